@@ -16,14 +16,32 @@ import os
 import sys
 import json
 import subprocess
+import tempfile
+from concurrent.futures import ThreadPoolExecutor
 from datetime import datetime
+from pathlib import Path
 from typing import Dict, List, Optional, Tuple
-import requests
+from requests.adapters import HTTPAdapter
+
+from github_http_cache import CachingSession, HTTPCache
+
+CACHE_DIR = Path('.ctmm_cache')
+MAX_WORKERS = 8  # PRs analyzed concurrently
+PER_PAGE = 100   # GitHub's maximum page size
+FILES_CACHE_VERSION = 3
 
 class PRAnalyzer:
-    """Analyzes open PRs for merge conflicts and workflow status."""
+    """Analyzes open PRs for merge conflicts and workflow status.
 
-    def __init__(self):
+    PRs are analyzed concurrently, at most max_workers at a time, over one
+    pooled session. The changed files of a PR are cached in
+    .ctmm_cache/pr_files.json and reused while its head and base commits
+    are unchanged. PR details and workflow runs change without new commits
+    (re-runs, reviews), so they are fetched every time and revalidated with
+    ETags.
+    """
+
+    def __init__(self, max_workers: int = MAX_WORKERS, cache_dir=CACHE_DIR):
         self.github_token = os.environ.get('GITHUB_TOKEN', '')
         self.repo_owner = 'Darkness308'
         self.repo_name = 'CTMM---PDF-in-LaTex'
@@ -33,16 +51,34 @@ class PRAnalyzer:
         }
         if self.github_token:
             self.headers['Authorization'] = f'token {self.github_token}'
+        self.max_workers = max(1, max_workers)
+        self.cache_dir = Path(cache_dir)
+        self.files_cache_path = self.cache_dir / 'pr_files.json'
+        # Unchanged PR lists and files are revalidated with ETags (HTTP 304)
+        self.session = CachingSession(HTTPCache(self.cache_dir / 'http'))
+        self.session.headers.update(self.headers)
+        # One pooled connection per concurrent PR
+        adapter = HTTPAdapter(pool_maxsize=self.max_workers)
+        self.session.mount('https://', adapter)
+        self.session.mount('http://', adapter)
+
+    def _get_all_pages(self, url: str) -> List[Dict]:
+        """GET a list endpoint and follow its rel="next" links."""
+        items = []
+        while url:
+            response = self.session.get(url)
+            response.raise_for_status()
+            items.extend(response.json())
+            url = response.links.get('next', {}).get('url')
+        return items
 
     def get_open_prs(self) -> List[Dict]:
         """Fetch all open PRs from GitHub API."""
         print("[TEST] Fetching all open pull requests...")
-        url = f'{self.api_base}/pulls?state=open&per_page=100'
+        url = f'{self.api_base}/pulls?state=open&per_page={PER_PAGE}'
 
         try:
-            response = requests.get(url, headers=self.headers)
-            response.raise_for_status()
-            prs = response.json()
+            prs = self._get_all_pages(url)
             print(f"[PASS] Found {len(prs)} open PRs")
             return prs
         except Exception as e:
@@ -54,42 +90,43 @@ class PRAnalyzer:
         url = f'{self.api_base}/pulls/{pr_number}'
 
         try:
-            response = requests.get(url, headers=self.headers)
+            response = self.session.get(url)
             response.raise_for_status()
             return response.json()
         except Exception as e:
             print(f"[FAIL] Error fetching PR #{pr_number} details: {e}")
             return None
 
-    def get_pr_files(self, pr_number: int) -> List[Dict]:
-        """Get list of files changed in a PR."""
-        url = f'{self.api_base}/pulls/{pr_number}/files'
+    def get_pr_files(self, pr_number: int) -> Optional[List[Dict]]:
+        """Get list of files changed in a PR, across all pages, or None on error."""
+        url = f'{self.api_base}/pulls/{pr_number}/files?per_page={PER_PAGE}'
 
         try:
-            response = requests.get(url, headers=self.headers)
-            response.raise_for_status()
-            return response.json()
+            return self._get_all_pages(url)
         except Exception as e:
             print(f"[FAIL] Error fetching PR #{pr_number} files: {e}")
-            return []
+            return None
 
-    def get_workflow_runs(self, branch: str, limit: int = 5) -> List[Dict]:
-        """Get recent workflow runs for a specific branch."""
+    def get_workflow_runs(self, branch: str, limit: int = 5) -> Optional[List[Dict]]:
+        """Get recent workflow runs for a specific branch, or None on error."""
         url = f'{self.api_base}/actions/runs?branch={branch}&per_page={limit}'
 
         try:
-            response = requests.get(url, headers=self.headers)
+            response = self.session.get(url)
             response.raise_for_status()
             data = response.json()
             return data.get('workflow_runs', [])
         except Exception as e:
             print(f"[FAIL] Error fetching workflow runs for branch {branch}: {e}")
-            return []
+            return None
+
+    def analyze_pr(self, pr: Dict, files: Optional[List[str]] = None) -> Dict:
+        """Analyze a single PR for conflicts and status.
 
-    def analyze_pr(self, pr: Dict) -> Dict:
-        """Analyze a single PR for conflicts and status."""
+        files are the names of the changed files if already known; otherwise
+        they are fetched.
+        """
         pr_number = pr['number']
-        print(f"\n[SEARCH] Analyzing PR #{pr_number}: {pr['title'][:60]}...")
 
         # Get detailed info
         details = self.get_pr_details(pr_number)
@@ -102,12 +139,21 @@ class PRAnalyzer:
             }
 
         # Get file changes
-        files = self.get_pr_files(pr_number)
+        if files is None:
+            pr_files = self.get_pr_files(pr_number)
+            if pr_files is not None:
+                files = [file['filename'] for file in pr_files]
 
         # Get workflow runs for this PR's branch
         branch = pr['head']['ref']
         workflows = self.get_workflow_runs(branch)
 
+        # Analyze what could be fetched
+        fetch_errors = [name for name, result in (('files', files), ('workflow_runs', workflows))
+                        if result is None]
+        files = files or []
+        workflows = workflows or []
+
         # Analyze mergeable state
         mergeable = details.get('mergeable')
         mergeable_state = details.get('mergeable_state', 'unknown')
@@ -120,20 +166,22 @@ class PRAnalyzer:
             'base': pr['base']['ref'],
             'mergeable': mergeable,
             'mergeable_state': mergeable_state,
+            'head_sha': pr['head'].get('sha'),
             'files_changed': len(files),
+            'changed_files': files,
             'has_conflicts': mergeable == False and mergeable_state == 'dirty',
             'is_mergeable': mergeable == True,
             'conflict_files': [],
             'workflow_status': 'unknown',
+            'workflows_pending': any(run.get('status') != 'completed' for run in workflows),
             'failed_workflows': [],
-            'direct_links': []
+            'direct_links': [],
+            'fetch_errors': fetch_errors
         }
 
         # Identify conflict files and generate direct links
         if analysis['has_conflicts']:
-            print(f"  [WARN]  Has merge conflicts")
-            for file in files:
-                filename = file['filename']
+            for filename in files:
                 # Generate direct GitHub link to the file
                 file_url = f"https://github.com/{self.repo_owner}/{self.repo_name}/blob/{branch}/{filename}"
                 analysis['conflict_files'].append(filename)
@@ -157,19 +205,92 @@ class PRAnalyzer:
         # Determine overall status
         if analysis['is_mergeable'] and analysis['workflow_status'] == 'success':
             analysis['status'] = 'READY_TO_MERGE'
-            print(f"  [PASS] Ready to merge!")
         elif analysis['has_conflicts']:
             analysis['status'] = 'HAS_CONFLICTS'
-            print(f"  [FAIL] Has {len(analysis['conflict_files'])} conflicting files")
         elif analysis['workflow_status'] == 'failure':
             analysis['status'] = 'WORKFLOW_FAILED'
-            print(f"  [WARN]  Workflow failed")
         else:
             analysis['status'] = 'NEEDS_REVIEW'
-            print(f"  [SYM] Needs review (mergeable: {mergeable}, state: {mergeable_state})")
 
         return analysis
 
+    @staticmethod
+    def _cache_key(pr: Dict) -> Optional[Tuple[str, str]]:
+        """Return the (head SHA, base SHA) the changed files of this PR are valid for."""
+        head_sha = pr.get('head', {}).get('sha')
+        base_sha = pr.get('base', {}).get('sha')
+        if not head_sha or not base_sha:
+            return None
+        return head_sha, base_sha
+
+    def load_files_cache(self) -> Dict[str, Dict]:
+        """Load the cached changed files of PRs, keyed by PR number."""
+        try:
+            with open(self.files_cache_path, encoding='utf-8') as f:
+                data = json.load(f)
+        except (OSError, ValueError):
+            return {}
+        if data.get('version') != FILES_CACHE_VERSION:
+            return {}
+        return data.get('prs', {})
+
+    def save_files_cache(self, prs: List[Dict], analyses: List[Dict]) -> None:
+        """Store the changed files of the open PRs; closed PRs are dropped."""
+        entries = {}
+        for pr, analysis in zip(prs, analyses):
+            key = self._cache_key(pr)
+            if key and analysis['status'] != 'ERROR' and 'files' not in analysis['fetch_errors']:
+                entries[str(pr['number'])] = {'head_sha': key[0], 'base_sha': key[1],
+                                              'files': analysis['changed_files']}
+        try:
+            self.cache_dir.mkdir(parents=True, exist_ok=True)
+            fd, temp_path = tempfile.mkstemp(dir=self.cache_dir, suffix='.tmp')
+            with os.fdopen(fd, 'w', encoding='utf-8') as f:
+                json.dump({'version': FILES_CACHE_VERSION, 'prs': entries}, f)
+            os.replace(temp_path, self.files_cache_path)
+        except OSError as e:
+            print(f"[WARN]  Could not save PR files cache: {e}")
+
+    def analyze_pr_cached(self, pr: Dict, files_cache: Dict[str, Dict]) -> Dict:
+        """Analyze a PR, reusing its cached changed files if its commits are unchanged."""
+        entry = files_cache.get(str(pr['number']))
+        key = self._cache_key(pr)
+        if entry and key and (entry['head_sha'], entry['base_sha']) == key:
+            return dict(self.analyze_pr(pr, files=entry['files']), files_cached=True)
+        return self.analyze_pr(pr)
+
+    def analyze_all(self, prs: List[Dict]) -> List[Dict]:
+        """Analyze PRs concurrently and return the analyses in the order of prs."""
+        if not prs:
+            return []
+        files_cache = self.load_files_cache()
+        analyses = []
+        with ThreadPoolExecutor(max_workers=min(self.max_workers, len(prs))) as pool:
+            results = pool.map(lambda pr: self.analyze_pr_cached(pr, files_cache), prs)
+            for pr, analysis in zip(prs, results):
+                self._print_analysis(pr, analysis)
+                analyses.append(analysis)
+        self.save_files_cache(prs, analyses)
+        return analyses
+
+    @staticmethod
+    def _print_analysis(pr: Dict, analysis: Dict) -> None:
+        """Print the status of an analyzed PR."""
+        cached = ' (cached files)' if analysis.get('files_cached') else ''
+        print(f"\n[SEARCH] PR #{pr['number']}: {pr['title'][:60]}{cached}")
+        status = analysis['status']
+        if status == 'READY_TO_MERGE':
+            print(f"  [PASS] Ready to merge!")
+        elif status == 'HAS_CONFLICTS':
+            print(f"  [FAIL] Has {len(analysis['conflict_files'])} conflicting files")
+        elif status == 'WORKFLOW_FAILED':
+            print(f"  [WARN]  Workflow failed")
+        elif status == 'NEEDS_REVIEW':
+            print(f"  [SYM] Needs review (mergeable: {analysis['mergeable']}, "
+                  f"state: {analysis['mergeable_state']})")
+        else:
+            print(f"  [FAIL] {analysis.get('error', 'Analysis failed')}")
+
     def generate_report(self, analyses: List[Dict]) -> str:
         """Generate a comprehensive markdown report."""
         report = []
@@ -294,11 +415,8 @@ class PRAnalyzer:
             print("No open PRs found or error fetching data.")
             return
 
-        # Analyze each PR
-        analyses = []
-        for pr in prs:
-            analysis = self.analyze_pr(pr)
-            analyses.append(analysis)
+        # Analyze the PRs concurrently
+        analyses = self.analyze_all(prs)
 
         # Generate report
         print("\n" + "=" * 80)
@@ -0,0 +1,189 @@
+#!/usr/bin/env python3
+"""
+CTMM Build Cache
+Content-hash cache for pdflatex builds so unchanged trees skip compilation.
+
+A cache entry is keyed on the exact TeX source that was compiled plus a hash
+of its full dependency closure: main.tex, the style and module files found by
+scan_references(), and every project file pdflatex reported reading in its
+-recorder (.fls) output. Only successful builds are cached; a failing build
+is always re-run so the log reflects the current tree.
+"""
+
+import hashlib
+import json
+import logging
+import os
+import shutil
+from datetime import datetime
+from pathlib import Path
+from typing import Dict, Iterable, List, Optional
+
+logger = logging.getLogger(__name__)
+
+DEFAULT_CACHE_DIR = Path('.ctmm_cache') / 'build'
+CACHE_VERSION = 2
+
+
+def parse_fls(fls_path, project_root='.') -> List[str]:
+    """Return the project files pdflatex read, according to a .fls recorder file.
+
+    Files outside project_root (the TeX distribution, temp dirs) and files
+    pdflatex also wrote (.aux, .toc, .out) are left out, so the result is the
+    set of source files the build depends on, relative to project_root.
+    """
+    fls_path = Path(fls_path)
+    root = Path(project_root).resolve()
+    if not fls_path.exists():
+        return []
+
+    cwd = root
+    inputs = set()
+    outputs = set()
+    with open(fls_path, 'r', encoding='utf-8', errors='replace') as f:
+        for line in f:
+            kind, _, value = line.rstrip('\n').partition(' ')
+            if kind == 'PWD':
+                cwd = Path(value)
+                continue
+            if kind not in ('INPUT', 'OUTPUT') or not value:
+                continue
+            path = Path(value)
+            if not path.is_absolute():
+                path = cwd / path
+            try:
+                relative = path.resolve().relative_to(root).as_posix()
+            except (OSError, ValueError):
+                continue
+            (inputs if kind == 'INPUT' else outputs).add(relative)
+
+    return sorted(inputs - outputs)
+
+
+def hash_files(paths: Iterable[str], project_root='.') -> str:
+    """Hash the names and contents of the given files in a stable order."""
+    root = Path(project_root)
+    digest = hashlib.sha256()
+    for name in sorted(set(paths)):
+        digest.update(name.encode('utf-8') + b'\0')
+        try:
+            with open(root / name, 'rb') as f:
+                digest.update(hashlib.sha256(f.read()).digest())
+        except OSError:
+            digest.update(b'<missing>')
+    return digest.hexdigest()
+
+
+def file_hash(path) -> Optional[str]:
+    """Hash a single file's contents, or None if it cannot be read."""
+    try:
+        with open(path, 'rb') as f:
+            return hashlib.sha256(f.read()).hexdigest()
+    except OSError:
+        return None
+
+
+def toolchain_fingerprint() -> Optional[str]:
+    """Identify the installed pdflatex binary without spawning it."""
+    binary = shutil.which('pdflatex')
+    if not binary:
+        return None
+    try:
+        stat = os.stat(os.path.realpath(binary))
+    except OSError:
+        return None
+    return f"{os.path.realpath(binary)}:{stat.st_size}:{int(stat.st_mtime)}"
+
+
+class BuildCache:
+    """Persistent store of successful build verdicts and their PDFs."""
+
+    def __init__(self, cache_dir=DEFAULT_CACHE_DIR, project_root='.'):
+        self.cache_dir = Path(cache_dir)
+        self.project_root = Path(project_root)
+
+    def _entry_path(self, name: str) -> Path:
+        return self.cache_dir / f"{name}.json"
+
+    def _pdf_path(self, name: str) -> Path:
+        return self.cache_dir / f"{name}.pdf"
+
+    @staticmethod
+    def _source_hash(source_text: str) -> str:
+        return hashlib.sha256(source_text.encode('utf-8')).hexdigest()
+
+    def _load(self, name: str) -> Optional[Dict]:
+        try:
+            with open(self._entry_path(name), 'r', encoding='utf-8') as f:
+                entry = json.load(f)
+        except (OSError, ValueError):
+            return None
+        if entry.get('version') != CACHE_VERSION:
+            return None
+        return entry
+
+    def lookup(self, name: str, source_text: str, base_files: Iterable[str]) -> Optional[Dict]:
+        """Return the cached entry if the source and every dependency are unchanged."""
+        entry = self._load(name)
+        if entry is None:
+            return None
+        if entry.get('source_hash') != self._source_hash(source_text):
+            logger.debug("Build cache miss for %s: source changed", name)
+            return None
+        if entry.get('toolchain') != toolchain_fingerprint():
+            logger.debug("Build cache miss for %s: pdflatex changed", name)
+            return None
+        files = set(entry.get('inputs', [])) | set(base_files)
+        if entry.get('inputs_hash') != hash_files(files, self.project_root):
+            logger.debug("Build cache miss for %s: dependencies changed", name)
+            return None
+        return entry
+
+    def store(self, name: str, source_text: str, base_files: Iterable[str],
+              recorded_inputs: Iterable[str], pdf_path=None) -> Dict:
+        """Record a successful build, copying its PDF into the cache."""
+        files = sorted(set(base_files) | set(recorded_inputs))
+        entry = {
+            'version': CACHE_VERSION,
+            'source_hash': self._source_hash(source_text),
+            'inputs': files,
+            'inputs_hash': hash_files(files, self.project_root),
+            'toolchain': toolchain_fingerprint(),
+            'pdf_size': 0,
+            'pdf_hash': None,
+            'created': datetime.now().isoformat(timespec='seconds'),
+        }
+
+        self.cache_dir.mkdir(parents=True, exist_ok=True)
+        if pdf_path is not None and Path(pdf_path).exists():
+            shutil.copyfile(pdf_path, self._pdf_path(name))
+            entry['pdf_size'] = Path(pdf_path).stat().st_size
+            entry['pdf_hash'] = file_hash(self._pdf_path(name))
+
+        # Write atomically so an interrupted run never leaves a half entry
+        temp_path = self._entry_path(name).with_suffix('.json.tmp')
+        with open(temp_path, 'w', encoding='utf-8') as f:
+            json.dump(entry, f, indent=2)
+        os.replace(temp_path, self._entry_path(name))
+        return entry
+
+    def restore_pdf(self, name: str, destination) -> bool:
+        """Copy the cached PDF for an entry to destination unless it is already there.
+
+        A PDF at destination from a different build (say, an edit that was
+        later reverted) is replaced; one matching the stored hash is kept.
+        """
+        entry = self._load(name)
+        expected_hash = entry.get('pdf_hash') if entry else None
+        if expected_hash and file_hash(destination) == expected_hash:
+            return True
+        cached_pdf = self._pdf_path(name)
+        if not cached_pdf.exists():
+            return False
+        shutil.copyfile(cached_pdf, destination)
+        return True
+
+    def clear(self) -> None:
+        """Remove all cached entries."""
+        if self.cache_dir.exists():
+            shutil.rmtree(self.cache_dir)
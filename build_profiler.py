@@ -0,0 +1,238 @@
+#!/usr/bin/env python3
+"""
+CTMM Build Profiler
+Wall, CPU and pdflatex resource timings for the ctmm_build.py steps.
+
+Every step of ctmm_build.main() runs inside BuildProfiler.step(), which
+records wall-clock time, CPU time of the Python process and CPU time of
+the child processes it waited for. Each pdflatex run is started by
+BuildProfiler.run(), which reaps it with os.wait4() and so records that
+run's own user/sys time and peak resident set size.
+
+With tracing enabled, pdflatex is started with LaTeX file hooks that log
+\\pdfelapsedtime whenever a file is opened or closed. parse_trace() turns
+those log lines into inclusive and exclusive seconds per file, so module
+compile time can be attributed without a TeX profiler.
+"""
+
+import json
+import logging
+import os
+import re
+import subprocess
+import sys
+import time
+from concurrent.futures import ThreadPoolExecutor
+from contextlib import contextmanager
+from datetime import datetime
+from pathlib import Path
+from typing import Dict, Iterator, List, Optional, Tuple
+
+try:
+    import resource
+    RESOURCE_AVAILABLE = True
+except ImportError:
+    # Not available on Windows; child usage is reported as missing
+    RESOURCE_AVAILABLE = False
+
+logger = logging.getLogger(__name__)
+
+DEFAULT_REPORT_PATH = Path('build_profile.json')
+
+TRACE_HOOKS = (
+    r'\AddToHook{file/before}{\typeout{CTMMT>+\CurrentFile:\the\pdfelapsedtime}}'
+    r'\AddToHook{file/after}{\typeout{CTMMT>-\CurrentFile:\the\pdfelapsedtime}}'
+)
+TRACE_PATTERN = re.compile(r'CTMMT>([+-])(.*?):(\d+)')
+# TeX wraps terminal and log lines at max_print_line characters
+TEX_LINE_WIDTH = 79
+# \pdfelapsedtime counts in scaled seconds
+SCALED_SECONDS = 65536
+
+
+def traced_input(tex_file) -> str:
+    """Return the pdflatex argument that compiles tex_file with file tracing."""
+    return f"{TRACE_HOOKS}\\input{{{tex_file}}}"
+
+
+def _max_rss_kb(usage) -> int:
+    max_rss = usage.ru_maxrss
+    if sys.platform == 'darwin':
+        # macOS reports bytes, Linux kilobytes
+        max_rss //= 1024
+    return max_rss
+
+
+def _children_usage() -> Optional[Tuple[float, float]]:
+    """Return (user, sys) of all waited-for child processes.
+
+    The children's ru_maxrss is the peak of the largest child so far, not
+    of any one run, so memory is only taken from run_measured().
+    """
+    if not RESOURCE_AVAILABLE:
+        return None
+    usage = resource.getrusage(resource.RUSAGE_CHILDREN)
+    return usage.ru_utime, usage.ru_stime
+
+
+def run_measured(cmd: List[str], **kwargs) -> Tuple[subprocess.CompletedProcess,
+                                                     Optional[Tuple[float, float, int]]]:
+    """Run cmd with captured output, like subprocess.run(capture_output=True).
+
+    Returns the completed process and (user, sys, max_rss_kb) of that child
+    alone, or None where os.wait4() is not available.
+    """
+    check = kwargs.pop('check', False)
+    if not hasattr(os, 'wait4'):
+        return subprocess.run(cmd, capture_output=True, check=check, **kwargs), None
+
+    process = subprocess.Popen(cmd, stdout=subprocess.PIPE, stderr=subprocess.PIPE, **kwargs)
+    # Drain both pipes without reaping the child, then reap it with wait4
+    with process.stdout, process.stderr, ThreadPoolExecutor(max_workers=2) as pool:
+        stdout = pool.submit(process.stdout.read)
+        stderr = pool.submit(process.stderr.read)
+        result = subprocess.CompletedProcess(cmd, None, stdout.result(), stderr.result())
+    _, status, usage = os.wait4(process.pid, 0)
+    process.returncode = result.returncode = os.waitstatus_to_exitcode(status)
+    if check:
+        result.check_returncode()
+    return result, (usage.ru_utime, usage.ru_stime, _max_rss_kb(usage))
+
+
+def parse_trace(log_text: str) -> Dict[str, Dict]:
+    """Attribute pdflatex time to files from the traced log.
+
+    Returns a dict mapping file name to inclusive seconds (file open to
+    close), exclusive seconds (minus files it loaded) and open count.
+    """
+    lines = log_text.split('\n')
+    unwrapped = []
+    buffer = ''
+    for line in lines:
+        buffer += line
+        if len(line) != TEX_LINE_WIDTH:
+            unwrapped.append(buffer)
+            buffer = ''
+    if buffer:
+        unwrapped.append(buffer)
+
+    files: Dict[str, Dict] = {}
+    stack: List[List] = []
+    for line in unwrapped:
+        match = TRACE_PATTERN.search(line)
+        if not match:
+            continue
+        kind, name, ticks = match.group(1), match.group(2).strip(), int(match.group(3))
+        seconds = ticks / SCALED_SECONDS
+        if kind == '+':
+            stack.append([name, seconds, 0.0])
+            continue
+        if not stack:
+            continue
+        opened, started, children = stack.pop()
+        inclusive = max(0.0, seconds - started)
+        entry = files.setdefault(opened, {'inclusive_s': 0.0, 'exclusive_s': 0.0, 'opens': 0})
+        entry['inclusive_s'] += inclusive
+        entry['exclusive_s'] += max(0.0, inclusive - children)
+        entry['opens'] += 1
+        if stack:
+            stack[-1][2] += inclusive
+
+    for entry in files.values():
+        entry['inclusive_s'] = round(entry['inclusive_s'], 4)
+        entry['exclusive_s'] = round(entry['exclusive_s'], 4)
+    return files
+
+
+class BuildProfiler:
+    """Collects step timings, pdflatex resource usage and file attribution."""
+
+    def __init__(self, trace_files: bool = False):
+        self.trace_files = trace_files
+        self.steps: Dict[str, Dict] = {}
+        self.processes: List[Dict] = []
+        self.files: Dict[str, Dict] = {}
+        self.started = datetime.now()
+
+    @contextmanager
+    def step(self, name: str) -> Iterator[None]:
+        """Time one build step."""
+        wall = time.perf_counter()
+        cpu = time.process_time()
+        children = _children_usage()
+        try:
+            yield
+        finally:
+            entry = {
+                'wall_s': round(time.perf_counter() - wall, 4),
+                'cpu_s': round(time.process_time() - cpu, 4),
+            }
+            after = _children_usage()
+            if children and after:
+                entry['children_user_s'] = round(after[0] - children[0], 4)
+                entry['children_sys_s'] = round(after[1] - children[1], 4)
+            self.steps[name] = entry
+            logger.debug("Step %s took %.2fs wall, %.2fs CPU", name, entry['wall_s'], entry['cpu_s'])
+
+    def run(self, label: str, cmd: List[str], **kwargs) -> subprocess.CompletedProcess:
+        """Run one child process and record its wall, user/sys time and peak memory."""
+        wall = time.perf_counter()
+        entry = {'label': label}
+        try:
+            result, usage = run_measured(cmd, **kwargs)
+        finally:
+            entry['wall_s'] = round(time.perf_counter() - wall, 4)
+            self.processes.append(entry)
+        if usage:
+            entry['user_s'] = round(usage[0], 4)
+            entry['sys_s'] = round(usage[1], 4)
+            entry['max_rss_kb'] = usage[2]
+        return result
+
+    def add_trace(self, log_path) -> None:
+        """Merge the file timings from a traced pdflatex log."""
+        try:
+            with open(log_path, 'r', encoding='utf-8', errors='replace') as f:
+                files = parse_trace(f.read())
+        except OSError as e:
+            logger.debug("No trace log at %s: %s", log_path, e)
+            return
+        for name, timing in files.items():
+            entry = self.files.setdefault(name, {'inclusive_s': 0.0, 'exclusive_s': 0.0, 'opens': 0})
+            for key in entry:
+                entry[key] = round(entry[key] + timing[key], 4)
+
+    def module_times(self) -> Dict[str, float]:
+        """Return inclusive seconds per modules/ file, slowest first."""
+        modules = {name: timing['inclusive_s'] for name, timing in self.files.items()
+                   if Path(name).parent.name == 'modules' or name.startswith('modules/')}
+        return dict(sorted(modules.items(), key=lambda item: item[1], reverse=True))
+
+    def to_dict(self) -> Dict:
+        return {
+            'started': self.started.isoformat(timespec='seconds'),
+            'steps': self.steps,
+            'total_wall_s': round(sum(step['wall_s'] for step in self.steps.values()), 4),
+            'pdflatex_runs': self.processes,
+            'modules': self.module_times(),
+            'files': self.files,
+        }
+
+    def write_report(self, path=DEFAULT_REPORT_PATH, build_data: Optional[Dict] = None) -> Path:
+        """Write the profile, and optionally the build results, as JSON."""
+        path = Path(path)
+        report = dict(build_data or {})
+        report['profile'] = self.to_dict()
+        with open(path, 'w', encoding='utf-8') as f:
+            json.dump(report, f, indent=2, ensure_ascii=False, default=str)
+        return path
+
+    def summary_lines(self) -> List[str]:
+        """Human-readable step timings for the build summary."""
+        lines = [f"  {name}: {step['wall_s']:.2f}s wall, {step['cpu_s']:.2f}s CPU"
+                 + (f", {step['children_user_s'] + step['children_sys_s']:.2f}s pdflatex"
+                    if 'children_user_s' in step else '')
+                 for name, step in self.steps.items()]
+        for module, seconds in list(self.module_times().items())[:5]:
+            lines.append(f"  {module}: {seconds:.2f}s")
+        return lines
@@ -7,20 +7,24 @@ This script:
 1. Scans main.tex for all usepackage{style/...} and input{modules/...} commands
 2. Checks if referenced files exist, creates minimal templates if missing
 3. Tests build with temporarily commented input lines
-4. Gradually reactivates input lines to identify problematic modules
+4. Builds each module in isolation in parallel and bisects combination failures
+   (optionally only the modules affected by changed files, see include_graph.py)
 5. Creates TODO comments and issues for new files
 6. Logs all operations for debugging
 """
 
+import os
 import re
 import subprocess
 import sys
+import tempfile
 import chardet
 import argparse
 import logging
+from concurrent.futures import ThreadPoolExecutor
 from datetime import datetime
 from pathlib import Path
-from typing import List, Set, Tuple, Dict
+from typing import List, Optional, Sequence, Set, Tuple, Dict
 
 # Configure logging
 logging.basicConfig(
@@ -33,6 +37,49 @@ logging.basicConfig(
 )
 logger = logging.getLogger(__name__)
 
+# Import precompiled preamble format support
+try:
+    from preamble_format import PreambleFormat, run_pdflatex
+    PREAMBLE_FORMAT_AVAILABLE = True
+except ImportError:
+    PREAMBLE_FORMAT_AVAILABLE = False
+
+    def run_pdflatex(args: Sequence[str], format_args: Sequence[str] = (),
+                     cwd: Optional[Path] = None) -> subprocess.CompletedProcess:
+        # Without preamble_format there are never format args to fall back from
+        return subprocess.run(['pdflatex', *format_args, *args], capture_output=True, text=True,
+                              errors='replace', cwd=str(cwd) if cwd is not None else None)
+
+# Import include graph for targeted module testing
+try:
+    from include_graph import IncludeGraph, changed_files_since
+    INCLUDE_GRAPH_AVAILABLE = True
+except ImportError:
+    INCLUDE_GRAPH_AVAILABLE = False
+
+MODULE_INPUT_PATTERN = r'\\input\{(modules/[^}]+)\}'
+
+
+def preamble_format_args(main_tex_path: Path) -> List[str]:
+    """Return pdflatex arguments that load the cached preamble format, if any."""
+    if not PREAMBLE_FORMAT_AVAILABLE:
+        return []
+    return PreambleFormat(main_tex_path).pdflatex_args()
+
+
+def compile_isolated(content: str, project_root: Path, label: str,
+                     format_args: Sequence[str] = ()) -> subprocess.CompletedProcess:
+    """Compile content in its own temporary directory.
+
+    style/ and modules/ inputs still resolve against project_root, so
+    several isolation builds can run at once without sharing .aux files.
+    """
+    with tempfile.TemporaryDirectory(prefix='ctmm-isolation-') as temp_dir:
+        temp_file = Path(temp_dir) / f"{label}.tex"
+        temp_file.write_text(content, encoding='utf-8')
+        return run_pdflatex(['-interaction=nonstopmode', f'-output-directory={temp_dir}',
+                             str(temp_file)], format_args, cwd=project_root)
+
 
 def filename_to_title(filename):
     """Convert filename to a readable title."""
@@ -42,12 +89,26 @@ def filename_to_title(filename):
 
 
 class CTMMBuildSystem:
-    def __init__(self, main_tex_path: str = "main.tex"):
+    def __init__(self, main_tex_path: str = "main.tex", jobs: Optional[int] = None):
         self.main_tex_path = Path(main_tex_path)
+        self.jobs = max(1, jobs or os.cpu_count() or 1)
         self.style_files: Set[str] = set()
         self.module_files: Set[str] = set()
         self.missing_files: List[str] = []
         self.problematic_modules: List[str] = []
+        self.format_args: List[str] = []
+        # Restricts isolation builds to these modules; None tests all
+        self.only_modules: Optional[Set[str]] = None
+
+    def restrict_to_changes(self, changed_files: Sequence[str]) -> None:
+        """Only test the modules the include graph says are affected."""
+        if not INCLUDE_GRAPH_AVAILABLE:
+            logger.warning("include_graph not available, testing all modules")
+            return
+        affected = IncludeGraph(self.main_tex_path).build().affected_modules(changed_files)
+        self.only_modules = set(affected)
+        logger.info("%d changed file(s) affect %d module(s): %s",
+                    len(changed_files), len(affected), ', '.join(affected) or '-')
 
     def _read_file_safely(self, file_path: Path) -> str:
         """Read a file with automatic encoding detection."""
@@ -212,12 +273,9 @@ This file was automatically created by the CTMM Build System because it was refe
 
         try:
             # Test build
-            result = subprocess.run(
-                ['pdflatex', '-interaction=nonstopmode', temp_file.name],
-                capture_output=True,
-                text=True,
-                cwd=str(self.main_tex_path.parent)
-            )
+            result = run_pdflatex(['-interaction=nonstopmode', temp_file.name],
+                                  preamble_format_args(self.main_tex_path),
+                                  cwd=self.main_tex_path.parent)
 
             success = result.returncode == 0
             if success:
@@ -238,76 +296,120 @@ This file was automatically created by the CTMM Build System because it was refe
                 if aux_file.exists():
                     aux_file.unlink()
 
+    def _module_inputs(self, content: str) -> List[str]:
+        """Return the modules input by content, in document order."""
+        modules = []
+        for match in re.findall(MODULE_INPUT_PATTERN, content):
+            module = f"{match}.tex"
+            if module in self.module_files and module not in modules:
+                modules.append(module)
+        return modules
+
+    def _content_with_modules(self, content: str, enabled: Set[str]) -> str:
+        """Comment out every module input that is not in enabled."""
+        def replace(match):
+            if f"{match.group(1)}.tex" in enabled:
+                return match.group(0)
+            return f"% {match.group(0)}  % Disabled for isolation testing"
+
+        return re.sub(MODULE_INPUT_PATTERN, replace, content)
+
+    def _build_with_modules(self, content: str, modules: List[str]) -> subprocess.CompletedProcess:
+        """Build content with only the given modules enabled."""
+        label = Path(modules[-1]).stem if len(modules) == 1 else f"prefix_{len(modules)}"
+        return compile_isolated(self._content_with_modules(content, set(modules)),
+                                self.main_tex_path.parent, label, self.format_args)
+
+    def _record_failure(self, module: str, result: subprocess.CompletedProcess) -> None:
+        """Remember a problematic module and save the failing build output."""
+        if module not in self.problematic_modules:
+            self.problematic_modules.append(module)
+
+        error_log = "build_error_%s.log" % Path(module).stem
+        with open(error_log, 'w') as f:
+            f.write("Build error when testing %s\n" % module)
+            f.write("Return code: %d\n\n" % result.returncode)
+            f.write("STDOUT:\n")
+            f.write(result.stdout or '')
+            f.write("\n\nSTDERR:\n")
+            f.write(result.stderr or '')
+
+        logger.error("Error details saved to %s", error_log)
+
     def test_modules_incrementally(self) -> None:
-        """Gradually reactivate input lines to identify problematic modules."""
+        """Build every module in isolation, then bisect combination failures.
+
+        Each module is first compiled alone against the shared preamble, in
+        its own temporary directory, on a worker pool sized to the machine.
+        Modules that pass alone are then built together; if that fails, a
+        parallel k-ary search over document-order prefixes finds the module
+        whose addition breaks the build, and the search repeats without it.
+        """
         if not self.module_files:
             logger.info("No modules to test")
             return
 
-        logger.info("Testing modules incrementally...")
-
         original_content = self._read_file_safely(self.main_tex_path)
-
-        module_list = sorted(list(self.module_files))
-
-        for i, current_module in enumerate(module_list):
-            logger.info("Testing with modules 0-%d: %s", i, ' '.join(module_list[:i + 1]))
-
-            # Create content with modules 0 to i enabled
-            modified_content = original_content
-            for j, module in enumerate(module_list):
-                module_pattern = f"modules/{Path(module).stem}"
-                
-                if j <= i:
-                    # Keep this module enabled
-                    continue
-                else:
-                    # Comment out this module
-                    modified_content = re.sub(
-                        f'(\\\\input\\{{{module_pattern}\\}})',
-                        r'% \1  % Disabled for incremental testing',
-                        modified_content
-                    )
-
-            # Test build with current module set
-            temp_file = self.main_tex_path.with_suffix('.test_%d.tex' % i)
-            with open(temp_file, 'w', encoding='utf-8') as f:
-                f.write(modified_content)
-
-            try:
-                result = subprocess.run(
-                    ['pdflatex', '-interaction=nonstopmode', temp_file.name],
-                    capture_output=True,
-                    text=True,
-                    cwd=str(self.main_tex_path.parent)
-                )
-
+        module_list = self._module_inputs(original_content)
+        module_list += sorted(self.module_files - set(module_list))
+        if self.only_modules is not None:
+            module_list = [module for module in module_list if module in self.only_modules]
+            if not module_list:
+                logger.info("No affected modules to test")
+                return
+        # Dump the shared preamble once, before the workers start
+        self.format_args = preamble_format_args(self.main_tex_path)
+
+        logger.info("Testing %d modules in isolation with %d workers...",
+                    len(module_list), self.jobs)
+
+        with ThreadPoolExecutor(max_workers=self.jobs) as pool:
+            results = pool.map(lambda module: self._build_with_modules(original_content, [module]),
+                               module_list)
+
+            passing = []
+            for module, result in zip(module_list, results):
                 if result.returncode == 0:
-                    logger.info("[OK] Build successful with %s", current_module)
+                    logger.info("[OK] Build successful with %s", module)
+                    passing.append(module)
                 else:
-                    logger.error("[X] Build failed when adding %s", current_module)
-                    self.problematic_modules.append(current_module)
-
-                    # Log error details
-                    error_log = "build_error_%s.log" % Path(current_module).stem
-                    with open(error_log, 'w') as f:
-                        f.write("Build error when testing %s\n" % current_module)
-                        f.write("Return code: %d\n\n" % result.returncode)
-                        f.write("STDOUT:\n")
-                        f.write(result.stdout)
-                        f.write("\n\nSTDERR:\n")
-                        f.write(result.stderr)
-
-                    logger.error("Error details saved to %s", error_log)
-
-            finally:
-                # Clean up
-                if temp_file.exists():
-                    temp_file.unlink()
-                for ext in ['.aux', '.log', '.out', '.toc', '.pdf']:
-                    aux_file = temp_file.with_suffix(ext)
-                    if aux_file.exists():
-                        aux_file.unlink()
+                    logger.error("[X] Build failed with %s in isolation", module)
+                    self._record_failure(module, result)
+
+            self._bisect_combined_failures(pool, original_content, passing)
+
+    def _bisect_combined_failures(self, pool: ThreadPoolExecutor, content: str,
+                                  modules: List[str]) -> None:
+        """Find modules that only fail when combined with earlier modules."""
+        remaining = list(modules)
+        while len(remaining) > 1:
+            result = self._build_with_modules(content, remaining)
+            if result.returncode == 0:
+                logger.info("[OK] Combined build successful with %d modules", len(remaining))
+                return
+
+            # remaining[:lo] builds (single modules passed alone), remaining[:hi] fails
+            lo, hi = 1, len(remaining)
+            failing_result = result
+            while hi - lo > 1:
+                probe_count = min(self.jobs, hi - lo - 1)
+                probes = sorted({lo + (hi - lo) * i // (probe_count + 1)
+                                 for i in range(1, probe_count + 1)} - {lo, hi})
+                outcomes = pool.map(lambda k: self._build_with_modules(content, remaining[:k]),
+                                    probes)
+                for k, outcome in zip(probes, outcomes):
+                    if outcome.returncode == 0:
+                        lo = k
+                    else:
+                        hi = k
+                        failing_result = outcome
+                        break
+
+            culprit = remaining[hi - 1]
+            logger.error("[X] Build failed when adding %s after %s",
+                         culprit, ', '.join(remaining[:hi - 1]))
+            self._record_failure(culprit, failing_result)
+            remaining.remove(culprit)
 
     def generate_report(self) -> str:
         """Generate a comprehensive build report."""
@@ -379,13 +481,24 @@ def main():
                        help='Path to main TeX file (default: main.tex)')
     parser.add_argument('--verbose', '-v', action='store_true',
                        help='Enable verbose logging')
+    parser.add_argument('--jobs', '-j', type=int, default=None,
+                       help='Parallel module builds (default: number of CPUs)')
+    parser.add_argument('--changed', nargs='+', metavar='FILE',
+                       help='Only test modules affected by these files')
+    parser.add_argument('--changed-since', metavar='REF',
+                       help='Only test modules affected by changes since a git ref')
 
     args = parser.parse_args()
 
     if args.verbose:
         logger.setLevel(logging.DEBUG)
 
-    build_system = CTMMBuildSystem(args.main_tex)
+    build_system = CTMMBuildSystem(args.main_tex, jobs=args.jobs)
+    if args.changed or args.changed_since:
+        changed = list(args.changed or [])
+        if args.changed_since and INCLUDE_GRAPH_AVAILABLE:
+            changed += changed_files_since(args.changed_since, build_system.main_tex_path.parent)
+        build_system.restrict_to_changes(changed)
     success = build_system.run_full_check()
 
     sys.exit(0 if success else 1)
@@ -14,10 +14,15 @@ import subprocess
 from pathlib import Path
 from typing import Dict, List, Tuple
 
+from repo_scanner import RepositoryScanner
+
 
 class CIFailureAnalyzer:
     """Analyzes and prevents common CI failure patterns."""
 
+    FILE_SIZE_CHECK = 'file-sizes'
+    LARGE_FILE_SIZE = 10 * 1024 * 1024  # 10MB
+
     def __init__(self):
         self.failure_patterns = {
             'timeout_issues': [
@@ -126,22 +131,29 @@ class CIFailureAnalyzer:
 
         return issues
 
-    def analyze_resource_usage_patterns(self) -> List[str]:
-        """Analyze potential resource usage issues."""
+    def register_checks(self, scanner: RepositoryScanner):
+        """Register the large file check with a RepositoryScanner; it only needs file sizes."""
+        scanner.register(self.FILE_SIZE_CHECK, lambda scanned: scanned.size, read=False)
+
+    def analyze_resource_usage_patterns(self, results: Dict[str, List[Tuple[Path, int]]] = None) -> List[str]:
+        """Analyze potential resource usage issues.
+
+        results are those of a RepositoryScanner the checks were registered
+        with; without them the repository is scanned here. Files ignored by
+        git are not checked out in CI and are not counted.
+        """
         print("[SAVE] Analyzing resource usage patterns...")
 
         issues = []
 
+        if results is None:
+            scanner = RepositoryScanner('.')
+            self.register_checks(scanner)
+            results = scanner.scan()
+
         # Check for large files that might cause issues
-        large_files = []
-        for file_path in Path('.').rglob('*'):
-            if file_path.is_file():
-                try:
-                    size = file_path.stat().st_size
-                    if size > 10 * 1024 * 1024:  # 10MB
-                        large_files.append((str(file_path), size))
-                except (OSError, PermissionError):
-                    pass
+        large_files = [(str(file_path), size) for file_path, size in results[self.FILE_SIZE_CHECK]
+                       if size > self.LARGE_FILE_SIZE]
 
         if large_files:
             print("   [SUMMARY] Large files found:")
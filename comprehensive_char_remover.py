@@ -9,11 +9,13 @@ that can cause merge conflicts. It uses a comprehensive approach.
 German: Entfernt ALLE störenden Zeichen, die Merges blockieren.
 """
 
-import os
-import re
 from pathlib import Path
 
+from repo_scanner import RepositoryScanner
+
 class ComprehensiveCharacterRemover:
+    CHECK_NAME = 'conflicting-characters'
+
     def __init__(self, dry_run=False):
         self.dry_run = dry_run
         self.stats = {
@@ -120,13 +122,25 @@ class ComprehensiveCharacterRemover:
 
         return ''.join(result), replacements
 
-    def process_file(self, filepath):
-        """Process a single file"""
+    def clean_bytes(self, data):
+        """Clean the bytes of a UTF-8 file, reading line endings as open() does"""
+        text = data.decode('utf-8').replace('\r\n', '\n').replace('\r', '\n')
+        return self.clean_text(text)
+
+    def _check_data(self, data):
         try:
-            with open(filepath, 'r', encoding='utf-8') as f:
-                original_content = f.read()
+            return self.clean_bytes(data)
+        except UnicodeDecodeError as e:
+            return e
+
+    def apply_result(self, filepath, result):
+        """Record the cleaned content of a file and write it unless dry run"""
+        if isinstance(result, Exception):
+            print(f"Error processing {filepath}: {result}")
+            return False
 
-            new_content, replacements = self.clean_text(original_content)
+        try:
+            new_content, replacements = result
 
             if replacements > 0:
                 self.files_with_changes.append((filepath, replacements))
@@ -145,27 +159,38 @@ class ComprehensiveCharacterRemover:
             print(f"Error processing {filepath}: {e}")
             return False
 
-    def process_directory(self, directory='.'):
-        """Process all files in directory"""
-        print("Scanning repository for ALL conflicting characters...")
-        print(f"Mode: {'DRY RUN' if self.dry_run else 'FIXING FILES'}\n")
+    def process_file(self, filepath):
+        """Process a single file"""
+        try:
+            with open(filepath, 'rb') as f:
+                data = f.read()
+        except OSError as e:
+            print(f"Error processing {filepath}: {e}")
+            return False
+        return self.apply_result(filepath, self._check_data(data))
 
-        for root, dirs, files in os.walk(directory):
-            if '.git' in dirs:
-                dirs.remove('.git')
+    def register_checks(self, scanner):
+        """Register the character check with a RepositoryScanner"""
+        scanner.register(self.CHECK_NAME, lambda scanned: self._check_data(scanned.data),
+                         accepts=lambda path: self.should_process(str(path)))
 
-            for skip_dir in ['converted', 'merge_conflict_analysis', 'merge_conflict_resolution']:
-                if skip_dir in dirs:
-                    dirs.remove(skip_dir)
+    def process_directory(self, directory='.', results=None):
+        """Process all files in directory
 
-            for file in files:
-                filepath = os.path.join(root, file)
+        results are those of a RepositoryScanner the checks were registered
+        with; without them the directory is scanned here.
+        """
+        print("Scanning repository for ALL conflicting characters...")
+        print(f"Mode: {'DRY RUN' if self.dry_run else 'FIXING FILES'}\n")
 
-                if not self.should_process(filepath):
-                    continue
+        if results is None:
+            scanner = RepositoryScanner(directory)
+            self.register_checks(scanner)
+            results = scanner.scan()
 
-                self.stats['files_scanned'] += 1
-                self.process_file(filepath)
+        for filepath, result in results[self.CHECK_NAME]:
+            self.stats['files_scanned'] += 1
+            self.apply_result(str(filepath), result)
 
         print(f"Scanned {self.stats['files_scanned']} source files")
         print(f"Found {len(self.files_with_changes)} files with conflicting characters\n")
@@ -14,10 +14,13 @@ import subprocess
 import sys
 import tempfile
 from datetime import datetime
-from dataclasses import dataclass
+from dataclasses import dataclass, field
 from typing import Dict, List, Optional, Tuple
 import requests
 
+from merge_conflict_predictor import ConflictPrediction, MergeConflictPredictor
+from merge_scheduler import schedule_merges
+
 @dataclass
 class PRAnalysis:
     """Analysis result for a pull request."""
@@ -29,11 +32,12 @@ class PRAnalysis:
     resolution_strategy: str
     can_auto_resolve: bool
     priority: int
+    conflict_files: List[str] = field(default_factory=list)
 
 class ComprehensivePRMergeResolver:
     """Comprehensive tool for analyzing and resolving PR merge conflicts."""
 
-    def __init__(self, repo_path: str = "/home/runner/work/CTMM---PDF-in-LaTex/CTMM---PDF-in-LaTex"):
+    def __init__(self, repo_path: str = "."):
         self.repo_path = repo_path
         self.github_token = os.environ.get('GITHUB_TOKEN')
         self.api_base = "https://api.github.com/repos/Darkness308/CTMM---PDF-in-LaTex"
@@ -53,6 +57,15 @@ class ComprehensivePRMergeResolver:
             3: {"mergeable": None, "mergeable_state": "unknown", "title": "Implement comprehensive LaTeX build and document conversion workflows..."}
         }
 
+        # Merge-tree results; without them conflicts are guessed from the PR titles
+        self.prediction: Optional[ConflictPrediction] = None
+
+    def load_conflict_prediction(self, predictor: Optional[MergeConflictPredictor] = None) -> ConflictPrediction:
+        """Predict the merge result of every PR with in-memory merges of the fetched PR heads."""
+        predictor = predictor or MergeConflictPredictor(self.repo_path)
+        self.prediction = predictor.predict(self.pr_data)
+        return self.prediction
+
     def analyze_all_prs(self) -> List[PRAnalysis]:
         """Analyze all open PRs for merge conflicts and resolution strategies."""
         print("[SEARCH] Analyzing all open pull requests for merge conflicts...")
@@ -71,7 +84,16 @@ class ComprehensivePRMergeResolver:
         mergeable_state = data.get("mergeable_state", "unknown")
         title = data.get("title", f"PR #{pr_number}")
 
+        # A merge probe of the actual PR head replaces GitHub's cached state
+        probe = self.prediction.base.get(pr_number) if self.prediction else None
+        if probe is not None:
+            if probe.error:
+                mergeable, mergeable_state = None, "unknown"
+            else:
+                mergeable, mergeable_state = probe.clean, "clean" if probe.clean else "dirty"
+
         conflicts = []
+        conflict_files = probe.conflicts if probe is not None else []
         resolution_strategy = ""
         can_auto_resolve = False
         priority = 3  # Default medium priority
@@ -86,7 +108,7 @@ class ComprehensivePRMergeResolver:
             # Analyze type of conflicts
             conflicts = self._identify_conflict_types(pr_number, title)
             resolution_strategy = self._determine_resolution_strategy(conflicts, title)
-            can_auto_resolve = self._can_auto_resolve(conflicts, title)
+            can_auto_resolve = self._can_auto_resolve(conflicts, title, conflict_files)
             priority = 2 if can_auto_resolve else 3
 
         elif mergeable_state == "unknown":
@@ -107,14 +129,19 @@ class ComprehensivePRMergeResolver:
             conflicts=conflicts,
             resolution_strategy=resolution_strategy,
             can_auto_resolve=can_auto_resolve,
-            priority=priority
+            priority=priority,
+            conflict_files=conflict_files
         )
 
     def _identify_conflict_types(self, pr_number: int, title: str) -> List[str]:
         """Identify the types of conflicts in a PR."""
+        probe = self.prediction.base.get(pr_number) if self.prediction else None
+        if probe is not None and probe.conflicts:
+            return self._conflict_types_from_files(probe.conflicts)
+
         conflicts = []
 
-        # Pattern-based conflict identification
+        # Without merge probes, guess from the title
         if "LaTeX" in title or "latex" in title:
             conflicts.append("LaTeX workflow conflicts")
 
@@ -133,6 +160,21 @@ class ComprehensivePRMergeResolver:
 
         return conflicts
 
+    @staticmethod
+    def _conflict_types_from_files(conflict_files: List[str]) -> List[str]:
+        """Categorize the files a merge probe reported as conflicted."""
+        conflicts = []
+        for path in conflict_files:
+            if path.startswith(".github/workflows/"):
+                conflict_type = "GitHub Actions workflow conflicts"
+            elif path.endswith((".tex", ".sty", ".cls")):
+                conflict_type = "LaTeX source conflicts"
+            else:
+                conflict_type = "Overlapping fix changes"
+            if conflict_type not in conflicts:
+                conflicts.append(conflict_type)
+        return conflicts
+
     def _determine_resolution_strategy(self, conflicts: List[str], title: str) -> str:
         """Determine the best resolution strategy for conflicts."""
         if "LaTeX workflow conflicts" in conflicts:
@@ -144,10 +186,18 @@ class ComprehensivePRMergeResolver:
         if "Overlapping fix changes" in conflicts:
             return "SEQUENTIAL_MERGE"
 
+        if conflicts == ["GitHub Actions workflow conflicts"]:
+            return "MERGE_WORKFLOW_UPDATES"
+
         return "REBASE_STRATEGY"
 
-    def _can_auto_resolve(self, conflicts: List[str], title: str) -> bool:
+    def _can_auto_resolve(self, conflicts: List[str], title: str,
+                          conflict_files: Optional[List[str]] = None) -> bool:
         """Determine if conflicts can be automatically resolved."""
+        if conflict_files:
+            # The workflow strategies only rewrite workflow files
+            return all(path.startswith(".github/workflows/") for path in conflict_files)
+
         # Simple fixes and workflow updates can often be auto-resolved
         auto_resolvable_patterns = [
             "Action version conflicts",
@@ -198,12 +248,21 @@ class ComprehensivePRMergeResolver:
         # Priority order for resolution
         plan["priority_order"] = [pr.number for pr in sorted(conflicted_prs, key=lambda x: x.priority)]
 
+        if self.prediction:
+            # Merge order with the fewest rebases, from the measured conflicts
+            schedule = schedule_merges(self.prediction)
+            conflicted = {pr.number for pr in conflicted_prs}
+            plan["merge_batches"] = schedule.batches
+            plan["rebase_order"] = schedule.rebase_required
+            plan["priority_order"] = [number for number in schedule.rebase_required if number in conflicted]
+
         # Detailed analysis
         for pr in conflicted_prs:
             plan["detailed_analysis"].append({
                 "pr_number": pr.number,
                 "title": pr.title,
                 "conflicts": pr.conflicts,
+                "conflict_files": pr.conflict_files,
                 "strategy": pr.resolution_strategy,
                 "auto_resolvable": pr.can_auto_resolve,
                 "priority": pr.priority
@@ -313,9 +372,20 @@ class ComprehensivePRMergeResolver:
             for pr in manual_prs:
                 report.append(f"- **PR #{pr.number}**: {pr.title}")
                 report.append(f"  - Conflicts: {', '.join(pr.conflicts)}")
+                if pr.conflict_files:
+                    report.append(f"  - Conflicting files: {', '.join(pr.conflict_files)}")
                 report.append(f"  - Recommended strategy: {pr.resolution_strategy}")
             report.append("")
 
+        # Measured merge order
+        if plan.get("merge_batches"):
+            report.append("## Merge Order")
+            for i, batch in enumerate(plan["merge_batches"], 1):
+                report.append(f"{i}. Merge together: {', '.join(f'PR #{number}' for number in batch)}")
+            report.append(f"\nThen rebase {len(plan['rebase_order'])} PR(s): "
+                          f"{', '.join(f'#{number}' for number in plan['rebase_order']) or '-'}")
+            report.append("")
+
         # Resolution strategies summary
         report.append("## Resolution Strategies Summary")
         for strategy, pr_numbers in plan["resolution_strategies"].items():
@@ -347,10 +417,23 @@ class ComprehensivePRMergeResolver:
 
 def main():
     """Main execution function."""
+    import argparse
+    parser = argparse.ArgumentParser(description="CTMM Pull Request Merge Conflict Resolution Tool")
+    parser.add_argument("--predict", action="store_true",
+                        help="Fetch the PR heads and detect conflicts with git merge-tree")
+    args = parser.parse_args()
+
     print("[SEARCH] CTMM Pull Request Merge Conflict Resolution Tool")
     print("=" * 60)
 
     resolver = ComprehensivePRMergeResolver()
+    if args.predict:
+        print("\n[SEARCH] Predicting merge conflicts with git merge-tree...")
+        try:
+            prediction = resolver.load_conflict_prediction()
+            print(f"   * {len(prediction.conflicting_pairs())} conflicting PR pair(s)")
+        except (RuntimeError, subprocess.CalledProcessError) as e:
+            print(f"[WARN] Merge prediction failed, falling back to PR titles: {e}")
 
     # Step 1: Analyze all PRs
     print("\n[SUMMARY] Step 1: Analyzing all open pull requests...")
@@ -81,44 +81,51 @@ def comprehensive_workflow(args):
     if run_command("python3 validate_latex_syntax.py", "LaTeX syntax validation"):
         success_count += 1
 
-    # Step 2: CTMM Build System Check
-    print_step(2, "CTMM Build System Check")
+    # Step 2: Character and merge readiness checks, reading every file once
+    print_step(2, "Repository Character Scan")
+    total_steps += 1
+
+    if run_command("python3 repo_scanner.py", "Character and merge readiness scan"):
+        success_count += 1
+
+    # Step 3: CTMM Build System Check
+    print_step(3, "CTMM Build System Check")
     total_steps += 1
 
     if run_command("python3 ctmm_build.py", "CTMM build system check"):
         success_count += 1
 
-    # Step 3: Unit Tests
-    print_step(3, "Unit Test Validation")
+    # Step 4: Unit Tests
+    print_step(4, "Unit Test Validation")
     total_steps += 1
 
     if run_command("python3 test_ctmm_build.py", "Unit tests"):
         success_count += 1
 
-    # Step 4: De-escaping workflow demonstration (if requested)
+    # Step 5: De-escaping workflow demonstration (if requested)
     if args.full:
-        print_step(4, "LaTeX De-escaping Workflow")
+        print_step(5, "LaTeX De-escaping Workflow")
         total_steps += 1
 
         if run_command("python3 conversion_workflow.py", "De-escaping workflow demo"):
             success_count += 1
 
-    # Step 5: Build system analysis
-    print_step(5 if args.full else 4, "Detailed Build Analysis")
+    # Step 6: Build system analysis
+    print_step(6 if args.full else 5, "Detailed Build Analysis")
     total_steps += 1
 
     if run_command("python3 build_system.py --verbose", "Detailed build analysis", check=False):
         success_count += 1
 
-    # Step 6: Workflow structure test
-    print_step(6 if args.full else 5, "Workflow Structure Test")
+    # Step 7: Workflow structure test
+    print_step(7 if args.full else 6, "Workflow Structure Test")
     total_steps += 1
 
     if run_command("python3 test_workflow_structure.py", "Workflow structure test"):
         success_count += 1
 
-    # Step 7: Final validation
-    final_step = 7 if args.full else 6
+    # Step 8: Final validation
+    final_step = 8 if args.full else 7
     print_step(final_step, "Final Integration Validation")
     total_steps += 1
 
@@ -138,7 +145,7 @@ def comprehensive_workflow(args):
     else:
         print(f"[FAIL] Missing key files: {missing_files}")
 
-    # Step 8: Cleanup (if requested)
+    # Step 9: Cleanup (if requested)
     if args.cleanup:
         print_step(final_step + 1, "Cleanup")
         run_command("make clean", "Cleaning build artifacts", check=False)
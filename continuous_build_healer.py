@@ -14,28 +14,41 @@ import os
 import sys
 import time
 import json
+import signal
+import asyncio
 import subprocess
+from concurrent.futures import ThreadPoolExecutor
 from datetime import datetime, timedelta
-from typing import Dict, Any
+from typing import Dict, Any, Optional
+
+# Time window checked for failed workflows
+CHECK_HOURS_BACK = 2
+# Failed workflows healed per iteration
+MAX_WORKFLOWS_PER_ITERATION = 5
 
 class ContinuousBuildHealer:
     """
     Continuous healing system that monitors workflows and auto-fixes failures.
     """
 
-    def __init__(self, max_iterations: int = 10, check_interval: int = 300):
+    def __init__(self, max_iterations: int = 10, check_interval: int = 300, dry_run: bool = False):
         """
         Initialize the continuous healer.
 
         Args:
             max_iterations: Maximum number of healing attempts per run
+                (0 runs the daemon until it is stopped)
             check_interval: Seconds between checks (default 5 minutes)
+            dry_run: Analyze and plan fixes without creating PRs
         """
         self.max_iterations = max_iterations
         self.check_interval = check_interval
+        self.dry_run = dry_run
         self.iteration_count = 0
         self.healed_workflows = []
         self.failed_healing_attempts = []
+        # Kept warm across iterations in daemon mode
+        self.healing_system = None
     
     def check_workflow_status(self) -> Dict[str, Any]:
         """
@@ -63,9 +76,9 @@ class ContinuousBuildHealer:
                 spec.loader.exec_module(workflow_monitor)
 
                 monitor = workflow_monitor.WorkflowMonitor()
-                failed_workflows = monitor.get_failed_workflows(hours_back=2)
+                failed_workflows = monitor.get_failed_workflows(hours_back=CHECK_HOURS_BACK)
 
-                print(f"[SUMMARY] Found {len(failed_workflows)} failed workflows in last 2 hours")
+                print(f"[SUMMARY] Found {len(failed_workflows)} failed workflows in last {CHECK_HOURS_BACK} hours")
                 return {
                     'failed_workflows': failed_workflows,
                     'method': 'monitor',
@@ -104,8 +117,12 @@ class ContinuousBuildHealer:
         # Run the workflow healing system
         try:
             print("[LAUNCH] Running workflow healing system...")
+            command = ['python3', 'workflow_healing_system.py',
+                       '--max-workflows', str(MAX_WORKFLOWS_PER_ITERATION)]
+            if self.dry_run:
+                command.append('--dry-run')
             result = subprocess.run(
-                ['python3', 'workflow_healing_system.py', '--max-workflows', '5'],
+                command,
                 capture_output=True,
                 text=True,
                 timeout=300
@@ -127,6 +144,144 @@ class ContinuousBuildHealer:
             print(f"[FAIL] Error running healing system: {e}")
             return False
 
+    def _get_healing_system(self):
+        """Return the in-process healing system, created on first use."""
+        if self.healing_system is None:
+            from workflow_healing_system import WorkflowHealingSystem
+            self.healing_system = WorkflowHealingSystem()
+        return self.healing_system
+
+    def heal_in_process(self) -> Optional[bool]:
+        """
+        Check and heal failed workflows with the warm healing system.
+
+        The monitor, analyzer and fix strategies (and with them the HTTP
+        session and caches) are reused, so no interpreter is started and
+        no connection is opened again per iteration. As in run(), the
+        failed runs are restarted after each healing attempt.
+
+        Returns:
+            None if all workflows are green, otherwise whether fixes were applied
+        """
+        print(f"\n{'='*80}")
+        print(f"[SEARCH] Checking Workflow Status - Iteration {self.iteration_count}")
+        print(f"{'='*80}")
+
+        system = self._get_healing_system()
+        try:
+            failed_workflows = system.monitor.get_failed_workflows(hours_back=CHECK_HOURS_BACK)
+        except Exception as e:
+            print(f"[WARN]  Error using workflow_monitor: {e}")
+            return False
+
+        print(f"[SUMMARY] Found {len(failed_workflows)} failed workflows in last {CHECK_HOURS_BACK} hours")
+        if not failed_workflows:
+            print("[PASS] No failed workflows found - everything is green!")
+            return None
+
+        try:
+            session = system.start_healing_session(
+                hours_back=CHECK_HOURS_BACK,
+                dry_run=self.dry_run,
+                max_workflows=MAX_WORKFLOWS_PER_ITERATION,
+                workflows=failed_workflows
+            )
+        except Exception as e:
+            print(f"[FAIL] Error running healing system: {e}")
+            healing_applied = False
+        else:
+            print(f"[SUMMARY] Results: {system._get_session_summary()}")
+            healing_applied = session.fixes_applied > 0
+
+        restarted = self.restart_workflows({'failed_workflows': [
+            {'workflow_name': run.workflow_name, 'id': run.id, 'html_url': run.html_url}
+            for run in failed_workflows]})
+        if restarted > 0:
+            print(f"[SYNC] Restarted {restarted} workflows")
+        return healing_applied
+
+    async def run_daemon_async(self, stop_event: Optional[asyncio.Event] = None) -> bool:
+        """
+        Run healing iterations on an event loop until stopped.
+
+        Checks are scheduled at a fixed rate of check_interval seconds; an
+        iteration that overruns delays the next one instead of queueing
+        more. SIGINT, SIGTERM or stop_event end the loop without waiting
+        for the interval to pass.
+
+        Args:
+            stop_event: Event that stops the daemon when set
+
+        Returns:
+            True if the last check found all workflows green
+        """
+        loop = asyncio.get_running_loop()
+        stop_event = stop_event or asyncio.Event()
+        handled_signals = []
+        for sig in (signal.SIGINT, signal.SIGTERM):
+            try:
+                loop.add_signal_handler(sig, stop_event.set)
+                handled_signals.append(sig)
+            except (NotImplementedError, RuntimeError, ValueError):
+                # Not supported on this platform or outside the main thread
+                pass
+
+        all_green = False
+        next_check = loop.time()
+        try:
+            # A single worker: the components are used by one iteration at a time
+            with ThreadPoolExecutor(max_workers=1, thread_name_prefix='healer') as executor:
+                while not stop_event.is_set():
+                    self.iteration_count += 1
+                    result = await loop.run_in_executor(executor, self.heal_in_process)
+
+                    all_green = result is None
+                    if result:
+                        print("[PASS] Healing fixes applied")
+                        self.healed_workflows.append(f"Iteration {self.iteration_count}")
+                    elif result is False:
+                        print("[WARN]  Could not apply healing fixes")
+                        self.failed_healing_attempts.append(f"Iteration {self.iteration_count}")
+
+                    if self.max_iterations and self.iteration_count >= self.max_iterations:
+                        break
+
+                    next_check = max(next_check + self.check_interval, loop.time())
+                    print(f"\n[SYM] Next check in {next_check - loop.time():.0f} seconds...")
+                    try:
+                        await asyncio.wait_for(stop_event.wait(), timeout=next_check - loop.time())
+                    except asyncio.TimeoutError:
+                        pass
+        finally:
+            for sig in handled_signals:
+                loop.remove_signal_handler(sig)
+
+        return all_green
+
+    def run_daemon(self) -> bool:
+        """
+        Long-lived daemon mode: heal in-process until stopped.
+
+        Returns:
+            True if the last check found all workflows green
+        """
+        print("="*80)
+        print("[FIX] CTMM Continuous Build Healing Daemon")
+        print("="*80)
+        print("\nConfiguration:")
+        print(f"   Max Iterations: {self.max_iterations or 'unlimited'}")
+        print(f"   Check Interval: {self.check_interval} seconds")
+        print(f"   Start Time: {datetime.now().strftime('%Y-%m-%d %H:%M:%S')}")
+        print()
+
+        all_green = asyncio.run(self.run_daemon_async())
+
+        summary = self.generate_summary_report()
+        print(summary)
+        self._save_summary(summary)
+
+        return all_green
+
     def restart_workflows(self, workflow_info: Dict) -> int:
         """
         Restart failed workflow runs if possible.
@@ -245,14 +400,17 @@ class ContinuousBuildHealer:
         summary = self.generate_summary_report()
         print(summary)
 
-        # Save summary to file
+        self._save_summary(summary)
+
+        return all_green
+
+    def _save_summary(self, summary: str) -> None:
+        """Save the summary report to a timestamped file."""
         summary_file = f'healing_summary_{datetime.now().strftime("%Y%m%d_%H%M%S")}.md'
         with open(summary_file, 'w') as f:
             f.write(summary)
         print(f"\n[FILE] Summary saved to: {summary_file}")
 
-        return all_green
-
 def main():
     """Main entry point."""
     import argparse
@@ -270,14 +428,17 @@ Examples:
 
   # Patient healing (20 iterations, 10 minute intervals)
   python3 continuous_build_healer.py --max-iterations 20 --check-interval 600
+
+  # Long-lived daemon, healing in-process until stopped (Ctrl+C / SIGTERM)
+  python3 continuous_build_healer.py --daemon
         """
     )
 
     parser.add_argument(
         '--max-iterations',
         type=int,
-        default=10,
-        help='Maximum number of healing iterations (default: 10)'
+        help='Maximum number of healing iterations '
+             '(default: 10, in daemon mode 0 = until stopped)'
     )
 
     parser.add_argument(
@@ -287,6 +448,12 @@ Examples:
         help='Seconds between checks (default: 300 = 5 minutes)'
     )
 
+    parser.add_argument(
+        '--daemon',
+        action='store_true',
+        help='Keep the healing components warm and heal in-process until stopped'
+    )
+
     parser.add_argument(
         '--dry-run',
         action='store_true',
@@ -295,16 +462,20 @@ Examples:
 
     args = parser.parse_args()
 
+    if args.max_iterations is None:
+        args.max_iterations = 0 if args.daemon else 10
+
     if args.dry_run:
         print("[SEARCH] DRY RUN MODE - No fixes will be applied")
         args.max_iterations = 1
 
     healer = ContinuousBuildHealer(
         max_iterations=args.max_iterations,
-        check_interval=args.check_interval
+        check_interval=args.check_interval,
+        dry_run=args.dry_run
     )
 
-    success = healer.run()
+    success = healer.run_daemon() if args.daemon else healer.run()
 
     sys.exit(0 if success else 1)
 
@@ -8,6 +8,7 @@ import re
 import subprocess
 import sys
 import tempfile
+from contextlib import nullcontext
 from pathlib import Path
 import logging
 
@@ -17,7 +18,7 @@ logger = logging.getLogger(__name__)
 
 # Import LaTeX validator if available
 try:
-    from latex_validator import LaTeXValidator
+    from latex_validator import LaTeXValidator, ValidationIndex
     VALIDATOR_AVAILABLE = True
 except ImportError:
     VALIDATOR_AVAILABLE = False
@@ -31,6 +32,38 @@ except ImportError:
     FORM_VALIDATOR_AVAILABLE = False
     logger.debug("Form field validator not available")
 
+# Import build cache for skipping unchanged builds
+try:
+    from build_cache import BuildCache, parse_fls
+    BUILD_CACHE_AVAILABLE = True
+except ImportError:
+    BUILD_CACHE_AVAILABLE = False
+    logger.debug("Build cache not available")
+
+# Import precompiled preamble format support
+try:
+    from preamble_format import PreambleFormat, format_load_failed
+    PREAMBLE_FORMAT_AVAILABLE = True
+except ImportError:
+    PREAMBLE_FORMAT_AVAILABLE = False
+    logger.debug("Preamble format support not available")
+
+# Import convergence-detecting pdflatex driver
+try:
+    from latex_runner import run_until_converged
+    LATEX_RUNNER_AVAILABLE = True
+except ImportError:
+    LATEX_RUNNER_AVAILABLE = False
+    logger.debug("LaTeX runner not available, using a single pdflatex pass")
+
+# Import step timers and pdflatex resource accounting
+try:
+    from build_profiler import BuildProfiler, DEFAULT_REPORT_PATH, traced_input
+    BUILD_PROFILER_AVAILABLE = True
+except ImportError:
+    BUILD_PROFILER_AVAILABLE = False
+    logger.debug("Build profiler not available")
+
 
 def filename_to_title(filename):
     """Convert filename to a readable title."""
@@ -148,8 +181,58 @@ Created by CTMM Build System
     return True
 
 
-def test_basic_build(main_tex_path="main.tex"):
+def _preamble_format_args(main_tex_path="main.tex"):
+    """Return pdflatex arguments that load the cached preamble format, if any."""
+    if not PREAMBLE_FORMAT_AVAILABLE:
+        return []
+    try:
+        return PreambleFormat(main_tex_path).pdflatex_args()
+    except Exception as e:
+        logger.debug("Preamble format unavailable: %s", e)
+        return []
+
+
+def _run_pdflatex(args, format_args=(), profiler=None, label='pdflatex'):
+    """Run pdflatex, retrying without the preamble format if that format cannot be loaded.
+
+    Other failures are real LaTeX errors and are not compiled a second time.
+    With a profiler, each run is recorded with its user/sys time and memory.
+    """
+    def run(cmd, run_label):
+        if profiler:
+            return profiler.run(run_label, cmd, text=True, errors='replace')
+        return subprocess.run(
+            cmd,
+            capture_output=True,
+            text=True,
+            errors='replace',  # Handle encoding issues
+            check=False
+        )
+
+    result = run(['pdflatex', *format_args, *args], label)
+    output = '\n'.join(str(part) for part in (result.stdout, result.stderr) if part)
+    if result.returncode != 0 and format_args and format_load_failed(output):
+        logger.warning("Precompiled preamble format could not be loaded, retrying without it")
+        result = run(['pdflatex', *args], f"{label} (without format)")
+    return result
+
+
+def test_basic_build(main_tex_path="main.tex", use_cache=True, profiler=None):
     """Test basic LaTeX build without modules."""
+    # An unchanged preamble and style tree reuses the last successful verdict
+    cache = BuildCache() if use_cache and BUILD_CACHE_AVAILABLE else None
+    if cache is not None:
+        try:
+            with open(main_tex_path, 'r', encoding='utf-8') as f:
+                source_text = re.sub(r'\\input\{modules/[^}]+\}', '', f.read())
+            base_files = [main_tex_path] + scan_references(main_tex_path)["style_files"]
+            if cache.lookup('basic', source_text, base_files):
+                logger.info("[OK] Basic build unchanged since last successful run (cached)")
+                return True
+        except Exception as e:
+            logger.debug("Build cache unavailable: %s", e)
+            cache = None
+
     # Check if pdflatex is available
     try:
         subprocess.run(['pdflatex', '--version'], capture_output=True, check=True)
@@ -171,18 +254,19 @@ def test_basic_build(main_tex_path="main.tex"):
             temp_file_path = temp_file.name
             temp_file.write(modified_content)
 
-        # Test build with limited output capture to avoid encoding issues
-        result = subprocess.run(
-            ['pdflatex', '-interaction=nonstopmode', temp_file_path],
-            capture_output=True,
-            text=True,
-            errors='replace',  # Handle encoding issues
-            check=False
+        # Test build with limited output capture to avoid encoding issues.
+        # -recorder writes the .fls list of files read, used as cache inputs.
+        result = _run_pdflatex(
+            ['-interaction=nonstopmode', '-recorder',
+             f'-output-directory={Path(temp_file_path).parent}', temp_file_path],
+            _preamble_format_args(main_tex_path),
+            profiler=profiler, label='basic'
         )
 
         # Enhanced PDF validation: check both return code and file existence/size
         temp_pdf = Path(temp_file_path).with_suffix('.pdf')
         temp_log = Path(temp_file_path).with_suffix('.log')
+        temp_fls = Path(temp_file_path).with_suffix('.fls')
         pdf_exists = temp_pdf.exists()
         pdf_size = temp_pdf.stat().st_size if pdf_exists else 0
 
@@ -192,6 +276,8 @@ def test_basic_build(main_tex_path="main.tex"):
         if success:
             logger.info("[OK] Basic build successful")
             logger.info("[OK] Test PDF generated successfully (%.2f KB)", pdf_size / 1024)
+            if cache is not None:
+                cache.store('basic', modified_content, base_files, parse_fls(temp_fls))
         else:
             logger.error("[X] Basic build failed")
             if result.returncode != 0:
@@ -208,6 +294,7 @@ def test_basic_build(main_tex_path="main.tex"):
             Path(temp_file_path).unlink(missing_ok=True)
             temp_pdf.unlink(missing_ok=True)
             temp_log.unlink(missing_ok=True)
+            temp_fls.unlink(missing_ok=True)
             Path(temp_file_path).with_suffix('.aux').unlink(missing_ok=True)
         except Exception:
             pass
@@ -219,8 +306,26 @@ def test_basic_build(main_tex_path="main.tex"):
         return False
 
 
-def test_full_build(main_tex_path="main.tex"):
+def test_full_build(main_tex_path="main.tex", use_cache=True, profiler=None):
     """Test full LaTeX build with modules."""
+    pdf_path = Path('main.pdf')
+
+    # An unchanged dependency closure reuses the last successful PDF and verdict
+    cache = BuildCache() if use_cache and BUILD_CACHE_AVAILABLE else None
+    if cache is not None:
+        try:
+            with open(main_tex_path, 'r', encoding='utf-8') as f:
+                source_text = f.read()
+            references = scan_references(main_tex_path)
+            base_files = [main_tex_path] + references["style_files"] + references["module_files"]
+            if cache.lookup('full', source_text, base_files):
+                if cache.restore_pdf('full', pdf_path):
+                    logger.info("[OK] Full build unchanged since last successful run (cached)")
+                    return True
+        except Exception as e:
+            logger.debug("Build cache unavailable: %s", e)
+            cache = None
+
     # Check if pdflatex is available
     try:
         subprocess.run(['pdflatex', '--version'], capture_output=True, check=True)
@@ -230,16 +335,30 @@ def test_full_build(main_tex_path="main.tex"):
         return True
 
     try:
-        result = subprocess.run(
-            ['pdflatex', '-interaction=nonstopmode', main_tex_path],
-            capture_output=True,
-            text=True,
-            errors='replace',
-            check=False
-        )
+        build_args = ['-interaction=nonstopmode', '-recorder', main_tex_path]
+        format_args = _preamble_format_args(main_tex_path)
+        tracing = profiler is not None and profiler.trace_files
+        if tracing:
+            # File hooks log \pdfelapsedtime per opened file; the hooks write
+            # to the log before main.tex is opened, so the job name is explicit
+            build_args = ['-interaction=nonstopmode', '-recorder',
+                          f'-jobname={Path(main_tex_path).stem}', traced_input(main_tex_path)]
+
+        def run_pass(args):
+            pass_result = _run_pdflatex(args, format_args, profiler=profiler, label='full')
+            if tracing:
+                profiler.add_trace(Path(main_tex_path).with_suffix('.log'))
+            return pass_result
+
+        if LATEX_RUNNER_AVAILABLE:
+            # Rerun only while .aux/.toc/.out still change between passes
+            result, passes = run_until_converged(
+                build_args, Path(main_tex_path).with_suffix(''), runner=run_pass)
+            logger.info("Full build ran %d pdflatex pass(es)", passes)
+        else:
+            result = run_pass(build_args)
 
         # Enhanced PDF validation: check both return code and file existence/size
-        pdf_path = Path('main.pdf')
         pdf_exists = pdf_path.exists()
         pdf_size = pdf_path.stat().st_size if pdf_exists else 0
 
@@ -249,6 +368,9 @@ def test_full_build(main_tex_path="main.tex"):
         if success:
             logger.info("[OK] Full build successful")
             logger.info("[OK] PDF generated successfully (%.2f KB)", pdf_size / 1024)
+            if cache is not None:
+                recorded = parse_fls(Path(main_tex_path).with_suffix('.fls'))
+                cache.store('full', source_text, base_files, recorded, pdf_path)
         else:
             logger.error("[X] Full build failed")
             if result.returncode != 0:
@@ -274,6 +396,8 @@ def validate_latex_files():
 
     logger.info("Validating LaTeX files for escaping issues...")
     validator = LaTeXValidator()
+    # Unchanged files reuse their recorded issues from the last run
+    index = ValidationIndex(rules_fingerprint=validator.rules_fingerprint())
 
     # Check main.tex and modules directory
     issues_found = False
@@ -283,12 +407,12 @@ def validate_latex_files():
             continue
 
         if path.is_file():
-            is_valid, issues, _ = validator.validate_file(path)
+            is_valid, issues, _ = validator.validate_file(path, detect_only=True)
             if not is_valid:
                 logger.warning(f"LaTeX escaping issues found in {path}: {list(issues.keys())}")
                 issues_found = True
         elif path.is_dir():
-            results = validator.validate_directory(path, fix=False)
+            results = validator.validate_directory(path, fix=False, index=index)
             for file_path, result in results.items():
                 if not result['valid']:
                     logger.warning(f"LaTeX escaping issues found in {file_path}: {list(result['issues'].keys())}")
@@ -321,8 +445,15 @@ def validate_form_fields():
         return True  # Don't fail build on validation errors
 
 
-def main():
-    """Run the CTMM build system check."""
+def main(use_cache=True, profile=False, report_path=None):
+    """Run the CTMM build system check.
+
+    Args:
+        use_cache: Reuse cached build verdicts when no dependency has changed
+        profile: Trace pdflatex file opens to attribute compile time to modules
+        report_path: Where to write the JSON build report
+            (default: build_profile.json)
+    """
     logger.info("CTMM Build System - Starting check...")
 
     # Initialize data structures for structured returns
@@ -334,111 +465,127 @@ def main():
         "build_testing": {"basic_passed": False, "full_passed": False}
     }
 
+    # Wall, CPU and pdflatex time per step, reported in build_data["profile"]
+    profiler = BuildProfiler(trace_files=profile) if BUILD_PROFILER_AVAILABLE else None
+
+    def timed(name):
+        return profiler.step(name) if profiler else nullcontext()
+
     # Step 1: Validate LaTeX files for escaping issues
     step = 1
     print(f"\n{step}. Validating LaTeX files...")
-    try:
-        latex_valid = validate_latex_files()
-        build_data["latex_validation"]["passed"] = latex_valid
-        print(f"[OK] LaTeX validation: {'PASS' if latex_valid else 'ISSUES FOUND'}")
-    except Exception as e:
-        logger.error("LaTeX validation failed: %s", e)
-        build_data["latex_validation"]["errors"].append(str(e))
-        latex_valid = False
+    with timed("latex_validation"):
+        try:
+            latex_valid = validate_latex_files()
+            build_data["latex_validation"]["passed"] = latex_valid
+            print(f"[OK] LaTeX validation: {'PASS' if latex_valid else 'ISSUES FOUND'}")
+        except Exception as e:
+            logger.error("LaTeX validation failed: %s", e)
+            build_data["latex_validation"]["errors"].append(str(e))
+            latex_valid = False
 
     # Step 1a: Validate form fields
     step_a = f"{step}a"
     print(f"\n{step_a}. Validating form fields...")
-    try:
-        form_valid = validate_form_fields()
-        build_data["form_validation"] = {"passed": form_valid, "errors": []}
-        print(f"[OK] Form field validation: {'PASS' if form_valid else 'ISSUES FOUND'}")
-    except Exception as e:
-        logger.error("Form field validation failed: %s", e)
-        build_data["form_validation"] = {"passed": False, "errors": [str(e)]}
-        form_valid = False
+    with timed("form_validation"):
+        try:
+            form_valid = validate_form_fields()
+            build_data["form_validation"] = {"passed": form_valid, "errors": []}
+            print(f"[OK] Form field validation: {'PASS' if form_valid else 'ISSUES FOUND'}")
+        except Exception as e:
+            logger.error("Form field validation failed: %s", e)
+            build_data["form_validation"] = {"passed": False, "errors": [str(e)]}
+            form_valid = False
 
     # Step 2: Scan for references
     step += 1
     print(f"\n{step}. Scanning file references...")
-    try:
-        references = scan_references()
-        style_files = references["style_files"]
-        module_files = references["module_files"]
+    with timed("file_scanning"):
+        try:
+            references = scan_references()
+            style_files = references["style_files"]
+            module_files = references["module_files"]
 
-        build_data["file_scanning"]["style_files"] = style_files
-        build_data["file_scanning"]["module_files"] = module_files
+            build_data["file_scanning"]["style_files"] = style_files
+            build_data["file_scanning"]["module_files"] = module_files
 
-        logger.info("Found %d style files and %d module files",
-                    len(style_files), len(module_files))
-        print(f"Found {len(style_files)} style packages")
-        print(f"Found {len(module_files)} module inputs")
-    except Exception as e:
-        logger.error("File scanning failed: %s", e)
-        style_files = []
-        module_files = []
+            logger.info("Found %d style files and %d module files",
+                        len(style_files), len(module_files))
+            print(f"Found {len(style_files)} style packages")
+            print(f"Found {len(module_files)} module inputs")
+        except Exception as e:
+            logger.error("File scanning failed: %s", e)
+            style_files = []
+            module_files = []
 
     # Step 3: Check file existence
     step += 1
     print(f"\n{step}. Checking file existence...")
-    try:
-        all_files = style_files + module_files
-        missing_files = check_missing_files(all_files)
-        total_missing = len(missing_files)
+    with timed("file_existence"):
+        try:
+            all_files = style_files + module_files
+            missing_files = check_missing_files(all_files)
+            total_missing = len(missing_files)
 
-        build_data["file_existence"]["missing_files"] = missing_files
-        build_data["file_existence"]["total_missing"] = total_missing
+            build_data["file_existence"]["missing_files"] = missing_files
+            build_data["file_existence"]["total_missing"] = total_missing
 
-        if total_missing > 0:
-            print(f"Found {total_missing} missing files")
-        else:
-            print("[OK] All referenced files exist")
-    except Exception as e:
-        logger.error("File existence check failed: %s", e)
-        missing_files = []
-        total_missing = 0
+            if total_missing > 0:
+                print(f"Found {total_missing} missing files")
+            else:
+                print("[OK] All referenced files exist")
+        except Exception as e:
+            logger.error("File existence check failed: %s", e)
+            missing_files = []
+            total_missing = 0
 
     # Step 4: Create templates for missing files (if any)
     if total_missing > 0:
         step += 1
         print(f"\n{step}. Creating templates for missing files...")
-        try:
-            created_count = 0
-            for file_path in missing_files:
-                if create_template(file_path):
-                    created_count += 1
-                    build_data["template_creation"]["created_files"].append(file_path)
-
-            build_data["template_creation"]["created_count"] = created_count
-            print(f"[OK] Created {created_count} template files")
-        except Exception as e:
-            logger.error("Template creation failed: %s", e)
+        with timed("template_creation"):
+            try:
+                created_count = 0
+                for file_path in missing_files:
+                    if create_template(file_path):
+                        created_count += 1
+                        build_data["template_creation"]["created_files"].append(file_path)
+
+                build_data["template_creation"]["created_count"] = created_count
+                print(f"[OK] Created {created_count} template files")
+            except Exception as e:
+                logger.error("Template creation failed: %s", e)
 
     # Step 5: Test basic framework
     step += 1
     print(f"\n{step}. Testing basic framework...")
-    try:
-        basic_ok = test_basic_build()
-        build_data["build_testing"]["basic_passed"] = basic_ok
+    stop_after_basic = False
+    with timed("basic_build"):
+        try:
+            basic_ok = test_basic_build(use_cache=use_cache, profiler=profiler)
+            build_data["build_testing"]["basic_passed"] = basic_ok
+            stop_after_basic = not basic_ok
+        except Exception as e:
+            logger.error("Basic build test failed: %s", e)
+            basic_ok = False
+            build_data["build_testing"]["basic_passed"] = False
 
-        if not basic_ok:
-            print("[WARN]  Basic framework has issues. Please fix before testing modules.")
-            return _generate_exit_code(build_data)
-    except Exception as e:
-        logger.error("Basic build test failed: %s", e)
-        basic_ok = False
-        build_data["build_testing"]["basic_passed"] = False
+    if stop_after_basic:
+        print("[WARN]  Basic framework has issues. Please fix before testing modules.")
+        _write_build_report(build_data, profiler, report_path)
+        return _generate_exit_code(build_data)
 
     # Step 6: Test modules incrementally
     step += 1
     print(f"\n{step}. Testing modules incrementally...")
-    try:
-        full_ok = test_full_build()
-        build_data["build_testing"]["full_passed"] = full_ok
-    except Exception as e:
-        logger.error("Full build test failed: %s", e)
-        full_ok = False
-        build_data["build_testing"]["full_passed"] = False
+    with timed("full_build"):
+        try:
+            full_ok = test_full_build(use_cache=use_cache, profiler=profiler)
+            build_data["build_testing"]["full_passed"] = full_ok
+        except Exception as e:
+            logger.error("Full build test failed: %s", e)
+            full_ok = False
+            build_data["build_testing"]["full_passed"] = False
 
     # Step 7: Generate build report
     step += 1
@@ -446,10 +593,27 @@ def main():
     form_valid = build_data.get("form_validation", {}).get("passed", True)
     _generate_build_summary(build_data, latex_valid, form_valid, basic_ok, full_ok,
                            len(style_files), len(module_files), total_missing, missing_files)
+    _write_build_report(build_data, profiler, report_path)
+    if profiler:
+        print("\nTIMINGS:")
+        for line in profiler.summary_lines():
+            print(line)
 
     return _generate_exit_code(build_data)
 
 
+def _write_build_report(build_data, profiler, report_path=None):
+    """Add the profile to build_data and write both as a JSON report."""
+    if profiler is None:
+        return
+    build_data["profile"] = profiler.to_dict()
+    try:
+        path = profiler.write_report(report_path or DEFAULT_REPORT_PATH, build_data)
+        logger.info("Build report written to %s", path)
+    except OSError as e:
+        logger.warning("Could not write build report: %s", e)
+
+
 def _generate_build_summary(build_data, latex_valid, form_valid, basic_ok, full_ok,
                            style_count, module_count, total_missing, missing_files):
     """Generate and display the build summary."""
@@ -557,4 +721,5 @@ if __name__ == "__main__":
         success = comprehensive_build_workflow()
         sys.exit(0 if success else 1)
     else:
-        sys.exit(main())
+        sys.exit(main(use_cache="--no-cache" not in sys.argv[1:],
+                      profile="--profile" in sys.argv[1:]))
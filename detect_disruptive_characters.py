@@ -12,16 +12,19 @@ cause build failures, including:
 - Other special characters that could disrupt LaTeX compilation
 """
 
-import os
 import sys
 import chardet
 from pathlib import Path
 from typing import List, Dict, Tuple, Set
 
+from repo_scanner import RepositoryScanner
+
 
 class CharacterValidator:
     """Validates character encoding and detects disruptive characters in files."""
 
+    CHECK_NAME = 'disruptive-characters'
+
     def __init__(self, verbose: bool = False):
         self.verbose = verbose
         self.issues_found = []
@@ -38,30 +41,6 @@ class CharacterValidator:
         try:
             with open(file_path, 'rb') as f:
                 raw_data = f.read()
-
-                # For LaTeX files, force UTF-8 encoding
-                if file_path.suffix in ['.tex', '.sty']:
-                    # Verify it's valid UTF-8
-                    try:
-                        raw_data.decode('utf-8')
-                        return {
-                            'encoding': 'utf-8',
-                            'confidence': 1.0,
-                            'has_bom': raw_data.startswith(b'\xef\xbb\xbf'),
-                            'raw_data': raw_data
-                        }
-                    except UnicodeDecodeError:
-                        # If UTF-8 fails, fall back to chardet
-                        pass
-
-                # For other files or if UTF-8 failed, use chardet
-                result = chardet.detect(raw_data)
-                return {
-                    'encoding': result['encoding'],
-                    'confidence': result['confidence'],
-                    'has_bom': raw_data.startswith(b'\xef\xbb\xbf'),  # UTF-8 BOM
-                    'raw_data': raw_data
-                }
         except Exception as e:
             return {
                 'encoding': 'ERROR',
@@ -69,6 +48,33 @@ class CharacterValidator:
                 'has_bom': False,
                 'error': str(e)
             }
+        return self.detect_encoding_of(raw_data, file_path)
+
+    def detect_encoding_of(self, raw_data: bytes, file_path: Path) -> Dict[str, any]:
+        """Detect the encoding of the bytes read from file_path."""
+        # For LaTeX files, force UTF-8 encoding
+        if file_path.suffix in ['.tex', '.sty']:
+            # Verify it's valid UTF-8
+            try:
+                raw_data.decode('utf-8')
+                return {
+                    'encoding': 'utf-8',
+                    'confidence': 1.0,
+                    'has_bom': raw_data.startswith(b'\xef\xbb\xbf'),
+                    'raw_data': raw_data
+                }
+            except UnicodeDecodeError:
+                # If UTF-8 fails, fall back to chardet
+                pass
+
+        # For other files or if UTF-8 failed, use chardet
+        result = chardet.detect(raw_data)
+        return {
+            'encoding': result['encoding'],
+            'confidence': result['confidence'],
+            'has_bom': raw_data.startswith(b'\xef\xbb\xbf'),  # UTF-8 BOM
+            'raw_data': raw_data
+        }
 
     def check_line_endings(self, raw_data: bytes) -> Dict[str, any]:
         """Check for line ending types."""
@@ -185,7 +191,21 @@ class CharacterValidator:
 
     def scan_file(self, file_path: Path) -> Dict:
         """Scan a single file for all types of issues."""
+        result = self.analyze(file_path, self.detect_encoding(file_path))
+        self._count(result)
+        return result
+
+    def scan_data(self, file_path: Path, raw_data: bytes) -> Dict:
+        """Scan the bytes read from file_path; unlike scan_file() no counters are updated."""
+        return self.analyze(file_path, self.detect_encoding_of(raw_data, file_path))
+
+    def _count(self, result: Dict):
         self.files_scanned += 1
+        if result['issues'] or result['warnings']:
+            self.files_with_issues += 1
+
+    def analyze(self, file_path: Path, encoding_info: Dict[str, any]) -> Dict:
+        """Check a file's content given its detect_encoding() result."""
         result = {
             'file': str(file_path),
             'issues': [],
@@ -193,8 +213,6 @@ class CharacterValidator:
             'info': {}
         }
 
-        # Detect encoding
-        encoding_info = self.detect_encoding(file_path)
         result['info']['encoding'] = encoding_info['encoding']
         result['info']['confidence'] = encoding_info['confidence']
 
@@ -203,7 +221,6 @@ class CharacterValidator:
                 'type': 'file_read_error',
                 'message': encoding_info['error']
             })
-            self.files_with_issues += 1
             return result
 
         raw_data = encoding_info['raw_data']
@@ -235,10 +252,9 @@ class CharacterValidator:
         if not is_valid_utf8:
             result['issues'].extend(utf8_issues)
 
-        # Try to read file content for further analysis
+        # Decode the content for further analysis
         try:
-            with open(file_path, 'r', encoding=encoding_info['encoding'] or 'utf-8', errors='replace') as f:
-                content = f.read()
+            content = raw_data.decode(encoding_info['encoding'] or 'utf-8', errors='replace')
 
             # Find control characters
             control_chars = self.find_control_characters(content, file_path)
@@ -256,24 +272,29 @@ class CharacterValidator:
                 'message': f"Error analyzing content: {str(e)}"
             })
 
-        # Mark file if it has issues
-        if result['issues'] or result['warnings']:
-            self.files_with_issues += 1
-
         return result
 
+    def register_checks(self, scanner: RepositoryScanner, extensions: List[str] = ['.tex']):
+        """Register the scan of files with the given extensions with a RepositoryScanner."""
+        suffixes = tuple(extensions)
+        scanner.register(self.CHECK_NAME, lambda scanned: self.scan_data(scanned.path, scanned.data),
+                         accepts=lambda path: path.name.endswith(suffixes))
+
+    def collect(self, results: Dict[str, List[Tuple[Path, Dict]]]) -> List[Dict]:
+        """Count and return this validator's results from a RepositoryScanner scan."""
+        collected = []
+        for file_path, result in results[self.CHECK_NAME]:
+            if self.verbose:
+                print(f"Scanning: {file_path}")
+            self._count(result)
+            collected.append(result)
+        return collected
+
     def scan_directory(self, directory: Path, extensions: List[str] = ['.tex']) -> List[Dict]:
         """Scan all files in a directory with specified extensions."""
-        results = []
-
-        for ext in extensions:
-            for file_path in directory.rglob(f'*{ext}'):
-                if self.verbose:
-                    print(f"Scanning: {file_path}")
-                result = self.scan_file(file_path)
-                results.append(result)
-
-        return results
+        scanner = RepositoryScanner(directory)
+        self.register_checks(scanner, extensions)
+        return self.collect(scanner.scan())
 
     def print_summary(self, results: List[Dict]):
         """Print a summary of the scan results."""
@@ -6,7 +6,9 @@ Analyzes workflow logs to identify and categorize errors for automated fixing.
 
 import re
 import logging
-from typing import Dict, List, Optional, Tuple, Set
+from bisect import bisect_right
+from collections import deque
+from typing import Dict, Iterable, List, Optional, Tuple, Set
 from dataclasses import dataclass
 from datetime import datetime
 
@@ -34,6 +36,182 @@ class ErrorAnalysis:
     is_solvable: bool
     recommended_fixes: List[str]
     analysis_timestamp: str
+    # False if a job log could not be read to the end
+    logs_complete: bool = True
+
+# Lines of context kept before and after each error
+CONTEXT_LINES = 2
+# Lines classified together when a log is streamed
+STREAM_BLOCK_LINES = 2000
+
+# Characters that end a literal run in a regular expression
+_REGEX_META = set('.^$*+?{}[]()|\\')
+
+
+def _required_literal(pattern: str) -> str:
+    """Return the longest literal every match of pattern must contain.
+
+    Only top-level text outside groups, classes and alternations is
+    considered, and a character followed by a quantifier is dropped, so
+    the result is safe as a prefilter. Returns '' when nothing is certain.
+    """
+    runs = ['']
+    depth = 0
+    i = 0
+    while i < len(pattern):
+        char = pattern[i]
+        if char == '\\' and i + 1 < len(pattern):
+            escaped = pattern[i + 1]
+            i += 2
+            if depth == 0 and not escaped.isalnum():
+                runs[-1] += escaped
+                continue
+            if depth == 0:
+                runs.append('')
+            continue
+        if char == '[':
+            # Skip the character class, including a leading ] or ^]
+            i += 1
+            if i < len(pattern) and pattern[i] == '^':
+                i += 1
+            if i < len(pattern) and pattern[i] == ']':
+                i += 1
+            while i < len(pattern) and pattern[i] != ']':
+                i += 2 if pattern[i] == '\\' else 1
+            i += 1
+            if depth == 0:
+                runs.append('')
+            continue
+        if char == '(':
+            depth += 1
+        elif char == ')':
+            depth -= 1
+        elif char == '|' and depth == 0:
+            return ''
+        elif char in '*?+{' and depth == 0:
+            # The quantified character may be absent or repeated
+            runs[-1] = runs[-1][:-1]
+            if char == '{':
+                closing = pattern.find('}', i)
+                i = len(pattern) if closing == -1 else closing
+        if char in _REGEX_META:
+            if depth == 0 or char == '(':
+                runs.append('')
+        elif depth == 0:
+            runs[-1] += char
+        i += 1
+    return max(runs, key=len)
+
+
+def _fold(text: str) -> str:
+    """Case-fold text so that literal search agrees with re.IGNORECASE."""
+    if text.isascii():
+        return text.lower()
+    # re.IGNORECASE also matches dotted and dotless I against i
+    return text.casefold().replace('\u0131', 'i').replace('i\u0307', 'i')
+
+
+def _line_starts(text: str) -> List[int]:
+    starts = [0]
+    position = text.find('\n')
+    while position != -1:
+        starts.append(position + 1)
+        position = text.find('\n', position + 1)
+    return starts
+
+
+class LogClassifier:
+    """Classifies log lines against categorised patterns in one prefiltered pass.
+
+    Every pattern is compiled once. The log is case-folded once and each
+    pattern's required literal is located with str.find, which marks the
+    only lines that pattern can match; patterns run on those lines alone.
+    Results are identical to searching every line with every pattern:
+    per line, each category reports its first matching pattern.
+    """
+
+    def __init__(self, detailed_patterns: Dict[str, Dict]):
+        # (category, severity, [(pattern, compiled)])
+        self.categories = []
+        # literal -> [(category index, pattern index)]
+        self.literals: Dict[str, List[Tuple[int, int]]] = {}
+        # patterns without a usable literal run on every line
+        self.unfiltered: Set[Tuple[int, int]] = set()
+
+        for category_index, (category, info) in enumerate(detailed_patterns.items()):
+            compiled = []
+            for pattern_index, pattern in enumerate(info['patterns']):
+                compiled.append((pattern, re.compile(pattern, re.IGNORECASE)))
+                literal = _fold(_required_literal(pattern))
+                if literal.strip():
+                    self.literals.setdefault(literal, []).append((category_index, pattern_index))
+                else:
+                    self.unfiltered.add((category_index, pattern_index))
+            self.categories.append((category, info['severity'], compiled))
+
+    def _candidates(self, log_content: str, starts: List[int]) -> Dict[int, Set[Tuple[int, int]]]:
+        """Map 0-based line index to the patterns whose literal occurs on it."""
+        folded = _fold(log_content)
+        if not log_content.isascii():
+            # Case folding can change lengths, but never the line breaks
+            starts = _line_starts(folded)
+        candidates: Dict[int, Set[Tuple[int, int]]] = {}
+        for literal, pattern_keys in self.literals.items():
+            position = folded.find(literal)
+            while position != -1:
+                line_index = bisect_right(starts, position) - 1
+                candidates.setdefault(line_index, set()).update(pattern_keys)
+                # One hit per line is enough; continue on the next line
+                if line_index + 1 >= len(starts):
+                    break
+                position = folded.find(literal, starts[line_index + 1])
+        return candidates
+
+    def classify(self, job_name: str, log_content: str, first_reported: int = 0,
+                 stop_reported: Optional[int] = None, line_offset: int = 0) -> List[ErrorInstance]:
+        """Return the errors in log_content, ordered by line and category.
+
+        Only lines with an index in [first_reported, stop_reported) are
+        reported; the others serve as context. line_offset is added to the
+        reported line numbers.
+        """
+        starts = _line_starts(log_content)
+        line_count = len(starts)
+        ends = [start - 1 for start in starts[1:]] + [len(log_content)]
+        if stop_reported is None:
+            stop_reported = line_count
+
+        candidates = self._candidates(log_content, starts)
+        if self.unfiltered:
+            for line_index in range(line_count):
+                candidates.setdefault(line_index, set()).update(self.unfiltered)
+
+        errors = []
+        for line_index in sorted(candidates):
+            if not first_reported <= line_index < stop_reported:
+                continue
+            pattern_keys = candidates[line_index]
+            line = log_content[starts[line_index]:ends[line_index]]
+            for category_index, (category, severity, compiled) in enumerate(self.categories):
+                for pattern_index, (pattern, regex) in enumerate(compiled):
+                    if (category_index, pattern_index) not in pattern_keys:
+                        continue
+                    match = regex.search(line)
+                    if match:
+                        context_start = max(0, line_index - CONTEXT_LINES)
+                        context_end = min(line_count - 1, line_index + CONTEXT_LINES)
+                        errors.append(ErrorInstance(
+                            category=category,
+                            pattern=pattern,
+                            matched_text=match.group(0),
+                            line_number=line_offset + line_index + 1,
+                            context=log_content[starts[context_start]:ends[context_end]],
+                            severity=severity,
+                            job_name=job_name
+                        ))
+                        break  # Only match first pattern per line
+        return errors
+
 
 class ErrorAnalyzer:
     """Analyzes workflow logs to identify and categorize errors."""
@@ -145,16 +323,49 @@ class ErrorAnalyzer:
     def analyze_logs(self, workflow_run_id: int, workflow_name: str, job_logs: Dict[str, str]) -> ErrorAnalysis:
         """Analyze logs from all jobs in a workflow run."""
         all_errors = []
-        error_categories = set()
 
         for job_name, log_content in job_logs.items():
-            job_errors = self._analyze_job_log(job_name, log_content)
-            all_errors.extend(job_errors)
-            error_categories.update(error.category for error in job_errors)
+            all_errors.extend(self._analyze_job_log(job_name, log_content))
 
         # Determine if errors are solvable
         is_solvable = self._assess_solvability(all_errors, job_logs)
 
+        return self._build_analysis(workflow_run_id, workflow_name, all_errors, is_solvable, len(job_logs))
+
+    def analyze_log_streams(self, workflow_run_id: int, workflow_name: str,
+                            job_streams: Dict[str, Iterable[str]]) -> ErrorAnalysis:
+        """Analyze streamed logs from all jobs in a workflow run.
+
+        Like analyze_logs(), but each job log is an iterable of lines (see
+        WorkflowMonitor.stream_workflow_run_logs()) and is never held in
+        memory as a whole.
+
+        A stream with a false complete attribute (see JobLogStream) ended
+        early; the analysis then has logs_complete set to False.
+        """
+        all_errors = []
+        unsolvable_seen = False
+        logs_complete = True
+
+        for job_name, lines in job_streams.items():
+            job_errors, job_unsolvable = self.analyze_job_stream(job_name, lines)
+            all_errors.extend(job_errors)
+            unsolvable_seen = unsolvable_seen or job_unsolvable
+            if not getattr(lines, 'complete', True):
+                self.logger.warning(f"Log of job {job_name} is incomplete")
+                logs_complete = False
+
+        is_solvable = not unsolvable_seen and self._assess_error_solvability(all_errors)
+
+        analysis = self._build_analysis(workflow_run_id, workflow_name, all_errors, is_solvable,
+                                        len(job_streams))
+        analysis.logs_complete = logs_complete
+        return analysis
+
+    def _build_analysis(self, workflow_run_id: int, workflow_name: str, all_errors: List[ErrorInstance],
+                        is_solvable: bool, job_count: int) -> ErrorAnalysis:
+        error_categories = {error.category for error in all_errors}
+
         # Generate recommended fixes
         recommended_fixes = self._generate_fix_recommendations(error_categories, all_errors)
 
@@ -169,39 +380,64 @@ class ErrorAnalyzer:
             analysis_timestamp=datetime.utcnow().isoformat()
         )
 
-        self.logger.info(f"Analyzed {len(all_errors)} errors in {len(job_logs)} jobs")
+        self.logger.info(f"Analyzed {len(all_errors)} errors in {job_count} jobs")
         self.logger.info(f"Error categories: {', '.join(error_categories)}")
 
         return analysis
 
+    def _classifier(self) -> LogClassifier:
+        """Return the classifier for the current detailed_patterns."""
+        key = tuple((category, info['severity'], tuple(info['patterns']))
+                    for category, info in self.detailed_patterns.items())
+        if getattr(self, '_classifier_key', None) != key:
+            # Key last, so a concurrent caller never pairs it with an older classifier
+            self._log_classifier = LogClassifier(self.detailed_patterns)
+            self._classifier_key = key
+        return self._log_classifier
+
     def _analyze_job_log(self, job_name: str, log_content: str) -> List[ErrorInstance]:
         """Analyze a single job's log content for errors."""
-        errors = []
-        lines = log_content.split('\n')
+        return self._classifier().classify(job_name, log_content)
 
-        for line_num, line in enumerate(lines, 1):
-            for category, pattern_info in self.detailed_patterns.items():
-                for pattern in pattern_info['patterns']:
-                    match = re.search(pattern, line, re.IGNORECASE)
-                    if match:
-                        # Get context around the error
-                        context_start = max(0, line_num - 3)
-                        context_end = min(len(lines), line_num + 2)
-                        context = '\n'.join(lines[context_start:context_end])
+    def analyze_job_stream(self, job_name: str, lines: Iterable[str]) -> Tuple[List[ErrorInstance], bool]:
+        """Analyze a job log given as an iterable of lines.
 
-                        error = ErrorInstance(
-                            category=category,
-                            pattern=pattern,
-                            matched_text=match.group(0),
-                            line_number=line_num,
-                            context=context,
-                            severity=pattern_info['severity'],
-                            job_name=job_name
-                        )
-                        errors.append(error)
-                        break  # Only match first pattern per line
+        Lines are classified in blocks of STREAM_BLOCK_LINES. A ring buffer
+        carries the last CONTEXT_LINES lines into the next block, and the
+        final CONTEXT_LINES lines of a block are only reported once the
+        lines after them have arrived, so the errors and their context are
+        the same as from _analyze_job_log() on the joined log.
 
-        return errors
+        Returns the errors and whether an unsolvable error pattern was seen.
+        """
+        classifier = self._classifier()
+        errors: List[ErrorInstance] = []
+        unsolvable_seen = False
+        context = deque(maxlen=CONTEXT_LINES)
+        block: List[str] = []
+        block_start = 0  # 0-based line index of block[0]
+
+        def classify_block(final: bool) -> None:
+            nonlocal block, block_start, unsolvable_seen
+            ready = len(block) if final else len(block) - CONTEXT_LINES
+            text = '\n'.join([*context, *block])
+            errors.extend(classifier.classify(
+                job_name, text,
+                first_reported=len(context),
+                stop_reported=len(context) + ready,
+                line_offset=block_start - len(context)))
+            unsolvable_seen = unsolvable_seen or config.is_unsolvable_error(text)
+            context.extend(block[:ready])
+            block_start += ready
+            block = block[ready:]
+
+        for line in lines:
+            block.append(line)
+            if len(block) >= STREAM_BLOCK_LINES + CONTEXT_LINES:
+                classify_block(final=False)
+        classify_block(final=True)
+
+        return errors, unsolvable_seen
 
     def _assess_solvability(self, errors: List[ErrorInstance], job_logs: Dict[str, str]) -> bool:
         """Assess whether the found errors can be automatically solved."""
@@ -210,6 +446,10 @@ class ErrorAnalyzer:
         if config.is_unsolvable_error(all_log_text):
             return False
 
+        return self._assess_error_solvability(errors)
+
+    def _assess_error_solvability(self, errors: List[ErrorInstance]) -> bool:
+        """Assess whether the categories and severity of errors allow a fix."""
         # Check for error categories that have known fix strategies
         solvable_categories = set(config.fix_strategies.keys())
         found_categories = {error.category for error in errors}
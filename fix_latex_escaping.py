@@ -6,12 +6,13 @@ This script fixes systematic over-escaping issues in converted LaTeX files.
 It removes excessive \textbackslash{} escaping to produce clean, readable LaTeX.
 
 Usage:
-    python3 fix_latex_escaping.py [input_dir] [output_dir]
+    python3 fix_latex_escaping.py [input_dir] [output_dir] [--jobs N]
     python3 fix_latex_escaping.py --help
 
 Examples:
     python3 fix_latex_escaping.py converted/ fixed/
     python3 fix_latex_escaping.py converted/  # fixes files in-place
+    python3 fix_latex_escaping.py converted/ --jobs 0  # one worker per CPU
 """
 
 import re
@@ -19,14 +20,133 @@ import os
 import sys
 import argparse
 import shutil
+from concurrent.futures import ProcessPoolExecutor
+from operator import itemgetter
 from pathlib import Path
-from typing import Dict, List, Tuple
+from typing import Dict, List, Optional, Tuple
 import logging
 
 # Configure logging
 logging.basicConfig(level=logging.INFO, format='%(levelname)s: %(message)s')
 logger = logging.getLogger(__name__)
 
+ESCAPE_TOKEN = '\\textbackslash{}'
+# Context kept around each run of escape tokens; generous compared to the
+# longest literal tail of an escaping rule ("tightlist")
+WINDOW_MARGIN = 64
+
+# Shapes escaping rules may be built from for windowed rewriting:
+# the escape token, letters, escaped punctuation and gap groups that
+# can never cross a closing brace
+_WINDOW_SAFE_RULE = re.compile(
+    r'(?:\\\\textbackslash\\\{\\\}'
+    r'|\(\[a-zA-Z\]\+\)(?=\\\\textbackslash)'
+    r'|\(\[\^\}\]\*\?\)(?=\\\\textbackslash)'
+    r'|\\[{}$&]|[a-zA-Z%])+')
+
+
+def _literal_prefix(pattern: str) -> str:
+    """Return the literal text every match of a regex must start with."""
+    if '|' in pattern:
+        return ''
+    prefix = []
+    i = 0
+    while i < len(pattern):
+        if pattern[i] == '\\' and i + 1 < len(pattern) and not pattern[i + 1].isalnum():
+            char, step = pattern[i + 1], 2
+        elif pattern[i] not in '.^$*+?{}[]()|\\':
+            char, step = pattern[i], 1
+        else:
+            break
+        if pattern[i + step:i + step + 1] in ('*', '+', '?', '{'):
+            break
+        prefix.append(char)
+        i += step
+    return ''.join(prefix)
+
+
+def _compile_replacement(template: str, regex: re.Pattern):
+    """Turn a replacement template with group references into a callable.
+
+    re expands such templates in Python code for every match; formatting
+    the groups into a prebuilt string is considerably cheaper. Templates
+    using anything besides literal text, \\\\ and \\1-\\9 are left to re.
+    """
+    literals = ['']
+    groups = []
+    i = 0
+    while i < len(template):
+        char = template[i]
+        following = template[i + 1:i + 2]
+        if char != '\\':
+            literals[-1] += char.replace('%', '%%')
+            i += 1
+        elif following == '\\':
+            literals[-1] += '\\'
+            i += 2
+        elif following and following in '123456789' and not template[i + 2:i + 3].isdigit():
+            groups.append(int(following))
+            literals.append('')
+            i += 2
+        else:
+            return template
+    if not groups or max(groups) > regex.groups:
+        return template
+
+    fmt = literals[0] + ''.join('%s' + literal for literal in literals[1:])
+    indices = [group - 1 for group in groups]
+    if indices == list(range(regex.groups)):
+        return lambda match: fmt % match.groups('')
+    pick = itemgetter(*indices)
+    if len(indices) == 1:
+        return lambda match: fmt % (pick(match.groups('')),)
+    return lambda match: fmt % pick(match.groups(''))
+
+
+def _window_safe(pattern: str) -> bool:
+    """Check that an escaping rule only matches inside a run of escape tokens."""
+    tail = pattern.rsplit('textbackslash\\{\\}', 1)[-1]
+    return (pattern.startswith('\\\\textbackslash\\{\\}')
+            and _WINDOW_SAFE_RULE.fullmatch(pattern) is not None
+            and len(tail) < WINDOW_MARGIN // 2)
+
+
+class _RecordCollector(logging.Handler):
+    """Keeps a worker's log records so the parent can emit them in order."""
+
+    def __init__(self):
+        super().__init__()
+        self.records = []
+
+    def emit(self, record):
+        record.msg = record.getMessage()
+        record.args = None
+        record.exc_info = None
+        self.records.append(record)
+
+
+_worker_de_escaper = None
+_worker_collector = None
+
+
+def _init_worker(de_escaper, level):
+    """Set up a pool worker with the parent's patterns and log level."""
+    global _worker_de_escaper, _worker_collector
+    _worker_de_escaper = de_escaper
+    _worker_collector = _RecordCollector()
+    logger.handlers = [_worker_collector]
+    logger.propagate = False
+    logger.setLevel(level)
+
+
+def _process_in_worker(paths):
+    """Process one file in a pool worker; returns its result and log records."""
+    input_path, output_path = paths
+    _worker_collector.records = []
+    changed, replacements = _worker_de_escaper.process_file(input_path, output_path)
+    return changed, replacements, _worker_collector.records
+
+
 class LaTeXDeEscaper:
     """Fixes over-escaped LaTeX commands in converted documents."""
 
@@ -138,6 +258,124 @@ class LaTeXDeEscaper:
             'total_replacements': 0
         }
 
+    def __getstate__(self):
+        # Compiled rules hold closures; pool workers recompile them
+        state = self.__dict__.copy()
+        for attribute in ('_rules_key', '_escaping_rules', '_cleanup_rules', '_windowed'):
+            state.pop(attribute, None)
+        return state
+
+    def _compile_rules(self, patterns: List[Tuple[str, str]], kind: str) -> List[Tuple]:
+        """Compile a rule table, skipping (and reporting) invalid patterns."""
+        rules = []
+        for i, (pattern, replacement) in enumerate(patterns):
+            try:
+                regex = re.compile(pattern)
+            except re.error as e:
+                logger.warning(f"Regex error in {kind} pattern {i+1}: {e}")
+                continue
+            rules.append((i, regex, _compile_replacement(replacement, regex),
+                          _literal_prefix(pattern)))
+        return rules
+
+    def _compiled_rules(self) -> Tuple[List[Tuple], List[Tuple], bool]:
+        """Compile both rule tables once; rebuilt only when a table changes."""
+        key = (tuple(self.escaping_patterns), tuple(self.cleanup_patterns))
+        if getattr(self, '_rules_key', None) != key:
+            self._escaping_rules = self._compile_rules(self.escaping_patterns, 'escaping')
+            self._cleanup_rules = self._compile_rules(self.cleanup_patterns, 'cleanup')
+            self._windowed = all(_window_safe(pattern) for pattern, _ in self.escaping_patterns)
+            self._rules_key = key
+        return self._escaping_rules, self._cleanup_rules, self._windowed
+
+    @staticmethod
+    def _apply_rules(rules: List[Tuple], content: str, counts: List[int], kind: str) -> str:
+        """Apply rules in order, skipping those whose literal prefix is absent."""
+        for i, regex, replacement, literal in rules:
+            if literal not in content:
+                continue
+            try:
+                content, count = regex.subn(replacement, content)
+            except Exception as e:
+                logger.warning(f"Error applying {kind} pattern {i+1}: {e}")
+                continue
+            counts[i] += count
+        return content
+
+    def _apply_escaping_windows(self, rules: List[Tuple], content: str, counts: List[int]) -> str:
+        """Apply the escaping rules only around runs of escape tokens.
+
+        A single forward scan groups escape tokens into runs; a run ends
+        where the next token is far away and a closing brace lies in
+        between, which no window-safe rule can match across. Each run plus
+        a margin is rewritten with the ordered rules and the untouched text
+        in between is copied once into the output buffer.
+        """
+        token_length = len(ESCAPE_TOKEN)
+        output = []
+        copied_to = 0
+        token = content.find(ESCAPE_TOKEN)
+        while token != -1:
+            run_start = token
+            run_end = token + token_length
+            while True:
+                # Jump to the last token starting within split distance
+                last = content.rfind(ESCAPE_TOKEN, run_end,
+                                     run_end + 2 * WINDOW_MARGIN + token_length - 1)
+                if last != -1:
+                    run_end = last + token_length
+                    continue
+                token = content.find(ESCAPE_TOKEN, run_end)
+                if token != -1 and content.find('}', run_end, token) == -1:
+                    run_end = token + token_length
+                    continue
+                break
+
+            window_start = max(copied_to, run_start - WINDOW_MARGIN)
+            window_end = min(len(content), run_end + WINDOW_MARGIN)
+            window = content[window_start:window_end]
+            rewritten = self._apply_rules(rules, window, counts, 'escaping')
+            if rewritten is not window:
+                output.append(content[copied_to:window_start])
+                output.append(rewritten)
+                copied_to = window_end
+        if not output:
+            return content
+        output.append(content[copied_to:])
+        return ''.join(output)
+
+    def fix_content(self, content: str) -> Tuple[str, int]:
+        """
+        Apply the escaping rules, then the cleanup rules, to LaTeX content.
+
+        The result is identical to running re.subn for every rule in table
+        order over the whole text; rules are compiled once per instance.
+
+        Args:
+            content: LaTeX source
+
+        Returns:
+            Tuple of (fixed_content, num_replacements)
+        """
+        escaping_rules, cleanup_rules, windowed = self._compiled_rules()
+
+        escaping_counts = [0] * len(self.escaping_patterns)
+        if windowed:
+            content = self._apply_escaping_windows(escaping_rules, content, escaping_counts)
+        else:
+            content = self._apply_rules(escaping_rules, content, escaping_counts, 'escaping')
+
+        cleanup_counts = [0] * len(self.cleanup_patterns)
+        content = self._apply_rules(cleanup_rules, content, cleanup_counts, 'cleanup')
+
+        for kind, patterns, counts in (('Escaping', self.escaping_patterns, escaping_counts),
+                                       ('Cleanup', self.cleanup_patterns, cleanup_counts)):
+            for i, count in enumerate(counts):
+                if count > 0:
+                    logger.debug(f"{kind} pattern {i+1} '{patterns[i][0][:50]}...' replaced {count} times")
+
+        return content, sum(escaping_counts) + sum(cleanup_counts)
+
     def process_file(self, input_path: Path, output_path: Path = None) -> Tuple[bool, int]:
         """
         Process a single LaTeX file to fix over-escaping.
@@ -179,35 +417,7 @@ class LaTeXDeEscaper:
                     return False, 0
 
             original_content = content
-            replacements_made = 0
-
-            # Apply all escaping pattern fixes with error handling
-            for i, (pattern, replacement) in enumerate(self.escaping_patterns):
-                try:
-                    content, count = re.subn(pattern, replacement, content)
-                    replacements_made += count
-                    if count > 0:
-                        logger.debug(f"Escaping pattern {i+1} '{pattern[:50]}...' replaced {count} times")
-                except re.error as e:
-                    logger.warning(f"Regex error in escaping pattern {i+1}: {e}")
-                    continue
-                except Exception as e:
-                    logger.warning(f"Error applying escaping pattern {i+1}: {e}")
-                    continue
-
-            # Apply cleanup patterns with error handling
-            for i, (pattern, replacement) in enumerate(self.cleanup_patterns):
-                try:
-                    content, count = re.subn(pattern, replacement, content)
-                    replacements_made += count
-                    if count > 0:
-                        logger.debug(f"Cleanup pattern {i+1} '{pattern[:50]}...' replaced {count} times")
-                except re.error as e:
-                    logger.warning(f"Regex error in cleanup pattern {i+1}: {e}")
-                    continue
-                except Exception as e:
-                    logger.warning(f"Error applying cleanup pattern {i+1}: {e}")
-                    continue
+            content, replacements_made = self.fix_content(content)
 
             # Check if content changed
             content_changed = content != original_content
@@ -246,13 +456,15 @@ class LaTeXDeEscaper:
             logger.error(f"Error processing {input_path}: {e}")
             return False, 0
 
-    def process_directory(self, input_dir: Path, output_dir: Path = None) -> Dict:
+    def process_directory(self, input_dir: Path, output_dir: Path = None,
+                          jobs: Optional[int] = 1) -> Dict:
         """
         Process all .tex files in a directory.
 
         Args:
             input_dir: Directory containing .tex files
             output_dir: Output directory (None for in-place)
+            jobs: Number of worker processes (None or 0 for one per CPU)
 
         Returns:
             Dictionary with processing statistics
@@ -260,25 +472,48 @@ class LaTeXDeEscaper:
         if output_dir and output_dir != input_dir:
             output_dir.mkdir(parents=True, exist_ok=True)
 
-        tex_files = list(input_dir.glob('*.tex'))
+        tex_files = sorted(input_dir.glob('*.tex'))
         logger.info(f"Found {len(tex_files)} .tex files in {input_dir}")
 
+        tasks = []
         for tex_file in tex_files:
-            self.stats['files_processed'] += 1
-
             if output_dir and output_dir != input_dir:
-                output_file = output_dir / tex_file.name
+                tasks.append((tex_file, output_dir / tex_file.name))
             else:
-                output_file = None
+                tasks.append((tex_file, None))
 
-            changed, replacements = self.process_file(tex_file, output_file)
+        jobs = min(max(1, jobs or os.cpu_count() or 1), len(tasks) or 1)
+        if jobs == 1:
+            results = (self.process_file(*task) for task in tasks)
+        else:
+            logger.info(f"Processing with {jobs} worker processes")
+            results = self._process_parallel(tasks, jobs)
 
+        for changed, replacements in results:
+            self.stats['files_processed'] += 1
             if changed:
                 self.stats['files_changed'] += 1
             self.stats['total_replacements'] += replacements
 
         return self.stats
 
+    def _process_parallel(self, tasks: List[Tuple[Path, Optional[Path]]], jobs: int):
+        """Yield (changed, replacements) per task, in task order.
+
+        Files are spread across a process pool. Each result, together with
+        the log lines its worker produced, is released as soon as every
+        earlier file is done, so the console output streams but matches a
+        serial run line for line.
+        """
+        with ProcessPoolExecutor(max_workers=jobs, initializer=_init_worker,
+                                 initargs=(self, logger.getEffectiveLevel())) as pool:
+            chunksize = max(1, len(tasks) // (jobs * 4))
+            for changed, replacements, records in pool.map(_process_in_worker, tasks,
+                                                           chunksize=chunksize):
+                for record in records:
+                    logger.handle(record)
+                yield changed, replacements
+
     def validate_latex_syntax(self, file_path: Path) -> List[str]:
         """
         Enhanced validation of LaTeX syntax in the fixed file.
@@ -337,6 +572,7 @@ Examples:
   %(prog)s converted/ fixed/            # Create fixed copies
   %(prog)s --validate converted/        # Validate fixed files
   %(prog)s --verbose converted/         # Show detailed output
+  %(prog)s --jobs 4 converted/          # Fix files with 4 worker processes
         """
     )
 
@@ -345,6 +581,8 @@ Examples:
     parser.add_argument('--validate', action='store_true', help='Validate LaTeX syntax after fixing')
     parser.add_argument('--verbose', '-v', action='store_true', help='Show verbose output')
     parser.add_argument('--backup', action='store_true', help='Create .bak backup files')
+    parser.add_argument('--jobs', '-j', type=int, default=1,
+                        help='Worker processes (default: 1, 0 = one per CPU)')
 
     args = parser.parse_args()
 
@@ -367,7 +605,7 @@ Examples:
 
     # Process files
     de_escaper = LaTeXDeEscaper()
-    stats = de_escaper.process_directory(input_dir, output_dir)
+    stats = de_escaper.process_directory(input_dir, output_dir, jobs=args.jobs)
 
     # Print summary
     print("\n" + "="*50)
@@ -11,12 +11,15 @@ This script identifies and fixes characters that could prevent merges:
 German: Behebt alle störenden Zeichen in Dateien, die einen Merge verhindern.
 """
 
-import os
 import sys
 import chardet
 from pathlib import Path
 
+from repo_scanner import RepositoryScanner
+
 class MergeConflictFixer:
+    CHECK_NAME = 'merge-blocking-characters'
+
     def __init__(self, dry_run=False):
         self.dry_run = dry_run
         self.stats = {
@@ -41,12 +44,18 @@ class MergeConflictFixer:
 
     def detect_issues(self, filepath):
         """Detect encoding and whitespace issues in a file"""
-        issues = []
-
         try:
             with open(filepath, 'rb') as f:
                 raw = f.read()
+        except Exception as e:
+            return [f'Error reading file: {e}']
+        return self.detect_issues_in(raw)
+
+    def detect_issues_in(self, raw):
+        """Detect encoding and whitespace issues in the bytes of a file"""
+        issues = []
 
+        try:
             # Check for BOM
             has_bom = False
             if raw.startswith(b'\xef\xbb\xbf'):
@@ -56,16 +65,13 @@ class MergeConflictFixer:
                 issues.append('UTF-16 BOM')
                 has_bom = True
 
-            # Check encoding
-            result = chardet.detect(raw)
-            encoding = result.get('encoding', 'unknown')
-
-            # chardet can be overly sensitive, so check if it's actually valid UTF-8
+            # Check encoding; chardet can be overly sensitive (and is slow),
+            # so it is only asked when the file is not valid UTF-8
             try:
                 raw.decode('utf-8')
                 actual_encoding = 'utf-8'
             except UnicodeDecodeError:
-                actual_encoding = encoding
+                actual_encoding = chardet.detect(raw).get('encoding', 'unknown')
 
             if actual_encoding and actual_encoding.lower() not in ['utf-8', 'ascii']:
                 issues.append(f'Non-UTF-8 encoding: {actual_encoding}')
@@ -93,7 +99,7 @@ class MergeConflictFixer:
             return issues
 
         except Exception as e:
-            return [f'Error reading file: {e}']
+            return [f'Error analyzing file: {e}']
 
     def fix_file(self, filepath):
         """Fix encoding and whitespace issues in a file"""
@@ -173,28 +179,30 @@ class MergeConflictFixer:
             print(f"Error fixing {filepath}: {e}")
             return False
 
-    def process_directory(self, directory='.'):
-        """Process all files in directory"""
+    def register_checks(self, scanner):
+        """Register the issue detection with a RepositoryScanner"""
+        scanner.register(self.CHECK_NAME, lambda scanned: self.detect_issues_in(scanned.data),
+                         accepts=lambda path: self.should_process(str(path)))
+
+    def process_directory(self, directory='.', results=None):
+        """Process all files in directory
+
+        results are those of a RepositoryScanner the checks were registered
+        with; without them the directory is scanned here.
+        """
         print("Scanning repository for merge-blocking characters...")
         print(f"Mode: {'DRY RUN' if self.dry_run else 'FIXING FILES'}\n")
 
         # First pass: identify issues
-        for root, dirs, files in os.walk(directory):
-            # Remove .git from dirs to skip it
-            if '.git' in dirs:
-                dirs.remove('.git')
-
-            for file in files:
-                filepath = os.path.join(root, file)
-
-                if not self.should_process(filepath):
-                    continue
-
-                self.stats['files_scanned'] += 1
-                issues = self.detect_issues(filepath)
-
-                if issues:
-                    self.issues_found.append((filepath, issues))
+        if results is None:
+            scanner = RepositoryScanner(directory)
+            self.register_checks(scanner)
+            results = scanner.scan()
+
+        for filepath, issues in results[self.CHECK_NAME]:
+            self.stats['files_scanned'] += 1
+            if issues:
+                self.issues_found.append((str(filepath), issues))
 
         # Report findings
         print(f"Scanned {self.stats['files_scanned']} files")
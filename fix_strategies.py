@@ -7,9 +7,11 @@ Implements automated strategies for common workflow errors.
 import os
 import re
 import logging
+import tempfile
+import functools
 import subprocess
 from typing import Dict, List, Optional, Tuple
-from dataclasses import dataclass
+from dataclasses import dataclass, field
 from pathlib import Path
 
 from healing_config import config
@@ -24,6 +26,96 @@ class FixResult:
     changes_made: List[str]
     validation_passed: bool
     error_message: Optional[str] = None
+    # Fixed content of each file in files_modified
+    file_contents: Dict[str, str] = field(default_factory=dict)
+
+class WorkflowChangeSet:
+    """In-memory copy of the workflow files, edited by several fix strategies.
+
+    Each file is read once. Strategies edit the copy, and write() puts all
+    modified files in place together: every new version is written to a
+    temporary file first and then renamed over the original, and files
+    already replaced are restored if a later step fails.
+    """
+
+    def __init__(self, repo_root: Path, workflow_files: List[str]):
+        self.repo_root = repo_root
+        self.files: Dict[str, str] = {}
+        for workflow_file in workflow_files:
+            file_path = repo_root / workflow_file
+            if file_path.exists():
+                with open(file_path, 'r', encoding='utf-8') as f:
+                    self.files[workflow_file] = f.read()
+        self.original = dict(self.files)
+
+    def paths(self) -> List[str]:
+        return list(self.files)
+
+    def read(self, workflow_file: str) -> str:
+        return self.files[workflow_file]
+
+    def update(self, workflow_file: str, content: str) -> bool:
+        """Replace the content of a file; returns whether it changed."""
+        if content == self.files[workflow_file]:
+            return False
+        self.files[workflow_file] = content
+        return True
+
+    def snapshot(self) -> Dict[str, str]:
+        return dict(self.files)
+
+    def restore(self, snapshot: Dict[str, str]) -> None:
+        self.files = dict(snapshot)
+
+    def modified_files(self) -> List[str]:
+        return [path for path, content in self.files.items() if content != self.original[path]]
+
+    def write(self) -> List[str]:
+        """Write all modified files to disk and return their paths."""
+        modified = self.modified_files()
+        temp_files = {}
+        replaced = []
+        try:
+            for workflow_file in modified:
+                file_path = self.repo_root / workflow_file
+                fd, temp_path = tempfile.mkstemp(dir=file_path.parent, prefix=f'.{file_path.name}.',
+                                                 suffix='.tmp')
+                temp_files[workflow_file] = temp_path
+                with os.fdopen(fd, 'w', encoding='utf-8') as f:
+                    f.write(self.files[workflow_file])
+                os.chmod(temp_path, file_path.stat().st_mode & 0o777)
+
+            for workflow_file in modified:
+                os.replace(temp_files[workflow_file], self.repo_root / workflow_file)
+                del temp_files[workflow_file]
+                replaced.append(workflow_file)
+        except OSError:
+            for temp_path in temp_files.values():
+                if os.path.exists(temp_path):
+                    os.unlink(temp_path)
+            for workflow_file in replaced:
+                with open(self.repo_root / workflow_file, 'w', encoding='utf-8') as f:
+                    f.write(self.original[workflow_file])
+            raise
+
+        self.original.update((workflow_file, self.files[workflow_file]) for workflow_file in modified)
+        return modified
+
+def _batched(method):
+    """Let a _fix_* method run on its own as a batch of one.
+
+    Called with a change set, the method only edits it. Called without
+    one, the workflow files are loaded, edited, written and validated.
+    """
+    @functools.wraps(method)
+    def wrapper(self, analysis: ErrorAnalysis, change_set: Optional[WorkflowChangeSet] = None) -> FixResult:
+        if change_set is not None:
+            return method(self, analysis, change_set)
+        change_set = self._load_change_set()
+        result = method(self, analysis, change_set)
+        self._write_and_validate(change_set, [result])
+        return result
+    return wrapper
 
 class FixStrategies:
     """Implements automated fix strategies for common workflow errors."""
@@ -32,13 +124,19 @@ class FixStrategies:
         self.logger = logging.getLogger(__name__)
         self.repo_root = Path.cwd()
 
-    def apply_fixes(self, analysis: ErrorAnalysis) -> List[FixResult]:
-        """Apply appropriate fix strategies based on error analysis."""
+    def apply_fixes(self, analysis: ErrorAnalysis, write: bool = True) -> List[FixResult]:
+        """Apply appropriate fix strategies based on error analysis.
+
+        With write=False the checkout is left alone: the edits are validated
+        in a temporary copy and only returned in the results' file_contents.
+        """
         if not analysis.is_solvable:
             self.logger.warning("Analysis indicates errors are not solvable")
             return []
 
         results = []
+        # All strategies edit one in-memory copy, written and validated once
+        change_set = self._load_change_set()
 
         # Apply fixes in priority order
         for category in sorted(analysis.error_categories,
@@ -47,7 +145,7 @@ class FixStrategies:
             if category in config.fix_strategies:
                 self.logger.info(f"Applying fix strategy for category: {category}")
 
-                fix_result = self._apply_category_fix(category, analysis)
+                fix_result = self._apply_category_fix(category, analysis, change_set)
                 if fix_result:
                     results.append(fix_result)
 
@@ -56,28 +154,33 @@ class FixStrategies:
                         self.logger.error(f"Critical fix failure for {category}: {fix_result.error_message}")
                         break
 
+        self._write_and_validate(change_set, results, write)
         return results
 
-    def _apply_category_fix(self, category: str, analysis: ErrorAnalysis) -> Optional[FixResult]:
+    def _apply_category_fix(self, category: str, analysis: ErrorAnalysis,
+                            change_set: WorkflowChangeSet) -> Optional[FixResult]:
         """Apply fix strategy for a specific error category."""
+        # A strategy that fails halfway leaves no edits behind
+        snapshot = change_set.snapshot()
         try:
             if category == 'latex_action_version':
-                return self._fix_latex_action_version(analysis)
+                return self._fix_latex_action_version(analysis, change_set)
             elif category == 'package_missing':
-                return self._fix_missing_packages(analysis)
+                return self._fix_missing_packages(analysis, change_set)
             elif category == 'timeout':
-                return self._fix_timeouts(analysis)
+                return self._fix_timeouts(analysis, change_set)
             elif category == 'dependency_error':
-                return self._fix_dependency_errors(analysis)
+                return self._fix_dependency_errors(analysis, change_set)
             elif category == 'font_error':
-                return self._fix_font_errors(analysis)
+                return self._fix_font_errors(analysis, change_set)
             elif category == 'workflow_syntax':
-                return self._fix_workflow_syntax(analysis)
+                return self._fix_workflow_syntax(analysis, change_set)
             else:
                 self.logger.warning(f"No fix strategy implemented for category: {category}")
                 return None
 
         except Exception as e:
+            change_set.restore(snapshot)
             self.logger.error(f"Error applying fix for category {category}: {e}")
             return FixResult(
                 success=False,
@@ -88,51 +191,39 @@ class FixStrategies:
                 error_message=str(e)
             )
 
-    def _fix_latex_action_version(self, analysis: ErrorAnalysis) -> FixResult:
+    @_batched
+    def _fix_latex_action_version(self, analysis: ErrorAnalysis, change_set: WorkflowChangeSet) -> FixResult:
         """Fix LaTeX action version issues."""
-        workflow_files = self._find_workflow_files()
         files_modified = []
         changes_made = []
 
         fallback_version = config.fix_strategies['latex_action_version']['fallback_version']
 
-        for workflow_file in workflow_files:
-            file_path = self.repo_root / workflow_file
-
-            if not file_path.exists():
-                continue
-
-            with open(file_path, 'r') as f:
-                content = f.read()
+        for workflow_file in change_set.paths():
+            content = change_set.read(workflow_file)
 
             # Find and replace dante-ev/latex-action versions
             pattern = r'(uses:\s*dante-ev/latex-action@)(v?[\d\.]+)'
             matches = re.findall(pattern, content)
 
             if matches:
-                old_content = content
                 content = re.sub(pattern, f'\\1{fallback_version}', content)
 
-                if content != old_content:
-                    with open(file_path, 'w') as f:
-                        f.write(content)
-
+                if change_set.update(workflow_file, content):
                     files_modified.append(str(workflow_file))
                     changes_made.append(f"Updated LaTeX action to {fallback_version} in {workflow_file}")
                     self.logger.info(f"Updated LaTeX action version in {workflow_file}")
 
-        # Validate the changes
-        validation_passed = self._validate_changes(files_modified)
-
         return FixResult(
             success=len(files_modified) > 0,
             description=f"Updated LaTeX action versions to {fallback_version}",
             files_modified=files_modified,
             changes_made=changes_made,
-            validation_passed=validation_passed
+            validation_passed=True  # Replaced by the batch validation
         )
 
-    def _fix_missing_packages(self, analysis: ErrorAnalysis) -> FixResult:
+    @_batched
+    def _fix_missing_packages(self, analysis: ErrorAnalysis, change_set: WorkflowChangeSet) -> FixResult:
         """Fix missing LaTeX packages by updating workflow dependencies."""
         # Extract missing package names from errors
         missing_packages = set()
@@ -167,19 +258,12 @@ class FixStrategies:
             )
 
         # Update workflow files to include missing packages
-        workflow_files = self._find_workflow_files()
         files_modified = []
         changes_made = []
 
-        for workflow_file in workflow_files:
+        for workflow_file in change_set.paths():
             if 'latex-build' in workflow_file:  # Only update the main LaTeX build workflow
-                file_path = self.repo_root / workflow_file
-
-                if not file_path.exists():
-                    continue
-
-                with open(file_path, 'r') as f:
-                    content = f.read()
+                content = change_set.read(workflow_file)
 
                 # Find the extra_system_packages section
                 package_section_pattern = r'(extra_system_packages:\s*\|)([^-]*?)(\n\s*-?\s*\n|\n\s*[a-zA-Z]|\Z)'
@@ -200,39 +284,29 @@ class FixStrategies:
 
                         new_content = content.replace(match.group(2), new_packages + '\n            ')
 
-                        with open(file_path, 'w') as f:
-                            f.write(new_content)
-
-                        files_modified.append(str(workflow_file))
-                        changes_made.extend([f"Added package {pkg}" for pkg in packages_to_add])
-                        self.logger.info(f"Added {len(packages_to_add)} packages to {workflow_file}")
-
-        validation_passed = self._validate_changes(files_modified)
+                        if change_set.update(workflow_file, new_content):
+                            files_modified.append(str(workflow_file))
+                            changes_made.extend([f"Added package {pkg}" for pkg in packages_to_add])
+                            self.logger.info(f"Added {len(packages_to_add)} packages to {workflow_file}")
 
         return FixResult(
             success=len(files_modified) > 0,
             description=f"Added missing LaTeX packages: {', '.join(missing_packages)}",
             files_modified=files_modified,
             changes_made=changes_made,
-            validation_passed=validation_passed
+            validation_passed=True  # Replaced by the batch validation
         )
 
-    def _fix_timeouts(self, analysis: ErrorAnalysis) -> FixResult:
+    @_batched
+    def _fix_timeouts(self, analysis: ErrorAnalysis, change_set: WorkflowChangeSet) -> FixResult:
         """Fix timeout issues by increasing timeout values."""
-        workflow_files = self._find_workflow_files()
         files_modified = []
         changes_made = []
 
         multiplier = config.fix_strategies['timeout']['timeout_multiplier']
 
-        for workflow_file in workflow_files:
-            file_path = self.repo_root / workflow_file
-
-            if not file_path.exists():
-                continue
-
-            with open(file_path, 'r') as f:
-                content = f.read()
+        for workflow_file in change_set.paths():
+            content = change_set.read(workflow_file)
 
             # Find and increase timeout-minutes values
             timeout_pattern = r'timeout-minutes:\s*(\d+)'
@@ -242,41 +316,29 @@ class FixStrategies:
                 new_timeout = max(int(current_timeout * multiplier), current_timeout + 5)
                 return f'timeout-minutes: {new_timeout}'
 
-            old_content = content
             content = re.sub(timeout_pattern, increase_timeout, content)
 
-            if content != old_content:
-                with open(file_path, 'w') as f:
-                    f.write(content)
-
+            if change_set.update(workflow_file, content):
                 files_modified.append(str(workflow_file))
                 changes_made.append(f"Increased timeouts by {multiplier}x in {workflow_file}")
                 self.logger.info(f"Increased timeouts in {workflow_file}")
 
-        validation_passed = self._validate_changes(files_modified)
-
         return FixResult(
             success=len(files_modified) > 0,
             description=f"Increased timeout values by factor of {multiplier}",
             files_modified=files_modified,
             changes_made=changes_made,
-            validation_passed=validation_passed
+            validation_passed=True  # Replaced by the batch validation
         )
 
-    def _fix_dependency_errors(self, analysis: ErrorAnalysis) -> FixResult:
+    @_batched
+    def _fix_dependency_errors(self, analysis: ErrorAnalysis, change_set: WorkflowChangeSet) -> FixResult:
         """Fix Python dependency errors."""
-        workflow_files = self._find_workflow_files()
         files_modified = []
         changes_made = []
 
-        for workflow_file in workflow_files:
-            file_path = self.repo_root / workflow_file
-
-            if not file_path.exists():
-                continue
-
-            with open(file_path, 'r') as f:
-                content = f.read()
+        for workflow_file in change_set.paths():
+            content = change_set.read(workflow_file)
 
             # Look for pip install commands and add upgrade flags
             pip_pattern = r'(pip install)([^|&\n]*)'
@@ -288,7 +350,6 @@ class FixStrategies:
                     return f'{install_cmd} --upgrade{packages}'
                 return match.group(0)
 
-            old_content = content
             content = re.sub(pip_pattern, upgrade_pip_install, content)
 
             # Also ensure pip itself is upgraded
@@ -299,41 +360,30 @@ class FixStrategies:
                     1  # Only replace the first occurrence
                 )
 
-            if content != old_content:
-                with open(file_path, 'w') as f:
-                    f.write(content)
-
+            if change_set.update(workflow_file, content):
                 files_modified.append(str(workflow_file))
                 changes_made.append(f"Added pip upgrade flags in {workflow_file}")
                 self.logger.info(f"Updated pip install commands in {workflow_file}")
 
-        validation_passed = self._validate_changes(files_modified)
-
         return FixResult(
             success=len(files_modified) > 0,
             description="Updated Python dependency installation with upgrade flags",
             files_modified=files_modified,
             changes_made=changes_made,
-            validation_passed=validation_passed
+            validation_passed=True  # Replaced by the batch validation
         )
 
-    def _fix_font_errors(self, analysis: ErrorAnalysis) -> FixResult:
+    @_batched
+    def _fix_font_errors(self, analysis: ErrorAnalysis, change_set: WorkflowChangeSet) -> FixResult:
         """Fix FontAwesome and font-related errors."""
         # This is primarily handled by the package installation fix
         # But we can also check for FontAwesome-specific issues
-        workflow_files = self._find_workflow_files()
         files_modified = []
         changes_made = []
 
-        for workflow_file in workflow_files:
+        for workflow_file in change_set.paths():
             if 'latex-build' in workflow_file:
-                file_path = self.repo_root / workflow_file
-
-                if not file_path.exists():
-                    continue
-
-                with open(file_path, 'r') as f:
-                    content = f.read()
+                content = change_set.read(workflow_file)
 
                 # Ensure FontAwesome packages are included
                 fontawesome_packages = [
@@ -359,39 +409,27 @@ class FixStrategies:
 
                         new_content = content.replace(match.group(2), new_packages + '\n            ')
 
-                        with open(file_path, 'w') as f:
-                            f.write(new_content)
-
-                        files_modified.append(str(workflow_file))
-                        changes_made.extend([f"Added FontAwesome package {pkg}" for pkg in packages_to_add])
-                        self.logger.info(f"Added FontAwesome packages to {workflow_file}")
-
-        validation_passed = self._validate_changes(files_modified)
+                        if change_set.update(workflow_file, new_content):
+                            files_modified.append(str(workflow_file))
+                            changes_made.extend([f"Added FontAwesome package {pkg}" for pkg in packages_to_add])
+                            self.logger.info(f"Added FontAwesome packages to {workflow_file}")
 
         return FixResult(
             success=len(files_modified) > 0,
             description="Added FontAwesome and font packages",
             files_modified=files_modified,
             changes_made=changes_made,
-            validation_passed=validation_passed
+            validation_passed=True  # Replaced by the batch validation
         )
 
-    def _fix_workflow_syntax(self, analysis: ErrorAnalysis) -> FixResult:
+    @_batched
+    def _fix_workflow_syntax(self, analysis: ErrorAnalysis, change_set: WorkflowChangeSet) -> FixResult:
         """Fix basic workflow syntax issues."""
-        workflow_files = self._find_workflow_files()
         files_modified = []
         changes_made = []
 
-        for workflow_file in workflow_files:
-            file_path = self.repo_root / workflow_file
-
-            if not file_path.exists():
-                continue
-
-            with open(file_path, 'r') as f:
-                content = f.read()
-
-            old_content = content
+        for workflow_file in change_set.paths():
+            content = change_set.read(workflow_file)
 
             # Fix common YAML syntax issues
             # Ensure proper quoting of 'on:' keyword
@@ -400,24 +438,53 @@ class FixStrategies:
             # Fix indentation issues (basic)
             content = re.sub(r'^\s\s([a-zA-Z])', r'  \1', content, flags=re.MULTILINE)
 
-            if content != old_content:
-                with open(file_path, 'w') as f:
-                    f.write(content)
-
+            if change_set.update(workflow_file, content):
                 files_modified.append(str(workflow_file))
                 changes_made.append(f"Fixed YAML syntax in {workflow_file}")
                 self.logger.info(f"Fixed workflow syntax in {workflow_file}")
 
-        validation_passed = self._validate_changes(files_modified)
-
         return FixResult(
             success=len(files_modified) > 0,
             description="Fixed workflow YAML syntax issues",
             files_modified=files_modified,
             changes_made=changes_made,
-            validation_passed=validation_passed
+            validation_passed=True  # Replaced by the batch validation
         )
 
+    def _load_change_set(self) -> WorkflowChangeSet:
+        """Load the workflow files for a batch of fixes."""
+        return WorkflowChangeSet(self.repo_root, self._find_workflow_files())
+
+    def _write_and_validate(self, change_set: WorkflowChangeSet, results: List[FixResult],
+                            write: bool = True) -> None:
+        """Write the edits of a batch and validate them with a single run."""
+        for result in results:
+            result.file_contents = {path: change_set.read(path) for path in result.files_modified}
+
+        if not write:
+            validation_passed = self._validate_change_set(change_set)
+            for result in results:
+                if result.files_modified:
+                    result.validation_passed = validation_passed
+            return
+
+        try:
+            modified_files = change_set.write()
+        except OSError as e:
+            # write() already put back the files it replaced
+            self.logger.error(f"Failed to write fixed workflow files: {e}")
+            for result in results:
+                if result.files_modified:
+                    result.success = False
+                    result.validation_passed = False
+                    result.error_message = str(e)
+            return
+
+        validation_passed = self._validate_changes(modified_files)
+        for result in results:
+            if result.files_modified:
+                result.validation_passed = validation_passed
+
     def _find_workflow_files(self) -> List[str]:
         """Find all workflow files in the repository."""
         workflow_dir = self.repo_root / '.github' / 'workflows'
@@ -432,18 +499,36 @@ class FixStrategies:
 
         return workflow_files
 
-    def _validate_changes(self, modified_files: List[str]) -> bool:
-        """Validate changes using existing validation tools."""
+    def _validate_change_set(self, change_set: WorkflowChangeSet) -> bool:
+        """Validate the edits of a batch in a temporary copy of the workflow files."""
+        modified_files = change_set.modified_files()
+        if not modified_files:
+            return True
+
+        with tempfile.TemporaryDirectory() as temp_dir:
+            for workflow_file in change_set.paths():
+                file_path = Path(temp_dir) / workflow_file
+                file_path.parent.mkdir(parents=True, exist_ok=True)
+                with open(file_path, 'w', encoding='utf-8') as f:
+                    f.write(change_set.read(workflow_file))
+            return self._validate_changes(modified_files, Path(temp_dir))
+
+    def _validate_changes(self, modified_files: List[str], root: Optional[Path] = None) -> bool:
+        """Validate changes using existing validation tools.
+
+        The validator checks the workflow files below root, the repository
+        root by default.
+        """
         if not modified_files:
             return True
 
         try:
             # Run YAML syntax validation
             result = subprocess.run(
-                ['python3', 'validate_workflow_syntax.py'],
+                ['python3', str(self.repo_root / 'validate_workflow_syntax.py')],
                 capture_output=True,
                 text=True,
-                cwd=self.repo_root,
+                cwd=root or self.repo_root,
                 timeout=60
             )
 
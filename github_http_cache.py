@@ -0,0 +1,233 @@
+#!/usr/bin/env python3
+"""
+GitHub HTTP Cache
+On-disk conditional-request cache shared by the GitHub API clients.
+
+GitHub answers a request carrying If-None-Match or If-Modified-Since with
+304 Not Modified when nothing changed, and 304 responses do not count
+against the rate limit. CachingSession stores every GET response that has
+an ETag or Last-Modified header, revalidates it on the next request, and
+serves the stored body when the answer is 304. Entries expire after a TTL
+and the least recently used entries are evicted beyond a size limit. The
+cache counts its entries, so the directory is only listed once the count
+exceeds the limit, and eviction leaves headroom below it.
+"""
+
+import hashlib
+import json
+import logging
+import os
+import tempfile
+import threading
+import time
+from pathlib import Path
+from typing import Dict, Optional
+
+import requests
+from requests.structures import CaseInsensitiveDict
+from requests.utils import get_encoding_from_headers
+
+logger = logging.getLogger(__name__)
+
+DEFAULT_CACHE_DIR = Path('.ctmm_cache') / 'http'
+DEFAULT_TTL_SECONDS = 24 * 3600
+DEFAULT_MAX_ENTRIES = 2000
+CACHE_VERSION = 1
+
+# Headers describing the transfer, not the cached body
+_TRANSFER_HEADERS = {'content-encoding', 'content-length', 'transfer-encoding', 'connection'}
+# Request headers the response varies on
+_VARY_HEADERS = ('Accept', 'Authorization')
+
+
+class HTTPCache:
+    """Stores validated GET responses as one file per URL.
+
+    Each file holds a JSON header line (URL, status, headers, validators,
+    store time) followed by the raw body. Files are replaced atomically,
+    so concurrent threads and processes can share the directory. The file
+    modification time records the last use and drives LRU eviction.
+    """
+
+    def __init__(self, cache_dir=DEFAULT_CACHE_DIR, ttl_seconds: float = DEFAULT_TTL_SECONDS,
+                 max_entries: int = DEFAULT_MAX_ENTRIES):
+        self.cache_dir = Path(cache_dir)
+        self.ttl_seconds = ttl_seconds
+        self.max_entries = max_entries
+        self.hits = 0
+        self.misses = 0
+        # Entries on disk, counted on the first store
+        self._entries: Optional[int] = None
+        self._lock = threading.Lock()
+
+    @staticmethod
+    def key(request: requests.PreparedRequest) -> str:
+        """Return the cache key of a request: its URL and the headers it varies on."""
+        digest = hashlib.sha256(request.url.encode('utf-8'))
+        for name in _VARY_HEADERS:
+            digest.update(b'\0' + (request.headers.get(name) or '').encode('utf-8'))
+        return digest.hexdigest()
+
+    def _path(self, key: str) -> Path:
+        return self.cache_dir / f"{key}.http"
+
+    def get(self, key: str) -> Optional[Dict]:
+        """Return the stored entry for key, or None if missing or expired."""
+        path = self._path(key)
+        try:
+            with open(path, 'rb') as f:
+                header, _, body = f.read().partition(b'\n')
+            entry = json.loads(header)
+        except (OSError, ValueError):
+            return None
+        if entry.get('version') != CACHE_VERSION:
+            return None
+        if time.time() - entry.get('stored_at', 0) > self.ttl_seconds:
+            path.unlink(missing_ok=True)
+            with self._lock:
+                if self._entries:
+                    self._entries -= 1
+            return None
+        entry['body'] = body
+        return entry
+
+    def record(self, hit: bool) -> None:
+        """Count a request served from the cache (hit) or by a full response."""
+        with self._lock:
+            if hit:
+                self.hits += 1
+            else:
+                self.misses += 1
+
+    def touch(self, key: str) -> None:
+        """Mark an entry as used for LRU eviction."""
+        try:
+            os.utime(self._path(key))
+        except OSError:
+            pass
+
+    def store(self, key: str, response: requests.Response) -> None:
+        """Store a response that carries an ETag or Last-Modified validator."""
+        headers = {name: value for name, value in response.headers.items()
+                   if name.lower() not in _TRANSFER_HEADERS}
+        entry = {
+            'version': CACHE_VERSION,
+            'url': response.url,
+            'status': response.status_code,
+            'reason': response.reason,
+            'headers': headers,
+            'etag': response.headers.get('ETag'),
+            'last_modified': response.headers.get('Last-Modified'),
+            'stored_at': time.time(),
+        }
+        path = self._path(key)
+        try:
+            self.cache_dir.mkdir(parents=True, exist_ok=True)
+            is_new = not path.exists()
+            fd, temp_path = tempfile.mkstemp(dir=self.cache_dir, suffix='.tmp')
+            with os.fdopen(fd, 'wb') as f:
+                f.write(json.dumps(entry).encode('utf-8') + b'\n' + response.content)
+            os.replace(temp_path, path)
+        except OSError as e:
+            logger.debug("Could not cache %s: %s", response.url, e)
+            return
+
+        with self._lock:
+            if self._entries is None:
+                self._entries = self._count()
+            elif is_new:
+                self._entries += 1
+            if self._entries > self.max_entries:
+                self._evict()
+
+    def _count(self) -> int:
+        try:
+            return sum(1 for entry in os.scandir(self.cache_dir) if entry.name.endswith('.http'))
+        except OSError:
+            return 0
+
+    def _evict(self) -> None:
+        """Delete the least recently used entries down to 90% of max_entries.
+
+        Called with the lock held. Listing the directory also corrects the
+        count for entries that other processes added or removed.
+        """
+        try:
+            entries = [(entry.stat().st_mtime, entry.path) for entry in os.scandir(self.cache_dir)
+                       if entry.name.endswith('.http')]
+        except OSError:
+            return
+        keep = self.max_entries - self.max_entries // 10
+        entries.sort()
+        evicted = 0
+        for _, path in entries[:max(0, len(entries) - keep)]:
+            try:
+                os.unlink(path)
+                evicted += 1
+            except OSError:
+                pass
+        self._entries = len(entries) - evicted
+
+    def clear(self) -> None:
+        for path in self.cache_dir.glob('*.http'):
+            path.unlink(missing_ok=True)
+        with self._lock:
+            self._entries = None
+
+
+class CachingSession(requests.Session):
+    """requests.Session that revalidates GET responses against an HTTPCache.
+
+    Streamed requests are passed through untouched, since their body is not
+    read here. A response served from the cache has from_cache set to True
+    and carries the headers of the 304, so rate-limit headers stay current.
+    """
+
+    def __init__(self, cache: Optional[HTTPCache] = None):
+        super().__init__()
+        self.cache = cache if cache is not None else HTTPCache()
+
+    def send(self, request: requests.PreparedRequest, **kwargs) -> requests.Response:
+        if request.method != 'GET' or kwargs.get('stream'):
+            return super().send(request, **kwargs)
+
+        key = self.cache.key(request)
+        entry = self.cache.get(key)
+        if entry is not None:
+            if entry['etag']:
+                request.headers['If-None-Match'] = entry['etag']
+            if entry['last_modified']:
+                request.headers['If-Modified-Since'] = entry['last_modified']
+
+        response = super().send(request, **kwargs)
+
+        if response.status_code == 304 and entry is not None:
+            self.cache.record(hit=True)
+            self.cache.touch(key)
+            return self._cached_response(entry, request, response)
+
+        self.cache.record(hit=False)
+        if response.status_code == 200 and ('ETag' in response.headers
+                                            or 'Last-Modified' in response.headers):
+            self.cache.store(key, response)
+        return response
+
+    @staticmethod
+    def _cached_response(entry: Dict, request: requests.PreparedRequest,
+                         not_modified: requests.Response) -> requests.Response:
+        response = requests.Response()
+        response.status_code = entry['status']
+        response.reason = entry.get('reason')
+        response.headers = CaseInsensitiveDict(entry['headers'])
+        for name, value in not_modified.headers.items():
+            if name.lower() not in _TRANSFER_HEADERS:
+                response.headers[name] = value
+        response._content = entry['body']
+        response.encoding = get_encoding_from_headers(response.headers)
+        response.url = request.url
+        response.request = request
+        response.elapsed = not_modified.elapsed
+        response.connection = not_modified.connection
+        response.from_cache = True
+        not_modified.close()
+        return response
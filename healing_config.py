@@ -16,6 +16,21 @@ class HealingConfig:
         self.repo_owner = os.environ.get('GITHUB_REPOSITORY_OWNER', 'Darkness308')
         self.repo_name = os.environ.get('GITHUB_REPOSITORY_NAME', 'CTMM---PDF-in-LaTex')
         self.api_base_url = 'https://api.github.com'
+        self.api_max_workers = 8             # Concurrent API requests
+        self.api_max_retries = 5             # Retries after rate limits or server errors
+        self.api_max_backoff_seconds = 900   # Longest wait for a rate limit reset
+
+        # Conditional-request cache for GitHub API responses (ETag / Last-Modified)
+        self.http_cache_enabled = True
+        self.http_cache_dir = '.ctmm_cache/http'
+        self.http_cache_ttl_hours = 24
+        self.http_cache_max_entries = 2000
+
+        # Webhook receiver for workflow_run events (event-driven healing)
+        self.webhook_secret = os.environ.get('GITHUB_WEBHOOK_SECRET')
+        self.webhook_host = '127.0.0.1'
+        self.webhook_port = 8787
+        self.webhook_queue_size = 100     # Failed runs waiting for a worker
 
         # Workflow Monitoring Settings
         self.max_workflow_age_hours = 24  # Only analyze workflows from last 24 hours
@@ -110,6 +125,8 @@ class HealingConfig:
         self.max_concurrent_prs = 3    # Max open healing PRs at once
         self.cooldown_minutes = 30     # Wait time between healing attempts
         self.max_iterations_per_run = 10  # Safety limit for single execution
+        self.healing_max_workers = 4   # Workflow runs fetched and analyzed in parallel
+        self.healing_store_path = '.ctmm_cache/healing.db'  # Analyses and attempts across runs
 
         # Logging Configuration
         self.log_level = 'INFO'
@@ -134,6 +151,16 @@ class HealingConfig:
             r'Rate limit exceeded'
         ]
 
+    def create_api_session(self):
+        """Create a requests session for the GitHub API, cached if enabled."""
+        import requests
+        if not self.http_cache_enabled:
+            return requests.Session()
+        from github_http_cache import CachingSession, HTTPCache
+        return CachingSession(HTTPCache(self.http_cache_dir,
+                                        ttl_seconds=self.http_cache_ttl_hours * 3600,
+                                        max_entries=self.http_cache_max_entries))
+
     def get_workflow_file_path(self, workflow_name: str) -> str:
         """Get the full path to a workflow file."""
         return f".github/workflows/{workflow_name}"
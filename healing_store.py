@@ -0,0 +1,172 @@
+#!/usr/bin/env python3
+"""
+Healing Store - Persistent Analysis and Attempt Tracking
+SQLite store for error analyses, fix results and healing attempts.
+
+Entries are keyed by workflow run ID and head SHA, so a failed run is
+downloaded and analyzed only once, even across separate healing processes.
+The attempt history gives max_healing_attempts and cooldown_minutes
+durable state.
+"""
+
+import json
+import logging
+import sqlite3
+import threading
+import time
+from dataclasses import asdict
+from pathlib import Path
+from typing import List, Optional
+
+from healing_config import config
+from error_analyzer import ErrorAnalysis, ErrorInstance
+from fix_strategies import FixResult
+
+SCHEMA = """
+CREATE TABLE IF NOT EXISTS analyses (
+    run_id INTEGER NOT NULL,
+    head_sha TEXT NOT NULL,
+    workflow_name TEXT NOT NULL,
+    analysis TEXT NOT NULL,
+    created_at REAL NOT NULL,
+    PRIMARY KEY (run_id, head_sha)
+);
+CREATE TABLE IF NOT EXISTS fix_results (
+    run_id INTEGER NOT NULL,
+    head_sha TEXT NOT NULL,
+    position INTEGER NOT NULL,
+    result TEXT NOT NULL,
+    created_at REAL NOT NULL,
+    PRIMARY KEY (run_id, head_sha, position)
+);
+CREATE TABLE IF NOT EXISTS attempts (
+    id INTEGER PRIMARY KEY AUTOINCREMENT,
+    workflow_name TEXT NOT NULL,
+    run_id INTEGER NOT NULL,
+    head_sha TEXT NOT NULL,
+    outcome TEXT NOT NULL,
+    attempted_at REAL NOT NULL
+);
+CREATE INDEX IF NOT EXISTS attempts_by_workflow ON attempts (workflow_name, head_sha);
+CREATE INDEX IF NOT EXISTS attempts_by_run ON attempts (run_id);
+"""
+
+# Attempt outcomes after which a run is not healed again
+FINAL_OUTCOMES = ('pr_created',)
+
+
+class HealingStore:
+    """Stores analyses, fix results and healing attempts in SQLite."""
+
+    def __init__(self, db_path: Optional[str] = None):
+        self.logger = logging.getLogger(__name__)
+        self.db_path = Path(db_path or config.healing_store_path)
+        self._connection: Optional[sqlite3.Connection] = None
+        self._lock = threading.Lock()
+
+    def _connect(self) -> sqlite3.Connection:
+        """Open the database on first use."""
+        if self._connection is None:
+            self.db_path.parent.mkdir(parents=True, exist_ok=True)
+            connection = sqlite3.connect(str(self.db_path), timeout=30, check_same_thread=False)
+            # WAL lets a reader in one process run while another process writes
+            connection.execute('PRAGMA journal_mode=WAL')
+            connection.executescript(SCHEMA)
+            self._connection = connection
+        return self._connection
+
+    def _execute(self, sql: str, params: tuple = ()) -> List[tuple]:
+        with self._lock:
+            connection = self._connect()
+            with connection:
+                return connection.execute(sql, params).fetchall()
+
+    def close(self) -> None:
+        with self._lock:
+            if self._connection is not None:
+                self._connection.close()
+                self._connection = None
+
+    # Analyses
+
+    def get_analysis(self, run_id: int, head_sha: str) -> Optional[ErrorAnalysis]:
+        """Return the stored analysis of a workflow run, if any."""
+        rows = self._execute('SELECT analysis FROM analyses WHERE run_id = ? AND head_sha = ?',
+                             (run_id, head_sha))
+        if not rows:
+            return None
+        data = json.loads(rows[0][0])
+        data['error_categories'] = set(data['error_categories'])
+        data['errors'] = [ErrorInstance(**error) for error in data['errors']]
+        return ErrorAnalysis(**data)
+
+    def save_analysis(self, analysis: ErrorAnalysis, head_sha: str) -> None:
+        """Store the analysis of a workflow run."""
+        data = asdict(analysis)
+        data['error_categories'] = sorted(analysis.error_categories)
+        self._execute('INSERT OR REPLACE INTO analyses VALUES (?, ?, ?, ?, ?)',
+                      (analysis.workflow_run_id, head_sha, analysis.workflow_name,
+                       json.dumps(data), time.time()))
+
+    # Fix results
+
+    def get_fix_results(self, run_id: int, head_sha: str) -> List[FixResult]:
+        """Return the fix results stored for a workflow run, in order."""
+        rows = self._execute('SELECT result FROM fix_results WHERE run_id = ? AND head_sha = ? '
+                             'ORDER BY position', (run_id, head_sha))
+        return [FixResult(**json.loads(row[0])) for row in rows]
+
+    def save_fix_results(self, run_id: int, head_sha: str, results: List[FixResult]) -> None:
+        """Replace the fix results stored for a workflow run."""
+        now = time.time()
+        with self._lock:
+            connection = self._connect()
+            with connection:
+                connection.execute('DELETE FROM fix_results WHERE run_id = ? AND head_sha = ?',
+                                   (run_id, head_sha))
+                connection.executemany('INSERT INTO fix_results VALUES (?, ?, ?, ?, ?)',
+                                       [(run_id, head_sha, position, json.dumps(asdict(result)), now)
+                                        for position, result in enumerate(results)])
+
+    # Healing attempts
+
+    def record_attempt(self, workflow_name: str, run_id: int, head_sha: str, outcome: str) -> None:
+        """Record a healing attempt and its outcome ('pr_created', 'pr_failed', 'fix_failed')."""
+        self._execute('INSERT INTO attempts (workflow_name, run_id, head_sha, outcome, attempted_at) '
+                      'VALUES (?, ?, ?, ?, ?)', (workflow_name, run_id, head_sha, outcome, time.time()))
+
+    def attempt_count(self, workflow_name: str, head_sha: str) -> int:
+        """Number of healing attempts for a workflow at a commit."""
+        rows = self._execute('SELECT COUNT(*) FROM attempts WHERE workflow_name = ? AND head_sha = ?',
+                             (workflow_name, head_sha))
+        return rows[0][0]
+
+    def last_attempt_time(self, workflow_name: str) -> Optional[float]:
+        """Time of the latest healing attempt for a workflow, as a Unix timestamp."""
+        rows = self._execute('SELECT MAX(attempted_at) FROM attempts WHERE workflow_name = ?',
+                             (workflow_name,))
+        return rows[0][0]
+
+    def run_outcomes(self, run_id: int) -> List[str]:
+        """Outcomes of all healing attempts for a workflow run, oldest first."""
+        rows = self._execute('SELECT outcome FROM attempts WHERE run_id = ? ORDER BY id', (run_id,))
+        return [row[0] for row in rows]
+
+    def healing_blocked_reason(self, workflow_name: str, run_id: int, head_sha: str,
+                               now: Optional[float] = None) -> Optional[str]:
+        """Return why a run must not be healed now, or None if it may be."""
+        if any(outcome in FINAL_OUTCOMES for outcome in self.run_outcomes(run_id)):
+            return f"run {run_id} was already healed"
+
+        attempts = self.attempt_count(workflow_name, head_sha)
+        if attempts >= config.max_healing_attempts:
+            return f"{attempts} healing attempts for {head_sha[:7]} (limit {config.max_healing_attempts})"
+
+        last_attempt = self.last_attempt_time(workflow_name)
+        if last_attempt is not None:
+            elapsed = (now if now is not None else time.time()) - last_attempt
+            remaining = config.cooldown_minutes * 60 - elapsed
+            if remaining > 0:
+                return f"cooldown active for {remaining / 60:.0f} more minutes"
+
+        return None
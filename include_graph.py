@@ -0,0 +1,286 @@
+#!/usr/bin/env python3
+"""
+CTMM Include Graph
+Dependency graph from main.tex through style packages to nested module inputs.
+
+scan_references() only sees the \\usepackage{style/...} and
+\\input{modules/...} lines of main.tex. This module follows the whole chain:
+\\RequirePackage lines inside style/*.sty, \\input/\\include lines nested
+inside modules, and which macros, environments and colours every module
+takes from which style file. From the include chain it answers the
+question a commit hook actually asks: given these changed files, which
+modules have to be re-tested? Any change to main.tex or a style it loads
+re-tests them all. The symbol uses are informational: they are listed
+per module and in --json, but do not narrow the re-test set.
+
+Usage:
+    python3 include_graph.py [--main-tex main.tex] [--json]
+    python3 include_graph.py --changed style/ctmm-design.sty
+    python3 include_graph.py --changed-since HEAD~1
+"""
+
+import argparse
+import json
+import logging
+import re
+import subprocess
+import sys
+from pathlib import Path
+from typing import Dict, Iterable, List, Optional, Set
+
+logger = logging.getLogger(__name__)
+
+PACKAGE_PATTERN = re.compile(r'\\(?:usepackage|RequirePackage)\s*(?:\[[^\]]*\])?\s*\{([^}]+)\}')
+INPUT_PATTERN = re.compile(r'\\(?:input|include)\s*\{([^}]+)\}')
+
+MACRO_DEFINITION_PATTERNS = [
+    re.compile(r'\\(?:re)?newcommand\*?\s*\{?\s*\\([A-Za-z@]+)'),
+    re.compile(r'\\providecommand\*?\s*\{?\s*\\([A-Za-z@]+)'),
+    re.compile(r'\\DeclareRobustCommand\*?\s*\{?\s*\\([A-Za-z@]+)'),
+    re.compile(r'\\(?:New|Renew|Provide|Declare)DocumentCommand\s*\{?\s*\\([A-Za-z@]+)'),
+    re.compile(r'\\(?:newtcbox|DeclareTotalTCBox|newlength)\s*\{?\s*\\([A-Za-z@]+)'),
+    re.compile(r'\\[egx]?def\s*\\([A-Za-z@]+)'),
+    re.compile(r'\\let\s*\\([A-Za-z@]+)'),
+]
+ENVIRONMENT_DEFINITION_PATTERNS = [
+    re.compile(r'\\(?:re)?newenvironment\*?\s*\{([A-Za-z@*]+)\}'),
+    re.compile(r'\\(?:New|Renew|Provide|Declare)DocumentEnvironment\s*\{([A-Za-z@*]+)\}'),
+    re.compile(r'\\(?:re)?newtcolorbox\s*(?:\[[^\]]*\])?\s*\{([A-Za-z@*]+)\}'),
+    re.compile(r'\\DeclareTColorBox\s*\{([A-Za-z@*]+)\}'),
+    re.compile(r'\\newtheorem\*?\s*\{([A-Za-z@*]+)\}'),
+]
+COLOR_DEFINITION_PATTERN = re.compile(r'\\(?:definecolor|colorlet)\s*\{([^}]+)\}')
+
+MACRO_USE_PATTERN = re.compile(r'\\([A-Za-z@]+)')
+ENVIRONMENT_USE_PATTERN = re.compile(r'\\begin\s*\{([A-Za-z@*]+)\}')
+WORD_PATTERN = re.compile(r'[A-Za-z][A-Za-z0-9]*')
+
+
+def strip_comments(content: str) -> str:
+    """Remove TeX comments, keeping escaped \\% signs."""
+    return re.sub(r'(?<!\\)%.*', '', content)
+
+
+def changed_files_since(ref: str, project_root='.') -> List[str]:
+    """Return the files changed between ref and the working tree, via git."""
+    result = subprocess.run(
+        ['git', 'diff', '--name-only', ref, '--'],
+        cwd=project_root,
+        capture_output=True,
+        text=True,
+        check=False
+    )
+    if result.returncode != 0:
+        raise RuntimeError(f"git diff against {ref} failed: {result.stderr.strip()}")
+    return [line for line in result.stdout.splitlines() if line]
+
+
+class IncludeGraph:
+    """Include and symbol dependency graph of a CTMM document."""
+
+    def __init__(self, main_tex_path="main.tex"):
+        self.main_tex_path = Path(main_tex_path)
+        self.project_root = self.main_tex_path.parent
+        self.main = self.main_tex_path.name
+
+        # file -> local files it loads, in source order
+        self.includes: Dict[str, List[str]] = {}
+        # top-level module -> itself plus every file it inputs, transitively
+        self.module_closure: Dict[str, List[str]] = {}
+        # symbol kind -> name -> style files defining it
+        self.definitions: Dict[str, Dict[str, Set[str]]] = {
+            'macro': {}, 'environment': {}, 'color': {}}
+        # top-level module -> style file -> symbols it uses from there
+        # (informational, see affected_modules())
+        self.module_uses: Dict[str, Dict[str, Set[str]]] = {}
+        self.missing: Set[str] = set()
+        self.external_packages: Set[str] = set()
+
+        self.modules: List[str] = []
+        self.style_files: List[str] = []
+
+    def _read(self, relative: str) -> str:
+        try:
+            with open(self.project_root / relative, 'r', encoding='utf-8', errors='replace') as f:
+                return strip_comments(f.read())
+        except OSError as e:
+            logger.debug("Cannot read %s: %s", relative, e)
+            return ''
+
+    def _resolve_package(self, name: str, including_file: str) -> Optional[str]:
+        """Map a package name to a project .sty file, or None for TeX packages."""
+        name = name.strip()
+        candidates = [f"{name}.sty"]
+        including_dir = Path(including_file).parent.as_posix()
+        if including_dir != '.':
+            candidates.append(f"{including_dir}/{name}.sty")
+        if '/' not in name:
+            candidates.append(f"style/{name}.sty")
+        for candidate in candidates:
+            if (self.project_root / candidate).is_file():
+                return candidate
+        if '/' in name:
+            self.missing.add(candidates[0])
+        else:
+            self.external_packages.add(name)
+        return None
+
+    def _resolve_input(self, name: str) -> Optional[str]:
+        name = name.strip()
+        candidate = name if name.endswith('.tex') else f"{name}.tex"
+        if (self.project_root / candidate).is_file():
+            return candidate
+        self.missing.add(candidate)
+        return None
+
+    def _scan(self, relative: str) -> None:
+        """Record what one file loads and defines, then follow its includes."""
+        if relative in self.includes:
+            return
+        content = self._read(relative)
+        self.includes[relative] = []
+
+        if relative.endswith('.sty'):
+            self.style_files.append(relative)
+            self._record_definitions(relative, content)
+
+        loaded = []
+        for match in PACKAGE_PATTERN.finditer(content):
+            for name in match.group(1).split(','):
+                resolved = self._resolve_package(name, relative)
+                if resolved:
+                    loaded.append((match.start(), resolved))
+        for match in INPUT_PATTERN.finditer(content):
+            resolved = self._resolve_input(match.group(1))
+            if resolved:
+                loaded.append((match.start(), resolved))
+
+        for _, dependency in sorted(loaded):
+            if dependency not in self.includes[relative]:
+                self.includes[relative].append(dependency)
+            self._scan(dependency)
+
+    def _record_definitions(self, style_file: str, content: str) -> None:
+        for kind, patterns in (('macro', MACRO_DEFINITION_PATTERNS),
+                               ('environment', ENVIRONMENT_DEFINITION_PATTERNS)):
+            for pattern in patterns:
+                for name in pattern.findall(content):
+                    self.definitions[kind].setdefault(name, set()).add(style_file)
+        for name in COLOR_DEFINITION_PATTERN.findall(content):
+            self.definitions['color'].setdefault(name.strip(), set()).add(style_file)
+
+    def _closure(self, relative: str, seen: Set[str]) -> None:
+        for dependency in self.includes.get(relative, []):
+            if dependency.endswith('.tex') and dependency not in seen:
+                seen.add(dependency)
+                self._closure(dependency, seen)
+
+    def _record_uses(self, module: str) -> None:
+        content = '\n'.join(self._read(path) for path in self.module_closure[module])
+        used = {
+            'macro': set(MACRO_USE_PATTERN.findall(content)),
+            'environment': set(ENVIRONMENT_USE_PATTERN.findall(content)),
+            'color': set(WORD_PATTERN.findall(content)),
+        }
+        uses: Dict[str, Set[str]] = {}
+        for kind, names in used.items():
+            for name in names & self.definitions[kind].keys():
+                for style_file in self.definitions[kind][name]:
+                    uses.setdefault(style_file, set()).add(name)
+        self.module_uses[module] = uses
+
+    def build(self) -> 'IncludeGraph':
+        """Scan main.tex and everything it reaches."""
+        if not self.main_tex_path.exists():
+            raise FileNotFoundError(f"Main TeX file {self.main_tex_path} not found")
+
+        self._scan(self.main)
+        self.modules = [dependency for dependency in self.includes[self.main]
+                        if dependency.endswith('.tex')]
+        for module in self.modules:
+            closure = {module}
+            self._closure(module, closure)
+            self.module_closure[module] = [module] + sorted(closure - {module})
+            self._record_uses(module)
+
+        logger.info("Include graph: %d style files, %d modules, %d nested inputs",
+                    len(self.style_files), len(self.modules),
+                    sum(len(files) - 1 for files in self.module_closure.values()))
+        return self
+
+    def affected_modules(self, changed_files: Iterable[str]) -> List[str]:
+        """Return the modules, in document order, that need re-testing.
+
+        A changed module or nested input affects the modules that include
+        it. A changed main.tex or any style file it loads affects every
+        module: the isolation builds share that preamble, and a style
+        change need not touch a symbol a module uses (lengths, geometry,
+        package options, hooks, or a syntax error) to break them all, so
+        module_uses is not consulted.
+        """
+        affected: Set[str] = set()
+        for changed in changed_files:
+            changed = Path(changed).as_posix()
+            if changed == self.main or changed in self.style_files:
+                return list(self.modules)
+            affected.update(module for module, files in self.module_closure.items()
+                            if changed in files)
+        return [module for module in self.modules if module in affected]
+
+    def to_dict(self) -> Dict:
+        """Return the graph as JSON-serialisable data."""
+        return {
+            'main': self.main,
+            'includes': self.includes,
+            'modules': {
+                module: {
+                    'files': self.module_closure[module],
+                    'uses': {style: sorted(names)
+                             for style, names in sorted(self.module_uses[module].items())},
+                }
+                for module in self.modules
+            },
+            'missing': sorted(self.missing),
+            'external_packages': sorted(self.external_packages),
+        }
+
+
+def main():
+    parser = argparse.ArgumentParser(description='CTMM include and symbol dependency graph')
+    parser.add_argument('--main-tex', default='main.tex',
+                        help='Path to main TeX file (default: main.tex)')
+    parser.add_argument('--changed', nargs='+', metavar='FILE',
+                        help='Print the modules affected by these files')
+    parser.add_argument('--changed-since', metavar='REF',
+                        help='Print the modules affected by changes since a git ref')
+    parser.add_argument('--json', action='store_true',
+                        help='Print the full graph as JSON')
+    args = parser.parse_args()
+
+    logging.basicConfig(level=logging.INFO, format='%(levelname)s: %(message)s')
+
+    graph = IncludeGraph(args.main_tex).build()
+
+    if args.json:
+        print(json.dumps(graph.to_dict(), indent=2, ensure_ascii=False))
+        return 0
+
+    changed = list(args.changed or [])
+    if args.changed_since:
+        changed += changed_files_since(args.changed_since, graph.project_root)
+
+    if args.changed is None and args.changed_since is None:
+        for module in graph.modules:
+            styles = ', '.join(sorted(graph.module_uses[module])) or '-'
+            print(f"{module}: {styles}")
+        if graph.missing:
+            print(f"Missing: {', '.join(sorted(graph.missing))}")
+        return 0
+
+    for module in graph.affected_modules(changed):
+        print(module)
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,143 @@
+#!/usr/bin/env python3
+"""
+CTMM LaTeX Runner
+Runs pdflatex only as many times as the document needs.
+
+Instead of a fixed number of passes, the auxiliary outputs (.aux, .toc,
+.out, .lof, .lot) are hashed before and after every pass, the way latexmk
+does it. Once a pass leaves them unchanged, labels, the table of contents
+and bookmarks are stable and the build is done. An incremental edit that
+does not move any label therefore needs a single pass.
+
+Usage:
+    python3 latex_runner.py [main.tex] [--max-passes N]
+"""
+
+import argparse
+import hashlib
+import logging
+import subprocess
+import sys
+from pathlib import Path
+from typing import Callable, List, Optional, Sequence, Tuple
+
+logger = logging.getLogger(__name__)
+
+AUX_SUFFIXES = ('.aux', '.toc', '.out', '.lof', '.lot')
+DEFAULT_MAX_PASSES = 5
+
+
+def aux_fingerprint(output_base) -> str:
+    """Hash the auxiliary files pdflatex writes next to output_base."""
+    output_base = Path(output_base)
+    digest = hashlib.sha256()
+    for suffix in AUX_SUFFIXES:
+        digest.update(suffix.encode('ascii') + b'\0')
+        aux_file = output_base.with_name(output_base.name + suffix)
+        try:
+            with open(aux_file, 'rb') as f:
+                digest.update(hashlib.sha256(f.read()).digest())
+        except OSError:
+            digest.update(b'<missing>')
+    return digest.hexdigest()
+
+
+def _run_plain(args: List[str]) -> subprocess.CompletedProcess:
+    return subprocess.run(
+        ['pdflatex', *args],
+        capture_output=True,
+        text=True,
+        errors='replace',
+        check=False
+    )
+
+
+def _format_fallback_runner(format_args: Sequence[str]
+                            ) -> Callable[[List[str]], subprocess.CompletedProcess]:
+    """Build a runner that drops format_args for good once the format fails to load."""
+    from preamble_format import run_pdflatex
+
+    active = list(format_args)
+
+    def run(args: List[str]) -> subprocess.CompletedProcess:
+        result = run_pdflatex(args, active)
+        if active and list(result.args[1:len(active) + 1]) != active:
+            # run_pdflatex retried without the format; later passes skip it too
+            active.clear()
+        return result
+
+    return run
+
+
+def run_until_converged(args: Sequence[str], output_base,
+                        max_passes: int = DEFAULT_MAX_PASSES,
+                        runner: Optional[Callable[[List[str]], subprocess.CompletedProcess]] = None,
+                        format_args: Sequence[str] = ()
+                        ) -> Tuple[subprocess.CompletedProcess, int]:
+    """Run pdflatex until its auxiliary files stop changing.
+
+    Args:
+        args: pdflatex arguments (without the program name)
+        output_base: Output path without suffix, e.g. Path('main') or build/main
+        max_passes: Upper bound for documents that never converge
+        runner: Callable that runs one pass; defaults to plain pdflatex
+        format_args: Precompiled preamble arguments (-fmt=...) for the default
+            runner; dropped for the remaining passes if the format fails to load
+
+    Returns:
+        Tuple of the last pass's result and the number of passes run
+    """
+    if runner is None:
+        runner = _format_fallback_runner(format_args) if format_args else _run_plain
+    passes = 0
+    while True:
+        before = aux_fingerprint(output_base)
+        result = runner(list(args))
+        passes += 1
+
+        if result.returncode != 0:
+            logger.debug("pdflatex pass %d failed, not rerunning", passes)
+            break
+        if aux_fingerprint(output_base) == before:
+            logger.debug("Auxiliary files converged after %d pass(es)", passes)
+            break
+        if passes >= max_passes:
+            logger.warning("Auxiliary files still changing after %d passes, giving up", passes)
+            break
+
+    return result, passes
+
+
+def main():
+    parser = argparse.ArgumentParser(description='CTMM LaTeX runner with convergence detection')
+    parser.add_argument('main_tex', nargs='?', default='main.tex',
+                        help='Path to main TeX file (default: main.tex)')
+    parser.add_argument('--max-passes', type=int, default=DEFAULT_MAX_PASSES,
+                        help=f'Maximum pdflatex passes (default: {DEFAULT_MAX_PASSES})')
+    args = parser.parse_args()
+
+    logging.basicConfig(level=logging.INFO, format='%(levelname)s: %(message)s')
+
+    format_args = []
+    try:
+        from preamble_format import PreambleFormat
+        format_args = PreambleFormat(args.main_tex).pdflatex_args()
+    except ImportError:
+        pass
+
+    # pdflatex writes its outputs into the current directory
+    output_base = Path(Path(args.main_tex).stem)
+    result, passes = run_until_converged(
+        ['-interaction=nonstopmode', args.main_tex],
+        output_base, args.max_passes, format_args=format_args)
+
+    if result.returncode == 0:
+        logger.info("[OK] %s built in %d pdflatex pass(es)", args.main_tex, passes)
+    else:
+        logger.error("[X] pdflatex failed on pass %d (see %s)",
+                     passes, output_base.with_suffix('.log'))
+    return result.returncode
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -4,16 +4,24 @@ LaTeX Validator for CTMM System
 Detects and fixes excessive escaping issues in LaTeX documents.
 """
 
+import bisect
+import hashlib
+import json
+import os
 import re
 import sys
+from dataclasses import dataclass
 from pathlib import Path
-from typing import List, Dict, Tuple
+from typing import List, Dict, Optional, Tuple
 import argparse
 import logging
 
 logging.basicConfig(level=logging.INFO, format='%(levelname)s: %(message)s')
 logger = logging.getLogger(__name__)
 
+DEFAULT_INDEX_PATH = Path('.ctmm_cache') / 'latex_validator_index.json'
+INDEX_VERSION = 1
+
 
 def sanitize_pkg_name(name):
     """
@@ -51,6 +59,15 @@ def sanitize_pkg_name(name):
     return sanitized
 
 
+@dataclass(frozen=True)
+class LaTeXIssue:
+    """A single problematic match with its 1-based position."""
+    name: str
+    text: str
+    line: int
+    column: int
+
+
 class LaTeXValidator:
     """Validates and cleans LaTeX files from excessive escaping."""
 
@@ -71,16 +88,67 @@ class LaTeXValidator:
             'clean_labels': r'\\label\{sec:[a-zA-Z][a-zA-Z0-9_-]*\}',
         }
 
+    def _compiled_scanner(self):
+        """Compile all problematic patterns into one alternation.
+
+        Each rule is wrapped in a lookahead so the combined pattern matches
+        zero-width at every position where any rule starts; the named group
+        carries the rule's own match. The result is rebuilt only when the
+        rule set changes.
+        """
+        key = tuple(self.problematic_patterns.items())
+        if getattr(self, '_scanner_key', None) != key:
+            self._rules = {name: re.compile(pattern) for name, pattern in key}
+            self._scanner = re.compile('|'.join(
+                f'(?=(?P<rule{i}>{pattern}))' for i, (_, pattern) in enumerate(key)))
+            self._scanner_key = key
+        return self._scanner
+
+    def scan_issues(self, content: str) -> List[LaTeXIssue]:
+        """Find every problematic match in one pass over the content.
+
+        Matches of one rule never overlap each other, exactly as with
+        re.findall, but different rules may report overlapping text.
+        """
+        scanner = self._compiled_scanner()
+        names = list(self._rules)
+        resume_at = dict.fromkeys(names, 0)
+        line_starts = None
+        issues = []
+
+        for match in scanner.finditer(content):
+            start = match.start()
+            first = int(match.lastgroup[len('rule'):])
+            # Alternation stops at the first rule matching here; later rules
+            # may still start at the same position.
+            for index, name in enumerate(names[first:], first):
+                if start < resume_at[name]:
+                    continue
+                if index == first:
+                    group = match.lastgroup
+                    end, text = match.end(group), match.group(group)
+                else:
+                    rule_match = self._rules[name].match(content, start)
+                    if not rule_match:
+                        continue
+                    end, text = rule_match.end(), rule_match.group(0)
+                resume_at[name] = max(end, start + 1)
+
+                if line_starts is None:
+                    line_starts = [0] + [m.end() for m in re.finditer('\n', content)]
+                line = bisect.bisect_right(line_starts, start)
+                issues.append(LaTeXIssue(name, text, line, start - line_starts[line - 1] + 1))
+
+        return issues
+
     def detect_issues(self, content: str) -> Dict[str, List[str]]:
         """Detect escaping and formatting issues in LaTeX content."""
         issues = {}
 
-        for issue_name, pattern in self.problematic_patterns.items():
-            matches = re.findall(pattern, content)
-            if matches:
-                issues[issue_name] = matches
+        for issue in self.scan_issues(content):
+            issues.setdefault(issue.name, []).append(issue.text)
 
-        return issues
+        return {name: issues[name] for name in self.problematic_patterns if name in issues}
 
     def clean_excessive_escaping(self, content: str) -> str:
         """Clean excessive escaping from LaTeX content."""
@@ -157,8 +225,13 @@ class LaTeXValidator:
 
         return cleaned
 
-    def validate_file(self, file_path: Path) -> Tuple[bool, Dict[str, List[str]], str]:
-        """Validate a single LaTeX file."""
+    def validate_file(self, file_path: Path,
+                      detect_only: bool = False) -> Tuple[bool, Dict[str, List[str]], Optional[str]]:
+        """Validate a single LaTeX file.
+
+        With detect_only=True the cleaned content is not built and None is
+        returned in its place.
+        """
         try:
             with open(file_path, 'r', encoding='utf-8', errors='replace') as f:
                 content = f.read()
@@ -167,33 +240,59 @@ class LaTeXValidator:
             return False, {}, ""
 
         issues = self.detect_issues(content)
-        cleaned_content = self.clean_excessive_escaping(content)
+        cleaned_content = None if detect_only else self.clean_excessive_escaping(content)
 
         is_valid = len(issues) == 0
         return is_valid, issues, cleaned_content
 
-    def validate_directory(self, directory: Path, fix: bool = False) -> Dict[str, Dict]:
-        """Validate all LaTeX files in a directory."""
+    def rules_fingerprint(self) -> str:
+        """Hash the detection rules so index entries expire when they change."""
+        rules = json.dumps(self.problematic_patterns, sort_keys=True)
+        return hashlib.sha256(rules.encode('utf-8')).hexdigest()
+
+    def validate_directory(self, directory: Path, fix: bool = False,
+                           index: Optional['ValidationIndex'] = None) -> Dict[str, Dict]:
+        """Validate all LaTeX files in a directory.
+
+        Each file is read at most once. Cleaned content is only built for
+        files that are being fixed; otherwise 'cleaned_size' is None. With an
+        index, files whose mtime and size are unchanged since the last run
+        reuse their recorded issues without being read at all.
+        """
         results = {}
 
         for tex_file in directory.glob('**/*.tex'):
             logger.info(f"Validating {tex_file}")
-            is_valid, issues, cleaned_content = self.validate_file(tex_file)
-
-            # Properly handle file reading to avoid resource warnings
-            try:
-                with open(tex_file, 'r', encoding='utf-8', errors='replace') as f:
-                    original_content = f.read()
-                original_size = len(original_content)
-            except Exception as e:
-                logger.warning(f"Could not read file size for {tex_file}: {e}")
-                original_size = 0
+            entry = index.lookup(tex_file) if index is not None else None
+            content = None
+
+            if entry is None:
+                try:
+                    raw = tex_file.read_bytes()
+                except Exception as e:
+                    logger.error(f"Error reading {tex_file}: {e}")
+                    results[str(tex_file)] = {'valid': False, 'issues': {},
+                                              'original_size': 0, 'cleaned_size': 0}
+                    continue
+                content = raw.decode('utf-8', errors='replace')
+                entry = {'issues': self.detect_issues(content), 'original_size': len(content)}
+                if index is not None:
+                    index.store(tex_file, raw, entry)
+
+            issues = entry['issues']
+            is_valid = len(issues) == 0
+            cleaned_content = None
+            if fix and not is_valid:
+                if content is None:
+                    with open(tex_file, 'r', encoding='utf-8', errors='replace') as f:
+                        content = f.read()
+                cleaned_content = self.clean_excessive_escaping(content)
 
             results[str(tex_file)] = {
                 'valid': is_valid,
                 'issues': issues,
-                'original_size': original_size,
-                'cleaned_size': len(cleaned_content)
+                'original_size': entry['original_size'],
+                'cleaned_size': len(cleaned_content) if cleaned_content is not None else None
             }
 
             if not is_valid:
@@ -212,6 +311,9 @@ class LaTeXValidator:
             else:
                 logger.info(f"[OK] {tex_file} is properly formatted")
 
+        if index is not None:
+            index.save()
+
         return results
 
     def create_sample_problematic_file(self, output_path: Path) -> None:
@@ -245,6 +347,94 @@ class LaTeXValidator:
         logger.info(f"Created sample problematic file: {output_path}")
 
 
+class ValidationIndex:
+    """Persistent per-file record of detected issues.
+
+    Entries are keyed by absolute path and hold the file's mtime, size and
+    content hash. A file with unchanged mtime and size is not read at all;
+    one that was only touched is re-hashed but not re-scanned.
+    """
+
+    def __init__(self, index_path=DEFAULT_INDEX_PATH, rules_fingerprint: str = ''):
+        self.index_path = Path(index_path)
+        self.rules_fingerprint = rules_fingerprint
+        self.entries: Dict[str, Dict] = {}
+        self.hits = 0
+        self.misses = 0
+        self._dirty = False
+        self._load()
+
+    def _load(self) -> None:
+        try:
+            with open(self.index_path, 'r', encoding='utf-8') as f:
+                data = json.load(f)
+        except (OSError, ValueError):
+            return
+        if data.get('version') == INDEX_VERSION and data.get('rules') == self.rules_fingerprint:
+            self.entries = data.get('files', {})
+
+    @staticmethod
+    def _key(file_path: Path) -> str:
+        return str(Path(file_path).resolve())
+
+    def lookup(self, file_path: Path) -> Optional[Dict]:
+        """Return the recorded result for an unchanged file, or None."""
+        entry = self.entries.get(self._key(file_path))
+        if entry is None:
+            self.misses += 1
+            return None
+        try:
+            stat = os.stat(file_path)
+        except OSError:
+            self.misses += 1
+            return None
+
+        if entry['mtime_ns'] != stat.st_mtime_ns or entry['size'] != stat.st_size:
+            # Touched but possibly identical: compare content before re-scanning
+            try:
+                digest = hashlib.sha256(Path(file_path).read_bytes()).hexdigest()
+            except OSError:
+                digest = None
+            if digest != entry['sha256']:
+                self.misses += 1
+                return None
+            entry['mtime_ns'] = stat.st_mtime_ns
+            entry['size'] = stat.st_size
+            self._dirty = True
+
+        self.hits += 1
+        return entry
+
+    def store(self, file_path: Path, raw: bytes, result: Dict) -> None:
+        """Record the detected issues for a file's current content."""
+        stat = os.stat(file_path)
+        self.entries[self._key(file_path)] = {
+            'mtime_ns': stat.st_mtime_ns,
+            'size': stat.st_size,
+            'sha256': hashlib.sha256(raw).hexdigest(),
+            'issues': result['issues'],
+            'original_size': result['original_size'],
+        }
+        self._dirty = True
+
+    def save(self) -> None:
+        """Write the index to disk, dropping entries for deleted files."""
+        logger.debug(f"Validation index: {self.hits} unchanged, {self.misses} scanned")
+        stale = [key for key in self.entries if not os.path.exists(key)]
+        for key in stale:
+            del self.entries[key]
+        if not self._dirty and not stale:
+            return
+
+        self.index_path.parent.mkdir(parents=True, exist_ok=True)
+        temp_path = self.index_path.with_suffix('.tmp')
+        with open(temp_path, 'w', encoding='utf-8') as f:
+            json.dump({'version': INDEX_VERSION, 'rules': self.rules_fingerprint,
+                       'files': self.entries}, f)
+        os.replace(temp_path, self.index_path)
+        self._dirty = False
+
+
 def main():
     parser = argparse.ArgumentParser(description='LaTeX Validator for CTMM System')
     parser.add_argument('path', nargs='?', default='.',
@@ -253,6 +443,8 @@ def main():
                        help='Fix issues found (creates backups)')
     parser.add_argument('--create-sample', metavar='FILE',
                        help='Create a sample file with escaping issues')
+    parser.add_argument('--no-index', action='store_true',
+                       help='Re-scan every file instead of using the validation index')
     parser.add_argument('--verbose', '-v', action='store_true',
                        help='Enable verbose logging')
 
@@ -271,7 +463,7 @@ def main():
     path = Path(args.path)
 
     if path.is_file():
-        is_valid, issues, cleaned_content = validator.validate_file(path)
+        is_valid, issues, cleaned_content = validator.validate_file(path, detect_only=not args.fix)
 
         if is_valid:
             print(f"[OK] {path} is properly formatted")
@@ -280,6 +472,10 @@ def main():
             print(f"[X] Issues found in {path}:")
             for issue_type, matches in issues.items():
                 print(f"  - {issue_type}: {len(matches)} occurrence(s)")
+            if args.verbose:
+                content = path.read_text(encoding='utf-8', errors='replace')
+                for issue in validator.scan_issues(content):
+                    print(f"    {path}:{issue.line}:{issue.column}: {issue.name}: {issue.text}")
 
             if args.fix:
                 backup_path = path.with_suffix('.tex.backup')
@@ -291,7 +487,9 @@ def main():
             return 1
 
     elif path.is_dir():
-        results = validator.validate_directory(path, fix=args.fix)
+        index = None if args.no_index else ValidationIndex(
+            rules_fingerprint=validator.rules_fingerprint())
+        results = validator.validate_directory(path, fix=args.fix, index=index)
 
         valid_files = sum(1 for r in results.values() if r['valid'])
         total_files = len(results)
@@ -0,0 +1,248 @@
+#!/usr/bin/env python3
+"""
+Merge Conflict Predictor
+Predicts pull request merge conflicts from in-memory three-way merges.
+
+All PR heads are fetched once into a bare mirror (.ctmm_cache/pr-mirror.git).
+`git merge-tree --write-tree` then merges every PR into the base branch and
+every pair of PRs with each other, without a checkout or working tree. Each
+probe takes milliseconds and the probes run in parallel. Results are cached
+by commit, so predicting again after a merge only probes what changed.
+
+Usage:
+    python3 merge_conflict_predictor.py 653 572 571 489
+"""
+
+import argparse
+import json
+import os
+import subprocess
+import sys
+import threading
+from concurrent.futures import ThreadPoolExecutor
+from dataclasses import asdict, dataclass, field
+from itertools import combinations
+from pathlib import Path
+from typing import Dict, Iterable, List, Optional, Tuple
+
+MIRROR_PATH = Path('.ctmm_cache') / 'pr-mirror.git'
+
+
+@dataclass
+class MergeProbe:
+    """Result of an in-memory merge of two commits."""
+    ours: str
+    theirs: str
+    clean: bool
+    conflicts: List[str] = field(default_factory=list)
+    tree: Optional[str] = None
+    error: Optional[str] = None
+
+
+@dataclass
+class ConflictPrediction:
+    """Merge probes of PRs against the base branch and against each other.
+
+    pairs[(a, b)] (a < b) is the merge of PR b into the result of merging
+    PR a into the base, i.e. whether b still merges once a is in. If either
+    PR conflicts with the base, the two heads are merged instead, so the
+    conflict with the base is not counted as a conflict between them.
+    """
+    base_commit: str
+    pr_heads: Dict[int, str]
+    base: Dict[int, MergeProbe]
+    pairs: Dict[Tuple[int, int], MergeProbe]
+    changed_files: Dict[int, List[str]] = field(default_factory=dict)
+
+    def conflicting_pairs(self) -> List[Tuple[int, int]]:
+        return [pair for pair, probe in sorted(self.pairs.items()) if not probe.clean]
+
+    def conflicts_with(self, pr_number: int) -> List[int]:
+        """PRs that cannot both be merged with pr_number without a rebase."""
+        return sorted(b if a == pr_number else a for a, b in self.conflicting_pairs()
+                      if pr_number in (a, b))
+
+    def to_dict(self) -> Dict:
+        return {
+            'base_commit': self.base_commit,
+            'pr_heads': {str(number): sha for number, sha in self.pr_heads.items()},
+            'base': {str(number): asdict(probe) for number, probe in self.base.items()},
+            'pairs': [dict(prs=list(pair), **asdict(probe)) for pair, probe in sorted(self.pairs.items())],
+            'changed_files': {str(number): files for number, files in self.changed_files.items()},
+        }
+
+
+class MergeConflictPredictor:
+    """Predicts PR merge conflicts with `git merge-tree` in a local mirror."""
+
+    def __init__(self, repo_path: str = '.', remote: str = 'origin', base_branch: str = 'main',
+                 mirror_path: Optional[str] = None, max_workers: Optional[int] = None):
+        self.repo_path = Path(repo_path)
+        self.remote = remote
+        self.base_branch = base_branch
+        self.mirror_path = (Path(mirror_path) if mirror_path else self.repo_path / MIRROR_PATH).resolve()
+        self.max_workers = max_workers or os.cpu_count() or 4
+        self.merge_tree_runs = 0
+
+        # A merge of two commits always has the same result
+        self._probes: Dict[Tuple[str, str], MergeProbe] = {}
+        # Whether two PRs conflict depends on their heads, not on what main has merged since
+        self._pairs: Dict[Tuple[str, str], MergeProbe] = {}
+        self._changed_files: Dict[Tuple[str, str], List[str]] = {}
+        self._lock = threading.Lock()
+
+    def _git(self, *args: str, cwd: Optional[Path] = None, check: bool = True,
+             env: Optional[Dict[str, str]] = None) -> subprocess.CompletedProcess:
+        """Run a git command, in the mirror unless cwd is given."""
+        return subprocess.run(['git', *args], cwd=cwd or self.mirror_path, env=env,
+                              capture_output=True, text=True, check=check)
+
+    def _remote_url(self) -> str:
+        """URL of the remote, or the remote itself if it is already a URL or path."""
+        result = self._git('remote', 'get-url', self.remote, cwd=self.repo_path, check=False)
+        return result.stdout.strip() if result.returncode == 0 else self.remote
+
+    def fetch(self, pr_numbers: Iterable[int]) -> Tuple[str, Dict[int, str]]:
+        """Fetch the base branch and PR heads into the mirror with one fetch.
+
+        Returns the base commit and the head commit of each PR that exists.
+        """
+        pr_numbers = sorted(set(pr_numbers))
+        if not (self.mirror_path / 'HEAD').exists():
+            self.mirror_path.mkdir(parents=True, exist_ok=True)
+            self._git('init', '-q', '--bare')
+
+        url = self._remote_url()
+        base_ref = f'refs/heads/{self.base_branch}'
+        refspecs = [f'+{base_ref}:{base_ref}']
+        refspecs += [f'+refs/pull/{number}/head:refs/pull/{number}/head' for number in pr_numbers]
+        result = self._git('fetch', '--no-tags', '--quiet', url, *refspecs, check=False)
+        if result.returncode != 0:
+            # One closed or unknown PR fails the whole fetch; fetch the rest one by one
+            for refspec in refspecs:
+                if self._git('fetch', '--no-tags', '--quiet', url, refspec, check=False).returncode:
+                    # Do not predict from a head fetched by an earlier run
+                    self._git('update-ref', '-d', refspec.rsplit(':', 1)[1], check=False)
+
+        refs = {}
+        listing = self._git('for-each-ref', '--format=%(refname) %(objectname)', base_ref, 'refs/pull')
+        for line in listing.stdout.splitlines():
+            name, sha = line.split()
+            refs[name] = sha
+        if base_ref not in refs:
+            raise RuntimeError(f"Could not fetch {self.base_branch} from {url}: {result.stderr.strip()}")
+
+        pr_heads = {}
+        for number in pr_numbers:
+            sha = refs.get(f'refs/pull/{number}/head')
+            if sha:
+                pr_heads[number] = sha
+            else:
+                print(f"[WARN] PR #{number}: head not found on {url}")
+        return refs[base_ref], pr_heads
+
+    def merge_tree(self, ours: str, theirs: str) -> MergeProbe:
+        """Merge two commits in memory and report the conflicted files."""
+        cached = self._probes.get((ours, theirs))
+        if cached is not None:
+            return cached
+        with self._lock:
+            self.merge_tree_runs += 1
+        result = self._git('merge-tree', '--write-tree', '--name-only', '--no-messages', '-z',
+                           ours, theirs, check=False)
+        if result.returncode not in (0, 1):
+            probe = MergeProbe(ours, theirs, clean=False,
+                               error=result.stderr.strip() or f'git merge-tree exited {result.returncode}')
+        else:
+            fields = result.stdout.split('\0')
+            probe = MergeProbe(ours, theirs, clean=result.returncode == 0,
+                               conflicts=[name for name in fields[1:] if name], tree=fields[0])
+        self._probes[(ours, theirs)] = probe
+        return probe
+
+    def merge_commit(self, probe: MergeProbe) -> str:
+        """Write the commit a clean merge would create, so later merges can build on it."""
+        # A fixed date gives the same merge the same commit ID on every run
+        env = dict(os.environ, GIT_AUTHOR_DATE='@0 +0000', GIT_COMMITTER_DATE='@0 +0000')
+        return self._git('-c', 'user.name=CTMM Merge Predictor', '-c', 'user.email=ctmm@localhost',
+                         'commit-tree', probe.tree, '-p', probe.ours, '-p', probe.theirs,
+                         '-m', f'Predicted merge of {probe.theirs}', env=env).stdout.strip()
+
+    def changed_files(self, base: str, head: str) -> List[str]:
+        """Files changed on head since it branched off base; a rename lists both paths."""
+        key = (base, head)
+        if key not in self._changed_files:
+            output = self._git('diff', '--name-only', '--no-renames', '-z', f'{base}...{head}').stdout
+            self._changed_files[key] = [name for name in output.split('\0') if name]
+        return self._changed_files[key]
+
+    def _probe_all(self, merges: List[Tuple[str, str]]) -> List[MergeProbe]:
+        if not merges:
+            return []
+        with ThreadPoolExecutor(max_workers=min(self.max_workers, len(merges))) as pool:
+            return list(pool.map(lambda merge: self.merge_tree(*merge), merges))
+
+    def predict(self, pr_numbers: Iterable[int], pairwise: bool = True) -> ConflictPrediction:
+        """Probe each PR against the base branch and, if pairwise, every pair of PRs."""
+        base_commit, pr_heads = self.fetch(pr_numbers)
+        numbers = sorted(pr_heads)
+
+        probes = self._probe_all([(base_commit, pr_heads[number]) for number in numbers])
+        base = dict(zip(numbers, probes))
+
+        pairs = {}
+        if pairwise:
+            pair_keys = [(a, b) for a, b in combinations(numbers, 2)
+                         if (pr_heads[a], pr_heads[b]) not in self._pairs]
+            merged = {number: self.merge_commit(base[number])
+                      for number in {number for pair in pair_keys for number in pair}
+                      if base[number].clean}
+            probes = self._probe_all([(merged[a] if a in merged and b in merged else pr_heads[a], pr_heads[b])
+                                      for a, b in pair_keys])
+            for (a, b), probe in zip(pair_keys, probes):
+                self._pairs[(pr_heads[a], pr_heads[b])] = probe
+            pairs = {(a, b): self._pairs[(pr_heads[a], pr_heads[b])] for a, b in combinations(numbers, 2)}
+
+        changed_files = {number: self.changed_files(base_commit, pr_heads[number]) for number in numbers}
+        return ConflictPrediction(base_commit, pr_heads, base, pairs, changed_files)
+
+
+def main():
+    """Predict conflicts for the given PRs and print the conflict matrix."""
+    parser = argparse.ArgumentParser(description='Predict PR merge conflicts with git merge-tree')
+    parser.add_argument('prs', nargs='+', type=int, help='Pull request numbers')
+    parser.add_argument('--base', default='main', help='Base branch (default: main)')
+    parser.add_argument('--remote', default='origin', help='Remote name or URL (default: origin)')
+    parser.add_argument('--json', metavar='FILE', help='Also write the prediction as JSON')
+    args = parser.parse_args()
+
+    predictor = MergeConflictPredictor(remote=args.remote, base_branch=args.base)
+    try:
+        prediction = predictor.predict(args.prs)
+    except (RuntimeError, subprocess.CalledProcessError) as e:
+        print(f"[FAIL] {e}")
+        return 1
+
+    print(f"[SEARCH] Merging {len(prediction.base)} PR(s) into {args.base} ({prediction.base_commit[:10]})")
+    for number, probe in sorted(prediction.base.items()):
+        if probe.error:
+            print(f"   [FAIL] PR #{number}: {probe.error}")
+        elif probe.clean:
+            print(f"   [PASS] PR #{number}: merges cleanly")
+        else:
+            print(f"   [WARN] PR #{number}: conflicts in {', '.join(probe.conflicts)}")
+
+    conflicting = prediction.conflicting_pairs()
+    print(f"\n[SUMMARY] {len(conflicting)} of {len(prediction.pairs)} PR pairs conflict")
+    for a, b in conflicting:
+        probe = prediction.pairs[(a, b)]
+        print(f"   * #{a} <-> #{b}: {', '.join(probe.conflicts) or probe.error}")
+
+    if args.json:
+        with open(args.json, 'w', encoding='utf-8') as f:
+            json.dump(prediction.to_dict(), f, indent=2)
+        print(f"\n[FILE] Prediction saved to: {args.json}")
+    return 0
+
+if __name__ == '__main__':
+    sys.exit(main())
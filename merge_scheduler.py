@@ -0,0 +1,204 @@
+#!/usr/bin/env python3
+"""
+Merge Scheduler
+Orders open PR merges so that as few PRs as possible need a rebase.
+
+Works on a ConflictPrediction from merge_conflict_predictor.py. A PR needs a
+rebase if it conflicts with main or with a PR merged before it, so the PRs
+merged without a rebase are an independent set of the pairwise conflict
+graph; the scheduler picks the largest one. Those PRs are grouped into
+batches of PRs that also change no common file, so a batch can be merged
+in parallel and validated once. After each merge, replan() predicts again,
+reusing the cached merge-tree results of unchanged PR heads.
+
+Usage:
+    python3 merge_scheduler.py 653 572 571 489 423
+"""
+
+import argparse
+import sys
+from dataclasses import dataclass, field
+from itertools import combinations
+from typing import Dict, Iterable, List, Optional, Set
+
+from merge_conflict_predictor import ConflictPrediction, MergeConflictPredictor
+
+# Largest conflict graph (PRs with at least one conflict) searched exhaustively
+EXACT_SEARCH_LIMIT = 24
+
+
+@dataclass
+class MergeSchedule:
+    """Merge order for a set of PRs.
+
+    batches are merged one after the other; the PRs within a batch touch
+    disjoint files and can be merged together. rebase_required lists the PRs
+    that conflict with main or with a scheduled PR, fewest conflicts first.
+    """
+    batches: List[List[int]] = field(default_factory=list)
+    rebase_required: List[int] = field(default_factory=list)
+
+    @property
+    def order(self) -> List[int]:
+        return [number for batch in self.batches for number in batch]
+
+    @property
+    def rebases(self) -> int:
+        return len(self.rebase_required)
+
+
+def _conflict_graph(prediction: ConflictPrediction, numbers: Iterable[int]) -> Dict[int, Set[int]]:
+    numbers = set(numbers)
+    graph = {number: set() for number in numbers}
+    for a, b in prediction.conflicting_pairs():
+        if a in numbers and b in numbers:
+            graph[a].add(b)
+            graph[b].add(a)
+    return graph
+
+
+def _overlap_graph(prediction: ConflictPrediction, numbers: Iterable[int]) -> Dict[int, Set[int]]:
+    """PRs that change at least one common file."""
+    numbers = sorted(numbers)
+    graph = {number: set() for number in numbers}
+    files = {number: set(prediction.changed_files.get(number, [])) for number in numbers}
+    for a, b in combinations(numbers, 2):
+        if files[a] & files[b]:
+            graph[a].add(b)
+            graph[b].add(a)
+    return graph
+
+
+def _independent_set(conflicts: Dict[int, Set[int]], overlaps: Dict[int, Set[int]],
+                     exact_limit: int = EXACT_SEARCH_LIMIT) -> Set[int]:
+    """Largest set of mutually non-conflicting PRs.
+
+    Among sets of equal size, the one with the fewest file overlaps wins,
+    since it needs fewer batches. PRs without conflicts are always included;
+    the rest is searched exhaustively up to exact_limit PRs, greedily beyond.
+    """
+    free = {number for number, neighbours in conflicts.items() if not neighbours}
+    rest = {number: set(neighbours) for number, neighbours in conflicts.items() if neighbours}
+
+    def score(chosen: Set[int]):
+        overlapping = sum(1 for a, b in combinations(sorted(chosen | free), 2) if b in overlaps[a])
+        return len(chosen), -overlapping
+
+    def greedy() -> Set[int]:
+        remaining = {number: set(neighbours) for number, neighbours in rest.items()}
+        chosen = set()
+        while remaining:
+            number = min(remaining, key=lambda n: (len(remaining[n]), len(overlaps[n]), n))
+            chosen.add(number)
+            for removed in remaining[number] | {number}:
+                remaining.pop(removed, None)
+            for neighbours in remaining.values():
+                neighbours.difference_update(conflicts[number] | {number})
+        return chosen
+
+    best = greedy()
+    if len(rest) <= exact_limit:
+        best_score = score(best)
+
+        def search(remaining: Set[int], chosen: Set[int]) -> None:
+            nonlocal best, best_score
+            if len(chosen) + len(remaining) < best_score[0]:
+                return
+            number = max(remaining, key=lambda n: (len(conflicts[n] & remaining), -n), default=None)
+            if number is None or not conflicts[number] & remaining:
+                # What is left conflicts with nothing else
+                candidate = score(chosen | remaining)
+                if candidate > best_score:
+                    best, best_score = chosen | remaining, candidate
+                return
+            search(remaining - conflicts[number] - {number}, chosen | {number})
+            search(remaining - {number}, chosen)
+
+        search(set(rest), set())
+    return free | best
+
+
+def _batches(numbers: Set[int], overlaps: Dict[int, Set[int]]) -> List[List[int]]:
+    """Group PRs into batches that change no common file, largest batch first."""
+    batches: List[List[int]] = []
+    for number in sorted(numbers, key=lambda n: (-len(overlaps[n] & numbers), n)):
+        for batch in batches:
+            if not overlaps[number] & set(batch):
+                batch.append(number)
+                break
+        else:
+            batches.append([number])
+    return sorted((sorted(batch) for batch in batches), key=lambda batch: (-len(batch), batch))
+
+
+def schedule_merges(prediction: ConflictPrediction,
+                    exact_limit: int = EXACT_SEARCH_LIMIT) -> MergeSchedule:
+    """Compute batches and rebases for the PRs of a prediction."""
+    mergeable = [number for number, probe in prediction.base.items() if probe.clean]
+    conflicts = _conflict_graph(prediction, mergeable)
+    overlaps = _overlap_graph(prediction, mergeable)
+
+    chosen = _independent_set(conflicts, overlaps, exact_limit)
+    rebase_required = [number for number in prediction.base if number not in chosen]
+    # PRs whose merge could not be computed go last
+    rebase_required.sort(key=lambda number: (bool(prediction.base[number].error),
+                                             len(prediction.conflicts_with(number)), number))
+    return MergeSchedule(_batches(chosen, overlaps), rebase_required)
+
+
+class MergeScheduler:
+    """Plans merges from live merge probes and re-plans after each merge."""
+
+    def __init__(self, predictor: MergeConflictPredictor, exact_limit: int = EXACT_SEARCH_LIMIT):
+        self.predictor = predictor
+        self.exact_limit = exact_limit
+        self.pr_numbers: List[int] = []
+        self.prediction: Optional[ConflictPrediction] = None
+        self.schedule: Optional[MergeSchedule] = None
+
+    def plan(self, pr_numbers: Iterable[int]) -> MergeSchedule:
+        """Predict conflicts for the PRs and schedule their merges."""
+        self.pr_numbers = sorted(set(pr_numbers))
+        self.prediction = self.predictor.predict(self.pr_numbers)
+        self.schedule = schedule_merges(self.prediction, self.exact_limit)
+        return self.schedule
+
+    def replan(self, merged: Iterable[int] = ()) -> MergeSchedule:
+        """Schedule the remaining PRs against the updated base branch.
+
+        Only the probes against the new base and those of rebased PRs run
+        again; pairs of unchanged PR heads come from the predictor's cache.
+        """
+        merged = set(merged)
+        return self.plan(number for number in self.pr_numbers if number not in merged)
+
+
+def main():
+    """Print a merge schedule for the given PRs."""
+    parser = argparse.ArgumentParser(description='Schedule PR merges with the fewest rebases')
+    parser.add_argument('prs', nargs='+', type=int, help='Pull request numbers')
+    parser.add_argument('--base', default='main', help='Base branch (default: main)')
+    parser.add_argument('--remote', default='origin', help='Remote name or URL (default: origin)')
+    args = parser.parse_args()
+
+    scheduler = MergeScheduler(MergeConflictPredictor(remote=args.remote, base_branch=args.base))
+    try:
+        schedule = scheduler.plan(args.prs)
+    except RuntimeError as e:
+        print(f"[FAIL] {e}")
+        return 1
+
+    print(f"[TEST] Merge schedule for {len(scheduler.prediction.base)} PR(s) into {args.base}")
+    for i, batch in enumerate(schedule.batches, 1):
+        print(f"   Batch {i}: {', '.join(f'#{number}' for number in batch)}")
+    if schedule.rebase_required:
+        print(f"\n[WARN] Rebase after the batches ({schedule.rebases}):")
+        for number in schedule.rebase_required:
+            probe = scheduler.prediction.base[number]
+            reason = (f"conflicts with {args.base} in {', '.join(probe.conflicts)}" if not probe.clean
+                      else f"conflicts with {', '.join(f'#{n}' for n in scheduler.prediction.conflicts_with(number))}")
+            print(f"   * #{number}: {probe.error or reason}")
+    return 0
+
+if __name__ == '__main__':
+    sys.exit(main())
@@ -8,8 +8,10 @@ import os
 import json
 import requests
 import logging
+import tempfile
 import subprocess
 from datetime import datetime
+from pathlib import Path
 from typing import Dict, List, Optional, Tuple
 from dataclasses import dataclass
 
@@ -34,7 +36,8 @@ class PRManager:
 
     def __init__(self):
         self.logger = logging.getLogger(__name__)
-        self.session = requests.Session()
+        self.repo_root = Path.cwd()
+        self.session = config.create_api_session()
 
         # Set up authentication
         if config.github_token:
@@ -88,27 +91,25 @@ class PRManager:
         self.logger.info(f"Created healing PR #{healing_pr.number}: {healing_pr.title}")
         return healing_pr
 
+    def _git(self, *args: str, env: Optional[Dict[str, str]] = None, input: Optional[bytes] = None) -> str:
+        """Run a git command in the repository and return its output."""
+        result = subprocess.run(['git', *args], cwd=self.repo_root, env=env, input=input,
+                                capture_output=True, check=True)
+        return result.stdout.decode('utf-8').strip()
+
     def _create_healing_branch(self, analysis: ErrorAnalysis) -> Optional[str]:
-        """Create a new branch for healing fixes."""
+        """Create a new branch for healing fixes at the current HEAD.
+
+        The branch is only created, not checked out, and its commit is built
+        from the fixed contents in the fix results, so the working tree is
+        never touched and several healing branches can be prepared at the
+        same time.
+        """
         timestamp = datetime.now().strftime("%Y%m%d-%H%M%S")
         branch_name = f"{config.pr_settings['branch_prefix']}/run-{analysis.workflow_run_id}-{timestamp}"
 
         try:
-            # Get current main branch SHA
-            result = subprocess.run(
-                ['git', 'rev-parse', 'HEAD'],
-                capture_output=True,
-                text=True,
-                check=True
-            )
-            base_sha = result.stdout.strip()
-
-            # Create and checkout new branch
-            subprocess.run(
-                ['git', 'checkout', '-b', branch_name],
-                check=True,
-                capture_output=True
-            )
+            self._git('branch', branch_name, 'HEAD')
 
             self.logger.info(f"Created healing branch: {branch_name}")
             return branch_name
@@ -117,45 +118,77 @@ class PRManager:
             self.logger.error(f"Failed to create healing branch: {e}")
             return None
 
+    def _commit_files(self, branch_name: str, files: Dict[str, bytes], message: str) -> str:
+        """Commit new file contents on top of a branch without touching the checkout.
+
+        Builds the commit with plumbing commands: blobs via hash-object, the
+        tree via a temporary index (read-tree / update-index / write-tree)
+        and the commit via commit-tree. The branch is moved only if nobody
+        moved it in the meantime. Returns the new commit SHA.
+        """
+        ref = f'refs/heads/{branch_name}'
+        parent = self._git('rev-parse', '--verify', f'{ref}^{{commit}}')
+
+        paths = {Path(file_path).as_posix(): content for file_path, content in files.items()}
+        modes = {}
+        for entry in self._git('ls-tree', '-z', parent, '--', *paths).split('\0'):
+            if entry:
+                info, path = entry.split('\t', 1)
+                modes[path] = info.split()[0]
+
+        with tempfile.TemporaryDirectory() as temp_dir:
+            # A private index, so concurrent commits and the checkout never interfere
+            env = dict(os.environ, GIT_INDEX_FILE=os.path.join(temp_dir, 'index'))
+            self._git('read-tree', parent, env=env)
+
+            index_info = []
+            for path, content in paths.items():
+                blob = self._git('hash-object', '-w', '--stdin', f'--path={path}', input=content)
+                index_info.append(f"{modes.get(path, '100644')} {blob}\t{path}")
+            self._git('update-index', '--index-info', env=env,
+                      input=('\n'.join(index_info) + '\n').encode('utf-8'))
+
+            tree = self._git('write-tree', env=env)
+
+        commit = self._git('commit-tree', tree, '-p', parent, input=message.encode('utf-8'))
+        self._git('update-ref', ref, commit, parent)
+        return commit
+
     def _apply_fixes_to_branch(self, branch_name: str, fix_results: List[FixResult]) -> bool:
-        """Apply fixes to the healing branch and commit changes."""
-        try:
-            files_to_commit = set()
+        """Commit the fixed files to the healing branch and push it.
 
-            # Collect all modified files
+        The fixed contents come from the fix results, so files in the
+        working tree, including uncommitted edits, are neither read nor
+        restored.
+        """
+        try:
+            # Collect the fixed content of all modified files
+            contents = {}
             for result in fix_results:
                 if result.success:
-                    files_to_commit.update(result.files_modified)
+                    for file_path in result.files_modified:
+                        if file_path not in result.file_contents:
+                            self.logger.error(f"No fixed content for {file_path}")
+                            return False
+                        contents[file_path] = result.file_contents[file_path].encode('utf-8')
 
-            if not files_to_commit:
+            if not contents:
                 self.logger.warning("No files to commit")
                 return False
 
-            # Stage the files
-            for file_path in files_to_commit:
-                subprocess.run(['git', 'add', file_path], check=True)
-
             # Create commit message
             commit_message = self._generate_commit_message(fix_results)
 
             # Commit the changes
-            subprocess.run(
-                ['git', 'commit', '-m', commit_message],
-                check=True,
-                capture_output=True
-            )
+            commit = self._commit_files(branch_name, contents, commit_message)
 
             # Push the branch
-            subprocess.run(
-                ['git', 'push', 'origin', branch_name],
-                check=True,
-                capture_output=True
-            )
+            self._git('push', 'origin', branch_name)
 
-            self.logger.info(f"Committed and pushed fixes to {branch_name}")
+            self.logger.info(f"Committed and pushed fixes to {branch_name} ({commit[:7]})")
             return True
 
-        except subprocess.CalledProcessError as e:
+        except (subprocess.CalledProcessError, OSError) as e:
             self.logger.error(f"Failed to apply fixes to branch: {e}")
             return False
 
@@ -340,16 +373,12 @@ class PRManager:
     def _cleanup_branch(self, branch_name: str) -> bool:
         """Clean up a healing branch after failed PR creation."""
         try:
-            # Switch back to main
-            subprocess.run(['git', 'checkout', 'main'], check=True, capture_output=True)
-
-            # Delete the local branch
-            subprocess.run(['git', 'branch', '-D', branch_name], check=True, capture_output=True)
+            # Delete the local branch (never checked out)
+            self._git('branch', '-D', branch_name)
 
             # Try to delete remote branch if it exists
             try:
-                subprocess.run(['git', 'push', 'origin', '--delete', branch_name],
-                             check=True, capture_output=True)
+                self._git('push', 'origin', '--delete', branch_name)
             except subprocess.CalledProcessError:
                 pass  # Remote branch might not exist yet
 
@@ -0,0 +1,197 @@
+#!/usr/bin/env python3
+"""
+CTMM Preamble Format
+Precompiles the main.tex preamble into a cached pdflatex format file.
+
+The preamble (tikz, tcolorbox, fontawesome5, babel, microtype and the
+ctmm-* style packages) is dumped once with mylatexformat. Later builds pass
+-fmt so pdflatex loads the dumped state instead of parsing every package
+again. Everything after \\csname endofdump\\endcsname in main.tex (hyperref
+and the document setup) still runs on each build.
+
+The format is rebuilt whenever the preamble, any style/*.sty file or the
+pdflatex binary changes. If the dump fails (e.g. mylatexformat is not
+installed) builds silently fall back to the plain pdflatex format, and the
+failure is remembered so the dump is not retried until one of those changes.
+
+Usage:
+    python3 preamble_format.py [main.tex]               # build the format
+    python3 preamble_format.py --pdflatex-args main.tex # print -fmt argument
+    python3 preamble_format.py --format-failed out.txt  # exit 0 if the format failed to load
+"""
+
+import argparse
+import hashlib
+import logging
+import re
+import subprocess
+import sys
+from pathlib import Path
+from typing import List, Optional, Sequence
+
+from build_cache import hash_files, toolchain_fingerprint
+
+logger = logging.getLogger(__name__)
+
+DEFAULT_FORMAT_DIR = Path('.ctmm_cache') / 'format'
+FORMAT_NAME = 'ctmm-preamble'
+
+# What pdflatex prints when it cannot load a format, before reading any input
+FORMAT_ERROR_PATTERN = re.compile(r"can't find the format file|Fatal format file error|---! .* was written by")
+
+
+def format_load_failed(output: str) -> bool:
+    """Check whether pdflatex output shows that the format itself could not be loaded."""
+    return bool(FORMAT_ERROR_PATTERN.search(output))
+
+
+def run_pdflatex(args: Sequence[str], format_args: Sequence[str] = (),
+                 cwd: Optional[Path] = None) -> subprocess.CompletedProcess:
+    """Run pdflatex, retrying without format_args if the format cannot be loaded."""
+    def run(cmd):
+        return subprocess.run(cmd, capture_output=True, text=True, errors='replace',
+                              cwd=str(cwd) if cwd is not None else None)
+
+    result = run(['pdflatex', *format_args, *args])
+    output = '\n'.join(str(part) for part in (result.stdout, result.stderr) if part)
+    if result.returncode != 0 and format_args and format_load_failed(output):
+        logger.warning("Precompiled preamble format could not be loaded, retrying without it")
+        result = run(['pdflatex', *args])
+    return result
+
+
+class PreambleFormat:
+    """Builds and locates the cached preamble format for a main TeX file."""
+
+    def __init__(self, main_tex_path='main.tex', format_dir=DEFAULT_FORMAT_DIR):
+        self.main_tex_path = Path(main_tex_path)
+        self.project_root = self.main_tex_path.parent
+        format_dir = Path(format_dir)
+        if not format_dir.is_absolute():
+            format_dir = self.project_root / format_dir
+        self.format_dir = format_dir
+
+    @property
+    def format_path(self) -> Path:
+        return self.format_dir / f"{FORMAT_NAME}.fmt"
+
+    @property
+    def stamp_path(self) -> Path:
+        return self.format_dir / f"{FORMAT_NAME}.hash"
+
+    @property
+    def failed_stamp_path(self) -> Path:
+        return self.format_dir / f"{FORMAT_NAME}.failed"
+
+    @staticmethod
+    def _stamp_matches(stamp_path: Path, fingerprint: str) -> bool:
+        if not stamp_path.exists():
+            return False
+        return stamp_path.read_text(encoding='utf-8').strip() == fingerprint
+
+    def fingerprint(self) -> str:
+        """Hash everything the dumped format depends on."""
+        with open(self.main_tex_path, 'r', encoding='utf-8', errors='replace') as f:
+            content = f.read()
+        preamble = content.split('\\begin{document}', 1)[0]
+
+        style_files = [path.relative_to(self.project_root).as_posix()
+                       for path in sorted(self.project_root.glob('style/*.sty'))]
+
+        digest = hashlib.sha256()
+        digest.update(preamble.encode('utf-8'))
+        digest.update(hash_files(style_files, self.project_root).encode('ascii'))
+        digest.update(str(toolchain_fingerprint()).encode('utf-8'))
+        return digest.hexdigest()
+
+    def is_current(self) -> bool:
+        """Check whether the cached format matches the current preamble."""
+        if not self.format_path.exists():
+            return False
+        return self._stamp_matches(self.stamp_path, self.fingerprint())
+
+    def ensure(self) -> Optional[Path]:
+        """Return the path of an up-to-date format, dumping it if necessary.
+
+        Returns None without another dump if dumping this preamble already failed.
+        """
+        fingerprint = self.fingerprint()
+        if self.format_path.exists() and self._stamp_matches(self.stamp_path, fingerprint):
+            return self.format_path
+        if self._stamp_matches(self.failed_stamp_path, fingerprint):
+            logger.debug("Preamble format failed before for this preamble - not retrying")
+            return None
+        return self._dump(fingerprint)
+
+    def _dump(self, fingerprint: str) -> Optional[Path]:
+        """Dump the preamble with mylatexformat."""
+        logger.info("Precompiling preamble of %s into %s...", self.main_tex_path, self.format_path)
+        self.format_dir.mkdir(parents=True, exist_ok=True)
+        self.stamp_path.unlink(missing_ok=True)
+        self.failed_stamp_path.unlink(missing_ok=True)
+
+        try:
+            result = subprocess.run(
+                ['pdflatex', '-ini', '-interaction=nonstopmode',
+                 f'-jobname={FORMAT_NAME}',
+                 f'-output-directory={self.format_dir.resolve()}',
+                 '&pdflatex', 'mylatexformat.ltx', self.main_tex_path.name],
+                capture_output=True,
+                text=True,
+                errors='replace',
+                cwd=str(self.project_root.resolve()),
+                check=False
+            )
+        except FileNotFoundError:
+            logger.debug("pdflatex not found - no preamble format")
+            self.failed_stamp_path.write_text(fingerprint + '\n', encoding='utf-8')
+            return None
+
+        if result.returncode != 0 or not self.format_path.exists():
+            logger.warning("Preamble format could not be built, using plain pdflatex "
+                           "(see %s)", self.format_dir / f"{FORMAT_NAME}.log")
+            self.failed_stamp_path.write_text(fingerprint + '\n', encoding='utf-8')
+            return None
+
+        self.stamp_path.write_text(fingerprint + '\n', encoding='utf-8')
+        return self.format_path
+
+    def pdflatex_args(self) -> List[str]:
+        """Return the pdflatex arguments that load the format, or [] if unavailable."""
+        try:
+            format_path = self.ensure()
+        except OSError as e:
+            logger.debug("Preamble format unavailable: %s", e)
+            return []
+        if format_path is None:
+            return []
+        return [f"-fmt={format_path.resolve().with_suffix('')}"]
+
+
+def main():
+    parser = argparse.ArgumentParser(description='CTMM preamble format builder')
+    parser.add_argument('main_tex', nargs='?', default='main.tex',
+                        help='Path to main TeX file (default: main.tex)')
+    parser.add_argument('--pdflatex-args', action='store_true',
+                        help='Print the pdflatex arguments that load the format')
+    parser.add_argument('--format-failed', metavar='OUTPUT',
+                        help='Exit 0 if this saved pdflatex output shows the format could not be loaded')
+    args = parser.parse_args()
+
+    if args.format_failed:
+        with open(args.format_failed, 'r', encoding='utf-8', errors='replace') as f:
+            return 0 if format_load_failed(f.read()) else 1
+
+    logging.basicConfig(level=logging.INFO, format='%(levelname)s: %(message)s',
+                        stream=sys.stderr)
+    preamble_format = PreambleFormat(args.main_tex)
+
+    if args.pdflatex_args:
+        print(' '.join(preamble_format.pdflatex_args()))
+        return 0
+
+    return 0 if preamble_format.ensure() else 1
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,166 @@
+#!/usr/bin/env python3
+"""
+Repository Scanner
+Walks the repository once and hands each file to registered checkers.
+
+The file list comes from `git ls-files` (tracked files plus untracked files
+that are not ignored), so .gitignore is honoured and .git, build output and
+caches are never visited; outside a git work tree the directory is walked
+instead. Each file is read once, on a thread pool, and its bytes are passed
+to every checker that accepts the path. The character and merge-readiness
+tools register their checks here, so running them together reads the tree
+once instead of once per tool.
+
+Usage:
+    python3 repo_scanner.py [directory]
+"""
+
+import os
+import subprocess
+import sys
+from concurrent.futures import ThreadPoolExecutor
+from dataclasses import dataclass
+from pathlib import Path
+from typing import Any, Callable, Dict, List, Optional, Tuple
+
+
+@dataclass
+class ScannedFile:
+    """A file as seen by the checkers; data is None if no checker needs the content."""
+    path: Path
+    size: int
+    data: Optional[bytes] = None
+
+
+@dataclass
+class Checker:
+    """A registered check.
+
+    accepts(path) selects the files the check runs on (all files if None);
+    check(scanned_file) returns the result for one file. Checkers with
+    read=False only get the file size, so the file is not read for them.
+    """
+    name: str
+    check: Callable[[ScannedFile], Any]
+    accepts: Optional[Callable[[Path], bool]] = None
+    read: bool = True
+
+    def wants(self, path: Path) -> bool:
+        return self.accepts is None or self.accepts(path)
+
+
+def list_files(directory: Path) -> List[Path]:
+    """Files below directory that are not ignored, relative to it and sorted."""
+    try:
+        result = subprocess.run(['git', 'ls-files', '-z', '--cached', '--others', '--exclude-standard'],
+                                cwd=directory, capture_output=True, check=True)
+    except (OSError, subprocess.CalledProcessError):
+        # Not a git work tree: walk it, skipping only .git
+        paths = []
+        for root, dirs, files in os.walk(directory):
+            if '.git' in dirs:
+                dirs.remove('.git')
+            paths.extend(Path(root, name).relative_to(directory) for name in files)
+        return sorted(paths)
+
+    # Unmerged files are listed once per stage
+    names = {name for name in result.stdout.decode('utf-8', 'surrogateescape').split('\0') if name}
+    return sorted(Path(name) for name in names)
+
+
+class RepositoryScanner:
+    """Reads each file once and dispatches it to the registered checkers."""
+
+    def __init__(self, directory='.', max_workers: Optional[int] = None):
+        self.directory = Path(directory)
+        self.max_workers = max_workers or min(8, os.cpu_count() or 1)
+        self.checkers: Dict[str, Checker] = {}
+        self.errors: List[Tuple[Path, str]] = []
+        self.files_read = 0
+
+    def register(self, name: str, check: Callable[[ScannedFile], Any],
+                 accepts: Optional[Callable[[Path], bool]] = None, read: bool = True) -> Checker:
+        """Register a check; a later registration with the same name replaces it."""
+        checker = Checker(name, check, accepts, read)
+        self.checkers[name] = checker
+        return checker
+
+    def _scan_file(self, job: Tuple[Path, List[Checker]]) -> List[Tuple[str, Any]]:
+        path, checkers = job
+        try:
+            if any(checker.read for checker in checkers):
+                with open(path, 'rb') as f:
+                    data = f.read()
+                scanned = ScannedFile(path, len(data), data)
+            else:
+                scanned = ScannedFile(path, path.stat().st_size)
+        except OSError as e:
+            self.errors.append((path, str(e)))
+            return []
+        return [(checker.name, checker.check(scanned)) for checker in checkers]
+
+    def scan(self) -> Dict[str, List[Tuple[Path, Any]]]:
+        """Run every checker on the files it accepts.
+
+        Returns the (path, result) pairs of each checker, in path order.
+        Paths are the scanned directory joined with the file's relative path.
+        """
+        results: Dict[str, List[Tuple[Path, Any]]] = {name: [] for name in self.checkers}
+        jobs = []
+        for relative in list_files(self.directory):
+            path = self.directory / relative
+            checkers = [checker for checker in self.checkers.values() if checker.wants(path)]
+            # Deleted but still tracked files, symlinks to directories and submodules
+            if checkers and path.is_file():
+                jobs.append((path, checkers))
+        self.files_read = sum(1 for _, checkers in jobs if any(checker.read for checker in checkers))
+        if not jobs:
+            return results
+
+        with ThreadPoolExecutor(max_workers=min(self.max_workers, len(jobs))) as pool:
+            for (path, _), file_results in zip(jobs, pool.map(self._scan_file, jobs)):
+                for name, result in file_results:
+                    results[name].append((path, result))
+        return results
+
+
+def main():
+    """Run the character, merge-readiness and file-size checks in one pass, reporting only."""
+    from comprehensive_char_remover import ComprehensiveCharacterRemover
+    from ci_failure_prevention import CIFailureAnalyzer
+    from detect_disruptive_characters import CharacterValidator
+    from fix_merge_conflicts import MergeConflictFixer
+    import validate_merge_readiness
+
+    directory = Path(sys.argv[1]) if len(sys.argv) > 1 else Path('.')
+    scanner = RepositoryScanner(directory)
+    fixer = MergeConflictFixer(dry_run=True)
+    remover = ComprehensiveCharacterRemover(dry_run=True)
+    validator = CharacterValidator()
+    analyzer = CIFailureAnalyzer()
+    fixer.register_checks(scanner)
+    remover.register_checks(scanner)
+    validator.register_checks(scanner, ['.tex', '.sty'])
+    validate_merge_readiness.register_checks(scanner)
+    analyzer.register_checks(scanner)
+
+    print(f"[SEARCH] Scanning {directory.absolute()} with {len(scanner.checkers)} checkers")
+    results = scanner.scan()
+    print(f"[SUMMARY] Read {scanner.files_read} files once")
+    for path, error in scanner.errors:
+        print(f"[WARN] Could not read {path}: {error}")
+
+    fixer.process_directory(directory, results)
+    remover.process_directory(directory, results)
+    character_results = validator.collect(results)
+    validator.print_summary(character_results)
+    readiness = validate_merge_readiness.run_validation(directory, results)
+    analyzer.analyze_resource_usage_patterns(results)
+
+    # Warnings are reported only; the exit code follows the checkers' own
+    critical = any(result['issues'] for result in character_results)
+    return 1 if readiness or critical else 0
+
+
+if __name__ == '__main__':
+    sys.exit(main())
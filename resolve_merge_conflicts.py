@@ -2,26 +2,179 @@
 """
 Automatic Merge Conflict Resolver
 Resolves Git merge conflicts by intelligently choosing the appropriate version.
+
+Only the files git reports as unmerged (`git diff --name-only --diff-filter=U`)
+are read, so resolving a conflicted merge or rebase takes time proportional
+to the conflicted files, not to the repository. Each file is streamed line by
+line through a conflict-marker state machine that accepts any branch label,
+diff3-style base sections (|||||||) and nested conflicts, and files are
+processed on a thread pool.
 """
 
+import os
 import re
+import subprocess
 import sys
+import tempfile
+from concurrent.futures import ThreadPoolExecutor
+from dataclasses import dataclass, field
 from pathlib import Path
-from typing import List, Tuple
+from typing import Callable, List, Optional, Tuple
 import logging
 
 logging.basicConfig(level=logging.INFO, format='%(levelname)s: %(message)s')
 logger = logging.getLogger(__name__)
 
+# A marker is at least seven characters; recursive merges nest longer ones
+MARKER_PATTERN = re.compile(rb'^(<{7,}|\|{7,}|={7,}|>{7,})(?:$|[ \t](.*)$)')
+BINARY_CHECK_BYTES = 8192
+
+
+@dataclass
+class ConflictHunk:
+    """One conflict: our side, the common base (diff3 style only) and their side."""
+    ours: List[bytes] = field(default_factory=list)
+    theirs: List[bytes] = field(default_factory=list)
+    base: Optional[List[bytes]] = None
+    ours_label: str = ''
+    theirs_label: str = ''
+
+
+class _Level:
+    """A conflict being read, with its raw lines in case it is not closed."""
+
+    def __init__(self, size: int, label: str, raw: bytes):
+        self.size = size
+        self.hunk = ConflictHunk(ours_label=label)
+        self.section = self.hunk.ours
+        self.raw = [raw]
+
+
+class ConflictMarkerParser:
+    """Streaming conflict-marker state machine.
+
+    feed() takes one line (with its line ending) and returns the output lines
+    that are final; a conflict is buffered until its closing marker and then
+    replaced by what resolve() returns for it. A conflict nested inside a
+    section is resolved first and becomes part of that section. Separator and
+    closing markers belong to the innermost conflict opened with a marker of
+    the same size; marker lines that do not fit, e.g. a ======= heading
+    outside a conflict, are kept as text. Conflicts still open at close()
+    are kept unchanged and counted in unterminated.
+    """
+
+    def __init__(self, resolve: Callable[[ConflictHunk], List[bytes]]):
+        self.resolve = resolve
+        self.conflicts = 0
+        self.unterminated = 0
+        self._stack: List[_Level] = []
+
+    def _level_for(self, size: int) -> Optional[_Level]:
+        """The innermost open conflict whose markers have this size."""
+        for level in reversed(self._stack):
+            if level.size == size:
+                return level
+        return None
+
+    def _emit(self, lines: List[bytes]) -> List[bytes]:
+        if self._stack:
+            self._stack[-1].section.extend(lines)
+            return []
+        return lines
+
+    def feed(self, line: bytes) -> List[bytes]:
+        match = MARKER_PATTERN.match(line.rstrip(b'\r\n'))
+        for level in self._stack:
+            level.raw.append(line)
+        if match is None:
+            return self._emit([line])
+
+        marker, label = match.group(1), (match.group(2) or b'').decode('utf-8', 'replace').strip()
+        kind, size = marker[:1], len(marker)
+        if kind == b'<':
+            self._stack.append(_Level(size, label, line))
+            return []
+
+        level = self._level_for(size)
+        if level is None:
+            return self._emit([line])
+        hunk = level.hunk
+        if kind == b'|' and level.section is hunk.ours:
+            hunk.base = []
+            level.section = hunk.base
+        elif kind == b'=' and not label and level.section is not hunk.theirs:
+            level.section = hunk.theirs
+        elif kind == b'>' and level.section is hunk.theirs:
+            hunk.theirs_label = label
+            # Conflicts opened inside this one and never closed stay as text
+            while self._stack[-1] is not level:
+                inner = self._stack.pop()
+                self.unterminated += 1
+                level.section.extend(inner.raw)
+            self._stack.pop()
+            self.conflicts += 1
+            return self._emit(list(self.resolve(hunk)))
+        else:
+            return self._emit([line])
+        return []
+
+    def close(self) -> List[bytes]:
+        """End of input: return the raw lines of conflicts that were never closed."""
+        if not self._stack:
+            return []
+        self.unterminated += len(self._stack)
+        # The outermost conflict's raw lines include the inner ones
+        lines = self._stack[0].raw
+        self._stack = []
+        return lines
+
+
+def conflicted_files(directory: Path) -> List[Path]:
+    """Files git reports as unmerged below directory."""
+    result = subprocess.run(['git', 'diff', '--name-only', '--diff-filter=U', '--relative', '-z'],
+                            cwd=directory, capture_output=True, check=True)
+    names = sorted({name for name in result.stdout.decode('utf-8', 'surrogateescape').split('\0') if name})
+    return [directory / name for name in names]
+
+
+def resolve_file_markers(filepath: Path, resolve: Callable[[ConflictHunk], List[bytes]]) -> Tuple[int, int]:
+    """
+    Stream a file through the conflict-marker parser and replace it atomically.
+
+    The file is only rewritten if it had conflicts and all of them were closed.
+    Binary files are not read and report no conflicts.
+
+    Returns:
+        Tuple of (conflicts_resolved, conflicts_unterminated)
+    """
+    parser = ConflictMarkerParser(resolve)
+    with open(filepath, 'rb') as source:
+        if b'\0' in source.read(BINARY_CHECK_BYTES):
+            logger.info(f"Skipping binary file {filepath}")
+            return 0, 0
+        source.seek(0)
+
+        fd, temp_path = tempfile.mkstemp(dir=filepath.parent, prefix=f'.{filepath.name}.', suffix='.tmp')
+        try:
+            with os.fdopen(fd, 'wb') as target:
+                for line in source:
+                    target.writelines(parser.feed(line))
+                target.writelines(parser.close())
+            if parser.conflicts and not parser.unterminated:
+                os.chmod(temp_path, os.stat(filepath).st_mode & 0o7777)
+                os.replace(temp_path, filepath)
+        finally:
+            if os.path.exists(temp_path):
+                os.unlink(temp_path)
+    return parser.conflicts, parser.unterminated
+
 
 class MergeConflictResolver:
     """Resolves Git merge conflicts in files."""
 
-    def __init__(self):
-        self.conflict_pattern = re.compile(
-            r'<<<<<<< HEAD\n(.*?)\n=======\n(.*?)\n>>>>>>> pr-653',
-            re.DOTALL
-        )
+    def __init__(self, max_workers: Optional[int] = None):
+        self.max_workers = max_workers or min(8, os.cpu_count() or 1)
+        self.failed_files: List[Path] = []
 
     def resolve_conflict(self, head_content: str, pr_content: str, context: str = "") -> str:
         """
@@ -38,32 +191,39 @@ class MergeConflictResolver:
 
         # If one side is empty, use the other
         if not head_stripped and pr_stripped:
-            logger.debug("Keeping pr-653 content (HEAD is empty)")
+            logger.debug(f"Keeping incoming content (HEAD is empty){context}")
             return pr_content
         elif not pr_stripped and head_stripped:
-            logger.debug("Keeping HEAD content (pr-653 is empty)")
+            logger.debug(f"Keeping HEAD content (incoming side is empty){context}")
             return head_content
         elif not head_stripped and not pr_stripped:
-            logger.debug("Both sides empty, removing conflict marker")
+            logger.debug(f"Both sides empty, removing conflict marker{context}")
             return ""
 
         # Check if contents are identical (just whitespace differences)
         if head_stripped == pr_stripped:
-            logger.debug("Contents identical, keeping HEAD version")
+            logger.debug(f"Contents identical, keeping HEAD version{context}")
             return head_content
 
         # Check if one is a subset/superset of the other
         if pr_stripped in head_stripped:
-            logger.debug("HEAD contains pr-653 content, keeping HEAD")
+            logger.debug(f"HEAD contains incoming content, keeping HEAD{context}")
             return head_content
         elif head_stripped in pr_stripped:
-            logger.debug("pr-653 contains HEAD content, keeping pr-653")
+            logger.debug(f"Incoming side contains HEAD content, keeping it{context}")
             return pr_content
 
         # For different content, keep HEAD (current branch)
-        logger.debug("Content differs, keeping HEAD version")
+        logger.debug(f"Content differs, keeping HEAD version{context}")
         return head_content
 
+    def resolve_hunk(self, hunk: ConflictHunk) -> List[bytes]:
+        """Resolve a parsed conflict with resolve_conflict()."""
+        head_content = b''.join(hunk.ours).decode('utf-8', 'surrogateescape')
+        pr_content = b''.join(hunk.theirs).decode('utf-8', 'surrogateescape')
+        context = f" ({hunk.ours_label} / {hunk.theirs_label})"
+        return [self.resolve_conflict(head_content, pr_content, context).encode('utf-8', 'surrogateescape')]
+
     def resolve_file(self, filepath: Path) -> Tuple[bool, int]:
         """
         Resolve all conflicts in a file.
@@ -72,76 +232,54 @@ class MergeConflictResolver:
             Tuple of (success, conflicts_resolved)
         """
         try:
-            content = filepath.read_text(encoding='utf-8')
-        except Exception as e:
-            logger.error(f"Error reading {filepath}: {e}")
+            conflicts, unterminated = resolve_file_markers(filepath, self.resolve_hunk)
+        except OSError as e:
+            logger.error(f"Error resolving {filepath}: {e}")
             return False, 0
 
-        # Check if file has conflicts
-        if '<<<<<<< HEAD' not in content:
-            logger.info(f"No conflicts in {filepath}")
-            return True, 0
-
-        original_content = content
-        conflicts_found = len(re.findall(r'<<<<<<< HEAD', content))
-
-        # Resolve all conflicts
-        def replace_conflict(match):
-            head_content = match.group(1)
-            pr_content = match.group(2)
-            return self.resolve_conflict(head_content, pr_content)
-
-        resolved_content = self.conflict_pattern.sub(replace_conflict, content)
-
-        # Verify all conflicts were resolved
-        remaining_conflicts = len(re.findall(r'<<<<<<< HEAD', resolved_content))
-        if remaining_conflicts > 0:
-            logger.warning(f"Could not resolve all conflicts in {filepath}: {remaining_conflicts} remaining")
-            return False, conflicts_found - remaining_conflicts
-
-        # Write resolved content
-        try:
-            filepath.write_text(resolved_content, encoding='utf-8')
-            logger.info(f"[OK] Resolved {conflicts_found} conflicts in {filepath}")
-            return True, conflicts_found
-        except Exception as e:
-            logger.error(f"Error writing {filepath}: {e}")
+        if unterminated:
+            logger.warning(f"Could not resolve all conflicts in {filepath}: {unterminated} unterminated")
+            return False, 0
+        if not conflicts:
+            # Unmerged without text markers: a binary or modify/delete conflict
+            logger.error(f"{filepath} is unmerged but has no conflict markers, resolve it manually")
             return False, 0
+        logger.info(f"[OK] Resolved {conflicts} conflicts in {filepath}")
+        return True, conflicts
 
     def resolve_all(self, directory: Path = None) -> Tuple[int, int]:
         """
-        Resolve conflicts in all files in the directory.
+        Resolve conflicts in all unmerged files below the directory.
+
+        Files that could not be resolved are collected in self.failed_files.
 
         Returns:
             Tuple of (files_resolved, total_conflicts_resolved)
         """
         if directory is None:
             directory = Path.cwd()
+        self.failed_files = []
 
-        files_resolved = 0
-        conflicts_resolved = 0
-
-        # Find all files with conflicts
-        conflict_files = []
-        for filepath in directory.rglob('*'):
-            if filepath.is_file() and not any(part.startswith('.') for part in filepath.parts[:-1]):
-                # Skip hidden directories but not .github
-                if '.git' in str(filepath) and '.github' not in str(filepath):
-                    continue
-                try:
-                    content = filepath.read_text(encoding='utf-8', errors='ignore')
-                    if '<<<<<<< HEAD' in content:
-                        conflict_files.append(filepath)
-                except:
-                    continue
+        try:
+            conflict_files = conflicted_files(directory)
+        except (OSError, subprocess.CalledProcessError) as e:
+            logger.error(f"Could not list unmerged files in {directory}: {e}")
+            return 0, 0
 
         logger.info(f"Found {len(conflict_files)} files with conflicts")
+        if not conflict_files:
+            return 0, 0
 
-        for filepath in conflict_files:
-            success, num_conflicts = self.resolve_file(filepath)
-            if success:
-                files_resolved += 1
-                conflicts_resolved += num_conflicts
+        files_resolved = 0
+        conflicts_resolved = 0
+        with ThreadPoolExecutor(max_workers=min(self.max_workers, len(conflict_files))) as pool:
+            for filepath, (success, num_conflicts) in zip(conflict_files,
+                                                          pool.map(self.resolve_file, conflict_files)):
+                if success:
+                    files_resolved += 1
+                    conflicts_resolved += num_conflicts
+                else:
+                    self.failed_files.append(filepath)
 
         return files_resolved, conflicts_resolved
 
@@ -164,9 +302,10 @@ def main():
     logger.info(f"Summary:")
     logger.info(f"  Files resolved: {files_resolved}")
     logger.info(f"  Conflicts resolved: {conflicts_resolved}")
+    logger.info(f"  Files left unresolved: {len(resolver.failed_files)}")
     logger.info("=" * 60)
 
-    return 0 if files_resolved > 0 else 1
+    return 0 if files_resolved > 0 and not resolver.failed_files else 1
 
 
 if __name__ == '__main__':
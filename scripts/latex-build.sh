@@ -1,6 +1,6 @@
 #!/bin/bash
 # Enhanced LaTeX Build Script for CTMM Project
-# Implements pdflatex + BibTeX + multiple passes workflow
+# Implements pdflatex + BibTeX workflow, rerunning passes until references converge
 
 set -e
 
@@ -10,6 +10,8 @@ BUILD_DIR="build"
 LOG_FILE="$BUILD_DIR/build-log.txt"
 ERROR_SUMMARY="$BUILD_DIR/error-summary.txt"
 WARNING_SUMMARY="$BUILD_DIR/warning-summary.txt"
+FORMAT_ARGS=""
+MAX_PASSES=5
 
 # Colors for output
 RED='\033[0;31m'
@@ -43,6 +45,17 @@ check_dependencies() {
     log_message "${GREEN}✓ All dependencies found${NC}"
 }
 
+prepare_preamble_format() {
+    # Precompiled preamble (see preamble_format.py); empty means plain pdflatex
+    FORMAT_ARGS=$(python3 preamble_format.py --pdflatex-args "$MAIN_FILE" 2>> "$LOG_FILE" || true)
+
+    if [[ -n "$FORMAT_ARGS" ]]; then
+        log_message "${GREEN}✓ Using precompiled preamble format${NC}"
+    else
+        log_message "${YELLOW}Precompiled preamble not available, using plain pdflatex${NC}"
+    fi
+}
+
 analyze_log() {
     local tex_log="$1"
     local errors=()
@@ -95,10 +108,25 @@ analyze_log() {
 run_pdflatex() {
     local pass_num="$1"
     local basename=$(basename "$MAIN_FILE" .tex)
+    local pass_output="$BUILD_DIR/pdflatex-pass.txt"
+    local status=0
 
     log_message "${BLUE}Running pdflatex pass $pass_num...${NC}"
 
-    if pdflatex -output-directory="$BUILD_DIR" -interaction=nonstopmode "$MAIN_FILE" >> "$LOG_FILE" 2>&1; then
+    pdflatex $FORMAT_ARGS -output-directory="$BUILD_DIR" -interaction=nonstopmode "$MAIN_FILE" > "$pass_output" 2>&1 || status=$?
+    cat "$pass_output" >> "$LOG_FILE"
+
+    # A stale or unreadable format fails before any input is read
+    if [[ $status -ne 0 && -n "$FORMAT_ARGS" ]] &&
+       python3 preamble_format.py --format-failed "$pass_output" 2>> "$LOG_FILE"; then
+        log_message "${YELLOW}Precompiled preamble could not be loaded, using plain pdflatex${NC}"
+        FORMAT_ARGS=""
+        status=0
+        pdflatex -output-directory="$BUILD_DIR" -interaction=nonstopmode "$MAIN_FILE" >> "$LOG_FILE" 2>&1 || status=$?
+    fi
+    rm -f "$pass_output"
+
+    if [[ $status -eq 0 ]]; then
         log_message "${GREEN}✓ pdflatex pass $pass_num completed${NC}"
         analyze_log "$BUILD_DIR/$basename.log"
         return $?
@@ -109,6 +137,16 @@ run_pdflatex() {
     fi
 }
 
+aux_fingerprint() {
+    # Hash of the files later passes read back; unchanged means converged
+    local basename=$(basename "$MAIN_FILE" .tex)
+    local ext
+    for ext in aux toc out lof lot bbl; do
+        echo "$ext"
+        cat "$BUILD_DIR/$basename.$ext" 2>/dev/null || true
+    done | sha256sum | cut -d' ' -f1
+}
+
 run_bibtex() {
     local basename=$(basename "$MAIN_FILE" .tex)
 
@@ -216,30 +254,38 @@ main() {
 
     # Check dependencies
     check_dependencies
+    prepare_preamble_format
+
+    # Clean previous logs; .aux/.toc/.out are kept so an unchanged
+    # document converges after a single pass
+    rm -f "$BUILD_DIR"/*.log "$BUILD_DIR"/*.blg
+
+    # Rerun pdflatex only while auxiliary files change (like latexmk)
+    local pass=0
+    local before
+    while true; do
+        pass=$((pass + 1))
+        before=$(aux_fingerprint)
+
+        if ! run_pdflatex $pass; then
+            log_message "${RED}Build failed on pass $pass${NC}"
+            exit 1
+        fi
 
-    # Clean previous build artifacts
-    rm -f "$BUILD_DIR"/*.aux "$BUILD_DIR"/*.log "$BUILD_DIR"/*.toc "$BUILD_DIR"/*.bbl "$BUILD_DIR"/*.blg "$BUILD_DIR"/*.out
-
-    # First pdflatex pass
-    if ! run_pdflatex 1; then
-        log_message "${RED}Build failed on first pass${NC}"
-        exit 1
-    fi
-
-    # Run BibTeX
-    run_bibtex
-
-    # Second pdflatex pass (for bibliography)
-    if ! run_pdflatex 2; then
-        log_message "${RED}Build failed on second pass${NC}"
-        exit 1
-    fi
+        # BibTeX after the first pass writes the .bbl the next pass reads
+        if [[ $pass -eq 1 ]]; then
+            run_bibtex
+        fi
 
-    # Third pdflatex pass (for cross-references)
-    if ! run_pdflatex 3; then
-        log_message "${RED}Build failed on third pass${NC}"
-        exit 1
-    fi
+        if [[ "$(aux_fingerprint)" == "$before" ]]; then
+            log_message "${GREEN}✓ References converged after $pass pass(es)${NC}"
+            break
+        fi
+        if [[ $pass -ge $MAX_PASSES ]]; then
+            log_message "${YELLOW}⚠ References still changing after $pass passes${NC}"
+            break
+        fi
+    done
 
     # Check PDF completeness
     if ! check_pdf_completeness; then
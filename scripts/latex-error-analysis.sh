@@ -34,15 +34,33 @@ run_extended_compilation() {
     # Clean previous artifacts
     rm -f "$BUILD_DIR"/*.aux "$BUILD_DIR"/*.log "$BUILD_DIR"/*.toc "$BUILD_DIR"/*.out
 
+    # Precompiled preamble (see preamble_format.py); empty means plain pdflatex
+    local format_args
+    format_args=$(python3 preamble_format.py --pdflatex-args "$MAIN_FILE" 2>/dev/null || true)
+
     # Run pdflatex with maximum error detail
-    pdflatex -output-directory="$BUILD_DIR" \
+    pdflatex $format_args \
+             -output-directory="$BUILD_DIR" \
              -interaction=nonstopmode \
              -file-line-error \
              -recorder \
              "$MAIN_FILE" > "$ANALYSIS_DIR/compilation-output.txt" 2>&1 || true
 
+    # A stale or unreadable format fails before any input is read
+    if [[ -n "$format_args" ]] &&
+       python3 preamble_format.py --format-failed "$ANALYSIS_DIR/compilation-output.txt" 2>/dev/null; then
+        log_message "${YELLOW}Precompiled preamble could not be loaded, using plain pdflatex${NC}"
+        format_args=""
+        pdflatex -output-directory="$BUILD_DIR" \
+                 -interaction=nonstopmode \
+                 -file-line-error \
+                 -recorder \
+                 "$MAIN_FILE" > "$ANALYSIS_DIR/compilation-output.txt" 2>&1 || true
+    fi
+
     # Also run with -halt-on-error to get precise error location
-    pdflatex -output-directory="$BUILD_DIR" \
+    pdflatex $format_args \
+             -output-directory="$BUILD_DIR" \
              -interaction=nonstopmode \
              -halt-on-error \
              -file-line-error \
@@ -0,0 +1,224 @@
+#!/usr/bin/env python3
+"""
+Unit tests for the concurrent open PR analysis.
+Runs PRAnalyzer against a local stub of the GitHub API to test pagination of
+PR files, bounded parallelism and the per-PR files cache.
+"""
+
+import io
+import json
+import sys
+import tempfile
+import threading
+import unittest
+from contextlib import redirect_stdout
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from pathlib import Path
+from urllib.parse import parse_qs, urlparse
+
+# Add current directory to path for importing modules
+sys.path.insert(0, str(Path(__file__).parent))
+from analyze_all_open_prs import PRAnalyzer
+
+REPO = '/repos/owner/repo'
+PR_COUNT = 6
+FILES_PER_PR = 230
+REQUEST_DELAY = 0.1
+
+
+def make_pr(number, head_sha=None):
+    return {
+        'number': number,
+        'title': f'Copilot PR {number}',
+        'html_url': f'https://github.com/owner/repo/pull/{number}',
+        'head': {'ref': f'copilot/fix-{number}', 'sha': head_sha or f'head{number}'},
+        'base': {'ref': 'main', 'sha': 'base1'},
+    }
+
+
+class StubGitHub(BaseHTTPRequestHandler):
+    """Serves the pull request and workflow run endpoints the analyzer uses."""
+
+    pulls = []
+    running = set()
+    failed_runs = set()
+    failing = set()
+    requests_seen = []
+    lock = threading.Lock()
+    active = 0
+    max_active = 0
+
+    def log_message(self, format, *args):
+        pass
+
+    def _send(self, body, headers=None):
+        payload = json.dumps(body).encode('utf-8')
+        self.send_response(200)
+        self.send_header('Content-Length', str(len(payload)))
+        for name, value in (headers or {}).items():
+            self.send_header(name, value)
+        self.end_headers()
+        self.wfile.write(payload)
+
+    def do_GET(self):
+        url = urlparse(self.path)
+        query = parse_qs(url.query)
+        page = int(query.get('page', ['1'])[0])
+        per_page = int(query.get('per_page', ['30'])[0])
+        parts = url.path[len(REPO):].strip('/').split('/')
+        cls = type(self)
+        with cls.lock:
+            cls.requests_seen.append(self.path)
+            cls.active += 1
+            cls.max_active = max(cls.max_active, cls.active)
+        # Not time.sleep, so the round-trips overlap in the server threads
+        threading.Event().wait(REQUEST_DELAY)
+        with cls.lock:
+            cls.active -= 1
+
+        if url.path in cls.failing:
+            self.send_error(502)
+        elif parts == ['pulls']:
+            self._send(cls.pulls)
+        elif parts[0] == 'pulls' and len(parts) == 2:
+            number = int(parts[1])
+            self._send(dict(make_pr(number), mergeable=number % 2 == 0,
+                            mergeable_state='clean' if number % 2 == 0 else 'dirty'))
+        elif parts[0] == 'pulls' and parts[2:] == ['files']:
+            files = [{'filename': f'modules/file{i}.tex'} for i in range(FILES_PER_PR)]
+            headers = {}
+            if page * per_page < FILES_PER_PR:
+                next_url = (f'http://{self.headers["Host"]}{url.path}'
+                            f'?per_page={per_page}&page={page + 1}')
+                headers['Link'] = f'<{next_url}>; rel="next"'
+            self._send(files[(page - 1) * per_page:page * per_page], headers)
+        elif parts == ['actions', 'runs']:
+            branch = query['branch'][0]
+            status = 'in_progress' if branch in cls.running else 'completed'
+            conclusion = 'failure' if branch in cls.failed_runs else 'success'
+            self._send({'workflow_runs': [{
+                'name': 'Build LaTeX PDF', 'status': status,
+                'conclusion': conclusion if status == 'completed' else None,
+                'html_url': 'https://github.com/owner/repo/actions/runs/1',
+                'created_at': '2024-01-01T00:00:00Z'}]})
+        else:
+            self.send_error(404)
+
+
+class TestConcurrentPRAnalysis(unittest.TestCase):
+    """Test the analyzer against a local stub server."""
+
+    @classmethod
+    def setUpClass(cls):
+        cls.server = ThreadingHTTPServer(('127.0.0.1', 0), StubGitHub)
+        cls.thread = threading.Thread(target=cls.server.serve_forever, daemon=True)
+        cls.thread.start()
+
+    @classmethod
+    def tearDownClass(cls):
+        cls.server.shutdown()
+        cls.server.server_close()
+
+    def setUp(self):
+        StubGitHub.pulls = [make_pr(number) for number in range(1, PR_COUNT + 1)]
+        StubGitHub.running = set()
+        StubGitHub.failed_runs = set()
+        StubGitHub.failing = set()
+        StubGitHub.requests_seen = []
+        StubGitHub.max_active = 0
+        self.cache_dir = tempfile.TemporaryDirectory()
+        self.addCleanup(self.cache_dir.cleanup)
+
+    def make_analyzer(self, max_workers=3):
+        analyzer = PRAnalyzer(max_workers=max_workers, cache_dir=self.cache_dir.name)
+        analyzer.api_base = f'http://127.0.0.1:{self.server.server_address[1]}{REPO}'
+        self.addCleanup(analyzer.session.close)
+        return analyzer
+
+    def analyze(self, analyzer):
+        with redirect_stdout(io.StringIO()):
+            return analyzer.analyze_all(analyzer.get_open_prs())
+
+    def test_prs_analyzed_concurrently_in_order(self):
+        """PRs are analyzed in parallel, bounded by max_workers, and reported in PR order."""
+        analyses = self.analyze(self.make_analyzer(max_workers=3))
+
+        self.assertEqual([a['number'] for a in analyses], list(range(1, PR_COUNT + 1)))
+        self.assertEqual(StubGitHub.max_active, 3)
+        self.assertEqual(analyses[0]['status'], 'HAS_CONFLICTS')
+        self.assertEqual(analyses[1]['status'], 'READY_TO_MERGE')
+
+    def test_pr_files_read_every_page(self):
+        """Files of a PR are collected across all pages of 100."""
+        analyses = self.analyze(self.make_analyzer())
+
+        self.assertEqual(analyses[0]['files_changed'], FILES_PER_PR)
+        self.assertEqual(len(analyses[0]['conflict_files']), FILES_PER_PR)
+        pages = [path for path in StubGitHub.requests_seen if path.startswith(f'{REPO}/pulls/1/files')]
+        self.assertEqual(len(pages), 3)
+        self.assertTrue(all('per_page=100' in path for path in pages))
+
+    @staticmethod
+    def files_fetched():
+        return {int(urlparse(path).path.split('/')[5]) for path in StubGitHub.requests_seen
+                if urlparse(path).path.endswith('/files')}
+
+    def test_unchanged_pr_files_served_from_cache(self):
+        """A second run only fetches the files of PRs with a new head commit."""
+        StubGitHub.running = {'copilot/fix-3'}
+        first = self.analyze(self.make_analyzer())
+
+        StubGitHub.pulls[1] = make_pr(2, head_sha='head2-pushed')
+        StubGitHub.requests_seen = []
+        second = self.analyze(self.make_analyzer())
+
+        self.assertEqual(self.files_fetched(), {2})
+        self.assertEqual([a.get('files_cached', False) for a in second],
+                         [True, False, True, True, True, True])
+        for before, after in zip(first, second):
+            self.assertEqual(before['status'], after['status'])
+            self.assertEqual(before['conflict_files'], after['conflict_files'])
+        self.assertEqual(second[0]['files_changed'], FILES_PER_PR)
+        self.assertEqual(second[1]['head_sha'], 'head2-pushed')
+
+    def test_workflow_rerun_updates_cached_pr(self):
+        """Workflow runs are fetched every time, so a re-run on the same commit is reported."""
+        StubGitHub.failed_runs = {'copilot/fix-2'}
+        first = self.analyze(self.make_analyzer())
+        self.assertEqual(first[1]['status'], 'WORKFLOW_FAILED')
+        self.assertEqual(len(first[1]['failed_workflows']), 1)
+
+        StubGitHub.failed_runs = set()
+        StubGitHub.requests_seen = []
+        second = self.analyze(self.make_analyzer())
+
+        self.assertTrue(second[1]['files_cached'])
+        self.assertEqual(second[1]['status'], 'READY_TO_MERGE')
+        self.assertEqual(second[1]['failed_workflows'], [])
+        runs = [path for path in StubGitHub.requests_seen if path.startswith(f'{REPO}/actions/runs')]
+        self.assertEqual(len(runs), PR_COUNT)
+
+    def test_failed_file_fetch_not_cached(self):
+        """PRs whose files could not be fetched fetch them again on the next run."""
+        StubGitHub.failing = {f'{REPO}/pulls/1/files', f'{REPO}/actions/runs'}
+        with redirect_stdout(io.StringIO()):
+            analyzer = self.make_analyzer()
+            first = analyzer.analyze_all(analyzer.get_open_prs()[:1])
+        self.assertEqual(first[0]['fetch_errors'], ['files', 'workflow_runs'])
+        self.assertEqual(first[0]['files_changed'], 0)
+
+        StubGitHub.failing = set()
+        StubGitHub.requests_seen = []
+        second = self.analyze(self.make_analyzer())
+        self.assertNotIn('files_cached', second[0])
+        self.assertEqual(second[0]['files_changed'], FILES_PER_PR)
+        self.assertIn(1, self.files_fetched())
+
+        StubGitHub.requests_seen = []
+        third = self.analyze(self.make_analyzer())
+        self.assertEqual(self.files_fetched(), set())
+        self.assertEqual(third[0]['files_changed'], FILES_PER_PR)
+
+
+if __name__ == '__main__':
+    unittest.main(verbosity=2)
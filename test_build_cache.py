@@ -0,0 +1,185 @@
+#!/usr/bin/env python3
+"""
+Unit tests for the CTMM build cache.
+Tests dependency hashing, .fls parsing and cached build verdicts.
+"""
+
+import os
+import sys
+import tempfile
+import unittest
+from pathlib import Path
+from unittest.mock import patch, MagicMock
+
+# Add current directory to path for importing modules
+sys.path.insert(0, str(Path(__file__).parent))
+import ctmm_build
+from build_cache import BuildCache, hash_files, parse_fls
+
+
+class TestBuildCacheBase(unittest.TestCase):
+    """Create a small project tree in a temporary directory."""
+
+    def setUp(self):
+        self.temp_dir = tempfile.TemporaryDirectory()
+        self.root = Path(self.temp_dir.name)
+        (self.root / 'style').mkdir()
+        (self.root / 'modules').mkdir()
+        (self.root / 'style' / 'ctmm-design.sty').write_text('% style\n', encoding='utf-8')
+        (self.root / 'modules' / 'intro.tex').write_text('Hallo\n', encoding='utf-8')
+        (self.root / 'main.tex').write_text(
+            '\\documentclass{article}\n'
+            '\\usepackage{style/ctmm-design}\n'
+            '\\begin{document}\n'
+            '\\input{modules/intro}\n'
+            '\\end{document}\n', encoding='utf-8')
+        self.cache = BuildCache(self.root / '.ctmm_cache', project_root=self.root)
+
+    def tearDown(self):
+        self.temp_dir.cleanup()
+
+
+class TestParseFls(TestBuildCacheBase):
+    """Test cases for parse_fls."""
+
+    def test_keeps_only_project_sources(self):
+        """System files and files pdflatex wrote are not dependencies."""
+        fls = self.root / 'main.fls'
+        fls.write_text(
+            f'PWD {self.root}\n'
+            'INPUT /usr/share/texlive/texmf-dist/tex/latex/base/article.cls\n'
+            'INPUT main.tex\n'
+            'INPUT ./style/ctmm-design.sty\n'
+            f'INPUT {self.root}/modules/intro.tex\n'
+            'INPUT main.aux\n'
+            'OUTPUT main.aux\n'
+            'OUTPUT main.pdf\n', encoding='utf-8')
+
+        self.assertEqual(parse_fls(fls, self.root),
+                         ['main.tex', 'modules/intro.tex', 'style/ctmm-design.sty'])
+
+    def test_missing_fls(self):
+        """A missing recorder file yields no inputs."""
+        self.assertEqual(parse_fls(self.root / 'absent.fls', self.root), [])
+
+
+class TestHashFiles(TestBuildCacheBase):
+    """Test cases for hash_files."""
+
+    def test_order_independent(self):
+        """The hash does not depend on the order files are listed in."""
+        files = ['main.tex', 'modules/intro.tex']
+        self.assertEqual(hash_files(files, self.root), hash_files(reversed(files), self.root))
+
+    def test_content_change_changes_hash(self):
+        """Editing any dependency changes the hash."""
+        before = hash_files(['main.tex', 'modules/intro.tex'], self.root)
+        (self.root / 'modules' / 'intro.tex').write_text('Hallo Welt\n', encoding='utf-8')
+        after = hash_files(['main.tex', 'modules/intro.tex'], self.root)
+        self.assertNotEqual(before, after)
+
+
+class TestBuildCache(TestBuildCacheBase):
+    """Test cases for BuildCache lookup and store."""
+
+    def test_lookup_empty_cache(self):
+        """Nothing is returned before a build was stored."""
+        self.assertIsNone(self.cache.lookup('full', 'source', ['main.tex']))
+
+    def test_store_then_hit(self):
+        """An unchanged tree hits the cache."""
+        self.cache.store('full', 'source', ['main.tex'], ['modules/intro.tex'])
+        self.assertIsNotNone(self.cache.lookup('full', 'source', ['main.tex']))
+
+    def test_recorded_input_change_misses(self):
+        """Changing a file only known from the .fls output invalidates the entry."""
+        self.cache.store('full', 'source', ['main.tex'], ['modules/intro.tex'])
+        (self.root / 'modules' / 'intro.tex').write_text('Geändert\n', encoding='utf-8')
+        self.assertIsNone(self.cache.lookup('full', 'source', ['main.tex']))
+
+    def test_source_change_misses(self):
+        """A different compiled source invalidates the entry."""
+        self.cache.store('full', 'source', ['main.tex'], [])
+        self.assertIsNone(self.cache.lookup('full', 'other source', ['main.tex']))
+
+    def test_new_base_file_misses(self):
+        """A newly referenced file invalidates the entry."""
+        self.cache.store('full', 'source', ['main.tex'], [])
+        self.assertIsNone(self.cache.lookup('full', 'source', ['main.tex', 'modules/intro.tex']))
+
+    def test_pdf_is_restored(self):
+        """The cached PDF can be restored after the original is deleted."""
+        pdf = self.root / 'main.pdf'
+        pdf.write_bytes(b'%PDF' * 512)
+        entry = self.cache.store('full', 'source', ['main.tex'], [], pdf)
+        self.assertEqual(entry['pdf_size'], 2048)
+
+        pdf.unlink()
+        self.assertTrue(self.cache.restore_pdf('full', pdf))
+        self.assertEqual(pdf.stat().st_size, 2048)
+
+
+class TestCachedBuilds(TestBuildCacheBase):
+    """Test that ctmm_build skips pdflatex when the cache is warm."""
+
+    def setUp(self):
+        super().setUp()
+        self.old_cwd = os.getcwd()
+        os.chdir(self.root)
+
+    def tearDown(self):
+        os.chdir(self.old_cwd)
+        super().tearDown()
+
+    def _warm_full_build(self):
+        source_text = Path('main.tex').read_text(encoding='utf-8')
+        Path('main.pdf').write_bytes(b'%PDF' * 512)
+        BuildCache().store('full', source_text,
+                           ['main.tex', 'style/ctmm-design.sty', 'modules/intro.tex'],
+                           [], 'main.pdf')
+
+    def test_full_build_cache_hit_skips_pdflatex(self):
+        """A warm cache returns the verdict without running pdflatex."""
+        self._warm_full_build()
+        with patch('subprocess.run') as mock_run:
+            self.assertTrue(ctmm_build.test_full_build())
+            mock_run.assert_not_called()
+
+    def test_full_build_cache_restores_pdf(self):
+        """A cache hit restores main.pdf if it was cleaned away."""
+        self._warm_full_build()
+        Path('main.pdf').unlink()
+        with patch('subprocess.run') as mock_run:
+            self.assertTrue(ctmm_build.test_full_build())
+            mock_run.assert_not_called()
+        self.assertTrue(Path('main.pdf').exists())
+
+    def test_full_build_cache_replaces_foreign_pdf(self):
+        """A cache hit replaces a main.pdf left behind by a different build."""
+        self._warm_full_build()
+        Path('main.pdf').write_bytes(b'%PDF from a later edit')
+        with patch('subprocess.run') as mock_run:
+            self.assertTrue(ctmm_build.test_full_build())
+            mock_run.assert_not_called()
+        self.assertEqual(Path('main.pdf').read_bytes(), b'%PDF' * 512)
+
+    def test_module_edit_reruns_pdflatex(self):
+        """Editing a module forces a real build."""
+        self._warm_full_build()
+        Path('modules/intro.tex').write_text('Neu\n', encoding='utf-8')
+        mock_result = MagicMock(returncode=1)
+        with patch('subprocess.run', return_value=mock_result) as mock_run:
+            ctmm_build.test_full_build()
+            self.assertTrue(mock_run.called)
+
+    def test_no_cache_always_builds(self):
+        """use_cache=False bypasses a warm cache."""
+        self._warm_full_build()
+        mock_result = MagicMock(returncode=0)
+        with patch('subprocess.run', return_value=mock_result) as mock_run:
+            ctmm_build.test_full_build(use_cache=False)
+            self.assertTrue(mock_run.called)
+
+
+if __name__ == '__main__':
+    unittest.main(verbosity=2)
@@ -0,0 +1,174 @@
+#!/usr/bin/env python3
+"""
+Unit tests for the CTMM build profiler.
+Tests step timers, pdflatex resource accounting and file-open trace attribution.
+"""
+
+import json
+import os
+import sys
+import tempfile
+import unittest
+from pathlib import Path
+from unittest.mock import patch, MagicMock
+
+# Add current directory to path for importing modules
+sys.path.insert(0, str(Path(__file__).parent))
+import ctmm_build
+from build_profiler import (BuildProfiler, SCALED_SECONDS, TEX_LINE_WIDTH,
+                            parse_trace, traced_input)
+
+
+def trace_line(kind, name, seconds):
+    return f"CTMMT>{kind}{name}:{int(seconds * SCALED_SECONDS)}"
+
+
+class TestParseTrace(unittest.TestCase):
+    """Test cases for parse_trace."""
+
+    def test_nested_files_split_inclusive_and_exclusive(self):
+        """Time spent in a nested input is excluded from its parent."""
+        log = '\n'.join([
+            trace_line('+', 'main.tex', 0.0),
+            trace_line('+', 'modules/a.tex', 1.0),
+            trace_line('+', 'modules/a/teil.tex', 1.5),
+            trace_line('-', 'modules/a/teil.tex', 2.5),
+            trace_line('-', 'modules/a.tex', 3.0),
+            'Overfull \\hbox in paragraph',
+            trace_line('+', 'modules/b.tex', 3.0),
+            trace_line('-', 'modules/b.tex', 3.5),
+            trace_line('-', 'main.tex', 4.0),
+        ])
+        files = parse_trace(log)
+        self.assertAlmostEqual(files['modules/a.tex']['inclusive_s'], 2.0, places=3)
+        self.assertAlmostEqual(files['modules/a.tex']['exclusive_s'], 1.0, places=3)
+        self.assertAlmostEqual(files['main.tex']['exclusive_s'], 1.5, places=3)
+        self.assertEqual(files['modules/b.tex']['opens'], 1)
+
+    def test_wrapped_log_lines_are_joined(self):
+        """TeX breaks long log lines; the trace entry is reassembled."""
+        name = 'modules/' + 'x' * 80 + '.tex'
+        opened = trace_line('+', name, 0.0)
+        closed = trace_line('-', name, 2.0)
+        wrapped = [opened[i:i + TEX_LINE_WIDTH] for i in range(0, len(opened), TEX_LINE_WIDTH)]
+        wrapped += [closed[i:i + TEX_LINE_WIDTH] for i in range(0, len(closed), TEX_LINE_WIDTH)]
+        files = parse_trace('\n'.join(wrapped))
+        self.assertAlmostEqual(files[name]['inclusive_s'], 2.0, places=3)
+
+    def test_unmatched_close_is_ignored(self):
+        """A log cut short or started mid-file does not raise."""
+        self.assertEqual(parse_trace(trace_line('-', 'main.tex', 1.0)), {})
+
+    def test_traced_input_wraps_main_file(self):
+        """The pdflatex argument installs the hooks and then inputs the file."""
+        argument = traced_input('main.tex')
+        self.assertIn('\\AddToHook{file/before}', argument)
+        self.assertTrue(argument.endswith('\\input{main.tex}'))
+
+
+class TestBuildProfiler(unittest.TestCase):
+    """Test cases for BuildProfiler."""
+
+    def test_step_records_wall_and_cpu(self):
+        """Every step gets wall and CPU time, even when it raises."""
+        profiler = BuildProfiler()
+        with profiler.step('scan'):
+            sum(range(10000))
+        with self.assertRaises(ValueError):
+            with profiler.step('broken'):
+                raise ValueError('boom')
+        self.assertEqual(list(profiler.steps), ['scan', 'broken'])
+        self.assertGreaterEqual(profiler.steps['scan']['wall_s'], 0)
+        self.assertIn('cpu_s', profiler.steps['scan'])
+
+    @unittest.skipUnless(hasattr(os, 'wait4'), "os.wait4 not available")
+    def test_run_records_child_usage(self):
+        """A child started with run() is recorded with user/sys time and memory."""
+        profiler = BuildProfiler()
+        result = profiler.run('child', [sys.executable, '-c', 'print(sum(range(100000)))'], text=True)
+        self.assertEqual((result.returncode, result.stdout), (0, '4999950000\n'))
+        run = profiler.processes[0]
+        self.assertEqual(run['label'], 'child')
+        self.assertGreater(run['user_s'] + run['sys_s'], 0)
+        self.assertGreater(run['max_rss_kb'], 0)
+
+    @unittest.skipUnless(hasattr(os, 'wait4'), "os.wait4 not available")
+    def test_memory_is_measured_per_run(self):
+        """A large run does not inflate the peak memory recorded for later small runs."""
+        profiler = BuildProfiler()
+        profiler.run('large', [sys.executable, '-c', 'x = bytearray(200 * 1024 * 1024)'])
+        profiler.run('small', [sys.executable, '-c', 'pass'])
+        large, small = profiler.processes
+        self.assertGreater(large['max_rss_kb'], 200 * 1024)
+        self.assertLess(small['max_rss_kb'], 100 * 1024)
+
+    def test_trace_accumulates_over_passes(self):
+        """Module times from several pdflatex passes add up."""
+        with tempfile.TemporaryDirectory() as temp_dir:
+            log = Path(temp_dir) / 'main.log'
+            log.write_text('\n'.join([trace_line('+', './modules/a.tex', 1.0),
+                                      trace_line('-', './modules/a.tex', 2.0)]))
+            profiler = BuildProfiler(trace_files=True)
+            profiler.add_trace(log)
+            profiler.add_trace(log)
+            profiler.add_trace(Path(temp_dir) / 'missing.log')
+        self.assertEqual(profiler.module_times(), {'./modules/a.tex': 2.0})
+        self.assertEqual(profiler.files['./modules/a.tex']['opens'], 2)
+
+    def test_report_is_json(self):
+        """The report holds the build results and the profile."""
+        profiler = BuildProfiler()
+        with profiler.step('scan'):
+            pass
+        with tempfile.TemporaryDirectory() as temp_dir:
+            path = profiler.write_report(Path(temp_dir) / 'report.json',
+                                         {'build_testing': {'basic_passed': True}})
+            report = json.loads(path.read_text(encoding='utf-8'))
+        self.assertTrue(report['build_testing']['basic_passed'])
+        self.assertIn('scan', report['profile']['steps'])
+
+
+class TestBuildIntegration(unittest.TestCase):
+    """Test that ctmm_build records the profile."""
+
+    def test_main_writes_profile(self):
+        """Every step is timed and the report lands in build_data and on disk."""
+        with tempfile.TemporaryDirectory() as temp_dir, \
+             patch('ctmm_build.validate_latex_files', return_value=True), \
+             patch('ctmm_build.validate_form_fields', return_value=True), \
+             patch('ctmm_build.test_basic_build', return_value=True), \
+             patch('ctmm_build.test_full_build', return_value=True), \
+             patch('ctmm_build._generate_build_summary') as mock_summary:
+            report_path = Path(temp_dir) / 'build_profile.json'
+            exit_code = ctmm_build.main(use_cache=False, report_path=report_path)
+            report = json.loads(report_path.read_text(encoding='utf-8'))
+
+        self.assertEqual(exit_code, 0)
+        build_data = mock_summary.call_args[0][0]
+        self.assertIn('profile', build_data)
+        for step in ('latex_validation', 'form_validation', 'file_scanning',
+                     'file_existence', 'basic_build', 'full_build'):
+            self.assertIn(step, report['profile']['steps'])
+
+    @patch('ctmm_build._preamble_format_args', return_value=[])
+    def test_traced_full_build_sets_job_name(self, _mock_args):
+        """With tracing, pdflatex gets the hooks and an explicit job name."""
+        profiler = BuildProfiler(trace_files=True)
+        with patch('subprocess.run', return_value=MagicMock(returncode=0)), \
+             patch('build_profiler.run_measured',
+                   return_value=(MagicMock(returncode=0), (0.5, 0.1, 50000))) as mock_run, \
+             patch('ctmm_build.run_until_converged',
+                   side_effect=lambda args, base, runner: (runner(args), 1)), \
+             patch.object(profiler, 'add_trace') as mock_trace:
+            ctmm_build.test_full_build(use_cache=False, profiler=profiler)
+
+        build_cmd = mock_run.call_args[0][0]
+        self.assertIn('-jobname=main', build_cmd)
+        self.assertEqual(build_cmd[-1], traced_input('main.tex'))
+        mock_trace.assert_called_once_with(Path('main.log'))
+        self.assertEqual([run['label'] for run in profiler.processes], ['full'])
+        self.assertEqual(profiler.processes[0]['max_rss_kb'], 50000)
+
+
+if __name__ == '__main__':
+    unittest.main(verbosity=2)
@@ -0,0 +1,132 @@
+#!/usr/bin/env python3
+"""
+Unit tests for the CTMM module isolation build engine.
+Tests parallel isolation builds and bisection of combination failures.
+"""
+
+import os
+import re
+import subprocess
+import sys
+import tempfile
+import threading
+import unittest
+from pathlib import Path
+from unittest.mock import patch
+
+# Add current directory to path for importing build_system
+sys.path.insert(0, str(Path(__file__).parent))
+from build_system import CTMMBuildSystem
+
+
+MODULES = ['alpha', 'beta', 'gamma', 'delta', 'epsilon', 'zeta']
+
+
+class FakePdflatex:
+    """Stand-in for pdflatex that fails on configured module combinations."""
+
+    def __init__(self, broken=(), conflicts=()):
+        self.broken = set(broken)
+        self.conflicts = [set(pair) for pair in conflicts]
+        self.calls = []
+        self.lock = threading.Lock()
+
+    def __call__(self, cmd, **kwargs):
+        if '-ini' in cmd:
+            # No preamble format in tests; builds fall back to plain pdflatex
+            return subprocess.CompletedProcess(cmd, 1, '', '')
+        content = Path(cmd[-1]).read_text(encoding='utf-8')
+        active = set(re.findall(r'^\\input\{modules/([^}]+)\}', content, re.MULTILINE))
+        with self.lock:
+            self.calls.append(active)
+        failed = bool(active & self.broken) or any(pair <= active for pair in self.conflicts)
+        return subprocess.CompletedProcess(cmd, 1 if failed else 0, 'stdout', 'stderr')
+
+
+class TestModuleIsolation(unittest.TestCase):
+    """Test cases for CTMMBuildSystem.test_modules_incrementally."""
+
+    def setUp(self):
+        self.temp_dir = tempfile.TemporaryDirectory()
+        self.root = Path(self.temp_dir.name)
+        self.old_cwd = os.getcwd()
+        os.chdir(self.root)
+        inputs = '\n'.join(f'\\input{{modules/{name}}}' for name in MODULES)
+        Path('main.tex').write_text(
+            '\\documentclass{article}\n\\begin{document}\n'
+            f'{inputs}\n\\end{{document}}\n', encoding='utf-8')
+
+        self.build_system = CTMMBuildSystem('main.tex', jobs=4)
+        self.build_system.module_files = {f'modules/{name}.tex' for name in MODULES}
+
+    def tearDown(self):
+        os.chdir(self.old_cwd)
+        self.temp_dir.cleanup()
+
+    def _run(self, fake):
+        with patch('subprocess.run', side_effect=fake):
+            self.build_system.test_modules_incrementally()
+        return self.build_system.problematic_modules
+
+    def test_all_modules_pass(self):
+        """A clean tree needs one isolation build per module plus one combined build."""
+        fake = FakePdflatex()
+        self.assertEqual(self._run(fake), [])
+        self.assertEqual(len(fake.calls), len(MODULES) + 1)
+
+    def test_module_broken_in_isolation(self):
+        """A module that fails alone is reported without bisection."""
+        fake = FakePdflatex(broken={'gamma'})
+        self.assertEqual(self._run(fake), ['modules/gamma.tex'])
+        self.assertTrue(Path('build_error_gamma.log').exists())
+
+    def test_combination_failure_is_bisected(self):
+        """A module that only fails after an earlier one is found by bisection."""
+        fake = FakePdflatex(conflicts=[('beta', 'epsilon')])
+        self.assertEqual(self._run(fake), ['modules/epsilon.tex'])
+
+    def test_modules_built_in_document_order(self):
+        """Bisection follows the order of inputs in main.tex, not sorted names."""
+        self.assertEqual(
+            self.build_system._module_inputs(Path('main.tex').read_text(encoding='utf-8')),
+            [f'modules/{name}.tex' for name in MODULES])
+
+    def test_only_affected_modules_are_built(self):
+        """A restriction from the include graph limits the isolation builds."""
+        self.build_system.only_modules = {'modules/beta.tex', 'modules/delta.tex'}
+        fake = FakePdflatex()
+        self.assertEqual(self._run(fake), [])
+        # Isolation builds run in parallel, so their order varies
+        self.assertCountEqual(fake.calls[:2], [{'beta'}, {'delta'}])
+        self.assertEqual(fake.calls[2:], [{'beta', 'delta'}])
+
+    def test_unloadable_format_falls_back_to_plain_pdflatex(self):
+        """Isolation builds retry without -fmt when the format cannot be loaded."""
+        fake = FakePdflatex()
+
+        def stale_format(cmd, **kwargs):
+            if any(arg.startswith('-fmt=') for arg in cmd):
+                return subprocess.CompletedProcess(
+                    cmd, 1, "---! ctmm-preamble.fmt was written by pdftex\n", '')
+            return fake(cmd, **kwargs)
+
+        with patch('build_system.preamble_format_args', return_value=['-fmt=/cache/ctmm-preamble']):
+            self.assertEqual(self._run(stale_format), [])
+        self.assertEqual(len(fake.calls), len(MODULES) + 1)
+
+    def test_isolation_builds_use_separate_directories(self):
+        """Every build gets its own output directory."""
+        output_dirs = []
+
+        def fake(cmd, **kwargs):
+            if '-ini' in cmd:
+                return subprocess.CompletedProcess(cmd, 1, '', '')
+            output_dirs.append(next(arg for arg in cmd if arg.startswith('-output-directory=')))
+            return subprocess.CompletedProcess(cmd, 0, '', '')
+
+        self._run(fake)
+        self.assertEqual(len(output_dirs), len(set(output_dirs)))
+
+
+if __name__ == '__main__':
+    unittest.main(verbosity=2)
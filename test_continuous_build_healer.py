@@ -0,0 +1,95 @@
+#!/usr/bin/env python3
+"""
+Unit tests for the ContinuousBuildHealer daemon mode.
+Tests that the healing components are created once and reused, and that
+the event loop schedules and stops iterations.
+"""
+
+import asyncio
+import io
+import sys
+import time
+import unittest
+from contextlib import redirect_stdout
+from pathlib import Path
+from unittest.mock import Mock, patch
+
+# Add current directory to path for importing modules
+sys.path.insert(0, str(Path(__file__).parent))
+from continuous_build_healer import ContinuousBuildHealer, MAX_WORKFLOWS_PER_ITERATION
+
+
+class TestDaemonMode(unittest.TestCase):
+    """Test the in-process daemon loop."""
+
+    def setUp(self):
+        self.system = Mock()
+        self.system.start_healing_session.return_value = Mock(fixes_applied=1)
+        self.system._get_session_summary.return_value = 'summary'
+        patcher = patch('workflow_healing_system.WorkflowHealingSystem', return_value=self.system)
+        self.system_class = patcher.start()
+        self.addCleanup(patcher.stop)
+
+    def run_daemon(self, healer, stop_event=None):
+        with redirect_stdout(io.StringIO()):
+            return asyncio.run(healer.run_daemon_async(stop_event))
+
+    def test_components_reused_across_iterations(self):
+        """One healing system serves every iteration, with the fetched runs passed on."""
+        failed = [Mock(id=1)]
+        self.system.monitor.get_failed_workflows.side_effect = [failed, failed, []]
+        healer = ContinuousBuildHealer(max_iterations=3, check_interval=0)
+
+        all_green = self.run_daemon(healer)
+
+        self.assertTrue(all_green)
+        self.assertEqual(self.system_class.call_count, 1)
+        self.assertEqual(self.system.monitor.get_failed_workflows.call_count, 3)
+        self.assertEqual(self.system.start_healing_session.call_count, 2)
+        kwargs = self.system.start_healing_session.call_args.kwargs
+        self.assertIs(kwargs['workflows'], failed)
+        self.assertEqual(kwargs['max_workflows'], MAX_WORKFLOWS_PER_ITERATION)
+        self.assertEqual(healer.healed_workflows, ['Iteration 1', 'Iteration 2'])
+
+    def test_failed_runs_restarted_after_healing(self):
+        """Like run(), each healing iteration goes on to restart the failed runs."""
+        failed = [Mock(id=7, workflow_name='Build LaTeX PDF', html_url='https://example.invalid/7')]
+        self.system.monitor.get_failed_workflows.side_effect = [failed, []]
+        healer = ContinuousBuildHealer(max_iterations=2, check_interval=0)
+
+        with patch.object(healer, 'restart_workflows', return_value=0) as restart:
+            self.run_daemon(healer)
+
+        restart.assert_called_once_with({'failed_workflows': [
+            {'workflow_name': 'Build LaTeX PDF', 'id': 7, 'html_url': 'https://example.invalid/7'}]})
+
+    def test_stop_event_interrupts_the_interval(self):
+        """An unlimited daemon stops as soon as it is asked to, without sleeping out the interval."""
+        self.system.monitor.get_failed_workflows.return_value = []
+        healer = ContinuousBuildHealer(max_iterations=0, check_interval=3600)
+
+        async def run_and_stop():
+            stop_event = asyncio.Event()
+            asyncio.get_running_loop().call_later(0.2, stop_event.set)
+            return await healer.run_daemon_async(stop_event)
+
+        started = time.monotonic()
+        with redirect_stdout(io.StringIO()):
+            all_green = asyncio.run(run_and_stop())
+
+        self.assertTrue(all_green)
+        self.assertEqual(healer.iteration_count, 1)
+        self.assertLess(time.monotonic() - started, 5)
+
+    def test_failed_check_counts_as_failed_attempt(self):
+        """API errors during a check are reported, not raised out of the loop."""
+        self.system.monitor.get_failed_workflows.side_effect = RuntimeError('API down')
+        healer = ContinuousBuildHealer(max_iterations=2, check_interval=0)
+
+        self.assertFalse(self.run_daemon(healer))
+        self.assertEqual(healer.failed_healing_attempts, ['Iteration 1', 'Iteration 2'])
+        self.system.start_healing_session.assert_not_called()
+
+
+if __name__ == '__main__':
+    unittest.main(verbosity=2)
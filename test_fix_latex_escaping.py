@@ -4,6 +4,8 @@ Comprehensive test suite for the LaTeX escaping fix tool.
 Tests all pattern recognition rules and multi-pass functionality.
 """
 
+import random
+import re
 import unittest
 import tempfile
 import shutil
@@ -12,7 +14,9 @@ import sys
 
 # Add current directory to path for importing fix_latex_escaping
 sys.path.insert(0, str(Path(__file__).parent))
-from fix_latex_escaping import LaTeXDeEscaper
+from fix_latex_escaping import LaTeXDeEscaper, _compile_replacement
+
+GOLDEN_DIR = Path(__file__).parent / 'test_data' / 'de_escaping'
 
 
 class TestLaTeXDeEscaper(unittest.TestCase):
@@ -241,6 +245,34 @@ class TestLaTeXDeEscaper(unittest.TestCase):
         self.assertEqual(stats['files_changed'], 2)  # file1 and file2 should change
         self.assertGreater(stats['total_replacements'], 0)
 
+    def test_parallel_directory_processing(self):
+        """A process pool produces the same files and stats as a serial run."""
+        serial_dir = self.temp_path / 'serial'
+        parallel_dir = self.temp_path / 'parallel'
+        for directory in (serial_dir, parallel_dir):
+            directory.mkdir()
+            for i in range(12):
+                content = (r"\textbackslash{}section\textbackslash{}{Datei %d}" % i
+                           if i % 3 else r"Valid LaTeX content")
+                (directory / f'file{i:02d}.tex').write_text(content, encoding='utf-8')
+
+        serial_stats = LaTeXDeEscaper().process_directory(serial_dir)
+        with self.assertLogs('fix_latex_escaping', level='INFO') as logs:
+            parallel_stats = LaTeXDeEscaper().process_directory(parallel_dir, jobs=3)
+
+        self.assertEqual(serial_stats, parallel_stats)
+        self.assertEqual(parallel_stats['files_processed'], 12)
+        self.assertEqual(parallel_stats['files_changed'], 8)
+        for i in range(12):
+            name = f'file{i:02d}.tex'
+            self.assertEqual((serial_dir / name).read_text(encoding='utf-8'),
+                             (parallel_dir / name).read_text(encoding='utf-8'))
+
+        # Worker log lines arrive in file order
+        order = [int(match.group(1)) for match in
+                 (re.search(r'file(\d+)\.tex', line) for line in logs.output) if match]
+        self.assertEqual(order, list(range(12)))
+
     def test_backup_functionality(self):
         """Test that backup files can be created."""
         content = r"\textbackslash{}section\textbackslash{}{Test}"
@@ -305,6 +337,62 @@ class TestLaTeXDeEscaper(unittest.TestCase):
                              "\\hypertarget{", result)
 
 
+class TestRewriteEngineParity(unittest.TestCase):
+    """The compiled rewrite engine must match the ordered per-rule passes."""
+
+    def setUp(self):
+        self.de_escaper = LaTeXDeEscaper()
+
+    def _ordered_passes(self, content):
+        """Reference: one re.subn per rule over the whole text, in table order."""
+        replacements = 0
+        for pattern, replacement in self.de_escaper.escaping_patterns + self.de_escaper.cleanup_patterns:
+            content, count = re.subn(pattern, replacement, content)
+            replacements += count
+        return content, replacements
+
+    def test_golden_corpus(self):
+        """Every golden input produces its recorded output."""
+        inputs = sorted(path for path in GOLDEN_DIR.glob('*.tex')
+                        if not path.name.endswith('.expected.tex'))
+        self.assertGreater(len(inputs), 0)
+        for input_file in inputs:
+            with self.subTest(golden=input_file.name):
+                content = input_file.read_text(encoding='utf-8')
+                expected = input_file.with_name(input_file.stem + '.expected.tex')
+                fixed, replacements = self.de_escaper.fix_content(content)
+                self.assertEqual(fixed, expected.read_text(encoding='utf-8'))
+                self.assertEqual((fixed, replacements), self._ordered_passes(content))
+
+    def test_random_token_soup(self):
+        """Dense, sparse and cascading escape sequences all match the reference."""
+        token = r'\textbackslash{}'
+        pieces = [token, token, '\\{', '\\}', '{', '}', r'\textbackslash{', 'textbackslash',
+                  'item', 'section', 'texorpdfstring', 'enumerate', 'label', 'Wort', ' ', '\n',
+                  '%', '$', '&', '\\', '{}', '}}', ' lorem ipsum ' * 8, '}' + 'x' * 150, 'y' * 140]
+        rng = random.Random(217)
+        for _ in range(2000):
+            content = ''.join(rng.choice(pieces) for _ in range(rng.randint(1, 60)))
+            self.assertEqual(self.de_escaper.fix_content(content), self._ordered_passes(content),
+                             repr(content))
+
+    def test_custom_rules_use_whole_text_passes(self):
+        """Rules that may span arbitrary text disable windowed rewriting."""
+        self.de_escaper.escaping_patterns.append((r'\\textbackslash\{\}note(.*)', r'% \1'))
+        content = r'\textbackslash{}note' + ' }' * 100 + r' \textbackslash{}item'
+        self.assertEqual(self.de_escaper.fix_content(content), self._ordered_passes(content))
+
+    def test_compiled_replacements_match_re(self):
+        """Prebuilt replacement callables expand like re's templates."""
+        regex = re.compile(r'(a)(b)?(c)')
+        for template in [r'\1', r'\\\1', r'\3\1', r'<\2>', r'100% \1', r'\1\\2',
+                         r'\1\\', r'\n\1', r'\g<1>']:
+            with self.subTest(template=template):
+                replacement = _compile_replacement(template, regex)
+                for text in ['abc', 'ac', 'xacx abc']:
+                    self.assertEqual(regex.sub(replacement, text), regex.sub(template, text))
+
+
 class TestLaTeXDeEscaperIntegration(unittest.TestCase):
     """Integration tests for LaTeX de-escaping with build system."""
 
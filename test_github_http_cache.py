@@ -0,0 +1,163 @@
+#!/usr/bin/env python3
+"""
+Unit tests for the GitHub HTTP cache.
+Tests ETag and Last-Modified revalidation, TTL expiry and LRU eviction
+against a local stub server.
+"""
+
+import hashlib
+import json
+import os
+import sys
+import tempfile
+import threading
+import time
+import unittest
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from pathlib import Path
+from unittest.mock import patch
+
+# Add current directory to path for importing modules
+sys.path.insert(0, str(Path(__file__).parent))
+from github_http_cache import CachingSession, HTTPCache
+
+LAST_MODIFIED = 'Mon, 01 Jan 2024 00:00:00 GMT'
+
+
+class ConditionalHandler(BaseHTTPRequestHandler):
+    """Answers conditional requests like the GitHub API."""
+
+    full_responses = 0
+    not_modified = 0
+    remaining = 5000
+
+    def log_message(self, format, *args):
+        pass
+
+    def do_GET(self):
+        cls = type(self)
+        body = json.dumps({'path': self.path,
+                           'auth': self.headers.get('Authorization')}).encode('utf-8')
+        etag = '"' + hashlib.sha256(body).hexdigest()[:16] + '"'
+        use_etag = not self.path.startswith('/dated')
+
+        if (use_etag and self.headers.get('If-None-Match') == etag) or \
+                (not use_etag and self.headers.get('If-Modified-Since') == LAST_MODIFIED):
+            cls.not_modified += 1
+            self.send_response(304)
+            self.send_header('X-RateLimit-Remaining', str(cls.remaining))
+            self.end_headers()
+            return
+
+        cls.full_responses += 1
+        cls.remaining -= 1
+        self.send_response(200)
+        self.send_header('Content-Type', 'application/json; charset=utf-8')
+        self.send_header('Content-Length', str(len(body)))
+        self.send_header('X-RateLimit-Remaining', str(cls.remaining))
+        self.send_header('Link', f'<http://{self.headers["Host"]}/next>; rel="next"')
+        if use_etag:
+            self.send_header('ETag', etag)
+        else:
+            self.send_header('Last-Modified', LAST_MODIFIED)
+        self.end_headers()
+        self.wfile.write(body)
+
+
+class TestCachingSession(unittest.TestCase):
+    """Test CachingSession against a local stub server."""
+
+    @classmethod
+    def setUpClass(cls):
+        cls.server = ThreadingHTTPServer(('127.0.0.1', 0), ConditionalHandler)
+        cls.thread = threading.Thread(target=cls.server.serve_forever, daemon=True)
+        cls.thread.start()
+        cls.base_url = f'http://127.0.0.1:{cls.server.server_address[1]}'
+
+    @classmethod
+    def tearDownClass(cls):
+        cls.server.shutdown()
+        cls.server.server_close()
+
+    def setUp(self):
+        ConditionalHandler.full_responses = 0
+        ConditionalHandler.not_modified = 0
+        self.temp_dir = tempfile.TemporaryDirectory()
+        self.cache = HTTPCache(self.temp_dir.name, ttl_seconds=3600, max_entries=10)
+        self.session = CachingSession(self.cache)
+
+    def tearDown(self):
+        self.session.close()
+        self.temp_dir.cleanup()
+
+    def test_not_modified_is_served_from_cache(self):
+        """The second request is revalidated and answered from the cache."""
+        first = self.session.get(f'{self.base_url}/runs', params={'per_page': 100})
+        second = self.session.get(f'{self.base_url}/runs', params={'per_page': 100})
+
+        self.assertEqual(second.json(), first.json())
+        self.assertTrue(getattr(second, 'from_cache', False))
+        self.assertFalse(getattr(first, 'from_cache', False))
+        self.assertEqual((ConditionalHandler.full_responses, ConditionalHandler.not_modified), (1, 1))
+        self.assertEqual((self.cache.hits, self.cache.misses), (1, 1))
+        # Headers of the 304 win, and cached Link headers still paginate
+        self.assertEqual(second.headers['X-RateLimit-Remaining'], first.headers['X-RateLimit-Remaining'])
+        self.assertEqual(second.links['next']['url'], f'{self.base_url}/next')
+
+    def test_last_modified_validator(self):
+        """Responses without an ETag revalidate with If-Modified-Since."""
+        self.session.get(f'{self.base_url}/dated')
+        response = self.session.get(f'{self.base_url}/dated')
+        self.assertTrue(response.from_cache)
+        self.assertEqual(ConditionalHandler.full_responses, 1)
+
+    def test_authorization_is_part_of_the_key(self):
+        """Responses for one token are not served to another."""
+        self.session.get(f'{self.base_url}/pulls', headers={'Authorization': 'token a'})
+        response = self.session.get(f'{self.base_url}/pulls', headers={'Authorization': 'token b'})
+        self.assertEqual(response.json()['auth'], 'token b')
+        self.assertEqual(ConditionalHandler.full_responses, 2)
+
+    def test_expired_entries_are_refetched(self):
+        """After the TTL the request is sent without validators."""
+        self.session.get(f'{self.base_url}/runs')
+        with patch('github_http_cache.time.time', return_value=time.time() + 7200):
+            response = self.session.get(f'{self.base_url}/runs')
+        self.assertFalse(getattr(response, 'from_cache', False))
+        self.assertEqual(ConditionalHandler.full_responses, 2)
+
+    def test_least_recently_used_entries_are_evicted(self):
+        """Beyond max_entries the entries unused for longest are dropped."""
+        self.cache.max_entries = 2
+        self.session.get(f'{self.base_url}/a')
+        self.session.get(f'{self.base_url}/b')
+        # Make /a older than /b, then use /a again
+        for number, entry in enumerate(sorted(Path(self.temp_dir.name).glob('*.http'))):
+            os.utime(entry, (1000 + number, 1000 + number))
+        self.session.get(f'{self.base_url}/a')
+        time.sleep(0.01)
+        self.session.get(f'{self.base_url}/c')
+
+        self.assertEqual(len(list(Path(self.temp_dir.name).glob('*.http'))), 2)
+        self.assertTrue(self.session.get(f'{self.base_url}/a').from_cache)
+        self.assertFalse(getattr(self.session.get(f'{self.base_url}/b'), 'from_cache', False))
+
+    def test_eviction_leaves_headroom(self):
+        """The directory is listed only once the limit is exceeded, then trimmed below it."""
+        for number in range(10):
+            self.session.get(f'{self.base_url}/page{number}')
+        with patch('github_http_cache.os.scandir', wraps=os.scandir) as scandir:
+            self.session.get(f'{self.base_url}/page10')
+            self.session.get(f'{self.base_url}/page11')
+        self.assertEqual(scandir.call_count, 1)
+        self.assertEqual(len(list(Path(self.temp_dir.name).glob('*.http'))), 10)
+
+    def test_streamed_requests_bypass_cache(self):
+        """Streamed bodies (job logs) are never stored."""
+        with self.session.get(f'{self.base_url}/logs', stream=True) as response:
+            response.content
+        self.assertEqual(list(Path(self.temp_dir.name).glob('*.http')), [])
+
+
+if __name__ == '__main__':
+    unittest.main(verbosity=2)
@@ -0,0 +1,152 @@
+#!/usr/bin/env python3
+"""
+Unit tests for the CTMM include graph.
+Tests package chains, nested inputs, symbol attribution and affected-module queries.
+"""
+
+import sys
+import tempfile
+import unittest
+from pathlib import Path
+
+# Add current directory to path for importing modules
+sys.path.insert(0, str(Path(__file__).parent))
+from include_graph import IncludeGraph, strip_comments
+
+
+FILES = {
+    'main.tex': (
+        '\\documentclass{article}\n'
+        '\\usepackage[ngerman]{babel}\n'
+        '\\usepackage{style/ctmm-design}\n'
+        '\\usepackage{style/ctmm-forms}\n'
+        '\\begin{document}\n'
+        '\\input{modules/boxes}\n'
+        '\\input{modules/formular}\n'
+        '% \\input{modules/entwurf}\n'
+        '\\input{modules/plain}\n'
+        '\\end{document}\n'
+    ),
+    'style/ctmm-design.sty': (
+        '\\RequirePackage{tcolorbox}\n'
+        '\\RequirePackage{ctmm-colors}\n'
+        '\\newtcolorbox{ctmmBlueBox}[2][]{colback=ctmmBlue!5}\n'
+        '\\newcommand{\\ctmmHeading}[1]{\\textbf{#1}}\n'
+    ),
+    'style/ctmm-colors.sty': (
+        '\\definecolor{ctmmBlue}{HTML}{1F4E79}\n'
+        '\\colorlet{ctmmAccent}{ctmmBlue}\n'
+    ),
+    'style/ctmm-forms.sty': (
+        '\\newcommand{\\ctmmTextField}[2]{\\rule{#1}{0.4pt}}\n'
+        '\\def\\ctmmCheckBox{$\\square$}\n'
+    ),
+    'modules/boxes.tex': (
+        '\\begin{ctmmBlueBox}{Titel}\n'
+        'Text\n'
+        '\\end{ctmmBlueBox}\n'
+    ),
+    'modules/formular.tex': (
+        '\\ctmmHeading{Formular}\n'
+        '\\input{modules/formular/felder}\n'
+    ),
+    'modules/formular/felder.tex': (
+        '\\ctmmTextField{5cm}{name} \\ctmmCheckBox\n'
+    ),
+    'modules/plain.tex': (
+        'Nur Text mit \\textcolor{ctmmAccent}{Farbe}, 100\\% ohne Makros.\n'
+    ),
+    'modules/entwurf.tex': '\\ctmmTextField{1cm}{x}\n',
+}
+
+
+class TestIncludeGraph(unittest.TestCase):
+    """Test cases for IncludeGraph."""
+
+    def setUp(self):
+        self.temp_dir = tempfile.TemporaryDirectory()
+        self.root = Path(self.temp_dir.name)
+        for name, content in FILES.items():
+            path = self.root / name
+            path.parent.mkdir(parents=True, exist_ok=True)
+            path.write_text(content, encoding='utf-8')
+        self.graph = IncludeGraph(self.root / 'main.tex').build()
+
+    def tearDown(self):
+        self.temp_dir.cleanup()
+
+    def test_follows_require_package_chain(self):
+        """Style files loaded by other style files are part of the graph."""
+        self.assertIn('style/ctmm-colors.sty', self.graph.includes['style/ctmm-design.sty'])
+        self.assertIn('tcolorbox', self.graph.external_packages)
+
+    def test_modules_in_document_order(self):
+        """Only active \\input lines of main.tex are modules."""
+        self.assertEqual(self.graph.modules,
+                         ['modules/boxes.tex', 'modules/formular.tex', 'modules/plain.tex'])
+
+    def test_nested_inputs_belong_to_module(self):
+        """Files input by a module count as part of that module."""
+        self.assertEqual(self.graph.module_closure['modules/formular.tex'],
+                         ['modules/formular.tex', 'modules/formular/felder.tex'])
+        self.assertEqual(self.graph.module_uses['modules/formular.tex'],
+                         {'style/ctmm-design.sty': {'ctmmHeading'},
+                          'style/ctmm-forms.sty': {'ctmmTextField', 'ctmmCheckBox'}})
+
+    def test_environment_and_color_uses(self):
+        """Environments and colours are attributed to their defining style."""
+        self.assertEqual(self.graph.module_uses['modules/boxes.tex'],
+                         {'style/ctmm-design.sty': {'ctmmBlueBox'}})
+        self.assertEqual(self.graph.module_uses['modules/plain.tex'],
+                         {'style/ctmm-colors.sty': {'ctmmAccent'}})
+
+    def test_changed_style_affects_everything(self):
+        """Styles are part of the shared preamble, whether or not a module uses their symbols."""
+        self.assertEqual(self.graph.affected_modules(['style/ctmm-forms.sty']), self.graph.modules)
+
+    def test_changed_required_package_affects_everything(self):
+        """A style loaded only by another style is part of the preamble too."""
+        self.assertEqual(self.graph.affected_modules(['style/ctmm-colors.sty']), self.graph.modules)
+
+    def test_unloaded_style_affects_nothing(self):
+        """A style file main.tex never loads cannot affect a build."""
+        self.assertEqual(self.graph.affected_modules(['style/ctmm-unused.sty']), [])
+
+    def test_changed_nested_input_affects_including_module(self):
+        """A change to a nested input re-tests the top-level module."""
+        self.assertEqual(self.graph.affected_modules(['modules/formular/felder.tex']),
+                         ['modules/formular.tex'])
+
+    def test_changed_main_affects_everything(self):
+        """The shared preamble lives in main.tex."""
+        self.assertEqual(self.graph.affected_modules(['main.tex']), self.graph.modules)
+
+    def test_unrelated_change_affects_nothing(self):
+        """Files outside the graph, including commented-out modules, are ignored."""
+        self.assertEqual(self.graph.affected_modules(['README.md', 'modules/entwurf.tex']), [])
+
+    def test_missing_inputs_are_reported(self):
+        """Referenced project files that do not exist are listed."""
+        (self.root / 'modules' / 'plain.tex').unlink()
+        graph = IncludeGraph(self.root / 'main.tex').build()
+        self.assertEqual(graph.missing, {'modules/plain.tex'})
+
+    def test_strip_comments_keeps_escaped_percent(self):
+        """Escaped percent signs are text, not comments."""
+        self.assertEqual(strip_comments('50\\% sicher % Kommentar'), '50\\% sicher ')
+
+
+class TestRepositoryGraph(unittest.TestCase):
+    """Test the graph of the real document."""
+
+    def test_main_tex_graph(self):
+        """Every module of main.tex is found and main.tex affects all of them."""
+        main_tex = Path(__file__).parent / 'main.tex'
+        graph = IncludeGraph(main_tex).build()
+        self.assertGreater(len(graph.modules), 0)
+        self.assertIn('style/ctmm-dark-theme.sty', graph.includes['style/ctmm-config.sty'])
+        self.assertEqual(graph.affected_modules(['main.tex']), graph.modules)
+
+
+if __name__ == '__main__':
+    unittest.main(verbosity=2)
@@ -0,0 +1,126 @@
+#!/usr/bin/env python3
+"""
+Unit tests for the CTMM LaTeX runner.
+Tests that pdflatex passes stop as soon as the auxiliary files converge.
+"""
+
+import subprocess
+import sys
+import tempfile
+import unittest
+from pathlib import Path
+from unittest.mock import patch, MagicMock
+
+# Add current directory to path for importing modules
+sys.path.insert(0, str(Path(__file__).parent))
+import ctmm_build
+from latex_runner import aux_fingerprint, run_until_converged
+
+
+class FakePass:
+    """Simulates pdflatex passes that rewrite main.aux with scripted contents."""
+
+    def __init__(self, output_base, aux_contents, returncode=0):
+        self.output_base = Path(output_base)
+        self.aux_contents = list(aux_contents)
+        self.returncode = returncode
+        self.calls = 0
+
+    def __call__(self, args):
+        content = self.aux_contents[min(self.calls, len(self.aux_contents) - 1)]
+        self.output_base.with_suffix('.aux').write_text(content, encoding='utf-8')
+        self.calls += 1
+        return subprocess.CompletedProcess(['pdflatex', *args], self.returncode, '', '')
+
+
+class TestRunUntilConverged(unittest.TestCase):
+    """Test cases for run_until_converged."""
+
+    def setUp(self):
+        self.temp_dir = tempfile.TemporaryDirectory()
+        self.output_base = Path(self.temp_dir.name) / 'main'
+
+    def tearDown(self):
+        self.temp_dir.cleanup()
+
+    def test_clean_build_needs_two_passes(self):
+        """Without aux files the first pass writes them and a second confirms them."""
+        runner = FakePass(self.output_base, ['\\newlabel{a}{{1}{1}}'])
+        result, passes = run_until_converged(['main.tex'], self.output_base, runner=runner)
+        self.assertEqual(result.returncode, 0)
+        self.assertEqual(passes, 2)
+
+    def test_unchanged_aux_needs_one_pass(self):
+        """An incremental build that does not move labels stops after one pass."""
+        self.output_base.with_suffix('.aux').write_text('\\newlabel{a}{{1}{1}}', encoding='utf-8')
+        runner = FakePass(self.output_base, ['\\newlabel{a}{{1}{1}}'])
+        _, passes = run_until_converged(['main.tex'], self.output_base, runner=runner)
+        self.assertEqual(passes, 1)
+
+    def test_moving_labels_rerun_until_stable(self):
+        """Passes continue while the aux file keeps changing."""
+        runner = FakePass(self.output_base, ['v1', 'v2', 'v3', 'v3'])
+        _, passes = run_until_converged(['main.tex'], self.output_base, runner=runner)
+        self.assertEqual(passes, 4)
+
+    def test_max_passes_bounds_oscillation(self):
+        """A document that never converges stops at max_passes."""
+        runner = FakePass(self.output_base, [str(i) for i in range(20)])
+        _, passes = run_until_converged(['main.tex'], self.output_base, max_passes=3, runner=runner)
+        self.assertEqual(passes, 3)
+
+    def test_failed_pass_is_not_rerun(self):
+        """A failing pass ends the build immediately."""
+        runner = FakePass(self.output_base, ['v1', 'v2'], returncode=1)
+        result, passes = run_until_converged(['main.tex'], self.output_base, runner=runner)
+        self.assertEqual(result.returncode, 1)
+        self.assertEqual(passes, 1)
+
+    def test_unloadable_format_falls_back_to_plain_pdflatex(self):
+        """The default runner retries without -fmt and keeps it off for later passes."""
+        calls = []
+        aux_contents = ['v1', 'v1']
+
+        def stale_format(cmd, **kwargs):
+            calls.append(cmd)
+            if any(arg.startswith('-fmt=') for arg in cmd):
+                return subprocess.CompletedProcess(
+                    cmd, 1, "---! ctmm-preamble.fmt was written by pdftex\n", '')
+            self.output_base.with_suffix('.aux').write_text(aux_contents.pop(0), encoding='utf-8')
+            return subprocess.CompletedProcess(cmd, 0, '', '')
+
+        with patch('subprocess.run', side_effect=stale_format):
+            result, passes = run_until_converged(
+                ['main.tex'], self.output_base, format_args=['-fmt=/cache/ctmm-preamble'])
+
+        self.assertEqual(result.returncode, 0)
+        self.assertEqual(passes, 2)
+        fmt_calls = [cmd for cmd in calls if '-fmt=/cache/ctmm-preamble' in cmd]
+        self.assertEqual(len(fmt_calls), 1)
+        self.assertEqual(len(calls), 3)
+
+    def test_toc_changes_are_detected(self):
+        """Changes to the table of contents change the fingerprint."""
+        before = aux_fingerprint(self.output_base)
+        self.output_base.with_suffix('.toc').write_text('\\contentsline', encoding='utf-8')
+        self.assertNotEqual(before, aux_fingerprint(self.output_base))
+
+
+class TestFullBuildUsesRunner(unittest.TestCase):
+    """Test that ctmm_build's full build uses the convergence driver."""
+
+    @patch('ctmm_build._preamble_format_args', return_value=[])
+    def test_full_build_reports_passes(self, _mock_args):
+        """The full build logs how many passes it needed."""
+        with patch('subprocess.run', return_value=MagicMock(returncode=0)), \
+             patch('ctmm_build.run_until_converged',
+                   return_value=(MagicMock(returncode=0), 1)) as mock_runner, \
+             patch('ctmm_build.logger') as mock_logger:
+            ctmm_build.test_full_build(use_cache=False)
+
+        mock_runner.assert_called_once()
+        mock_logger.info.assert_any_call("Full build ran %d pdflatex pass(es)", 1)
+
+
+if __name__ == '__main__':
+    unittest.main(verbosity=2)
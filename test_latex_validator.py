@@ -6,8 +6,10 @@ Unit tests for LaTeX validator functionality.
 import unittest
 import tempfile
 import os
+import re
 from pathlib import Path
-from latex_validator import LaTeXValidator, sanitize_pkg_name
+from unittest.mock import patch
+from latex_validator import LaTeXValidator, ValidationIndex, sanitize_pkg_name
 
 
 class TestLaTeXValidator(unittest.TestCase):
@@ -178,6 +180,136 @@ class TestLaTeXValidatorIntegration(unittest.TestCase):
             self.assertIn(pattern, validator.problematic_patterns)
 
 
+class TestIssueScanner(unittest.TestCase):
+    """Test cases for the single-pass issue scanner."""
+
+    def setUp(self):
+        self.validator = LaTeXValidator()
+
+    def _findall_per_pattern(self, content):
+        issues = {}
+        for issue_name, pattern in self.validator.problematic_patterns.items():
+            matches = re.findall(pattern, content)
+            if matches:
+                issues[issue_name] = matches
+        return issues
+
+    def test_matches_findall_for_overlapping_rules(self):
+        """Issues inside another rule's match are still reported."""
+        content = ("\\label{tool-23}} Text \\textbackslash{} und \\\\& mehr\n"
+                   "\\texorpdfstring{a \\\\& \\textbf{b}}\n")
+        self.assertEqual(self.validator.detect_issues(content),
+                         self._findall_per_pattern(content))
+        self.assertEqual(len(self.validator.detect_issues(content)['excessive_backslashes']), 2)
+
+    def test_matches_findall_on_module_files(self):
+        """The scanner agrees with per-pattern findall on the real modules."""
+        for tex_file in Path(__file__).parent.glob('modules/*.tex'):
+            content = tex_file.read_text(encoding='utf-8', errors='replace')
+            self.assertEqual(self.validator.detect_issues(content),
+                             self._findall_per_pattern(content), tex_file)
+
+    def test_reports_line_and_column(self):
+        """Positions are 1-based lines and columns."""
+        content = "Erste Zeile\n  Text \\textbackslash{}\n"
+        issue, = self.validator.scan_issues(content)
+        self.assertEqual((issue.name, issue.line, issue.column), ('textbackslash_escape', 2, 8))
+        self.assertEqual(issue.text, '\\textbackslash{}')
+
+    def test_added_rule_is_scanned(self):
+        """Rules added after construction are compiled into the scanner."""
+        self.validator.detect_issues('warm up')
+        self.validator.problematic_patterns['legacy-tabular'] = r'\\begin\{tabular\}'
+        issues = self.validator.detect_issues('\\begin{tabular}{ll}')
+        self.assertEqual(issues, {'legacy-tabular': ['\\begin{tabular}']})
+
+
+class TestValidationIndex(unittest.TestCase):
+    """Test cases for incremental directory validation."""
+
+    def setUp(self):
+        """Set up a directory with one clean and one problematic file."""
+        self.validator = LaTeXValidator()
+        self.temp_dir = tempfile.mkdtemp()
+        self.clean_file = Path(self.temp_dir) / "clean.tex"
+        self.clean_file.write_text("\\section{Sauber}\n", encoding='utf-8')
+        self.bad_file = Path(self.temp_dir) / "bad.tex"
+        self.bad_file.write_text("Text \\textbackslash{} hier\n", encoding='utf-8')
+        self.index_path = Path(self.temp_dir) / "cache" / "index.json"
+
+    def tearDown(self):
+        """Clean up test fixtures."""
+        import shutil
+        shutil.rmtree(self.temp_dir)
+
+    def _index(self):
+        return ValidationIndex(self.index_path, self.validator.rules_fingerprint())
+
+    def test_detect_only_skips_cleaning(self):
+        """Directory validation without fix never builds cleaned content."""
+        with patch.object(self.validator, 'clean_excessive_escaping') as mock_clean:
+            results = self.validator.validate_directory(Path(self.temp_dir))
+        mock_clean.assert_not_called()
+        self.assertFalse(results[str(self.bad_file)]['valid'])
+        self.assertIsNone(results[str(self.bad_file)]['cleaned_size'])
+
+    def test_validate_file_detect_only(self):
+        """validate_file can skip building the cleaned content."""
+        is_valid, issues, cleaned = self.validator.validate_file(self.bad_file, detect_only=True)
+        self.assertFalse(is_valid)
+        self.assertIn('textbackslash_escape', issues)
+        self.assertIsNone(cleaned)
+
+    def test_unchanged_files_are_not_rescanned(self):
+        """A second run reuses the index without scanning any file."""
+        first = self.validator.validate_directory(Path(self.temp_dir), index=self._index())
+
+        index = self._index()
+        with patch.object(self.validator, 'detect_issues') as mock_detect:
+            second = self.validator.validate_directory(Path(self.temp_dir), index=index)
+        mock_detect.assert_not_called()
+        self.assertEqual(index.hits, 2)
+        self.assertEqual(first, second)
+
+    def test_changed_file_is_rescanned(self):
+        """Only the edited file is scanned again."""
+        self.validator.validate_directory(Path(self.temp_dir), index=self._index())
+        self.bad_file.write_text("Jetzt korrekt \\textbf{fett}\n", encoding='utf-8')
+
+        index = self._index()
+        results = self.validator.validate_directory(Path(self.temp_dir), index=index)
+        self.assertEqual(index.misses, 1)
+        self.assertTrue(results[str(self.bad_file)]['valid'])
+
+    def test_touched_file_reuses_issues(self):
+        """A file with a new mtime but the same content is not re-scanned."""
+        self.validator.validate_directory(Path(self.temp_dir), index=self._index())
+        os.utime(self.bad_file, ns=(0, 10**18))
+
+        index = self._index()
+        with patch.object(self.validator, 'detect_issues') as mock_detect:
+            results = self.validator.validate_directory(Path(self.temp_dir), index=index)
+        mock_detect.assert_not_called()
+        self.assertFalse(results[str(self.bad_file)]['valid'])
+
+    def test_rule_change_invalidates_index(self):
+        """Changing the detection rules discards all recorded results."""
+        self.validator.validate_directory(Path(self.temp_dir), index=self._index())
+        self.validator.problematic_patterns['new_rule'] = r'Sauber'
+
+        index = self._index()
+        results = self.validator.validate_directory(Path(self.temp_dir), index=index)
+        self.assertEqual(index.hits, 0)
+        self.assertIn('new_rule', results[str(self.clean_file)]['issues'])
+
+    def test_fix_with_index_cleans_problem_files(self):
+        """Fixing still works when issues come from the index."""
+        self.validator.validate_directory(Path(self.temp_dir), index=self._index())
+        self.validator.validate_directory(Path(self.temp_dir), fix=True, index=self._index())
+        self.assertNotIn('textbackslash', self.bad_file.read_text(encoding='utf-8'))
+        self.assertTrue(self.bad_file.with_suffix('.tex.backup').exists())
+
+
 class TestSanitizePkgName(unittest.TestCase):
     """Test cases for the sanitize_pkg_name function."""
 
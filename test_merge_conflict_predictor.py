@@ -0,0 +1,169 @@
+#!/usr/bin/env python3
+"""
+Unit tests for the git merge-tree conflict predictor.
+Builds a local origin with pull request refs and checks the predicted
+conflicts with main and between PRs, and their use by the PR merge tools.
+"""
+
+import io
+import os
+import shutil
+import subprocess
+import sys
+import tempfile
+import unittest
+from contextlib import redirect_stdout
+from pathlib import Path
+
+# Add current directory to path for importing modules
+sys.path.insert(0, str(Path(__file__).parent))
+from comprehensive_pr_merge_resolver import ComprehensivePRMergeResolver
+from merge_conflict_predictor import MergeConflictPredictor
+from merge_scheduler import MergeScheduler
+from pr_conflict_deep_analyzer import PRConflictDeepAnalyzer
+
+WORKFLOW = '.github/workflows/latex-build.yml'
+
+
+def git(cwd, *args):
+    return subprocess.run(['git', *args], cwd=cwd, capture_output=True, text=True,
+                          check=True).stdout.strip()
+
+
+class TestMergeConflictPredictor(unittest.TestCase):
+    """Test conflict prediction against a local origin with PR refs."""
+
+    @classmethod
+    def setUpClass(cls):
+        """Create an origin whose PRs 10-13 branch off the first commit on main.
+
+        PRs 10 and 11 change the same line of main.tex, PR 12 adds a file and
+        PR 13 changes the workflow line that main changed since.
+        """
+        cls.test_dir = tempfile.mkdtemp()
+        cls.origin = os.path.join(cls.test_dir, 'origin.git')
+        cls.work = work = os.path.join(cls.test_dir, 'work')
+        git(cls.test_dir, 'init', '-q', '--bare', cls.origin)
+        git(cls.test_dir, 'clone', '-q', cls.origin, work)
+        git(work, 'symbolic-ref', 'HEAD', 'refs/heads/main')
+        git(work, 'config', 'user.email', 'test@example.com')
+        git(work, 'config', 'user.name', 'Test User')
+
+        def commit(files, message):
+            for path, content in files.items():
+                os.makedirs(os.path.dirname(os.path.join(work, path)) or work, exist_ok=True)
+                with open(os.path.join(work, path), 'w') as f:
+                    f.write(content)
+            git(work, 'add', '.')
+            git(work, 'commit', '-q', '-m', message)
+            return git(work, 'rev-parse', 'HEAD')
+
+        initial = commit({WORKFLOW: 'uses: dante-ev/latex-action@v1.0.0\n',
+                          'main.tex': '\\documentclass{article}\n\\title{CTMM}\n\\begin{document}\n'},
+                         'Initial commit')
+        prs = {
+            10: {'main.tex': '\\documentclass{article}\n\\title{CTMM PR 10}\n\\begin{document}\n'},
+            11: {'main.tex': '\\documentclass{article}\n\\title{CTMM PR 11}\n\\begin{document}\n'},
+            12: {'docs/guide.md': 'guide\n'},
+            13: {WORKFLOW: 'uses: dante-ev/latex-action@v2.0.0\n'},
+        }
+        for number, files in prs.items():
+            git(work, 'checkout', '-q', '-B', f'pr-{number}', initial)
+            commit(files, f'PR {number}')
+            git(work, 'push', '-q', 'origin', f'HEAD:refs/pull/{number}/head')
+        git(work, 'checkout', '-q', '-B', 'main', initial)
+        commit({WORKFLOW: 'uses: dante-ev/latex-action@v2.3.0\n', 'README.md': 'readme\n'}, 'Update main')
+        git(work, 'push', '-q', 'origin', 'main', 'main:release')
+
+    @classmethod
+    def tearDownClass(cls):
+        shutil.rmtree(cls.test_dir)
+
+    def setUp(self):
+        self.mirror_dir = tempfile.mkdtemp()
+        self.addCleanup(shutil.rmtree, self.mirror_dir)
+        self.predictor = MergeConflictPredictor(remote=self.origin, max_workers=4,
+                                                mirror_path=os.path.join(self.mirror_dir, 'mirror.git'))
+
+    def predict(self, pr_numbers):
+        with redirect_stdout(io.StringIO()) as output:
+            prediction = self.predictor.predict(pr_numbers)
+        return prediction, output.getvalue()
+
+    def test_conflicts_with_main(self):
+        """Each PR is merged into main in memory; only real conflicts are reported."""
+        prediction, output = self.predict([10, 11, 12, 13, 99])
+
+        self.assertEqual(sorted(prediction.pr_heads), [10, 11, 12, 13])
+        self.assertIn('PR #99: head not found', output)
+        self.assertEqual({number: probe.clean for number, probe in prediction.base.items()},
+                         {10: True, 11: True, 12: True, 13: False})
+        self.assertEqual(prediction.base[13].conflicts, [WORKFLOW])
+        # No working tree was needed
+        self.assertFalse(os.path.exists(os.path.join(self.predictor.mirror_path, 'index')))
+
+    def test_pairwise_conflict_matrix(self):
+        """Pairs conflict only on each other's changes, not on changes made to main."""
+        prediction, _ = self.predict([10, 11, 12, 13])
+
+        self.assertEqual(len(prediction.pairs), 6)
+        self.assertEqual(prediction.conflicting_pairs(), [(10, 11)])
+        self.assertEqual(prediction.pairs[(10, 11)].conflicts, ['main.tex'])
+        self.assertEqual(prediction.conflicts_with(11), [10])
+        self.assertEqual(prediction.conflicts_with(13), [])
+
+    def test_resolver_uses_predicted_conflicts(self):
+        """The resolver and deep analyzer work from the probes instead of PR titles."""
+        resolver = ComprehensivePRMergeResolver()
+        resolver.pr_data = {
+            10: {"mergeable": None, "mergeable_state": "unknown", "title": "Copilot/fix 10"},
+            12: {"mergeable": False, "mergeable_state": "dirty", "title": "Fix LaTeX syntax error"},
+            13: {"mergeable": True, "mergeable_state": "clean", "title": "Update docs"},
+        }
+        with redirect_stdout(io.StringIO()):
+            resolver.load_conflict_prediction(self.predictor)
+            analyses = {a.number: a for a in resolver.analyze_all_prs()}
+
+        self.assertEqual(analyses[10].resolution_strategy, "READY_TO_MERGE")
+        self.assertEqual(analyses[12].resolution_strategy, "READY_TO_MERGE")
+        self.assertEqual(analyses[13].conflicts, ["GitHub Actions workflow conflicts"])
+        self.assertEqual(analyses[13].conflict_files, [WORKFLOW])
+        self.assertEqual(analyses[13].resolution_strategy, "MERGE_WORKFLOW_UPDATES")
+        self.assertTrue(analyses[13].can_auto_resolve)
+
+        analyzer = PRConflictDeepAnalyzer()
+        analyzer.ready_to_merge, analyzer.needs_recheck, analyzer.manual_review = [10, 11], [12], [13]
+        with redirect_stdout(io.StringIO()):
+            analyzer.load_conflict_prediction(self.predictor)
+            plan = analyzer.create_sequential_merge_plan()
+        self.assertEqual(plan["merge_batches"], [[10, 12]])
+        self.assertEqual(plan["rebase_required"], [13, 11])
+        self.assertEqual(plan["conflicting_pairs"], [[10, 11]])
+
+    def test_replan_reuses_merge_probes(self):
+        """After a merge only the remaining PRs are probed again, against the new base."""
+        self.predictor.base_branch = 'release'
+        scheduler = MergeScheduler(self.predictor)
+        with redirect_stdout(io.StringIO()):
+            schedule = scheduler.plan([10, 11, 12, 13])
+        self.assertEqual(schedule.batches, [[10, 12]])
+        self.assertEqual(schedule.rebase_required, [13, 11])
+        first_runs = self.predictor.merge_tree_runs
+
+        # PR 12 gets merged into release
+        git(self.work, 'fetch', '-q', 'origin', 'refs/pull/12/head')
+        git(self.work, 'checkout', '-q', '-B', 'release', 'origin/release')
+        git(self.work, 'merge', '-q', '--no-edit', 'FETCH_HEAD')
+        git(self.work, 'push', '-q', 'origin', 'release')
+        with redirect_stdout(io.StringIO()):
+            schedule = scheduler.replan(merged=[12])
+
+        # Three probes against the new base; the pairs of unchanged heads are cached
+        self.assertEqual(self.predictor.merge_tree_runs - first_runs, 3)
+        self.assertEqual(sorted(scheduler.prediction.base), [10, 11, 13])
+        self.assertEqual(schedule.batches, [[10]])
+        self.assertEqual(schedule.rebase_required, [13, 11])
+
+
+if __name__ == '__main__':
+    unittest.main(verbosity=2)
@@ -0,0 +1,72 @@
+#!/usr/bin/env python3
+"""
+Unit tests for the merge scheduler.
+Schedules recorded merge probes and checks the batches and rebases.
+"""
+
+import sys
+import unittest
+from itertools import combinations
+from pathlib import Path
+
+# Add current directory to path for importing modules
+sys.path.insert(0, str(Path(__file__).parent))
+from merge_conflict_predictor import ConflictPrediction, MergeProbe
+from merge_scheduler import schedule_merges
+
+
+def make_prediction(numbers, conflicting_pairs=(), base_conflicts=(), changed_files=None):
+    """Build a prediction whose probes report the given conflicts."""
+    base = {number: MergeProbe('base', f'head{number}', clean=number not in base_conflicts,
+                               conflicts=['main.tex'] if number in base_conflicts else [])
+            for number in numbers}
+    pairs = {(a, b): MergeProbe(f'head{a}', f'head{b}', clean=(a, b) not in conflicting_pairs,
+                                conflicts=['shared.tex'] if (a, b) in conflicting_pairs else [])
+             for a, b in combinations(sorted(numbers), 2)}
+    changed_files = changed_files or {number: [f'file{number}.tex'] for number in numbers}
+    return ConflictPrediction('base', {number: f'head{number}' for number in numbers},
+                              base, pairs, changed_files)
+
+
+class TestMergeScheduler(unittest.TestCase):
+    """Test scheduling of measured conflicts."""
+
+    def test_fewest_rebases(self):
+        """A PR conflicting with two others is rebased instead of both of them."""
+        prediction = make_prediction([1, 2, 3, 4, 5], conflicting_pairs=[(1, 2), (1, 3)],
+                                     base_conflicts=[4])
+        schedule = schedule_merges(prediction)
+
+        self.assertEqual(schedule.batches, [[2, 3, 5]])
+        self.assertEqual(schedule.rebase_required, [4, 1])
+        self.assertEqual(schedule.rebases, 2)
+
+    def test_batches_change_disjoint_files(self):
+        """PRs sharing a file go into separate batches; ties prefer fewer batches."""
+        changed_files = {1: ['a.yml'], 2: ['b.tex'], 3: ['a.yml', 'c.tex'], 4: ['d.tex'], 5: ['a.yml']}
+        prediction = make_prediction([1, 2, 3, 4, 5], conflicting_pairs=[(4, 5)],
+                                     changed_files=changed_files)
+        schedule = schedule_merges(prediction)
+
+        # Merging 4 rather than 5 keeps a.yml out of a third batch
+        self.assertEqual(schedule.rebase_required, [5])
+        self.assertEqual(schedule.batches, [[1, 2, 4], [3]])
+        self.assertEqual(schedule.order, [1, 2, 4, 3])
+
+    def test_exhaustive_search_beats_greedy(self):
+        """The exhaustive search finds the larger conflict-free set where greedy choice fails."""
+        # Picking the PR with the fewest conflicts first leads to 1, 2, 3 instead of 3, 6, 7, 8
+        pairs = [(1, 6), (1, 7), (2, 4), (2, 5), (2, 6), (2, 7), (2, 8), (3, 5), (4, 6), (4, 7),
+                 (4, 8), (5, 6)]
+        numbers = range(1, 9)
+        greedy = schedule_merges(make_prediction(numbers, pairs), exact_limit=0)
+        exact = schedule_merges(make_prediction(numbers, pairs))
+
+        self.assertEqual(greedy.rebases, 5)
+        self.assertEqual(exact.rebases, 4)
+        order = set(exact.order)
+        self.assertFalse(any(a in order and b in order for a, b in pairs))
+
+
+if __name__ == '__main__':
+    unittest.main(verbosity=2)
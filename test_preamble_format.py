@@ -0,0 +1,158 @@
+#!/usr/bin/env python3
+"""
+Unit tests for the CTMM precompiled preamble format.
+Tests format invalidation and the pdflatex arguments used by the builds.
+"""
+
+import subprocess
+import sys
+import tempfile
+import unittest
+from pathlib import Path
+from unittest.mock import patch, MagicMock
+
+# Add current directory to path for importing modules
+sys.path.insert(0, str(Path(__file__).parent))
+import ctmm_build
+from preamble_format import PreambleFormat
+
+
+def fake_dump(cmd, **kwargs):
+    """Pretend to be pdflatex -ini by writing the requested format file."""
+    if '-ini' in cmd:
+        output_dir = next(arg.split('=', 1)[1] for arg in cmd if arg.startswith('-output-directory='))
+        Path(output_dir, 'ctmm-preamble.fmt').write_bytes(b'format')
+    return subprocess.CompletedProcess(cmd, 0, '', '')
+
+
+class TestPreambleFormat(unittest.TestCase):
+    """Test cases for PreambleFormat."""
+
+    def setUp(self):
+        self.temp_dir = tempfile.TemporaryDirectory()
+        self.root = Path(self.temp_dir.name)
+        (self.root / 'style').mkdir()
+        (self.root / 'style' / 'ctmm-design.sty').write_text('% design\n', encoding='utf-8')
+        self.main_tex = self.root / 'main.tex'
+        self.main_tex.write_text(
+            '\\documentclass{article}\n'
+            '\\usepackage{style/ctmm-design}\n'
+            '\\csname endofdump\\endcsname\n'
+            '\\begin{document}\nInhalt\n\\end{document}\n', encoding='utf-8')
+        self.preamble_format = PreambleFormat(self.main_tex)
+
+    def tearDown(self):
+        self.temp_dir.cleanup()
+
+    def test_fingerprint_ignores_document_body(self):
+        """Editing the document body keeps the format valid."""
+        before = self.preamble_format.fingerprint()
+        self.main_tex.write_text(self.main_tex.read_text(encoding='utf-8').replace('Inhalt', 'Neu'),
+                                 encoding='utf-8')
+        self.assertEqual(before, self.preamble_format.fingerprint())
+
+    def test_fingerprint_tracks_preamble(self):
+        """Editing the preamble invalidates the format."""
+        before = self.preamble_format.fingerprint()
+        self.main_tex.write_text('\\usepackage{xcolor}\n' + self.main_tex.read_text(encoding='utf-8'),
+                                 encoding='utf-8')
+        self.assertNotEqual(before, self.preamble_format.fingerprint())
+
+    def test_fingerprint_tracks_style_files(self):
+        """Editing any style/*.sty file invalidates the format."""
+        before = self.preamble_format.fingerprint()
+        (self.root / 'style' / 'ctmm-new.sty').write_text('% neu\n', encoding='utf-8')
+        self.assertNotEqual(before, self.preamble_format.fingerprint())
+
+    def test_dump_once_then_reuse(self):
+        """The format is dumped on first use and reused while current."""
+        with patch('subprocess.run', side_effect=fake_dump) as mock_run:
+            args = self.preamble_format.pdflatex_args()
+            self.assertEqual(mock_run.call_count, 1)
+            self.assertIn('mylatexformat.ltx', mock_run.call_args[0][0])
+
+            self.assertEqual(self.preamble_format.pdflatex_args(), args)
+            self.assertEqual(mock_run.call_count, 1)
+
+        self.assertEqual(len(args), 1)
+        self.assertTrue(args[0].startswith('-fmt='))
+        self.assertTrue(args[0].endswith('ctmm-preamble'))
+
+    def test_style_change_triggers_redump(self):
+        """A changed style file causes a fresh dump."""
+        with patch('subprocess.run', side_effect=fake_dump) as mock_run:
+            self.preamble_format.pdflatex_args()
+            (self.root / 'style' / 'ctmm-design.sty').write_text('% geändert\n', encoding='utf-8')
+            self.preamble_format.pdflatex_args()
+            self.assertEqual(mock_run.call_count, 2)
+
+    def test_failed_dump_falls_back(self):
+        """Without a usable format the builds use plain pdflatex."""
+        failed = subprocess.CompletedProcess([], 1, '', '')
+        with patch('subprocess.run', return_value=failed):
+            self.assertEqual(self.preamble_format.pdflatex_args(), [])
+        self.assertFalse(self.preamble_format.is_current())
+
+    def test_failed_dump_is_not_retried(self):
+        """A failed dump is remembered until the preamble changes."""
+        failed = subprocess.CompletedProcess([], 1, '', '')
+        with patch('subprocess.run', return_value=failed) as mock_run:
+            self.preamble_format.pdflatex_args()
+            self.assertEqual(self.preamble_format.pdflatex_args(), [])
+            self.assertEqual(mock_run.call_count, 1)
+
+        (self.root / 'style' / 'ctmm-design.sty').write_text('% repariert\n', encoding='utf-8')
+        with patch('subprocess.run', side_effect=fake_dump) as mock_run:
+            self.assertEqual(len(self.preamble_format.pdflatex_args()), 1)
+            self.assertEqual(mock_run.call_count, 1)
+        self.assertFalse(self.preamble_format.failed_stamp_path.exists())
+
+    def test_missing_pdflatex_falls_back(self):
+        """A missing pdflatex binary yields no format arguments."""
+        with patch('subprocess.run', side_effect=FileNotFoundError):
+            self.assertEqual(self.preamble_format.pdflatex_args(), [])
+
+
+class TestBuildsUseFormat(unittest.TestCase):
+    """Test that ctmm_build passes the format to pdflatex."""
+
+    @patch('ctmm_build._preamble_format_args', return_value=['-fmt=/cache/ctmm-preamble'])
+    def test_full_build_uses_format(self, _mock_args):
+        """The full build loads the cached format."""
+        with patch('subprocess.run', return_value=MagicMock(returncode=0)) as mock_run:
+            ctmm_build.test_full_build(use_cache=False)
+        build_cmd = mock_run.call_args_list[-1][0][0]
+        self.assertEqual(build_cmd[:2], ['pdflatex', '-fmt=/cache/ctmm-preamble'])
+
+    def test_failed_format_build_retries_plain(self):
+        """A build whose format cannot be loaded is retried without it."""
+        results = [subprocess.CompletedProcess([], 1, "I can't find the format file `ctmm-preamble.fmt'!\n", ''),
+                   subprocess.CompletedProcess([], 0, '', '')]
+        with patch('subprocess.run', side_effect=results) as mock_run:
+            result = ctmm_build._run_pdflatex(['main.tex'], ['-fmt=/cache/ctmm-preamble'])
+        self.assertEqual(result.returncode, 0)
+        self.assertEqual(mock_run.call_args_list[1][0][0], ['pdflatex', 'main.tex'])
+
+    def test_latex_error_is_not_retried(self):
+        """A LaTeX error in the document is not compiled a second time."""
+        failed = subprocess.CompletedProcess([], 1, '! Undefined control sequence.\nl.12 \\foo\n', '')
+        with patch('subprocess.run', return_value=failed) as mock_run:
+            result = ctmm_build._run_pdflatex(['main.tex'], ['-fmt=/cache/ctmm-preamble'])
+        self.assertEqual(result.returncode, 1)
+        self.assertEqual(mock_run.call_count, 1)
+
+    def test_cli_detects_format_load_failure(self):
+        """The shell builds ask preamble_format.py whether to retry without -fmt."""
+        with tempfile.TemporaryDirectory() as temp_dir:
+            output = Path(temp_dir) / 'pass.txt'
+            for text, expected in (("I can't find the format file `ctmm-preamble.fmt'!\n", 0),
+                                   ('! Undefined control sequence.\n', 1)):
+                output.write_text(text, encoding='utf-8')
+                result = subprocess.run(
+                    [sys.executable, str(Path(__file__).parent / 'preamble_format.py'),
+                     '--format-failed', str(output)], capture_output=True)
+                self.assertEqual(result.returncode, expected)
+
+
+if __name__ == '__main__':
+    unittest.main(verbosity=2)
@@ -0,0 +1,141 @@
+#!/usr/bin/env python3
+"""
+Unit tests for the shared repository scanner.
+Tests the git-aware file listing, reading each file once for several
+checkers, and the character tools sharing one scan.
+"""
+
+import io
+import shutil
+import subprocess
+import sys
+import tempfile
+import unittest
+from contextlib import redirect_stdout
+from pathlib import Path
+
+# Add current directory to path for importing modules
+sys.path.insert(0, str(Path(__file__).parent))
+import validate_merge_readiness
+from ci_failure_prevention import CIFailureAnalyzer
+from comprehensive_char_remover import ComprehensiveCharacterRemover
+from detect_disruptive_characters import CharacterValidator
+from fix_merge_conflicts import MergeConflictFixer
+from repo_scanner import RepositoryScanner, list_files
+
+# Built here so this file does not itself contain conflict markers
+START, SEP, END = '<' * 7, '=' * 7, '>' * 7
+
+
+class TestRepositoryScanner(unittest.TestCase):
+    """Test listing and scanning a temporary repository."""
+
+    def setUp(self):
+        self.repo = Path(tempfile.mkdtemp())
+        self.addCleanup(shutil.rmtree, self.repo)
+        self.write('.gitignore', 'build/\n*.log\n')
+        self.write('main.tex', '\\documentclass{article}\n')
+        self.write('modules/a.tex', 'Gruppen\u00fcbung\n')
+        self.write('build/main.tex', 'generated\n')
+        self.write('healing.log', 'log\n')
+
+    def write(self, path, content):
+        (self.repo / path).parent.mkdir(parents=True, exist_ok=True)
+        (self.repo / path).write_bytes(content if isinstance(content, bytes) else content.encode('utf-8'))
+
+    def git(self, *args):
+        subprocess.run(['git', *args], cwd=self.repo, capture_output=True, check=True)
+
+    def test_gitignore_is_honoured(self):
+        """In a work tree, ignored files are skipped and untracked ones are listed."""
+        self.git('init', '-q')
+        self.git('add', '.gitignore', 'main.tex')
+        self.assertEqual(list_files(self.repo),
+                         [Path('.gitignore'), Path('main.tex'), Path('modules/a.tex')])
+
+    def test_walk_outside_git(self):
+        """Outside a work tree every file except those in .git is listed."""
+        self.write('.git/config', '')
+        self.assertEqual(list_files(self.repo),
+                         [Path('.gitignore'), Path('build/main.tex'), Path('healing.log'),
+                          Path('main.tex'), Path('modules/a.tex')])
+
+    def test_checkers_share_one_read(self):
+        """Each file is read once for all checkers; size-only checkers do not read."""
+        self.git('init', '-q')
+        scanner = RepositoryScanner(self.repo, max_workers=2)
+        seen = []
+        scanner.register('first', lambda scanned: seen.append(scanned.data) or len(scanned.data),
+                         accepts=lambda path: path.suffix == '.tex')
+        scanner.register('second', lambda scanned: scanned.data.decode('utf-8'),
+                         accepts=lambda path: path.suffix == '.tex')
+        scanner.register('sizes', lambda scanned: (scanned.size, scanned.data), read=False)
+
+        results = scanner.scan()
+
+        self.assertEqual(scanner.files_read, 2)
+        self.assertEqual(len(seen), 2)
+        self.assertEqual(results['second'], [(self.repo / 'main.tex', '\\documentclass{article}\n'),
+                                             (self.repo / 'modules/a.tex', 'Gruppen\u00fcbung\n')])
+        # The .tex files were read anyway, so their bytes are shared
+        self.assertEqual(dict(results['sizes'])[self.repo / '.gitignore'], (13, None))
+        self.assertEqual(dict(results['sizes'])[self.repo / 'main.tex'][0], 24)
+
+
+class TestSharedScan(unittest.TestCase):
+    """Test the character tools on one shared scan against their own scans."""
+
+    def setUp(self):
+        self.repo = Path(tempfile.mkdtemp())
+        self.addCleanup(shutil.rmtree, self.repo)
+        files = {
+            'main.tex': b'\xef\xbb\xbf\\documentclass{article}\r\n',
+            'notes.md': f'Notes\n{START} HEAD\nours\n{SEP}\ntheirs\n{END} pr\n'.encode('utf-8'),
+            'tool.py': 'print("\u2705 done")\n'.encode('utf-8'),
+            'converted/skip.tex': '\u2705\n'.encode('utf-8'),
+        }
+        for path, content in files.items():
+            (self.repo / path).parent.mkdir(parents=True, exist_ok=True)
+            (self.repo / path).write_bytes(content)
+
+    def test_shared_scan_matches_separate_scans(self):
+        """Registering all tools on one scanner gives the results of separate scans."""
+        scanner = RepositoryScanner(self.repo)
+        shared = (MergeConflictFixer(dry_run=True), ComprehensiveCharacterRemover(dry_run=True),
+                  CharacterValidator())
+        shared[0].register_checks(scanner)
+        shared[1].register_checks(scanner)
+        shared[2].register_checks(scanner, ['.tex'])
+        validate_merge_readiness.register_checks(scanner)
+        CIFailureAnalyzer().register_checks(scanner)
+
+        with redirect_stdout(io.StringIO()):
+            results = scanner.scan()
+            shared[0].process_directory(self.repo, results)
+            shared[1].process_directory(self.repo, results)
+            validated = shared[2].collect(results)
+            readiness = validate_merge_readiness.run_validation(self.repo, results)
+
+            fixer, remover, validator = (MergeConflictFixer(dry_run=True),
+                                         ComprehensiveCharacterRemover(dry_run=True), CharacterValidator())
+            fixer.process_directory(self.repo)
+            remover.process_directory(self.repo)
+            self.assertEqual(validated, validator.scan_directory(self.repo, ['.tex']))
+
+        self.assertEqual(scanner.files_read, 4)
+        self.assertEqual(shared[0].issues_found, fixer.issues_found)
+        self.assertEqual([path for path, _ in fixer.issues_found],
+                         [str(self.repo / 'main.tex')])
+        self.assertEqual(shared[1].files_with_changes, remover.files_with_changes)
+        # The BOM is replaced too; converted/ is skipped
+        self.assertEqual(remover.files_with_changes,
+                         [(str(self.repo / 'main.tex'), 1), (str(self.repo / 'tool.py'), 1)])
+        self.assertEqual([result['file'] for result in validated if result['issues']],
+                         [str(self.repo / 'main.tex')])
+        self.assertEqual(readiness, 1)
+        # Dry runs leave the files alone
+        self.assertEqual((self.repo / 'tool.py').read_text(encoding='utf-8'), 'print("\u2705 done")\n')
+
+
+if __name__ == '__main__':
+    unittest.main(verbosity=2)
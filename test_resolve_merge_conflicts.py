@@ -0,0 +1,158 @@
+#!/usr/bin/env python3
+"""
+Unit tests for the streaming merge conflict resolvers.
+Tests the conflict-marker state machine on labelled, diff3-style and nested
+conflicts, and resolving the unmerged files of a real merge.
+"""
+
+import shutil
+import subprocess
+import sys
+import tempfile
+import unittest
+from pathlib import Path
+from unittest.mock import patch
+
+# Add current directory to path for importing modules
+sys.path.insert(0, str(Path(__file__).parent))
+import resolve_conflicts_v2
+from resolve_conflicts_v2 import STRATEGIES, resolve_file_conflicts
+from resolve_merge_conflicts import ConflictMarkerParser, MergeConflictResolver
+
+# Built here so this file does not itself contain conflict markers
+START, BASE, SEP, END = '<' * 7, '|' * 7, '=' * 7, '>' * 7
+
+
+def parse(text, resolve):
+    """Run text through the parser and return (output, parser)."""
+    parser = ConflictMarkerParser(resolve)
+    output = []
+    for line in text.encode('utf-8').splitlines(keepends=True):
+        output.extend(parser.feed(line))
+    output.extend(parser.close())
+    return b''.join(output).decode('utf-8'), parser
+
+
+class TestConflictMarkerParser(unittest.TestCase):
+    """Test the line-streaming conflict-marker state machine."""
+
+    def test_any_branch_label(self):
+        """Conflicts are found whatever the branch labels, and line endings are kept."""
+        text = (f"intro\r\n{START} HEAD\r\nours\r\n{SEP}\r\ntheirs\r\n{END} feature/fix-42\r\n"
+                f"middle\n{START} copilot/fix-300\nmine\n{SEP}\nyours\n{END} origin/main\nend\n")
+
+        output, parser = parse(text, STRATEGIES['keep-pr'])
+        self.assertEqual(output, "intro\r\ntheirs\r\nmiddle\nyours\nend\n")
+        self.assertEqual(parser.conflicts, 2)
+
+        hunks = []
+        parse(text, lambda hunk: hunks.append(hunk) or hunk.ours)
+        self.assertEqual([(h.ours_label, h.theirs_label) for h in hunks],
+                         [('HEAD', 'feature/fix-42'), ('copilot/fix-300', 'origin/main')])
+
+    def test_diff3_base_section(self):
+        """A diff3 base section is parsed separately and never ends up in the output."""
+        text = f"{START} HEAD\nv2.3.0\n{BASE} merged common ancestors\nv1.0.0\n{SEP}\nv2.0.0\n{END} pr-653\n"
+        hunks = []
+        output, _ = parse(text, lambda hunk: hunks.append(hunk) or hunk.ours)
+
+        self.assertEqual(output, "v2.3.0\n")
+        self.assertEqual(hunks[0].base, [b"v1.0.0\n"])
+        self.assertEqual(hunks[0].theirs, [b"v2.0.0\n"])
+
+    def test_nested_conflicts(self):
+        """Inner conflicts, with longer or equal markers, are resolved before the outer one."""
+        long_start, long_sep, long_end = '<' * 9, '=' * 9, '>' * 9
+        text = (f"{START} HEAD\nouter ours\n{BASE} base\n"
+                f"{long_start} Temporary merge branch 1\nbase a\n{long_sep}\nbase b\n{long_end} Temporary merge branch 2\n"
+                f"{SEP}\n{START} inner\ninner ours\n{SEP}\ninner theirs\n{END} inner-pr\nouter theirs\n{END} pr\n")
+        hunks = []
+        output, parser = parse(text, lambda hunk: hunks.append(hunk) or hunk.theirs)
+
+        self.assertEqual(output, "inner theirs\nouter theirs\n")
+        self.assertEqual(parser.conflicts, 3)
+        self.assertEqual(hunks[-1].base, [b"base b\n"])
+
+    def test_markers_outside_conflicts_and_unterminated(self):
+        """Separator lines outside a conflict are text; an unclosed conflict is left as it was."""
+        text = f"Title\n{SEP}\n{END} not a conflict\n{START} HEAD\nours\n{SEP}\ntheirs\n"
+        output, parser = parse(text, STRATEGIES['keep-head'])
+
+        self.assertEqual(output, text)
+        self.assertEqual(parser.conflicts, 0)
+        self.assertEqual(parser.unterminated, 1)
+
+    def test_merge_both(self):
+        """merge-both keeps the side that contains the other."""
+        text = (f"{START} HEAD\n\\usepackage{{hyperref}}\n{SEP}\n\\usepackage{{hyperref}}\n\\usepackage{{xcolor}}\n"
+                f"{END} pr\n{START} HEAD\nkept\n{SEP}\n\n{END} pr\n")
+        output, _ = parse(text, STRATEGIES['merge-both'])
+        self.assertEqual(output, "\\usepackage{hyperref}\n\\usepackage{xcolor}\nkept\n")
+
+
+class TestResolveUnmergedFiles(unittest.TestCase):
+    """Test resolving the files of a conflicted merge in a temporary repository."""
+
+    def setUp(self):
+        self.repo = Path(tempfile.mkdtemp())
+        self.addCleanup(shutil.rmtree, self.repo)
+        self.git('init', '-q', '-b', 'main')
+        self.git('config', 'user.email', 'test@example.com')
+        self.git('config', 'user.name', 'Test User')
+        self.git('config', 'merge.conflictstyle', 'diff3')
+
+        (self.repo / 'modules').mkdir()
+        self.write('modules/a.tex', 'one\ntwo\nthree\n')
+        self.write('notes.md', f'Notes\n{SEP}\n')
+        (self.repo / 'logo.bin').write_bytes(b'\0base')
+        self.git('add', '.')
+        self.git('commit', '-q', '-m', 'Initial commit')
+
+        self.git('checkout', '-q', '-b', 'pr-1')
+        self.write('modules/a.tex', 'one\nTWO from pr\nthree\n')
+        (self.repo / 'logo.bin').write_bytes(b'\0pr')
+        self.git('commit', '-q', '-am', 'PR change')
+        self.git('checkout', '-q', 'main')
+        self.write('modules/a.tex', 'one\nTwo on main\nthree\n')
+        (self.repo / 'logo.bin').write_bytes(b'\0main')
+        self.git('commit', '-q', '-am', 'Main change')
+        subprocess.run(['git', 'merge', '-q', 'pr-1'], cwd=self.repo, capture_output=True)
+
+    def git(self, *args):
+        return subprocess.run(['git', *args], cwd=self.repo, capture_output=True, text=True,
+                              check=True).stdout
+
+    def write(self, path, content):
+        (self.repo / path).write_text(content)
+
+    def test_only_unmerged_files_are_resolved(self):
+        """Only files git reports as unmerged are read and rewritten."""
+        stray = f'{START} HEAD\ncommitted marker\n{SEP}\nx\n{END} old\n'
+        self.write('notes.md', stray)
+
+        resolver = MergeConflictResolver(max_workers=2)
+        files_resolved, conflicts_resolved = resolver.resolve_all(self.repo)
+
+        self.assertEqual((files_resolved, conflicts_resolved), (1, 1))
+        self.assertEqual(resolver.failed_files, [self.repo / 'logo.bin'])
+        self.assertEqual((self.repo / 'modules/a.tex').read_text(), 'one\nTwo on main\nthree\n')
+        self.assertEqual((self.repo / 'notes.md').read_text(), stray)
+        self.assertEqual([p.name for p in self.repo.rglob('*.tmp')], [])
+
+    def test_v2_strategy_keeps_incoming_side(self):
+        """The v2 resolver applies its strategy to the diff3 conflict."""
+        self.assertTrue(resolve_file_conflicts(self.repo / 'modules/a.tex', 'keep-pr'))
+        self.assertEqual((self.repo / 'modules/a.tex').read_text(), 'one\nTWO from pr\nthree\n')
+
+    def test_unmerged_binary_file_is_a_failure(self):
+        """An unmerged file without text markers is not reported as resolved."""
+        self.assertFalse(MergeConflictResolver().resolve_file(self.repo / 'logo.bin')[0])
+        self.assertFalse(resolve_file_conflicts(self.repo / 'logo.bin'))
+
+        with patch.object(sys, 'argv', ['resolve_conflicts_v2.py', str(self.repo)]):
+            self.assertEqual(resolve_conflicts_v2.main(), 1)
+        self.assertIn('logo.bin', self.git('diff', '--name-only', '--diff-filter=U').split())
+
+
+if __name__ == '__main__':
+    unittest.main(verbosity=2)
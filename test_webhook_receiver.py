@@ -0,0 +1,178 @@
+#!/usr/bin/env python3
+"""
+Unit tests for the workflow_run webhook receiver.
+Posts recorded webhook payloads to a receiver on a local port and checks
+filtering, de-duplication, signatures and the bounded worker pool.
+"""
+
+import asyncio
+import copy
+import hashlib
+import hmac
+import json
+import sys
+import threading
+import time
+import unittest
+from pathlib import Path
+
+# Add current directory to path for importing modules
+sys.path.insert(0, str(Path(__file__).parent))
+from webhook_receiver import WebhookReceiver
+
+# Trimmed workflow_run delivery as sent by GitHub
+RECORDED_PAYLOAD = {
+    'action': 'completed',
+    'workflow_run': {
+        'id': 30433642,
+        'name': 'Build LaTeX PDF',
+        'path': '.github/workflows/latex-build.yml',
+        'run_attempt': 1,
+        'status': 'completed',
+        'conclusion': 'failure',
+        'created_at': '2024-01-01T00:00:00Z',
+        'updated_at': '2024-01-01T00:05:00Z',
+        'head_sha': 'acb5820ced9479c074f688cc328bf03f341a511d',
+        'head_branch': 'main',
+        'html_url': 'https://github.com/owner/repo/actions/runs/30433642',
+        'jobs_url': 'https://api.github.com/repos/owner/repo/actions/runs/30433642/jobs',
+        'logs_url': 'https://api.github.com/repos/owner/repo/actions/runs/30433642/logs',
+    },
+}
+
+
+def make_payload(**run_fields):
+    payload = copy.deepcopy(RECORDED_PAYLOAD)
+    payload['workflow_run'].update(run_fields)
+    return payload
+
+
+async def post(port, payload, event='workflow_run', path='/webhook', headers=None):
+    """POST a payload to the receiver and return (status, message)."""
+    body = payload if isinstance(payload, bytes) else json.dumps(payload).encode('utf-8')
+    reader, writer = await asyncio.open_connection('127.0.0.1', port)
+    head = [f'POST {path} HTTP/1.1', 'Host: localhost', f'X-GitHub-Event: {event}',
+            'Content-Type: application/json', f'Content-Length: {len(body)}']
+    head += [f'{name}: {value}' for name, value in (headers or {}).items()]
+    writer.write(('\r\n'.join(head) + '\r\n\r\n').encode('latin-1') + body)
+    await writer.drain()
+    response = await reader.read()
+    writer.close()
+    status_line, _, rest = response.partition(b'\r\n')
+    return int(status_line.split()[1]), json.loads(rest.partition(b'\r\n\r\n')[2])['message']
+
+
+class TestWebhookReceiver(unittest.TestCase):
+    """Test the receiver over a local socket."""
+
+    def setUp(self):
+        self.handled = []
+        self.lock = threading.Lock()
+        self.active = 0
+        self.max_active = 0
+        self.release = threading.Event()
+        self.release.set()
+
+    def handler(self, workflow_run):
+        with self.lock:
+            self.active += 1
+            self.max_active = max(self.max_active, self.active)
+        # Not time.sleep, so the test keeps control of the pace
+        self.release.wait(5)
+        threading.Event().wait(0.05)
+        with self.lock:
+            self.active -= 1
+            self.handled.append(workflow_run)
+
+    def run_receiver(self, scenario, **kwargs):
+        receiver = WebhookReceiver(self.handler, host='127.0.0.1', port=0,
+                                   secret=kwargs.pop('secret', ''), **kwargs)
+
+        async def main():
+            await receiver.start()
+            try:
+                return await scenario(receiver)
+            finally:
+                self.release.set()
+                await receiver.stop()
+
+        return asyncio.run(main())
+
+    def test_failed_run_is_queued_once(self):
+        """A failed run is healed once, even when GitHub redelivers it."""
+        async def scenario(receiver):
+            first = await post(receiver.port, RECORDED_PAYLOAD)
+            again = await post(receiver.port, RECORDED_PAYLOAD)
+            rerun = await post(receiver.port, make_payload(run_attempt=2))
+            await receiver.join()
+            return first, again, rerun
+
+        first, again, rerun = self.run_receiver(scenario)
+        self.assertEqual(first[0], 202)
+        self.assertEqual(again, (200, 'run 30433642 already queued'))
+        self.assertEqual(rerun[0], 202)
+        self.assertEqual([run.id for run in self.handled], [30433642, 30433642])
+        self.assertEqual(self.handled[0].head_sha, RECORDED_PAYLOAD['workflow_run']['head_sha'])
+
+    def test_irrelevant_deliveries_are_ignored(self):
+        """Successful, unmonitored and in-progress runs and other events are not queued."""
+        in_progress = make_payload(conclusion=None)
+        in_progress['action'] = 'in_progress'
+
+        async def scenario(receiver):
+            return [
+                await post(receiver.port, make_payload(conclusion='success')),
+                await post(receiver.port, make_payload(path='.github/workflows/other.yml')),
+                await post(receiver.port, in_progress),
+                await post(receiver.port, {'zen': 'Keep it simple.'}, event='ping'),
+                await post(receiver.port, RECORDED_PAYLOAD, event='push'),
+            ]
+
+        responses = self.run_receiver(scenario)
+        self.assertEqual([status for status, _ in responses], [200] * 5)
+        self.assertEqual(self.handled, [])
+
+    def test_bad_requests(self):
+        """Malformed payloads, wrong paths and wrong signatures are rejected."""
+        secret = 'webhook-secret'
+        body = json.dumps(RECORDED_PAYLOAD).encode('utf-8')
+        signature = 'sha256=' + hmac.new(secret.encode('utf-8'), body, hashlib.sha256).hexdigest()
+
+        async def scenario(receiver):
+            return [
+                (await post(receiver.port, b'{not json'))[0],
+                (await post(receiver.port, {'action': 'completed'}))[0],
+                (await post(receiver.port, RECORDED_PAYLOAD, path='/other'))[0],
+                (await post(receiver.port, body, headers={'X-Hub-Signature-256': 'sha256=0'}))[0],
+                (await post(receiver.port, body, headers={'X-Hub-Signature-256': signature}))[0],
+            ]
+
+        statuses = self.run_receiver(scenario, secret=secret)
+        self.assertEqual(statuses, [401, 401, 404, 401, 202])
+
+        statuses = self.run_receiver(lambda receiver: asyncio.gather(
+            post(receiver.port, b'{not json'), post(receiver.port, {'action': 'completed'})))
+        self.assertEqual([status for status, _ in statuses], [400, 400])
+
+    def test_worker_pool_is_bounded(self):
+        """No more than max_workers runs are healed at a time, and a full queue is reported."""
+        self.release.clear()
+
+        async def scenario(receiver):
+            statuses = [(await post(receiver.port, make_payload(id=run_id)))[0]
+                        for run_id in range(1, 6)]
+            self.release.set()
+            await receiver.join()
+            return statuses
+
+        started = time.monotonic()
+        statuses = self.run_receiver(scenario, max_workers=2, queue_size=2)
+        # Two runs are picked up by the workers, two wait, the fifth is refused
+        self.assertEqual(statuses, [202, 202, 202, 202, 503])
+        self.assertEqual(self.max_active, 2)
+        self.assertEqual(sorted(run.id for run in self.handled), [1, 2, 3, 4])
+        self.assertLess(time.monotonic() - started, 5)
+
+
+if __name__ == '__main__':
+    unittest.main(verbosity=2)
@@ -5,10 +5,16 @@ Comprehensive tests for all components of the automated workflow healing system.
 """
 
 import os
+import re
 import sys
+import time
 import unittest
 import tempfile
 import shutil
+import threading
+import subprocess
+import requests
+from concurrent.futures import ThreadPoolExecutor
 from unittest.mock import Mock, patch, MagicMock
 from datetime import datetime, timedelta
 from pathlib import Path
@@ -18,10 +24,11 @@ sys.path.insert(0, os.path.dirname(os.path.abspath(__file__)))
 
 from healing_config import config, HealingConfig
 from workflow_monitor import WorkflowMonitor, WorkflowRun, JobRun
-from error_analyzer import ErrorAnalyzer, ErrorAnalysis, ErrorInstance
-from fix_strategies import FixStrategies, FixResult
+from error_analyzer import ErrorAnalyzer, ErrorAnalysis, ErrorInstance, _required_literal
+from fix_strategies import FixStrategies, FixResult, WorkflowChangeSet
 from pr_manager import PRManager, HealingPR
 from workflow_healing_system import WorkflowHealingSystem, HealingSession
+from healing_store import HealingStore
 
 class TestHealingConfig(unittest.TestCase):
     """Test the healing configuration system."""
@@ -143,6 +150,48 @@ class TestWorkflowMonitor(unittest.TestCase):
         self.assertEqual(jobs[0].name, 'build')
         self.assertEqual(jobs[0].conclusion, 'failure')
 
+    @patch('requests.Session.get')
+    def test_iter_job_log_lines(self, mock_get):
+        """Job logs are streamed in chunks and split into the same lines as the full text."""
+        log_text = 'Schritt 1 ü\nPackage fontawesome5 not found\n\nfertig'
+        data = log_text.encode('utf-8')
+        mock_response = MagicMock()
+        mock_response.raise_for_status.return_value = None
+        # Chunks split inside the two-byte ü and right after a newline
+        mock_response.iter_content.return_value = [data[:10], data[10:13], data[13:40], data[40:]]
+        mock_get.return_value.__enter__.return_value = mock_response
+
+        lines = list(self.monitor.iter_job_log_lines(67890))
+
+        self.assertEqual(lines, log_text.split('\n'))
+        self.assertTrue(mock_get.call_args.kwargs['stream'])
+
+    @patch('requests.Session.get')
+    def test_broken_log_stream_is_incomplete(self, mock_get):
+        """A download that breaks off raises, and the run's log streams report it."""
+        def chunks(chunk_size):
+            yield b'Package fontawesome5 not found\npartial'
+            raise requests.ConnectionError('connection reset')
+
+        mock_response = MagicMock()
+        mock_response.raise_for_status.return_value = None
+        mock_response.iter_content.side_effect = chunks
+        mock_get.return_value.__enter__.return_value = mock_response
+
+        with self.assertRaises(requests.ConnectionError):
+            list(self.monitor.iter_job_log_lines(67890))
+
+        job = JobRun(67890, 'build', 'completed', 'failure', '', '', '', '')
+        with patch.object(self.monitor, 'get_workflow_jobs', return_value=[job]):
+            streams = self.monitor.stream_workflow_run_logs(12345)
+        self.assertEqual(list(streams['build']), ['Package fontawesome5 not found'])
+        self.assertFalse(streams['build'].complete)
+
+        mock_response.iter_content.side_effect = None
+        mock_response.iter_content.return_value = [b'done']
+        self.assertEqual(list(streams['build']), ['done'])
+        self.assertTrue(streams['build'].complete)
+
 class TestErrorAnalyzer(unittest.TestCase):
     """Test the error analysis system."""
 
@@ -169,6 +218,89 @@ class TestErrorAnalyzer(unittest.TestCase):
         self.assertIn('syntax_error', categories)
         self.assertIn('timeout', categories)
 
+    def test_classifier_matches_per_line_search(self):
+        """The prefiltered classifier finds exactly what a per-line search finds."""
+        log_content = '\n'.join([
+            'Run pdflatex main.tex',
+            'TIMEOUT after 15 minutes',
+            '! LaTeX Error: File `ctmm-design.sty\' not found.',
+            'pip install failed for package PyYAML\r',
+            'İnvalid workflow configuration',
+            'YAML parse error on line 12',
+            '',
+        ])
+        expected = []
+        lines = log_content.split('\n')
+        for line_num, line in enumerate(lines, 1):
+            for category, info in self.analyzer.detailed_patterns.items():
+                for pattern in info['patterns']:
+                    match = re.search(pattern, line, re.IGNORECASE)
+                    if match:
+                        expected.append((line_num, category, pattern, match.group(0),
+                                         '\n'.join(lines[max(0, line_num - 3):line_num + 2])))
+                        break
+
+        errors = self.analyzer._analyze_job_log('test-job', log_content)
+        self.assertEqual([(e.line_number, e.category, e.pattern, e.matched_text, e.context)
+                          for e in errors], expected)
+
+    def test_stream_matches_whole_log(self):
+        """Streamed analysis reports the same errors and context across block boundaries."""
+        log_content = '\n'.join([
+            'Run pdflatex main.tex',
+            'Package fontawesome5 not found',
+            'LaTeX Error: File ctmm-design.sty not found',
+            'line 4',
+            'The operation was canceled',
+            'line 6',
+            'Undefined control sequence \\ctmmCheckBox',
+        ])
+        expected = self.analyzer._analyze_job_log('test-job', log_content)
+        for block_lines in (1, 2, 3, 100):
+            with patch('error_analyzer.STREAM_BLOCK_LINES', block_lines):
+                errors, unsolvable = self.analyzer.analyze_job_stream(
+                    'test-job', iter(log_content.split('\n')))
+            self.assertEqual(errors, expected)
+            self.assertFalse(unsolvable)
+
+    def test_analyze_log_streams(self):
+        """Unsolvable patterns in a streamed log mark the analysis unsolvable."""
+        job_streams = {
+            'build': iter(['uses: dante-ev/latex-action@v1.0.0', 'Package fontawesome5 not found']),
+            'deploy': iter(['remote: Permission denied to github-actions[bot]']),
+        }
+        analysis = self.analyzer.analyze_log_streams(12345, 'test-workflow', job_streams)
+        self.assertIn('latex_action_version', analysis.error_categories)
+        self.assertFalse(analysis.is_solvable)
+        self.assertTrue(analysis.logs_complete)
+
+    def test_incomplete_log_stream_marks_analysis(self):
+        """An analysis built from a log that ended early says so."""
+        partial = Mock(complete=False)
+        partial.__iter__ = Mock(return_value=iter(['Package fontawesome5 not found']))
+        job_streams = {'build': partial, 'deploy': iter(['ok'])}
+
+        analysis = self.analyzer.analyze_log_streams(12345, 'test-workflow', job_streams)
+
+        self.assertIn('package_missing', analysis.error_categories)
+        self.assertFalse(analysis.logs_complete)
+
+    def test_classifier_follows_pattern_changes(self):
+        """Patterns added after construction are picked up."""
+        self.assertEqual(self.analyzer._analyze_job_log('job', 'Segmentation fault'), [])
+        self.analyzer.detailed_patterns['crash'] = {
+            'patterns': [r'Segmentation fault'], 'severity': 'high', 'description': 'Crashes'}
+        errors = self.analyzer._analyze_job_log('job', 'Segmentation fault')
+        self.assertEqual([e.category for e in errors], ['crash'])
+
+    def test_required_literal(self):
+        """Prefilter literals are only taken from text every match contains."""
+        self.assertEqual(_required_literal(r'Package\s+([^\s]+)\s+not found'), 'not found')
+        self.assertEqual(_required_literal(r'timeouts?'), 'timeout')
+        self.assertEqual(_required_literal(r'ab{2,3}cd'), 'cd')
+        self.assertEqual(_required_literal(r'(fatal|error) in step'), ' in step')
+        self.assertEqual(_required_literal(r'fatal|error'), '')
+
     def test_analyze_logs(self):
         """Test complete log analysis."""
         job_logs = {
@@ -286,6 +418,130 @@ jobs:
             content = f.read()
         self.assertIn('dante-ev/latex-action@v2.3.0', content)
 
+    def _write_batch_workflows(self):
+        """Create two workflows that several strategies edit."""
+        self.strategies.repo_root = Path(self.test_dir)
+        workflows = {
+            '.github/workflows/latex-build.yml': (
+                'name: Build\n"on": push\njobs:\n  build:\n    timeout-minutes: 10\n'
+                '    steps:\n      - uses: dante-ev/latex-action@v1.0.0\n'
+                '      - run: pip install pyyaml\n'),
+            '.github/workflows/static.yml': (
+                'name: Static\n"on": push\njobs:\n  deploy:\n    timeout-minutes: 20\n'
+                '    steps:\n      - run: echo ok\n'),
+        }
+        for path, content in workflows.items():
+            with open(path, 'w') as f:
+                f.write(content)
+        return workflows
+
+    def test_fixes_are_batched(self):
+        """Several strategies edit one copy that is written and validated once."""
+        self._write_batch_workflows()
+        analysis = ErrorAnalysis(1, 'Build', 3, {'latex_action_version', 'timeout', 'dependency_error'},
+                                 [], True, [], '2024-01-01T00:00:00')
+
+        with patch('fix_strategies.subprocess.run', return_value=Mock(returncode=0)) as mock_run, \
+                patch('fix_strategies.os.replace', wraps=os.replace) as mock_replace:
+            results = self.strategies.apply_fixes(analysis)
+
+        self.assertEqual(mock_run.call_count, 1)
+        self.assertEqual(mock_replace.call_count, 2)
+        self.assertTrue(all(result.success and result.validation_passed for result in results))
+        build = Path('.github/workflows/latex-build.yml').read_text()
+        self.assertIn('dante-ev/latex-action@v2.3.0', build)
+        self.assertIn('timeout-minutes: 15', build)
+        self.assertIn('pip install --upgrade pip && pip install --upgrade pyyaml', build)
+        self.assertIn('timeout-minutes: 30', Path('.github/workflows/static.yml').read_text())
+
+    def test_failed_strategy_leaves_no_edits(self):
+        """Edits of a strategy that raises are dropped; the others are still written."""
+        workflows = self._write_batch_workflows()
+        analysis = ErrorAnalysis(1, 'Build', 2, {'latex_action_version', 'timeout'},
+                                 [], True, [], '2024-01-01T00:00:00')
+
+        def broken_fix(analysis, change_set):
+            change_set.update('.github/workflows/static.yml', 'half-edited')
+            raise ValueError('unexpected workflow layout')
+
+        with patch.object(self.strategies, '_fix_timeouts', side_effect=broken_fix), \
+                patch('fix_strategies.subprocess.run', return_value=Mock(returncode=0)):
+            results = self.strategies.apply_fixes(analysis)
+
+        self.assertEqual([result.success for result in results], [True, False])
+        self.assertFalse(results[1].validation_passed)
+        self.assertEqual(Path('.github/workflows/static.yml').read_text(),
+                         workflows['.github/workflows/static.yml'])
+        self.assertIn('latex-action@v2.3.0', Path('.github/workflows/latex-build.yml').read_text())
+
+    def test_fixes_without_write_leave_checkout_alone(self):
+        """With write=False the fixed contents are only returned in the results."""
+        workflows = self._write_batch_workflows()
+        analysis = ErrorAnalysis(1, 'Build', 2, {'latex_action_version', 'timeout'},
+                                 [], True, [], '2024-01-01T00:00:00')
+
+        def validate(command, cwd, **kwargs):
+            # The validator sees the fixed copy, not the checkout
+            self.assertNotEqual(Path(cwd), Path(self.test_dir))
+            build = (Path(cwd) / '.github/workflows/latex-build.yml').read_text()
+            self.assertIn('latex-action@v2.3.0', build)
+            return Mock(returncode=0)
+
+        with patch('fix_strategies.subprocess.run', side_effect=validate) as mock_run:
+            results = self.strategies.apply_fixes(analysis, write=False)
+
+        self.assertEqual(mock_run.call_count, 1)
+        self.assertTrue(all(result.success and result.validation_passed for result in results))
+        for path, content in workflows.items():
+            self.assertEqual(Path(path).read_text(), content)
+        fixed = results[0].file_contents['.github/workflows/latex-build.yml']
+        self.assertIn('latex-action@v2.3.0', fixed)
+        self.assertIn('timeout-minutes: 15', fixed)
+        self.assertEqual(results[1].file_contents['.github/workflows/latex-build.yml'], fixed)
+
+    def test_write_failure_marks_results_failed(self):
+        """An error while writing the batch is reported in the fix results."""
+        workflows = self._write_batch_workflows()
+        analysis = ErrorAnalysis(1, 'Build', 2, {'latex_action_version', 'timeout'},
+                                 [], True, [], '2024-01-01T00:00:00')
+
+        with patch('fix_strategies.os.replace', side_effect=OSError('disk full')), \
+                patch('fix_strategies.subprocess.run') as mock_run:
+            results = self.strategies.apply_fixes(analysis)
+
+        self.assertEqual(len(results), 2)
+        for result in results:
+            self.assertFalse(result.success)
+            self.assertFalse(result.validation_passed)
+            self.assertEqual(result.error_message, 'disk full')
+        mock_run.assert_not_called()
+        for path, content in workflows.items():
+            self.assertEqual(Path(path).read_text(), content)
+
+    def test_change_set_write_is_all_or_nothing(self):
+        """A failure while replacing files restores the ones already replaced."""
+        workflows = self._write_batch_workflows()
+        change_set = WorkflowChangeSet(Path(self.test_dir), list(workflows))
+        for path in workflows:
+            change_set.update(path, 'edited')
+
+        real_replace = os.replace
+        calls = []
+
+        def failing_replace(source, target):
+            calls.append(target)
+            if len(calls) == 2:
+                raise OSError('disk full')
+            real_replace(source, target)
+
+        with patch('fix_strategies.os.replace', side_effect=failing_replace):
+            with self.assertRaises(OSError):
+                change_set.write()
+
+        for path, content in workflows.items():
+            self.assertEqual(Path(path).read_text(), content)
+        self.assertEqual(sorted(os.listdir('.github/workflows')), ['latex-build.yml', 'static.yml'])
+
 class TestPRManager(unittest.TestCase):
     """Test the PR management system."""
 
@@ -336,6 +592,227 @@ class TestPRManager(unittest.TestCase):
         self.assertIn('[Automated Fix]', message)
         self.assertIn('LaTeX action', message)
 
+class TestPRManagerBranches(unittest.TestCase):
+    """Test healing branch preparation against a local bare repository."""
+
+    WORKFLOW = '.github/workflows/latex-build.yml'
+
+    def setUp(self):
+        """Create a bare origin and a clone with one workflow on main."""
+        self.test_dir = tempfile.mkdtemp()
+        self.origin = os.path.join(self.test_dir, 'origin.git')
+        self.work = os.path.join(self.test_dir, 'work')
+        self.git(self.test_dir, 'init', '-q', '--bare', self.origin)
+        self.git(self.test_dir, 'clone', '-q', self.origin, self.work)
+        self.git(self.work, 'symbolic-ref', 'HEAD', 'refs/heads/main')
+        self.git(self.work, 'config', 'user.email', 'test@example.com')
+        self.git(self.work, 'config', 'user.name', 'Test User')
+        os.makedirs(os.path.join(self.work, '.github/workflows'))
+        self.write(self.WORKFLOW, 'uses: dante-ev/latex-action@v1.0.0\n')
+        self.write('README.md', 'readme\n')
+        self.git(self.work, 'add', '.')
+        self.git(self.work, 'commit', '-q', '-m', 'Initial commit')
+        self.git(self.work, 'push', '-q', 'origin', 'main')
+
+        self.pr_manager = PRManager()
+        self.pr_manager.repo_root = Path(self.work)
+        self.analysis = Mock(workflow_run_id=42)
+
+    def tearDown(self):
+        """Clean up test fixtures."""
+        shutil.rmtree(self.test_dir)
+
+    def git(self, cwd, *args):
+        return subprocess.run(['git', *args], cwd=cwd, capture_output=True, text=True,
+                              check=True).stdout.strip()
+
+    def write(self, path, content):
+        with open(os.path.join(self.work, path), 'w') as f:
+            f.write(content)
+
+    def fix(self, contents):
+        return FixResult(True, 'Updated LaTeX action versions to v2.3.0', list(contents), [], True,
+                         file_contents=contents)
+
+    def test_fixes_committed_without_checkout(self):
+        """The branch gets the fix while the working tree stays clean on main."""
+        branch = self.pr_manager._create_healing_branch(self.analysis)
+        fix = self.fix({self.WORKFLOW: 'uses: dante-ev/latex-action@v2.3.0\n'})
+
+        self.assertTrue(self.pr_manager._apply_fixes_to_branch(branch, [fix]))
+
+        self.assertEqual(self.git(self.work, 'symbolic-ref', '--short', 'HEAD'), 'main')
+        self.assertEqual(self.git(self.work, 'status', '--porcelain'), '')
+        pushed = self.git(self.origin, 'show', f'{branch}:{self.WORKFLOW}')
+        self.assertEqual(pushed, 'uses: dante-ev/latex-action@v2.3.0')
+        self.assertEqual(self.git(self.origin, 'show', f'{branch}:README.md'), 'readme')
+        self.assertEqual(self.git(self.origin, 'log', '-1', '--format=%s', branch),
+                         '[Automated Fix] Updated LaTeX action versions to v2.3.0')
+
+        self.assertTrue(self.pr_manager._cleanup_branch(branch))
+        self.assertEqual(self.git(self.origin, 'branch', '--list', branch), '')
+
+    def test_healing_pr_keeps_dirty_working_tree(self):
+        """Uncommitted and untracked files survive; untracked fix paths are committed."""
+        self.write(self.WORKFLOW, 'uses: dante-ev/latex-action@v1.0.0\n# local edit\n')
+        self.write('README.md', 'readme with local edit\n')
+        self.write('notes.txt', 'untracked\n')
+        status = self.git(self.work, 'status', '--porcelain')
+        new_workflow = '.github/workflows/static.yml'
+        fix = self.fix({self.WORKFLOW: 'uses: dante-ev/latex-action@v2.3.0\n',
+                        new_workflow: 'name: Static\n'})
+        analysis = Mock(workflow_run_id=42, workflow_name='Build LaTeX PDF', error_categories={'timeout'},
+                        total_errors=1, recommended_fixes=[], analysis_timestamp='2024-01-01T00:00:00')
+        pr_data = {'number': 7, 'title': 'Fix', 'html_url': 'https://github.com/owner/repo/pull/7',
+                   'created_at': '2024-01-01T00:00:00Z'}
+
+        with patch.object(self.pr_manager, '_get_open_healing_prs', return_value=[]), \
+                patch.object(self.pr_manager, '_create_pull_request', return_value=pr_data):
+            healing_pr = self.pr_manager.create_healing_pr(analysis, [fix])
+
+        self.assertIsNotNone(healing_pr)
+        self.assertEqual(self.git(self.work, 'status', '--porcelain'), status)
+        with open(os.path.join(self.work, self.WORKFLOW)) as f:
+            self.assertIn('# local edit', f.read())
+        self.assertFalse(os.path.exists(os.path.join(self.work, new_workflow)))
+        branch = healing_pr.branch
+        self.assertEqual(self.git(self.origin, 'show', f'{branch}:{self.WORKFLOW}'),
+                         'uses: dante-ev/latex-action@v2.3.0')
+        self.assertEqual(self.git(self.origin, 'show', f'{branch}:{new_workflow}'), 'name: Static')
+        self.assertEqual(self.git(self.origin, 'show', f'{branch}:README.md'), 'readme')
+
+    def test_branches_prepared_concurrently(self):
+        """Several healing branches can be committed and pushed at the same time."""
+        branches = [f'workflow-healing/run-{i}' for i in range(6)]
+        for branch in branches:
+            self.git(self.work, 'branch', branch, 'HEAD')
+
+        def apply(branch):
+            return self.pr_manager._apply_fixes_to_branch(branch, [self.fix({self.WORKFLOW: f'fixed on {branch}\n'})])
+
+        with ThreadPoolExecutor(max_workers=6) as executor:
+            self.assertTrue(all(executor.map(apply, branches)))
+
+        for branch in branches:
+            self.assertEqual(self.git(self.origin, 'show', f'{branch}:{self.WORKFLOW}'), f'fixed on {branch}')
+            self.assertEqual(self.git(self.work, 'rev-parse', f'{branch}~1'),
+                             self.git(self.work, 'rev-parse', 'main'))
+        self.assertEqual(self.git(self.work, 'status', '--porcelain'), '')
+
+class TestHealingStore(unittest.TestCase):
+    """Test the persistent analysis and attempt store."""
+
+    def setUp(self):
+        """Set up test fixtures."""
+        self.test_dir = tempfile.mkdtemp()
+        self.store = HealingStore(os.path.join(self.test_dir, 'healing.db'))
+        self.analysis = ErrorAnalysis(
+            workflow_run_id=12345,
+            workflow_name='Build LaTeX PDF',
+            total_errors=1,
+            error_categories={'package_missing'},
+            errors=[ErrorInstance('package_missing', r'Package .* not found',
+                                  'Package fontawesome5 not found', 3, 'context',
+                                  'high', 'build')],
+            is_solvable=True,
+            recommended_fixes=['Install missing LaTeX packages'],
+            analysis_timestamp='2024-01-01T00:00:00'
+        )
+
+    def tearDown(self):
+        """Clean up test fixtures."""
+        self.store.close()
+        shutil.rmtree(self.test_dir)
+
+    def test_analysis_round_trip(self):
+        """Stored analyses and fix results survive a new store instance."""
+        results = [FixResult(True, 'Added fontawesome5', ['.github/workflows/latex-build.yml'],
+                             ['extra_packages'], True)]
+        self.store.save_analysis(self.analysis, 'abc123')
+        self.store.save_fix_results(12345, 'abc123', results)
+        self.store.close()
+
+        reopened = HealingStore(self.store.db_path)
+        self.assertEqual(reopened.get_analysis(12345, 'abc123'), self.analysis)
+        self.assertIsNone(reopened.get_analysis(12345, 'def456'))
+        self.assertEqual(reopened.get_fix_results(12345, 'abc123'), results)
+        reopened.close()
+
+    def test_attempt_limits(self):
+        """Healed runs, attempt limits and the cooldown block further healing."""
+        name = 'Build LaTeX PDF'
+        self.assertIsNone(self.store.healing_blocked_reason(name, 1, 'abc123'))
+
+        self.store.record_attempt(name, 1, 'abc123', 'pr_failed')
+        later = self.store.last_attempt_time(name) + config.cooldown_minutes * 60 + 1
+        self.assertIn('cooldown', self.store.healing_blocked_reason(name, 2, 'abc123'))
+        self.assertIsNone(self.store.healing_blocked_reason(name, 2, 'abc123', now=later))
+
+        self.store.record_attempt(name, 2, 'abc123', 'pr_created')
+        self.assertIn('already healed', self.store.healing_blocked_reason(name, 2, 'abc123', now=later))
+
+        with patch.object(config, 'max_healing_attempts', 2):
+            self.assertIn('limit 2', self.store.healing_blocked_reason(name, 3, 'abc123', now=later))
+            self.assertIsNone(self.store.healing_blocked_reason(name, 3, 'def456', now=later))
+
+    def test_heal_workflow_reuses_stored_analysis(self):
+        """A run analyzed once is not downloaded again."""
+        system = WorkflowHealingSystem()
+        system.store = self.store
+        system.current_session = HealingSession('test', datetime.now(), 0, 0, 0, 0, 0.0, 'running')
+        workflow = WorkflowRun(12345, 'Build LaTeX PDF', 'completed', 'failure', '', '',
+                               'abc123', 'main', '', '', '')
+        logs = {'build': iter(['Package fontawesome5 not found'])}
+
+        with patch.object(system.monitor, 'stream_workflow_run_logs', return_value=logs) as mock_logs, \
+                patch.object(system.fix_strategies, 'apply_fixes', return_value=[]):
+            system._heal_workflow(workflow, dry_run=True)
+            system._heal_workflow(workflow, dry_run=True)
+
+        stored = self.store.get_analysis(12345, 'abc123')
+        self.assertEqual(mock_logs.call_count, 1)
+        self.assertIn('package_missing', stored.error_categories)
+        self.assertEqual(system.current_session.errors_found, 2 * stored.total_errors)
+
+    def _healing_system(self):
+        system = WorkflowHealingSystem()
+        system.store = self.store
+        system.current_session = HealingSession('test', datetime.now(), 0, 0, 0, 0, 0.0, 'running')
+        return system
+
+    def test_incomplete_logs_not_stored(self):
+        """An analysis of logs that broke off is analyzed again next time."""
+        system = self._healing_system()
+        workflow = WorkflowRun(12345, 'Build LaTeX PDF', 'completed', 'failure', '', '',
+                               'abc123', 'main', '', '', '')
+
+        def stream_logs(run_id):
+            partial = Mock(complete=False)
+            partial.__iter__ = Mock(return_value=iter(['Error: uses: dante-ev/latex-action@v0.1.0']))
+            return {'build': partial}
+
+        with patch.object(system.monitor, 'stream_workflow_run_logs', side_effect=stream_logs) as mock_logs:
+            self.assertIsNotNone(system._analyze_workflow(workflow))
+            self.assertIsNotNone(system._analyze_workflow(workflow))
+
+        self.assertEqual(mock_logs.call_count, 2)
+        self.assertIsNone(self.store.get_analysis(12345, 'abc123'))
+
+    def test_failed_fixes_count_as_attempt(self):
+        """A run whose fixes all fail is counted toward the attempt limit and cooldown."""
+        system = self._healing_system()
+        workflow = WorkflowRun(12345, 'Build LaTeX PDF', 'completed', 'failure', '', '',
+                               'abc123', 'main', '', '', '')
+        failed = FixResult(False, 'Added packages', [], [], False, 'no packages found')
+
+        with patch.object(system.fix_strategies, 'apply_fixes', return_value=[failed]), \
+                patch.object(system.pr_manager, 'create_healing_pr') as mock_pr:
+            self.assertFalse(system._apply_healing(workflow, self.analysis, dry_run=False))
+
+        mock_pr.assert_not_called()
+        self.assertEqual(self.store.run_outcomes(12345), ['fix_failed'])
+        self.assertIn('cooldown', self.store.healing_blocked_reason('Build LaTeX PDF', 12346, 'abc123'))
+
 class TestWorkflowHealingSystem(unittest.TestCase):
     """Test the main workflow healing system."""
 
@@ -365,6 +842,90 @@ class TestWorkflowHealingSystem(unittest.TestCase):
         self.assertIn('monitored_workflows', status)
         self.assertIsInstance(status['monitored_workflows'], list)
 
+class TestParallelHealingSession(unittest.TestCase):
+    """Test parallel analysis with serialized fixes and PRs."""
+
+    def setUp(self):
+        """Set up test fixtures."""
+        self.test_dir = tempfile.mkdtemp()
+        self.system = WorkflowHealingSystem()
+        self.system.store = HealingStore(os.path.join(self.test_dir, 'healing.db'))
+        self.lock = threading.Lock()
+        self.active = {'analysis': 0, 'healing': 0}
+        self.peak = {'analysis': 0, 'healing': 0}
+
+    def tearDown(self):
+        """Clean up test fixtures."""
+        self.system.store.close()
+        shutil.rmtree(self.test_dir)
+
+    def _track(self, phase, delay):
+        with self.lock:
+            self.active[phase] += 1
+            self.peak[phase] = max(self.peak[phase], self.active[phase])
+        threading.Event().wait(delay)
+        with self.lock:
+            self.active[phase] -= 1
+
+    def test_runs_analyzed_in_parallel_and_healed_serially(self):
+        """Analysis overlaps across runs; fixes and PRs never do and stop at max_concurrent_prs."""
+        workflows = [WorkflowRun(run_id, 'Build LaTeX PDF', 'completed', 'failure', '', '',
+                                 f'sha{run_id}', 'main', '', '', '') for run_id in range(1, 7)]
+
+        def stream_logs(run_id):
+            self._track('analysis', 0.2)
+            return {'build': iter(['Error: uses: dante-ev/latex-action@v0.1.0'])}
+
+        def apply_fixes(analysis, write=True):
+            self._track('healing', 0.02)
+            return [FixResult(True, 'Added package', ['.github/workflows/latex-build.yml'], [], True)]
+
+        pr = Mock(number=1, url='https://github.com/owner/repo/pull/1')
+        with patch.object(config, 'healing_max_workers', 6), \
+                patch.object(config, 'max_concurrent_prs', 3), \
+                patch.object(config, 'cooldown_minutes', 0), \
+                patch.object(self.system, '_validate_environment'), \
+                patch.object(self.system, '_cleanup_stale_prs'), \
+                patch.object(self.system.monitor, 'stream_workflow_run_logs', side_effect=stream_logs), \
+                patch.object(self.system.fix_strategies, 'apply_fixes', side_effect=apply_fixes), \
+                patch.object(self.system.pr_manager, '_get_open_healing_prs', return_value=[{}]), \
+                patch.object(self.system.pr_manager, 'create_healing_pr', return_value=pr) as mock_pr, \
+                patch('workflow_healing_system.time.sleep'):
+            started = time.monotonic()
+            session = self.system.start_healing_session(workflows=workflows)
+            elapsed = time.monotonic() - started
+
+        self.assertGreater(self.peak['analysis'], 1)
+        self.assertEqual(self.peak['healing'], 1)
+        self.assertLess(elapsed, 6 * 0.2)
+        self.assertEqual(session.workflow_runs_analyzed, 6)
+        # One healing PR was already open, so two more may be created
+        self.assertEqual(mock_pr.call_count, 2)
+        self.assertEqual(session.prs_created, 2)
+
+    def test_blocked_runs_skipped_after_analysis(self):
+        """Runs analyzed together get one PR; the cooldown set by the first blocks the rest."""
+        workflows = [WorkflowRun(run_id, 'Build LaTeX PDF', 'completed', 'failure', '', '',
+                                 f'sha{run_id}', 'main', '', '', '') for run_id in range(1, 4)]
+        fix = FixResult(True, 'Added package', ['.github/workflows/latex-build.yml'], [], True)
+
+        pr = Mock(number=1, url='https://github.com/owner/repo/pull/1')
+        with patch.object(config, 'healing_max_workers', 3), \
+                patch.object(self.system, '_validate_environment'), \
+                patch.object(self.system, '_cleanup_stale_prs'), \
+                patch.object(self.system.monitor, 'stream_workflow_run_logs',
+                             side_effect=lambda run_id: {'build': iter(['Error: uses: dante-ev/latex-action@v0.1.0'])}), \
+                patch.object(self.system.fix_strategies, 'apply_fixes', return_value=[fix]) as mock_fixes, \
+                patch.object(self.system.pr_manager, '_get_open_healing_prs', return_value=[]), \
+                patch.object(self.system.pr_manager, 'create_healing_pr', return_value=pr) as mock_pr, \
+                patch('workflow_healing_system.time.sleep'):
+            session = self.system.start_healing_session(workflows=workflows)
+
+        self.assertEqual(session.workflow_runs_analyzed, 3)
+        self.assertEqual(mock_fixes.call_count, 1)
+        self.assertFalse(mock_fixes.call_args.kwargs['write'])
+        self.assertEqual(mock_pr.call_count, 1)
+
 class TestIntegration(unittest.TestCase):
     """Integration tests for the complete healing system."""
 
@@ -447,7 +1008,10 @@ def run_comprehensive_tests():
         TestErrorAnalyzer,
         TestFixStrategies,
         TestPRManager,
+        TestPRManagerBranches,
+        TestHealingStore,
         TestWorkflowHealingSystem,
+        TestParallelHealingSession,
         TestIntegration
     ]
 
@@ -0,0 +1,200 @@
+#!/usr/bin/env python3
+"""
+Unit tests for the WorkflowMonitor fetch layer.
+Runs the monitor against a local stub of the GitHub API to test pagination,
+concurrent fetching and rate-limit backoff.
+"""
+
+import json
+import sys
+import tempfile
+import threading
+import time
+import unittest
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from pathlib import Path
+from unittest.mock import patch
+from urllib.parse import parse_qs, urlparse
+
+# Add current directory to path for importing modules
+sys.path.insert(0, str(Path(__file__).parent))
+from healing_config import config
+from workflow_monitor import WorkflowMonitor
+
+REPO = '/repos/owner/repo'
+RUNS_TOTAL = 230
+JOB_DELAY = 0.2
+
+
+def make_run(run_id, workflow_file='latex-build.yml', conclusion='failure'):
+    return {
+        'id': run_id,
+        'name': 'Build LaTeX PDF',
+        'path': f'.github/workflows/{workflow_file}',
+        'status': 'completed',
+        'conclusion': conclusion,
+        'created_at': f'2024-01-01T00:{run_id % 60:02d}:{run_id // 60:02d}Z',
+        'updated_at': '2024-01-01T01:00:00Z',
+        'head_sha': f'sha{run_id}',
+        'head_branch': 'main',
+        'html_url': f'https://github.com/owner/repo/actions/runs/{run_id}',
+        'jobs_url': f'https://api.github.com{REPO}/actions/runs/{run_id}/jobs',
+        'logs_url': f'https://api.github.com{REPO}/actions/runs/{run_id}/logs',
+    }
+
+
+class StubGitHub(BaseHTTPRequestHandler):
+    """Serves the handful of GitHub API endpoints the monitor uses."""
+
+    requests_seen = []
+    rate_limited_once = set()
+    lock = threading.Lock()
+    active = 0
+    max_active = 0
+
+    def log_message(self, format, *args):
+        pass
+
+    def _send(self, status, body, headers=None):
+        payload = body.encode('utf-8') if isinstance(body, str) else json.dumps(body).encode('utf-8')
+        self.send_response(status)
+        self.send_header('Content-Length', str(len(payload)))
+        for name, value in (headers or {}).items():
+            self.send_header(name, value)
+        self.end_headers()
+        self.wfile.write(payload)
+
+    def do_GET(self):
+        url = urlparse(self.path)
+        query = parse_qs(url.query)
+        page = int(query.get('page', ['1'])[0])
+        per_page = int(query.get('per_page', ['30'])[0])
+        cls = type(self)
+        with cls.lock:
+            cls.requests_seen.append(self.path)
+
+        if url.path == f'{REPO}/actions/workflows/latex-build.yml/runs':
+            # Runs 0..229 of which every tenth succeeded
+            runs = [make_run(i, conclusion='success' if i % 10 == 0 else 'failure')
+                    for i in range(RUNS_TOTAL)]
+            chunk = runs[(page - 1) * per_page:page * per_page]
+            self._send(200, {'total_count': RUNS_TOTAL, 'workflow_runs': chunk})
+        elif url.path.startswith(f'{REPO}/actions/workflows/'):
+            self._send(200, {'total_count': 0, 'workflow_runs': []})
+        elif url.path == f'{REPO}/actions/runs/7/jobs':
+            if '7/jobs' not in cls.rate_limited_once:
+                cls.rate_limited_once.add('7/jobs')
+                self._send(403, {'message': 'API rate limit exceeded'},
+                           {'X-RateLimit-Remaining': '0',
+                            'X-RateLimit-Reset': str(int(time.time()) + 30)})
+                return
+            jobs = [{'id': 700 + i, 'name': f'build-{i}', 'status': 'completed',
+                     'conclusion': 'failure', 'started_at': None, 'completed_at': None,
+                     'html_url': f'https://github.com/jobs/{700 + i}'} for i in range(4)]
+            self._send(200, {'total_count': len(jobs), 'jobs': jobs})
+        elif url.path.startswith(f'{REPO}/actions/jobs/') and url.path.endswith('/logs'):
+            with cls.lock:
+                cls.active += 1
+                cls.max_active = max(cls.max_active, cls.active)
+            # Not time.sleep, which the backoff tests patch
+            threading.Event().wait(JOB_DELAY)
+            with cls.lock:
+                cls.active -= 1
+            job_id = url.path.split('/')[-2]
+            self._send(200, f'log of job {job_id}\nPackage fontawesome5 not found\n')
+        elif url.path == f'{REPO}/pulls':
+            # Bare list, paginated only through the Link header
+            pulls = [{'number': page * 10 + i, 'head': {'ref': 'workflow-healing/x'},
+                      'title': 'PR'} for i in range(2)]
+            headers = {}
+            if page < 3:
+                next_url = f'http://{self.headers["Host"]}{REPO}/pulls?state=open&per_page=2&page={page + 1}'
+                headers['Link'] = f'<{next_url}>; rel="next"'
+            self._send(200, pulls, headers)
+        elif url.path == f'{REPO}/actions/runs/9/jobs':
+            self._send(503, {'message': 'unavailable'})
+        else:
+            self._send(404, {'message': 'Not Found'})
+
+
+class TestWorkflowMonitorFetching(unittest.TestCase):
+    """Test the monitor against a local stub server."""
+
+    @classmethod
+    def setUpClass(cls):
+        cls.server = ThreadingHTTPServer(('127.0.0.1', 0), StubGitHub)
+        cls.thread = threading.Thread(target=cls.server.serve_forever, daemon=True)
+        cls.thread.start()
+
+    @classmethod
+    def tearDownClass(cls):
+        cls.server.shutdown()
+        cls.server.server_close()
+
+    def setUp(self):
+        StubGitHub.requests_seen = []
+        StubGitHub.rate_limited_once = set()
+        StubGitHub.max_active = 0
+        base_url = f'http://127.0.0.1:{self.server.server_address[1]}'
+        self.cache_dir = tempfile.TemporaryDirectory()
+        self.patches = [
+            patch.object(config, 'http_cache_dir', self.cache_dir.name),
+            patch.object(config, 'api_base_url', base_url),
+            patch.object(config, 'repo_owner', 'owner'),
+            patch.object(config, 'repo_name', 'repo'),
+            patch.object(config, 'api_max_retries', 2),
+        ]
+        for p in self.patches:
+            p.start()
+        self.monitor = WorkflowMonitor(max_workers=4)
+
+    def tearDown(self):
+        for p in self.patches:
+            p.stop()
+        self.monitor.session.close()
+        self.cache_dir.cleanup()
+
+    def test_failed_workflows_read_every_page(self):
+        """All pages are fetched and only failures are returned, newest first."""
+        runs = self.monitor.get_failed_workflows(hours_back=24)
+        self.assertEqual(len(runs), RUNS_TOTAL - RUNS_TOTAL // 10)
+        created = [run.created_at for run in runs]
+        self.assertEqual(created, sorted(created, reverse=True))
+        pages = [path for path in StubGitHub.requests_seen if 'latex-build.yml/runs' in path]
+        self.assertEqual(len(pages), 3)
+
+    def test_job_logs_fetched_concurrently(self):
+        """Logs of the failed jobs are downloaded in parallel after a rate-limit wait."""
+        with patch('workflow_monitor.time.sleep') as mock_sleep:
+            started = time.perf_counter()
+            logs = self.monitor.get_workflow_run_logs(7)
+            elapsed = time.perf_counter() - started
+
+        self.assertEqual(sorted(logs), [f'build-{i}' for i in range(4)])
+        self.assertIn('Package fontawesome5 not found', logs['build-0'])
+        self.assertGreater(StubGitHub.max_active, 1)
+        self.assertLess(elapsed, 4 * JOB_DELAY)
+        # The 403 with an exhausted quota waited for the reset before retrying
+        self.assertTrue(any(call.args[0] > 20 for call in mock_sleep.call_args_list))
+
+    def test_link_header_pagination(self):
+        """Endpoints without total_count follow rel="next" links."""
+        pulls = self.monitor.get_open_pull_requests()
+        self.assertEqual([pr['number'] for pr in pulls], [10, 11, 20, 21, 30, 31])
+
+    def test_server_errors_are_retried_then_reported(self):
+        """A persistent 5xx is retried with backoff and then treated as a failure."""
+        with patch('workflow_monitor.time.sleep') as mock_sleep:
+            self.assertEqual(self.monitor.get_workflow_jobs(9), [])
+        self.assertEqual([call.args[0] for call in mock_sleep.call_args_list], [1, 2])
+        attempts = [path for path in StubGitHub.requests_seen if '/runs/9/jobs' in path]
+        self.assertEqual(len(attempts), 3)
+
+    def test_streamed_log_lines(self):
+        """Streaming a log from the server yields its lines."""
+        lines = list(self.monitor.iter_job_log_lines(701))
+        self.assertEqual(lines, ['log of job 701', 'Package fontawesome5 not found', ''])
+
+
+if __name__ == '__main__':
+    unittest.main(verbosity=2)
@@ -16,19 +16,35 @@ This script performs comprehensive validation to identify:
 5. Line ending inconsistencies
 """
 
-import os
+import io
 import sys
 import re
 import codecs
-from pathlib import Path
 
+from repo_scanner import RepositoryScanner
 
-def check_merge_conflict_markers(filepath):
+CHECK_NAME = 'merge-readiness'
+CHECK_SUFFIXES = ('.tex', '.sty', '.yml', '.yaml', '.py', '.md')
+
+
+def _read(filepath, content):
+    """The file's bytes: content if given, otherwise read from disk."""
+    if content is not None:
+        return content
+    with open(filepath, 'rb') as f:
+        return f.read()
+
+
+def _text_lines(content):
+    """Lines of UTF-8 bytes, split as readlines() on a file opened in text mode."""
+    return io.TextIOWrapper(io.BytesIO(content), encoding='utf-8', errors='ignore').readlines()
+
+
+def check_merge_conflict_markers(filepath, content=None):
     """Check for actual git merge conflict markers."""
     issues = []
     try:
-        with open(filepath, 'r', encoding='utf-8', errors='ignore') as f:
-            lines = f.readlines()
+        lines = _text_lines(_read(filepath, content))
 
         # Track if we're inside a code block (for markdown files)
         in_code_block = False
@@ -65,12 +81,11 @@ def check_merge_conflict_markers(filepath):
     return issues
 
 
-def check_problematic_characters(filepath):
+def check_problematic_characters(filepath, content=None):
     """Check for problematic characters that could cause merge or compilation issues."""
     issues = []
     try:
-        with open(filepath, 'rb') as f:
-            content = f.read()
+        content = _read(filepath, content)
 
         # Check for BOM
         if content.startswith(codecs.BOM_UTF8):
@@ -119,15 +134,14 @@ def check_problematic_characters(filepath):
     return issues
 
 
-def check_latex_escaping_issues(filepath):
+def check_latex_escaping_issues(filepath, content=None):
     """Check for LaTeX characters that might need escaping."""
     if not filepath.endswith('.tex'):
         return []
 
     issues = []
     try:
-        with open(filepath, 'r', encoding='utf-8', errors='ignore') as f:
-            lines = f.readlines()
+        lines = _text_lines(_read(filepath, content))
 
         for line_num, line in enumerate(lines, 1):
             # Skip comments
@@ -151,8 +165,14 @@ def check_latex_escaping_issues(filepath):
     return issues
 
 
-def validate_file(filepath):
-    """Run all validations on a single file."""
+def validate_file(filepath, content=None):
+    """Run all validations on a single file, reading it once unless content is given."""
+    try:
+        content = _read(filepath, content)
+    except Exception:
+        # Each check reports the read error
+        pass
+
     results = {
         'filepath': filepath,
         'merge_conflicts': [],
@@ -161,9 +181,9 @@ def validate_file(filepath):
         'has_issues': False
     }
 
-    results['merge_conflicts'] = check_merge_conflict_markers(filepath)
-    results['problematic_chars'] = check_problematic_characters(filepath)
-    results['latex_issues'] = check_latex_escaping_issues(filepath)
+    results['merge_conflicts'] = check_merge_conflict_markers(filepath, content)
+    results['problematic_chars'] = check_problematic_characters(filepath, content)
+    results['latex_issues'] = check_latex_escaping_issues(filepath, content)
 
     results['has_issues'] = any([
         results['merge_conflicts'],
@@ -174,8 +194,19 @@ def validate_file(filepath):
     return results
 
 
-def main():
-    """Main validation function."""
+def register_checks(scanner):
+    """Register validate_file() with a RepositoryScanner."""
+    # Also skips .github, as this check always has
+    scanner.register(CHECK_NAME, lambda scanned: validate_file(str(scanned.path), scanned.data),
+                     accepts=lambda path: path.name.endswith(CHECK_SUFFIXES) and '.git' not in str(path))
+
+
+def run_validation(directory='.', results=None):
+    """Validate the files below directory and print the results.
+
+    results are those of a RepositoryScanner the checks were registered
+    with; without them the directory is scanned here.
+    """
     print("[SEARCH] CTMM Merge Readiness Validation")
     print("=" * 70)
     print("Task: Identify conflicts and disturbing characters in files")
@@ -183,35 +214,17 @@ def main():
     print("=" * 70)
     print()
 
-    # Define files to check
-    check_patterns = [
-        '*.tex',
-        '*.sty',
-        '*.yml',
-        '*.yaml',
-        '*.py',
-        '*.md'
-    ]
-
-    files_to_check = []
-    for pattern in check_patterns:
-        files_to_check.extend(Path('.').rglob(pattern))
+    if results is None:
+        scanner = RepositoryScanner(directory)
+        register_checks(scanner)
+        results = scanner.scan()
+    file_results = [result for _, result in results[CHECK_NAME]]
 
-    # Filter out .git directory
-    files_to_check = [f for f in files_to_check if '.git' not in str(f)]
-
-    print(f"[SUMMARY] Checking {len(files_to_check)} files...")
+    print(f"[SUMMARY] Checking {len(file_results)} files...")
     print()
 
-    files_with_issues = []
-    total_checked = 0
-
-    for filepath in sorted(files_to_check):
-        total_checked += 1
-        results = validate_file(str(filepath))
-
-        if results['has_issues']:
-            files_with_issues.append(results)
+    total_checked = len(file_results)
+    files_with_issues = [result for result in file_results if result['has_issues']]
 
     # Print results
     print("=" * 70)
@@ -267,5 +280,10 @@ def main():
         return 0
 
 
+def main():
+    """Main validation function."""
+    return run_validation()
+
+
 if __name__ == "__main__":
     sys.exit(main())
@@ -0,0 +1,248 @@
+#!/usr/bin/env python3
+"""
+Webhook Receiver - Event-Driven Workflow Healing
+Receives GitHub workflow_run webhooks and queues failed runs for healing.
+
+Instead of polling get_failed_workflows() on an interval, GitHub calls this
+receiver as soon as a run completes. Failed runs of monitored workflows are
+de-duplicated and handed to a bounded pool of workers.
+
+Recorded payloads can be replayed locally, e.g.:
+
+    curl -X POST http://127.0.0.1:8787/webhook \\
+         -H 'X-GitHub-Event: workflow_run' -d @payload.json
+"""
+
+import asyncio
+import hashlib
+import hmac
+import json
+import logging
+import sys
+from collections import OrderedDict
+from concurrent.futures import ThreadPoolExecutor
+from http import HTTPStatus
+from typing import Callable, Dict, Optional, Tuple
+
+from healing_config import config
+from workflow_monitor import WorkflowRun, failed_workflow_run
+
+WEBHOOK_PATH = '/webhook'
+MAX_BODY_BYTES = 25 * 1024 * 1024  # GitHub caps payloads at 25 MB
+REQUEST_TIMEOUT_SECONDS = 10
+# Delivered runs remembered for de-duplication
+SEEN_RUNS_LIMIT = 10000
+DEFAULT_MAX_WORKERS = 1
+
+
+class WebhookReceiver:
+    """Asyncio HTTP receiver that queues failed workflow runs for healing.
+
+    handler is called with each WorkflowRun in a worker thread; at most
+    max_workers runs are handled at a time. A run (and re-run attempt) is
+    queued once, however often GitHub delivers it.
+    """
+
+    def __init__(self, handler: Callable[[WorkflowRun], object],
+                 host: Optional[str] = None, port: Optional[int] = None,
+                 max_workers: Optional[int] = None, queue_size: Optional[int] = None,
+                 secret: Optional[str] = None):
+        self.logger = logging.getLogger(__name__)
+        self.handler = handler
+        self.host = host or config.webhook_host
+        self.port = config.webhook_port if port is None else port
+        self.max_workers = max_workers or DEFAULT_MAX_WORKERS
+        self.queue_size = queue_size or config.webhook_queue_size
+        self.secret = secret if secret is not None else config.webhook_secret
+
+        self.seen_runs: 'OrderedDict[Tuple[int, int], None]' = OrderedDict()
+        self.handled = 0
+        self.failed = 0
+        self.server: Optional[asyncio.AbstractServer] = None
+        self._queue: Optional[asyncio.Queue] = None
+        self._workers = []
+        self._executor: Optional[ThreadPoolExecutor] = None
+
+    # HTTP handling
+
+    async def start(self) -> None:
+        """Start listening and the worker pool on the running event loop."""
+        self._queue = asyncio.Queue(maxsize=self.queue_size)
+        self._executor = ThreadPoolExecutor(max_workers=self.max_workers,
+                                            thread_name_prefix='webhook-heal')
+        self._workers = [asyncio.create_task(self._worker()) for _ in range(self.max_workers)]
+        self.server = await asyncio.start_server(self._handle_connection, self.host, self.port)
+        # Port 0 picks a free port
+        self.port = self.server.sockets[0].getsockname()[1]
+        self.logger.info(f"Listening for workflow_run webhooks on http://{self.host}:{self.port}{WEBHOOK_PATH}")
+
+    async def stop(self) -> None:
+        """Stop accepting webhooks, finish queued runs and stop the workers."""
+        if self.server:
+            self.server.close()
+            await self.server.wait_closed()
+        if self._queue is not None:
+            await self._queue.join()
+        for worker in self._workers:
+            worker.cancel()
+        await asyncio.gather(*self._workers, return_exceptions=True)
+        if self._executor:
+            self._executor.shutdown(wait=True)
+
+    async def _handle_connection(self, reader: asyncio.StreamReader,
+                                 writer: asyncio.StreamWriter) -> None:
+        try:
+            status, message = await asyncio.wait_for(self._read_request(reader),
+                                                     REQUEST_TIMEOUT_SECONDS)
+        except (asyncio.TimeoutError, asyncio.IncompleteReadError, ValueError, UnicodeDecodeError):
+            status, message = HTTPStatus.BAD_REQUEST, 'malformed request'
+
+        body = json.dumps({'message': message}).encode('utf-8')
+        writer.write(f"HTTP/1.1 {status.value} {status.phrase}\r\n"
+                     f"Content-Type: application/json\r\n"
+                     f"Content-Length: {len(body)}\r\n"
+                     f"Connection: close\r\n\r\n".encode('latin-1') + body)
+        try:
+            await writer.drain()
+        except ConnectionError:
+            pass
+        finally:
+            writer.close()
+
+    async def _read_request(self, reader: asyncio.StreamReader) -> Tuple[HTTPStatus, str]:
+        """Read one HTTP request and return the response status and message."""
+        method, path, _ = (await reader.readline()).decode('latin-1').split(' ', 2)
+        headers = {}
+        while True:
+            line = await reader.readline()
+            if line in (b'\r\n', b'\n', b''):
+                break
+            name, _, value = line.decode('latin-1').partition(':')
+            headers[name.strip().lower()] = value.strip()
+
+        length = int(headers.get('content-length', '0'))
+        if length > MAX_BODY_BYTES:
+            return HTTPStatus.REQUEST_ENTITY_TOO_LARGE, 'payload too large'
+        body = await reader.readexactly(length)
+
+        if path.split('?', 1)[0] != WEBHOOK_PATH:
+            return HTTPStatus.NOT_FOUND, 'not found'
+        if method != 'POST':
+            return HTTPStatus.METHOD_NOT_ALLOWED, 'use POST'
+        return self.handle_delivery(headers, body)
+
+    def handle_delivery(self, headers: Dict[str, str], body: bytes) -> Tuple[HTTPStatus, str]:
+        """Validate a webhook delivery and queue its run if it failed."""
+        if self.secret and not self._signature_valid(headers.get('x-hub-signature-256', ''), body):
+            return HTTPStatus.UNAUTHORIZED, 'invalid signature'
+
+        event = headers.get('x-github-event')
+        if event == 'ping':
+            return HTTPStatus.OK, 'pong'
+        if event != 'workflow_run':
+            return HTTPStatus.OK, f'ignored event {event}'
+
+        try:
+            payload = json.loads(body)
+            if payload.get('action') != 'completed':
+                return HTTPStatus.OK, f"ignored action {payload.get('action')}"
+            run_data = payload['workflow_run']
+            workflow_run = failed_workflow_run(run_data)
+        except (ValueError, KeyError, TypeError, AttributeError):
+            return HTTPStatus.BAD_REQUEST, 'invalid workflow_run payload'
+
+        if workflow_run is None:
+            return HTTPStatus.OK, 'ignored: not a failed run of a monitored workflow'
+
+        # Redeliveries carry the same run and attempt; a re-run is a new attempt
+        run_key = (workflow_run.id, run_data.get('run_attempt', 1))
+        if run_key in self.seen_runs:
+            return HTTPStatus.OK, f'run {workflow_run.id} already queued'
+
+        try:
+            self._queue.put_nowait(workflow_run)
+        except asyncio.QueueFull:
+            return HTTPStatus.SERVICE_UNAVAILABLE, 'healing queue full'
+
+        self.seen_runs[run_key] = None
+        if len(self.seen_runs) > SEEN_RUNS_LIMIT:
+            self.seen_runs.popitem(last=False)
+        self.logger.info(f"Queued failed workflow: {workflow_run.workflow_name} (ID: {workflow_run.id})")
+        return HTTPStatus.ACCEPTED, f'run {workflow_run.id} queued'
+
+    def _signature_valid(self, signature: str, body: bytes) -> bool:
+        expected = 'sha256=' + hmac.new(self.secret.encode('utf-8'), body, hashlib.sha256).hexdigest()
+        return hmac.compare_digest(expected, signature)
+
+    # Workers
+
+    async def _worker(self) -> None:
+        loop = asyncio.get_running_loop()
+        while True:
+            workflow_run = await self._queue.get()
+            try:
+                await loop.run_in_executor(self._executor, self.handler, workflow_run)
+                self.handled += 1
+            except Exception as e:
+                self.failed += 1
+                self.logger.error(f"Error healing workflow {workflow_run.workflow_name}: {e}")
+            finally:
+                self._queue.task_done()
+
+    async def join(self) -> None:
+        """Wait until every queued run has been handled."""
+        await self._queue.join()
+
+    async def serve_forever(self, stop_event: Optional[asyncio.Event] = None) -> None:
+        """Serve until stop_event is set, then drain the queue."""
+        await self.start()
+        try:
+            await (stop_event or asyncio.Event()).wait()
+        finally:
+            await self.stop()
+
+
+def main():
+    """Run the webhook receiver with the workflow healing system as handler."""
+    import argparse
+    import signal
+    from workflow_healing_system import WorkflowHealingSystem
+
+    parser = argparse.ArgumentParser(description='CTMM Workflow Healing Webhook Receiver')
+    parser.add_argument('--host', default=config.webhook_host,
+                        help=f'Address to listen on (default: {config.webhook_host})')
+    parser.add_argument('--port', type=int, default=config.webhook_port,
+                        help=f'Port to listen on (default: {config.webhook_port})')
+    parser.add_argument('--dry-run', action='store_true',
+                        help='Analyze and plan fixes without creating PRs')
+    parser.add_argument('--debug', action='store_true',
+                        help='Enable debug logging')
+    args = parser.parse_args()
+
+    healing_system = WorkflowHealingSystem(debug=args.debug)
+
+    def heal(workflow_run: WorkflowRun) -> None:
+        healing_system.start_healing_session(dry_run=args.dry_run, workflows=[workflow_run])
+
+    # One worker: sessions share healing_system.current_session, and attempt
+    # limits and PR slots are only checked against runs healed before
+    receiver = WebhookReceiver(heal, host=args.host, port=args.port, max_workers=1)
+    if not receiver.secret:
+        receiver.logger.warning("GITHUB_WEBHOOK_SECRET not set - webhook signatures are not verified")
+
+    async def run():
+        stop_event = asyncio.Event()
+        loop = asyncio.get_running_loop()
+        for sig in (signal.SIGINT, signal.SIGTERM):
+            try:
+                loop.add_signal_handler(sig, stop_event.set)
+            except NotImplementedError:
+                pass
+        await receiver.serve_forever(stop_event)
+
+    asyncio.run(run())
+    print(f"[SUMMARY] Healed {receiver.handled} runs, {receiver.failed} failed")
+    return 0
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -9,6 +9,8 @@ import os
 import time
 import logging
 import argparse
+import threading
+from concurrent.futures import ThreadPoolExecutor, as_completed
 from datetime import datetime, timedelta
 from typing import Dict, List, Optional, Tuple
 from dataclasses import dataclass
@@ -18,6 +20,7 @@ from workflow_monitor import WorkflowMonitor, WorkflowRun
 from error_analyzer import ErrorAnalyzer, ErrorAnalysis
 from fix_strategies import FixStrategies, FixResult
 from pr_manager import PRManager, HealingPR
+from healing_store import HealingStore
 
 @dataclass
 class HealingSession:
@@ -54,10 +57,13 @@ class WorkflowHealingSystem:
         self.analyzer = ErrorAnalyzer()
         self.fix_strategies = FixStrategies()
         self.pr_manager = PRManager()
+        self.store = HealingStore()
 
         # Session tracking
         self.current_session: Optional[HealingSession] = None
         self.healing_history: List[HealingSession] = []
+        # Guards session stats updated by the analysis workers
+        self._stats_lock = threading.Lock()
 
         # Safety limits
         self.max_iterations = config.max_iterations_per_run
@@ -66,12 +72,19 @@ class WorkflowHealingSystem:
     def start_healing_session(self,
                             hours_back: int = None,
                             dry_run: bool = False,
-                            max_workflows: int = None) -> HealingSession:
-        """Start a new healing session."""
+                            max_workflows: int = None,
+                            workflows: Optional[List[WorkflowRun]] = None) -> HealingSession:
+        """Start a new healing session.
+
+        Failed workflows already fetched by the caller can be passed as
+        workflows to avoid fetching them again.
+        """
         if hours_back is None:
             hours_back = config.max_workflow_age_hours
 
         session_id = f"healing-{datetime.now().strftime('%Y%m%d-%H%M%S')}"
+        # The iteration limit applies per session, also in a long-lived process
+        self.iteration_count = 0
 
         self.current_session = HealingSession(
             session_id=session_id,
@@ -95,30 +108,22 @@ class WorkflowHealingSystem:
             self._cleanup_stale_prs()
 
             # Get failed workflows
-            failed_workflows = self._get_failed_workflows(hours_back, max_workflows)
+            if workflows is None:
+                failed_workflows = self._get_failed_workflows(hours_back, max_workflows)
+            else:
+                failed_workflows = workflows[:max_workflows] if max_workflows else list(workflows)
 
             if not failed_workflows:
                 self.logger.info("No failed workflows found")
                 self.current_session.status = 'completed'
                 return self.current_session
 
-            # Process each failed workflow
-            for workflow in failed_workflows:
-                if self.iteration_count >= self.max_iterations:
-                    self.logger.warning(f"Reached maximum iterations ({self.max_iterations})")
-                    break
-
-                try:
-                    self._heal_workflow(workflow, dry_run)
-                    self.iteration_count += 1
-
-                    # Add delay between workflows to avoid overwhelming the system
-                    if not dry_run:
-                        time.sleep(30)
+            if len(failed_workflows) > self.max_iterations:
+                self.logger.warning(f"Reached maximum iterations ({self.max_iterations})")
+                failed_workflows = failed_workflows[:self.max_iterations]
 
-                except Exception as e:
-                    self.logger.error(f"Error healing workflow {workflow.workflow_name}: {e}")
-                    continue
+            # Process the failed workflows
+            self._heal_workflows(failed_workflows, dry_run)
 
             # Calculate success rate
             if self.current_session.workflow_runs_analyzed > 0:
@@ -191,23 +196,103 @@ class WorkflowHealingSystem:
         self.logger.info(f"Found {len(failed_workflows)} failed workflows to process")
         return failed_workflows
 
+    def _heal_workflows(self, workflows: List[WorkflowRun], dry_run: bool) -> None:
+        """Analyze failed workflows in parallel and heal them one at a time.
+
+        Fetching and analyzing logs runs on a pool of worker threads. Each
+        analyzed run is handed back to this thread and healed in the order
+        its analysis finishes, so attempt limits and PR slots are checked
+        against the runs healed before it, stopping PR creation at
+        max_concurrent_prs.
+        """
+        pr_slots = None if dry_run else self._open_pr_slots()
+
+        with ThreadPoolExecutor(max_workers=config.healing_max_workers,
+                                thread_name_prefix='healing') as executor:
+            futures = {executor.submit(self._analyze_workflow, workflow): workflow
+                       for workflow in workflows}
+
+            for future in as_completed(futures):
+                workflow = futures[future]
+                self.iteration_count += 1
+
+                try:
+                    analysis = future.result()
+                    if analysis is None:
+                        continue
+
+                    if pr_slots is not None and pr_slots <= 0:
+                        self.logger.warning(f"Maximum healing PRs ({config.max_concurrent_prs}) open - "
+                                            f"not healing workflow {workflow.id}")
+                        continue
+
+                    prs_before = self.current_session.prs_created
+                    self._apply_healing(workflow, analysis, dry_run)
+
+                    if self.current_session.prs_created > prs_before:
+                        if pr_slots is not None:
+                            pr_slots -= 1
+                        # Add delay between PRs to avoid overwhelming the system
+                        time.sleep(30)
+
+                except Exception as e:
+                    self.logger.error(f"Error healing workflow {workflow.workflow_name}: {e}")
+                    continue
+
+    def _open_pr_slots(self) -> Optional[int]:
+        """Number of healing PRs that may still be opened, or None if unknown."""
+        try:
+            return config.max_concurrent_prs - len(self.pr_manager._get_open_healing_prs())
+        except Exception as e:
+            self.logger.warning(f"Could not count open healing PRs: {e}")
+            return None
+
     def _heal_workflow(self, workflow: WorkflowRun, dry_run: bool) -> bool:
         """Heal a single failed workflow."""
+        analysis = self._analyze_workflow(workflow)
+        if analysis is None:
+            return False
+        return self._apply_healing(workflow, analysis, dry_run)
+
+    def _analyze_workflow(self, workflow: WorkflowRun) -> Optional[ErrorAnalysis]:
+        """Fetch and analyze the logs of a failed workflow.
+
+        Safe to run concurrently. Returns the analysis if the workflow
+        should be healed, otherwise None.
+        """
         self.logger.info(f"Healing workflow: {workflow.workflow_name} (ID: {workflow.id})")
 
         try:
-            # Update session stats
-            self.current_session.workflow_runs_analyzed += 1
+            # Respect attempt limits and cooldown recorded by earlier runs
+            blocked_reason = self.store.healing_blocked_reason(
+                workflow.workflow_name, workflow.id, workflow.head_sha)
+            if blocked_reason:
+                self.logger.info(f"Skipping workflow {workflow.id}: {blocked_reason}")
+                return None
 
-            # Get workflow logs
-            job_logs = self.monitor.get_workflow_run_logs(workflow.id)
-            if not job_logs:
-                self.logger.warning(f"No logs found for workflow {workflow.id}")
-                return False
+            # Update session stats
+            with self._stats_lock:
+                self.current_session.workflow_runs_analyzed += 1
 
-            # Analyze errors
-            analysis = self.analyzer.analyze_logs(workflow.id, workflow.workflow_name, job_logs)
-            self.current_session.errors_found += analysis.total_errors
+            analysis = self.store.get_analysis(workflow.id, workflow.head_sha)
+            if analysis is not None:
+                self.logger.info(f"Using stored analysis of workflow {workflow.id}")
+            else:
+                # Get workflow logs (streamed while they are analyzed)
+                job_logs = self.monitor.stream_workflow_run_logs(workflow.id)
+                if not job_logs:
+                    self.logger.warning(f"No logs found for workflow {workflow.id}")
+                    return None
+
+                # Analyze errors
+                analysis = self.analyzer.analyze_log_streams(workflow.id, workflow.workflow_name, job_logs)
+                # An analysis of truncated logs is used once but computed again next time
+                if analysis.logs_complete:
+                    self.store.save_analysis(analysis, workflow.head_sha)
+                else:
+                    self.logger.warning(f"Not storing analysis of workflow {workflow.id}: logs incomplete")
+            with self._stats_lock:
+                self.current_session.errors_found += analysis.total_errors
 
             self.logger.info(f"Analysis: {analysis.total_errors} errors in {len(analysis.error_categories)} categories")
             self.logger.info(f"Error categories: {', '.join(analysis.error_categories)}")
@@ -215,18 +300,44 @@ class WorkflowHealingSystem:
 
             if not analysis.is_solvable:
                 self.logger.warning("Analysis indicates errors are not automatically solvable")
-                return False
+                return None
 
             if not analysis.error_categories:
                 self.logger.warning("No error categories identified")
+                return None
+
+            return analysis
+
+        except Exception as e:
+            self.logger.error(f"Error analyzing workflow {workflow.workflow_name}: {e}")
+            return None
+
+    def _apply_healing(self, workflow: WorkflowRun, analysis: ErrorAnalysis, dry_run: bool) -> bool:
+        """Apply fixes for an analyzed workflow and open a PR for them.
+
+        The fixes are committed to a new healing branch without touching
+        the working tree. Attempts and PR slots are counted in order, so
+        never run concurrently.
+        """
+        try:
+            # Runs analyzed in parallel were checked before an earlier run of
+            # the same workflow recorded its attempt, so check again here
+            blocked_reason = self.store.healing_blocked_reason(
+                workflow.workflow_name, workflow.id, workflow.head_sha)
+            if blocked_reason:
+                self.logger.info(f"Skipping workflow {workflow.id}: {blocked_reason}")
                 return False
 
             # Apply fix strategies
-            fix_results = self.fix_strategies.apply_fixes(analysis)
+            fix_results = self.fix_strategies.apply_fixes(analysis, write=False)
+            self.store.save_fix_results(workflow.id, workflow.head_sha, fix_results)
 
             successful_fixes = [r for r in fix_results if r.success]
             if not successful_fixes:
                 self.logger.warning("No successful fixes could be applied")
+                if not dry_run:
+                    self.store.record_attempt(workflow.workflow_name, workflow.id, workflow.head_sha,
+                                              'fix_failed')
                 return False
 
             self.logger.info(f"Applied {len(successful_fixes)} successful fixes")
@@ -239,6 +350,8 @@ class WorkflowHealingSystem:
 
             # Create pull request for fixes
             healing_pr = self.pr_manager.create_healing_pr(analysis, fix_results)
+            self.store.record_attempt(workflow.workflow_name, workflow.id, workflow.head_sha,
+                                      'pr_created' if healing_pr else 'pr_failed')
             if healing_pr:
                 self.current_session.prs_created += 1
                 self.logger.info(f"Created healing PR #{healing_pr.number}: {healing_pr.url}")
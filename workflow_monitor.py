@@ -6,15 +6,23 @@ Monitors GitHub Actions workflows for failures and retrieves error information.
 
 import os
 import sys
+import codecs
+import threading
+import time
 import requests
 import json
 import logging
+from concurrent.futures import ThreadPoolExecutor
 from datetime import datetime, timedelta
-from typing import Dict, List, Optional, Tuple
+from typing import Callable, Dict, Iterable, Iterator, List, Optional, Tuple
 from dataclasses import dataclass
+from requests.adapters import HTTPAdapter
 
 from healing_config import config
 
+# Bytes read per chunk when streaming job logs
+LOG_CHUNK_SIZE = 64 * 1024
+
 @dataclass
 class WorkflowRun:
     """Represents a GitHub Actions workflow run."""
@@ -42,12 +50,89 @@ class JobRun:
     html_url: str
     logs_url: str
 
+def failed_workflow_run(run_data: Dict) -> Optional[WorkflowRun]:
+    """Return a WorkflowRun for a failed run of a monitored workflow, else None.
+
+    run_data is a run object as returned by the API or sent in a
+    workflow_run webhook payload.
+    """
+    # Check if this is a monitored workflow and has failed
+    workflow_file = os.path.basename(run_data['path'])
+    if not (config.is_monitored_workflow(workflow_file) and
+            run_data['conclusion'] in config.failure_states):
+        return None
+
+    return WorkflowRun(
+        id=run_data['id'],
+        workflow_name=run_data['name'],
+        status=run_data['status'],
+        conclusion=run_data['conclusion'],
+        created_at=run_data['created_at'],
+        updated_at=run_data['updated_at'],
+        head_sha=run_data['head_sha'],
+        head_branch=run_data['head_branch'],
+        html_url=run_data['html_url'],
+        jobs_url=run_data['jobs_url'],
+        logs_url=run_data['logs_url']
+    )
+
+def _header_int(response: requests.Response, name: str) -> Optional[int]:
+    """Return an integer response header, or None if missing or malformed."""
+    try:
+        return int(response.headers[name])
+    except (KeyError, TypeError, ValueError):
+        return None
+
+
+def _next_page_url(response: requests.Response) -> Optional[str]:
+    """Return the rel="next" URL from the Link header, if any."""
+    links = getattr(response, 'links', None)
+    if not isinstance(links, dict):
+        return None
+    return links.get('next', {}).get('url')
+
+
+class JobLogStream:
+    """Lines of a job log, streamed by WorkflowMonitor.iter_job_log_lines().
+
+    A fetch error is logged and ends the iteration early instead of
+    raising; complete tells whether the whole log was read.
+    """
+
+    def __init__(self, monitor: 'WorkflowMonitor', job_id: int):
+        self.monitor = monitor
+        self.job_id = job_id
+        self.complete = False
+
+    def __iter__(self) -> Iterator[str]:
+        try:
+            yield from self.monitor.iter_job_log_lines(self.job_id)
+        except requests.RequestException as e:
+            self.monitor.logger.error(f"Failed to stream logs for job {self.job_id}: {e}")
+            return
+        self.complete = True
+
 class WorkflowMonitor:
-    """Monitors GitHub Actions workflows for failures."""
+    """Monitors GitHub Actions workflows for failures.
 
-    def __init__(self):
+    API requests share one pooled session and run concurrently, at most
+    config.api_max_workers at a time. List endpoints are read across all
+    pages. When the X-RateLimit-* headers report an exhausted quota, every
+    request waits for the reset; rate-limited and 5xx responses are retried.
+    """
+
+    def __init__(self, max_workers: Optional[int] = None):
         self.logger = logging.getLogger(__name__)
-        self.session = requests.Session()
+        self.session = config.create_api_session()
+        self.max_workers = max(1, max_workers or config.api_max_workers)
+
+        # One pooled connection per concurrent request
+        adapter = HTTPAdapter(pool_maxsize=self.max_workers)
+        self.session.mount('https://', adapter)
+        self.session.mount('http://', adapter)
+        self._request_slots = threading.BoundedSemaphore(self.max_workers)
+        self._rate_limit_lock = threading.Lock()
+        self._rate_limit_reset = 0.0  # epoch seconds at which an exhausted quota resets
 
         # Set up authentication
         if config.github_token:
@@ -59,8 +144,120 @@ class WorkflowMonitor:
         else:
             self.logger.warning("No GitHub token provided - API rate limits will apply")
 
+    def _wait_for_rate_limit(self) -> None:
+        with self._rate_limit_lock:
+            wait = self._rate_limit_reset - time.time()
+        if wait > 0:
+            wait = min(wait + 1, config.api_max_backoff_seconds)
+            self.logger.warning(f"GitHub API rate limit exhausted, waiting {wait:.0f}s for reset")
+            time.sleep(wait)
+
+    def _retry_delay(self, response: requests.Response, attempt: int) -> Optional[float]:
+        """Return how long to wait before retrying response, or None to accept it."""
+        remaining = _header_int(response, 'X-RateLimit-Remaining')
+        reset = _header_int(response, 'X-RateLimit-Reset')
+        if remaining == 0 and reset is not None:
+            with self._rate_limit_lock:
+                self._rate_limit_reset = max(self._rate_limit_reset, reset)
+        elif remaining:
+            # The quota has been renewed
+            with self._rate_limit_lock:
+                self._rate_limit_reset = 0.0
+
+        status = response.status_code
+        if not isinstance(status, int):
+            return None
+        retry_after = _header_int(response, 'Retry-After')
+        if status in (403, 429) and retry_after is not None:
+            # Secondary rate limit
+            delay = retry_after
+        elif status in (403, 429) and remaining == 0 and reset is not None:
+            # Primary rate limit; _wait_for_rate_limit() sleeps until the reset
+            delay = 0
+        elif status == 429 or status >= 500:
+            delay = 2 ** attempt
+        else:
+            return None
+        return min(delay, config.api_max_backoff_seconds)
+
+    def _get(self, url: str, **kwargs) -> requests.Response:
+        """GET url with bounded concurrency and rate-limit-aware retries."""
+        for attempt in range(config.api_max_retries + 1):
+            self._wait_for_rate_limit()
+            with self._request_slots:
+                response = self.session.get(url, **kwargs)
+            delay = self._retry_delay(response, attempt)
+            if delay is None or attempt == config.api_max_retries:
+                return response
+            self.logger.warning(f"GitHub API returned {response.status_code} for {url}, "
+                                f"retry {attempt + 1} in {delay:.0f}s")
+            response.close()
+            time.sleep(delay)
+        return response
+
+    def _map_concurrent(self, function: Callable, items: Iterable) -> List:
+        """Apply function to items on the thread pool, keeping their order."""
+        items = list(items)
+        if len(items) <= 1 or self.max_workers == 1:
+            return [function(item) for item in items]
+        with ThreadPoolExecutor(max_workers=min(self.max_workers, len(items))) as pool:
+            return list(pool.map(function, items))
+
+    def _get_all_pages(self, url: str, key: Optional[str], params: Optional[Dict] = None) -> List:
+        """Return the items of every page of a list endpoint.
+
+        key names the list in the JSON object, or None for endpoints that
+        return a bare list. When the first page reports total_count, the
+        other pages are fetched concurrently; otherwise the Link rel="next"
+        chain is followed.
+
+        Raises:
+            requests.RequestException: if any page cannot be fetched
+        """
+        params = {'per_page': 100, **(params or {})}
+
+        def fetch(page_url: str, page_params: Optional[Dict]) -> Tuple[object, requests.Response]:
+            response = self._get(page_url, params=page_params)
+            response.raise_for_status()
+            return response.json(), response
+
+        def page_items(data) -> List:
+            return list(data if key is None else data.get(key, []))
+
+        data, response = fetch(url, params)
+        items = page_items(data)
+        total = None if key is None else data.get('total_count')
+        if isinstance(total, int) and total > params['per_page']:
+            page_count = -(-total // params['per_page'])
+            pages = self._map_concurrent(lambda page: page_items(fetch(url, {**params, 'page': page})[0]),
+                                         range(2, page_count + 1))
+            for page in pages:
+                items.extend(page)
+            return items
+
+        next_url = _next_page_url(response)
+        while next_url:
+            # The next link already carries the query parameters
+            data, response = fetch(next_url, None)
+            items.extend(page_items(data))
+            next_url = _next_page_url(response)
+        return items
+
+    def _get_workflow_runs(self, workflow_file: str, params: Dict) -> List[Dict]:
+        url = (f"{config.api_base_url}/repos/{config.repo_owner}/{config.repo_name}"
+               f"/actions/workflows/{workflow_file}/runs")
+        try:
+            return self._get_all_pages(url, 'workflow_runs', params)
+        except requests.RequestException as e:
+            self.logger.error(f"Failed to fetch workflow runs for {workflow_file}: {e}")
+            return []
+
     def get_failed_workflows(self, hours_back: int = None) -> List[WorkflowRun]:
-        """Get all failed workflow runs within the specified time range."""
+        """Get all failed workflow runs within the specified time range.
+
+        The runs of the monitored workflows are listed concurrently, newest
+        first, across all pages.
+        """
         if hours_back is None:
             hours_back = config.max_workflow_age_hours
 
@@ -68,43 +265,26 @@ class WorkflowMonitor:
         failed_runs = []
 
         try:
-            # Get workflow runs for the repository
-            url = f"{config.api_base_url}/repos/{config.repo_owner}/{config.repo_name}/actions/runs"
             params = {
                 'status': 'completed',
                 'per_page': 100,
                 'created': f'>{since.isoformat()}Z'
             }
-
-            response = self.session.get(url, params=params)
-            response.raise_for_status()
-
-            data = response.json()
-
-            for run_data in data.get('workflow_runs', []):
-                # Check if this is a monitored workflow and has failed
-                workflow_name = run_data['name']
-                workflow_file = os.path.basename(run_data['path'])
-
-                if (config.is_monitored_workflow(workflow_file) and
-                    run_data['conclusion'] in config.failure_states):
-
-                    workflow_run = WorkflowRun(
-                        id=run_data['id'],
-                        workflow_name=workflow_name,
-                        status=run_data['status'],
-                        conclusion=run_data['conclusion'],
-                        created_at=run_data['created_at'],
-                        updated_at=run_data['updated_at'],
-                        head_sha=run_data['head_sha'],
-                        head_branch=run_data['head_branch'],
-                        html_url=run_data['html_url'],
-                        jobs_url=run_data['jobs_url'],
-                        logs_url=run_data['logs_url']
-                    )
-
+            runs_per_workflow = self._map_concurrent(
+                lambda workflow_file: self._get_workflow_runs(workflow_file, params),
+                config.monitored_workflows)
+
+            # A run listed twice (pages shifting during the scan) counts once
+            runs_by_id = {run_data['id']: run_data
+                          for runs in runs_per_workflow for run_data in runs}
+            all_runs = sorted(runs_by_id.values(), key=lambda run_data: run_data['created_at'],
+                              reverse=True)
+
+            for run_data in all_runs:
+                workflow_run = failed_workflow_run(run_data)
+                if workflow_run:
                     failed_runs.append(workflow_run)
-                    self.logger.info(f"Found failed workflow: {workflow_name} (ID: {run_data['id']})")
+                    self.logger.info(f"Found failed workflow: {workflow_run.workflow_name} (ID: {run_data['id']})")
 
             self.logger.info(f"Found {len(failed_runs)} failed workflow runs")
             return failed_runs
@@ -117,13 +297,9 @@ class WorkflowMonitor:
         """Get all jobs for a specific workflow run."""
         try:
             url = f"{config.api_base_url}/repos/{config.repo_owner}/{config.repo_name}/actions/runs/{run_id}/jobs"
-            response = self.session.get(url)
-            response.raise_for_status()
-
-            data = response.json()
             jobs = []
 
-            for job_data in data.get('jobs', []):
+            for job_data in self._get_all_pages(url, 'jobs'):
                 job = JobRun(
                     id=job_data['id'],
                     name=job_data['name'],
@@ -146,7 +322,7 @@ class WorkflowMonitor:
         """Get the logs for a specific job."""
         try:
             url = f"{config.api_base_url}/repos/{config.repo_owner}/{config.repo_name}/actions/jobs/{job_id}/logs"
-            response = self.session.get(url)
+            response = self._get(url)
             response.raise_for_status()
 
             # The response is the raw log text
@@ -156,19 +332,56 @@ class WorkflowMonitor:
             self.logger.error(f"Failed to fetch logs for job {job_id}: {e}")
             return ""
 
+    def iter_job_log_lines(self, job_id: int) -> Iterator[str]:
+        """Stream the logs for a specific job line by line.
+
+        The response is read in LOG_CHUNK_SIZE chunks and decoded as UTF-8
+        incrementally, so only the current line is held in memory. Lines
+        are yielded exactly as str.split('\\n') would produce them.
+
+        Raises:
+            requests.RequestException: if the log cannot be fetched or the
+                download breaks off, possibly after some lines were yielded
+        """
+        url = f"{config.api_base_url}/repos/{config.repo_owner}/{config.repo_name}/actions/jobs/{job_id}/logs"
+        with self._get(url, stream=True) as response:
+            response.raise_for_status()
+
+            decoder = codecs.getincrementaldecoder('utf-8')(errors='replace')
+            pending = ''
+            for chunk in response.iter_content(chunk_size=LOG_CHUNK_SIZE):
+                text = decoder.decode(chunk)
+                if '\n' not in text:
+                    pending += text
+                    continue
+                lines = (pending + text).split('\n')
+                pending = lines.pop()
+                yield from lines
+            yield pending + decoder.decode(b'', final=True)
+
     def get_workflow_run_logs(self, run_id: int) -> Dict[str, str]:
-        """Get logs for all jobs in a workflow run."""
-        jobs = self.get_workflow_jobs(run_id)
-        logs = {}
+        """Get logs for all failed jobs in a workflow run, fetched concurrently."""
+        failed_jobs = [job for job in self.get_workflow_jobs(run_id)
+                       if job.conclusion in config.failure_states]
+        job_logs = self._map_concurrent(lambda job: self.get_job_logs(job.id), failed_jobs)
 
-        for job in jobs:
-            if job.conclusion in config.failure_states:
-                job_logs = self.get_job_logs(job.id)
-                logs[job.name] = job_logs
-                self.logger.debug(f"Retrieved logs for failed job: {job.name}")
+        logs = {}
+        for job, log_text in zip(failed_jobs, job_logs):
+            logs[job.name] = log_text
+            self.logger.debug(f"Retrieved logs for failed job: {job.name}")
 
         return logs
 
+    def stream_workflow_run_logs(self, run_id: int) -> Dict[str, 'JobLogStream']:
+        """Get line iterables over the logs of the failed jobs in a workflow run.
+
+        Each log is only downloaded while it is iterated, for use with
+        ErrorAnalyzer.analyze_log_streams().
+        """
+        return {job.name: JobLogStream(self, job.id)
+                for job in self.get_workflow_jobs(run_id)
+                if job.conclusion in config.failure_states}
+
     def restart_workflow(self, run_id: int) -> bool:
         """Restart a failed workflow run."""
         try:
@@ -193,7 +406,7 @@ class WorkflowMonitor:
                 'per_page': 1
             }
 
-            response = self.session.get(url, params=params)
+            response = self._get(url, params=params)
             response.raise_for_status()
 
             data = response.json()
@@ -210,15 +423,13 @@ class WorkflowMonitor:
 
     def wait_for_workflow_completion(self, run_id: int, timeout_minutes: int = 30) -> Optional[str]:
         """Wait for a workflow run to complete and return its conclusion."""
-        import time
-
         start_time = time.time()
         timeout_seconds = timeout_minutes * 60
 
         while time.time() - start_time < timeout_seconds:
             try:
                 url = f"{config.api_base_url}/repos/{config.repo_owner}/{config.repo_name}/actions/runs/{run_id}"
-                response = self.session.get(url)
+                response = self._get(url)
                 response.raise_for_status()
 
                 data = response.json()
@@ -245,10 +456,7 @@ class WorkflowMonitor:
             url = f"{config.api_base_url}/repos/{config.repo_owner}/{config.repo_name}/pulls"
             params = {'state': 'open', 'per_page': 100}
 
-            response = self.session.get(url, params=params)
-            response.raise_for_status()
-
-            return response.json()
+            return self._get_all_pages(url, None, params)
 
         except requests.RequestException as e:
             self.logger.error(f"Failed to fetch open pull requests: {e}")